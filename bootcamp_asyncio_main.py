@@ -0,0 +1,140 @@
+"""
+Bootcamp F2025
+
+Alternative to bootcamp_main that runs all the workers as coroutines in this single process,
+which owns the one connection to the drone
+"""
+
+import asyncio
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.common.modules.logger import logger_main_setup
+from modules.common.modules.read_yaml import read_yaml
+from modules.command import command
+from modules.heartbeat import heartbeat_receiver
+from modules.heartbeat import heartbeat_sender
+from modules.telemetry import telemetry
+from utilities.workers import asyncio_runtime
+
+
+# MAVLink connection
+CONNECTION_STRING = "tcp:localhost:12345"
+
+RUN_TIME = 100  # seconds
+EXIT_TIMEOUT = 1  # seconds
+
+# =================================================================================================
+#                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
+# =================================================================================================
+# Set queue max sizes (<= 0 for infinity)
+
+# Any other constants
+
+# =================================================================================================
+#                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
+# =================================================================================================
+
+
+async def run(connection: mavutil.mavfile, main_logger: logger.Logger) -> int:
+    """
+    Runs the workers as coroutines until the time is up or the drone disconnects.
+    """
+    # Reads the connection whenever data arrives and hands each message to its subscribers
+    dispatcher = asyncio_runtime.MavlinkDispatcher(connection)
+    dispatcher.start()
+
+    # Set to ask the coroutines to return
+    exit_event = asyncio.Event()
+
+    # Coroutines running the workers
+    tasks: "list[asyncio.Task]" = []
+
+    # =============================================================================================
+    #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
+    # =============================================================================================
+    # Create queues between the coroutines (asyncio.Queue), which cost nothing to pass items through
+    # Telemetry to command
+
+    # Subscribe to the messages each worker reads with dispatcher.subscribe() instead of reading
+    # the connection, a blocking recv_match() would stop every other coroutine
+    # Heartbeat receiver
+
+    # Telemetry
+
+    # Create a coroutine for each worker and start it with asyncio.create_task(), adding it to tasks
+    # Heartbeat sender: asyncio_runtime.run_periodically() sends on time without drifting
+
+    # Heartbeat receiver: await the subscribed queue with asyncio.wait_for() for the timeout
+
+    # Telemetry: await the subscribed queue, put the combined data into the queue to command
+
+    # Command: await the queue from telemetry and send on the connection
+
+    # =============================================================================================
+    #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
+    # =============================================================================================
+
+    main_logger.info("Started")
+
+    # Main's work is done by the coroutines
+    # Continue running for RUN_TIME seconds or until the drone disconnects
+    try:
+        await asyncio.wait_for(dispatcher.wait_disconnected(), RUN_TIME)
+    except asyncio.TimeoutError:
+        pass
+
+    # Stop the coroutines, cancelling those still waiting
+    exit_event.set()
+    main_logger.info("Requested exit")
+
+    if len(tasks) > 0:
+        _, pending = await asyncio.wait(tasks, timeout=EXIT_TIMEOUT)
+        for task in pending:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    dispatcher.stop()
+    main_logger.info("Stopped")
+
+    return 0
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    # Configuration settings
+    result, config = read_yaml.open_config(logger.CONFIG_FILE_PATH)
+    if not result:
+        print("ERROR: Failed to load configuration file")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert config is not None
+
+    # Setup main logger
+    result, main_logger, _ = logger_main_setup.setup_main_logger(config)
+    if not result:
+        print("ERROR: Failed to create main logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert main_logger is not None
+
+    # Create a connection to the drone, which only this process uses
+    # NOTE: If you want to have type annotations for the connection, it is of type mavutil.mavfile
+    connection = mavutil.mavlink_connection(CONNECTION_STRING)
+    connection.wait_heartbeat(timeout=30)  # Wait for the "drone" to connect
+
+    return asyncio.run(run(connection, main_logger))
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
@@ -13,6 +13,7 @@ from pymavlink import mavutil
 from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
+from modules import struct_codecs
 from modules.command import command
 from modules.command import command_worker
 from modules.heartbeat import heartbeat_receiver_worker
@@ -34,6 +35,7 @@ CONNECTION_STRING = "tcp:localhost:12345"
 # Set worker counts
 
 # Any other constants
+# e.g. the telemetry rates to request from the drone, in messages per second
 
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -62,6 +64,9 @@ def main() -> int:
     # Get Pylance to stop complaining
     assert main_logger is not None
 
+    # Send TelemetryData and Position through the queues in their fixed layout encoding
+    struct_codecs.register_codecs()
+
     # Create a connection to the drone. Assume that this is safe to pass around to all processes
     # In reality, this will not work, but to simplify the bootamp, preetend it is allowed
     # To test, you will run each of your workers individually to see if they work
@@ -78,8 +83,39 @@ def main() -> int:
     # Create a multiprocess manager for synchronized queues
 
     # Create queues
-
+    # With queue_proxy_wrapper.QueueBackend.AUTO, hops between 1 producer and 1 consumer worker
+    # get a direct pipe instead of going through the manager
+    # Command only needs the newest telemetry, so the telemetry to command hop can be a
+    # utilities.workers.mailbox_channel.MailboxChannel which never falls behind the drone
+    # Workers reading from the drone should never block on a slow consumer, so give their output
+    # queues an overflow_policy other than queue_proxy_wrapper.OverflowPolicy.BLOCK
+    # Main can read everything from a single
+    # utilities.workers.priority_queue_proxy_wrapper.PriorityQueueProxyWrapper, with command
+    # reports and disconnects in the high priority lane and status and telemetry in the low one
+    # Workers sharing the connection take each other's messages, so only
+    # modules.mavlink_router.mavlink_router_worker.mavlink_router_worker should read it: give it
+    # one output queue per reading worker with that worker's message types
+    # (e.g. modules.mavlink_router.mavlink_router.TELEMETRY_MESSAGE_TYPES), and have the worker
+    # read its queue instead
+    # Likewise only modules.mavlink_writer.mavlink_writer_worker.mavlink_writer_worker should
+    # write it: the heartbeat sender and command put their messages into its input queue, and it
+    # coalesces superseded commands, sends heartbeats first and can rate limit each message type
+    # Telemetry can ask the drone for exactly the rates it needs with
+    # modules.telemetry.stream_rate.StreamRateNegotiator, whose requests also go through the
+    # writer's input queue
+    # The router can record a flight for replay with its recording_path argument, and
+    # modules.mavlink_replay.replay_connection.ReplayConnection can stand in for the connection to
+    # profile the workers offline, at the recorded speed, faster, or at MAX_SPEED
+
+    # The queues, worker properties and managers can instead be declared in the "topology"
+    # section of a config and built with utilities.workers.topology.Topology.create(), which
+    # checks the queue sizes and shuts down in the right order
+    # (see documentation/config_multiprocess_example.yaml)
     # Create worker properties for each worker type (what inputs it takes, how many workers)
+    # The heartbeat workers mostly wait, so they can run as threads (ExecutionKind.THREAD) in a
+    # single utilities.workers.worker_host.WorkerHost instead of a process each
+    # Telemetry and command can be kept from being preempted by logging and housekeeping with a
+    # cpu_affinity of their own and a lower niceness (raising priority may need privileges)
     # Heartbeat sender
 
     # Heartbeat receiver
@@ -89,23 +125,32 @@ def main() -> int:
     # Command
 
     # Create the workers (processes) and obtain their managers
+    # A utilities.workers.restart_policy.RestartPolicy stops a worker that cannot connect from
+    # being respawned in a tight loop, and can stop the whole pipeline if a worker it depends on
+    # keeps crashing
 
     # Start worker processes
 
     main_logger.info("Started")
 
     # Main's work: read from all queues that output to main, and log any commands that we make
+    # A utilities.workers.worker_supervisor.WorkerSupervisor restarts crashed workers and can put
+    # its exit events into the queue main reads, so main blocks on a single queue
     # Continue running for 100 seconds or until the drone disconnects
+    # Every few seconds, log utilities.workers.worker_statistics.format_table() of the
+    # get_worker_statistics() of each manager to see the CPU, memory and loop times of every worker
 
     # Stop the processes
 
     main_logger.info("Requested exit")
 
-    # Fill and drain queues from END TO START
+    # Shut down queues, which gives each consumer a sentinel and works with infinite size queues
 
     main_logger.info("Queues cleared")
 
     # Clean up worker processes
+    # utilities.workers.worker_shutdown.join_all() joins all the managers at once and terminates
+    # workers stuck in a blocking read, so shutdown cannot hang
 
     main_logger.info("Stopped")
 
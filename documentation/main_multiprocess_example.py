@@ -6,27 +6,33 @@ python -m documentation.main_multiprocess_example
 """
 
 import multiprocessing as mp
+import pathlib
 import time
 
-from documentation.multiprocess_example.add_random import add_random_worker
-from documentation.multiprocess_example.concatenator import concatenator_worker
-from documentation.multiprocess_example.countup import countup_worker
 from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
-from utilities.workers import queue_proxy_wrapper
+from utilities.workers import autoscaler
+from utilities.workers import topology
 from utilities.workers import worker_controller
 from utilities.workers import worker_manager
+from utilities.workers import worker_statistics
+from utilities.workers import worker_supervisor
 
 
-# Play with these numbers to see queue bottlenecks
-COUNTUP_TO_ADD_RANDOM_QUEUE_MAX_SIZE = 5
-ADD_RANDOM_TO_CONCATENATOR_QUEUE_MAX_SIZE = 5
+# Queues, worker counts and arguments of every stage
+# Play with the numbers in it to see queue and process bottlenecks
+TOPOLOGY_CONFIG_FILE_PATH = pathlib.Path("documentation", "config_multiprocess_example.yaml")
 
-# Play with these numbers to see process bottlenecks
-COUNTUP_WORKER_COUNT = 2
-ADD_RANDOM_WORKER_COUNT = 2
-CONCATENATOR_WORKER_COUNT = 2
+# Add Random workers are added while their input queue is full, up to this many
+ADD_RANDOM_WORKER_MAX_COUNT = 4
+AUTOSCALE_PERIOD = 0.5  # seconds
+
+# How often the table of worker CPU, memory and loop times is logged
+WORKER_STATISTICS_PERIOD = 1.0  # seconds
+
+# Workers that have not exited by then are terminated
+SHUTDOWN_TIMEOUT = 2.0  # seconds
 
 
 # main() is required for early return
@@ -34,6 +40,10 @@ def main() -> int:
     """
     Main function.
     """
+    # Workers start from a forkserver with the common modules already imported
+    # Must be done before creating any queues or controllers
+    worker_manager.enable_warm_start()
+
     # Configuration settings
     result, config = read_yaml.open_config(logger.CONFIG_FILE_PATH)
     if not result:
@@ -62,127 +72,76 @@ def main() -> int:
     # See 2nd note: https://docs.python.org/3/library/multiprocessing.html#pipes-and-queues
     mp_manager = mp.Manager()
 
-    # Queue maxsize should always be >= the larger of producers/consumers count
-    # Example: Producers 3, consumers 2, so queue maxsize minimum is 3
-    countup_to_add_random_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager,
-        COUNTUP_TO_ADD_RANDOM_QUEUE_MAX_SIZE,
-    )
-    add_random_to_concatenator_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager,
-        ADD_RANDOM_TO_CONCATENATOR_QUEUE_MAX_SIZE,
-    )
-
-    # Worker properties
-    result, countup_worker_properties = worker_manager.WorkerProperties.create(
-        count=COUNTUP_WORKER_COUNT,  # How many workers
-        target=countup_worker.countup_worker,  # What's the function that this worker runs
-        work_arguments=(  # The function's arguments excluding input/output queues and controller
-            3,
-            100,
-        ),
-        input_queues=[],  # Note that input/output queues must be in the proper order
-        output_queues=[countup_to_add_random_queue],
-        controller=controller,  # Worker controller
-        local_logger=main_logger,  # Main logger to log any failures during worker creation
-    )
+    # Queues, worker properties and worker managers of every stage, from the configuration
+    # Each stage is created after the stages it receives from
+    result, topology_config = read_yaml.open_config(TOPOLOGY_CONFIG_FILE_PATH)
     if not result:
-        print("Failed to create arguments for Countup")
+        print("ERROR: Failed to load topology configuration file")
         return -1
 
     # Get Pylance to stop complaining
-    assert countup_worker_properties is not None
-
-    result, add_random_worker_properties = worker_manager.WorkerProperties.create(
-        count=ADD_RANDOM_WORKER_COUNT,
-        target=add_random_worker.add_random_worker,
-        work_arguments=(
-            252,
-            10,
-            5,
-        ),
-        input_queues=[countup_to_add_random_queue],
-        output_queues=[add_random_to_concatenator_queue],
-        controller=controller,
-        local_logger=main_logger,
-    )
-    if not result:
-        print("Failed to create arguments for Add Random")
-        return -1
+    assert topology_config is not None
 
-    # Get Pylance to stop complaining
-    assert add_random_worker_properties is not None
-
-    result, concatenator_worker_properties = worker_manager.WorkerProperties.create(
-        count=CONCATENATOR_WORKER_COUNT,
-        target=concatenator_worker.concatenator_worker,
-        work_arguments=(
-            "Hello ",
-            " world!",
-        ),
-        input_queues=[add_random_to_concatenator_queue],
-        output_queues=[],
-        controller=controller,
-        local_logger=main_logger,
+    result, pipeline = topology.Topology.create(
+        topology_config, controller, main_logger, mp_manager
     )
     if not result:
-        print("Failed to create arguments for Concatenator")
+        print("Failed to create topology")
         return -1
 
     # Get Pylance to stop complaining
-    assert concatenator_worker_properties is not None
+    assert pipeline is not None
 
-    # Prepare processes
-    # Data path: countup_worker to add_random_worker to concatenator_workers
-    worker_managers: list[worker_manager.WorkerManager] = []  # List of all worker managers
+    main_logger.info(f"Stages: {pipeline.get_stage_order()}", True)
+    main_logger.info(f"Theoretical throughput {pipeline.get_bottleneck_report()}", True)
 
-    result, countup_manager = worker_manager.WorkerManager.create(
-        worker_properties=countup_worker_properties,
-        local_logger=main_logger,
-    )
-    if not result:
-        print("Failed to create manager for Countup")
-        return -1
+    worker_managers = pipeline.get_managers()
+    add_random_manager = pipeline.get_manager("add_random")
+    countup_to_add_random_queue = pipeline.get_queue("countup_to_add_random")
+    add_random_to_concatenator_queue = pipeline.get_queue("add_random_to_concatenator")
 
     # Get Pylance to stop complaining
-    assert countup_manager is not None
+    assert add_random_manager is not None
+    assert countup_to_add_random_queue is not None
+    assert add_random_to_concatenator_queue is not None
 
-    worker_managers.append(countup_manager)
+    # Start worker processes
+    pipeline.start()
 
-    result, add_random_manager = worker_manager.WorkerManager.create(
-        worker_properties=add_random_worker_properties,
-        local_logger=main_logger,
-    )
+    main_logger.info("Started", True)
+
+    # Restarts workers the moment they exit, without main polling them
+    result, supervisor = worker_supervisor.WorkerSupervisor.create(worker_managers, main_logger)
     if not result:
-        print("Failed to create manager for Add Random")
+        print("Failed to create supervisor")
         return -1
 
     # Get Pylance to stop complaining
-    assert add_random_manager is not None
+    assert supervisor is not None
 
-    worker_managers.append(add_random_manager)
+    supervisor.start()
 
-    result, concatenator_manager = worker_manager.WorkerManager.create(
-        worker_properties=concatenator_worker_properties,
-        local_logger=main_logger,
+    result, add_random_autoscaler = autoscaler.Autoscaler.create(
+        add_random_manager,
+        countup_to_add_random_queue,
+        main_logger,
+        add_random_manager.get_worker_count(),
+        ADD_RANDOM_WORKER_MAX_COUNT,
+        scale_up_depth=countup_to_add_random_queue.maxsize,
     )
     if not result:
-        print("Failed to create manager for Concatenator")
+        print("Failed to create autoscaler")
         return -1
 
     # Get Pylance to stop complaining
-    assert concatenator_manager is not None
+    assert add_random_autoscaler is not None
 
-    worker_managers.append(concatenator_manager)
+    # Run for some time and then pause
+    time.sleep(2)
 
-    # Start worker processes
     for manager in worker_managers:
-        manager.start_workers()
-
-    main_logger.info("Started", True)
+        main_logger.info(f"Spawn latency {manager.get_spawn_latency_report()}", True)
 
-    # Run for some time and then pause
-    time.sleep(2)
     controller.request_pause()
 
     main_logger.info("Paused", True)
@@ -191,22 +150,54 @@ def main() -> int:
     controller.request_resume()
     main_logger.info("Resumed", True)
 
-    time.sleep(2)
-
-    # Stop the processes
-    controller.request_exit()
+    # Block until a worker exits or it is time to autoscale
+    run_end_time = time.monotonic() + 2
+    next_worker_statistics_time = time.monotonic()
+    while time.monotonic() < run_end_time:
+        result, exit_event = supervisor.get_exit_event(
+            min(AUTOSCALE_PERIOD, max(run_end_time - time.monotonic(), 0.0))
+        )
+        if result:
+            main_logger.warning(f"{exit_event}", True)
+
+        result, is_scaled = add_random_autoscaler.check()
+        if not result:
+            main_logger.warning("Failed to autoscale", True)
+
+        # New workers are supervised too
+        if is_scaled:
+            supervisor.refresh()
+
+        # Published by the workers to shared memory, separate from the data queues
+        if time.monotonic() >= next_worker_statistics_time:
+            rows = []
+            for manager in worker_managers:
+                rows += manager.get_worker_statistics()
+
+            main_logger.info(f"Worker statistics:\n{worker_statistics.format_table(rows)}", True)
+            next_worker_statistics_time += WORKER_STATISTICS_PERIOD
+
+    # Statistics are in shared memory, so reading them does not go through the queues
+    main_logger.info(f"Countup to Add Random: {countup_to_add_random_queue.stats()}", True)
+    main_logger.info(
+        f"Add Random to Concatenator: {add_random_to_concatenator_queue.stats()}", True
+    )
 
-    main_logger.info("Requested exit", True)
+    for manager in worker_managers:
+        main_logger.info(f"{manager.get_target_name()} {manager.get_restart_statistics()}", True)
 
-    # Fill and drain queues from END TO START
-    countup_to_add_random_queue.fill_and_drain_queue()
-    add_random_to_concatenator_queue.fill_and_drain_queue()
+    # Stop supervising first, otherwise exiting workers are restarted
+    supervisor.stop()
 
-    main_logger.info("Queues cleared", True)
+    # Stop the processes, discarding items in flight and giving each consumer a sentinel,
+    # with the queues shut down from the end of the pipeline to the start
+    main_logger.info(
+        f"Requesting exit, queue shutdown order: {pipeline.get_shutdown_order()}", True
+    )
 
-    # Clean up worker processes
-    for manager in worker_managers:
-        manager.join_workers()
+    # Workers stuck in a blocking call are terminated so shutdown is bounded
+    shutdown_report = pipeline.shutdown(SHUTDOWN_TIMEOUT)
+    main_logger.info(f"Workers joined, {shutdown_report}", True)
 
     main_logger.info("Stopped", True)
 
@@ -8,6 +8,7 @@ import pathlib
 from modules.common.modules.logger import logger
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
+from utilities.workers import worker_statistics
 from . import add_random
 
 
@@ -49,25 +50,43 @@ def add_random_worker(
         # Method blocks worker if pause has been requested
         controller.check_pause()
 
-        # Get an item from the queue
+        # Loop iterations and their times are published to main with the worker statistics
+        worker_statistics.record_iteration()
+
+        # Get a batch of items from the queue in a single transfer
         # If the queue is empty, the worker process will block
         # until the queue is non-empty
-        term = input_queue.queue.get()
+        terms = input_queue.get_many()
 
-        # Exit on sentinel
-        if term is None:
-            break
+        # The sentinel is always the last item of a batch
+        is_sentinel_received = terms[-1] is None
+        if is_sentinel_received:
+            terms.pop()
 
-        # All of the work should be done within the class
-        # Getting the output is as easy as calling a single method
-        # The class is reponsible for packing the intermediate type
-        result, value = add_random_instance.run_add_random(term)
+        values = []
+        for term in terms:
+            # All of the work should be done within the class
+            # Getting the output is as easy as calling a single method
+            # The class is reponsible for packing the intermediate type
+            result, value = add_random_instance.run_add_random(term)
 
-        # Check result
-        if not result:
-            continue
+            # Check result
+            if not result:
+                continue
 
-        # Put an item into the queue
+            values.append(value)
+
+        # Put the batch of items into the queue
         # If the queue is full, the worker process will block
         # until the queue is non-empty
-        output_queue.queue.put(value)
+        output_queue.put_many(values)
+
+        # Exit on sentinel
+        if is_sentinel_received:
+            break
+
+    _, input_batch_size = input_queue.get_average_batch_sizes()
+    output_batch_size, _ = output_queue.get_average_batch_sizes()
+    local_logger.info(
+        f"Average batch size: input {input_batch_size:.2f}, output {output_batch_size:.2f}", True
+    )
@@ -8,6 +8,7 @@ import pathlib
 from modules.common.modules.logger import logger
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
+from utilities.workers import worker_statistics
 from . import concatenator
 
 
@@ -45,23 +46,35 @@ def concatenator_worker(
         # Method blocks worker if pause has been requested
         controller.check_pause()
 
-        # Get an item from the queue
+        # Loop iterations and their times are published to main with the worker statistics
+        worker_statistics.record_iteration()
+
+        # Get a batch of items from the queue in a single transfer
         # If the queue is empty, the worker process will block
         # until the queue is non-empty
-        input_data = input_queue.queue.get()
+        batch = input_queue.get_many()
 
-        # Exit on sentinel
-        if input_data is None:
-            break
+        # The sentinel is always the last item of a batch
+        is_sentinel_received = batch[-1] is None
+        if is_sentinel_received:
+            batch.pop()
+
+        for input_data in batch:
+            # All of the work should be done within the class
+            # Getting the output is as easy as calling a single method
+            # The class is reponsible for unpacking the intermediate type
+            result, value = concatenator_instance.run_concatenation(input_data)
 
-        # All of the work should be done within the class
-        # Getting the output is as easy as calling a single method
-        # The class is reponsible for unpacking the intermediate type
-        result, value = concatenator_instance.run_concatenation(input_data)
+            # Check result
+            if not result:
+                continue
 
-        # Check result
-        if not result:
-            continue
+            # Print just the string
+            local_logger.info(str(value), None)
+
+        # Exit on sentinel
+        if is_sentinel_received:
+            break
 
-        # Print just the string
-        local_logger.info(str(value), None)
+    _, input_batch_size = input_queue.get_average_batch_sizes()
+    local_logger.info(f"Average batch size: input {input_batch_size:.2f}", True)
@@ -8,6 +8,7 @@ import pathlib
 from modules.common.modules.logger import logger
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
+from utilities.workers import worker_statistics
 from . import countup
 
 
@@ -47,6 +48,9 @@ def countup_worker(
         # Method blocks worker if pause has been requested
         controller.check_pause()
 
+        # Loop iterations and their times are published to main with the worker statistics
+        worker_statistics.record_iteration()
+
         # All of the work should be done within the class
         # Getting the output is as easy as calling a single method
         result, value = countup_instance.run_countup()
@@ -58,4 +62,4 @@ def countup_worker(
         # Put an item into the queue
         # If the queue is full, the worker process will block
         # until the queue is non-empty
-        output_queue.queue.put(value)
+        output_queue.put(value)
@@ -49,6 +49,8 @@ def heartbeat_receiver_worker(
     # Instantiate class object (heartbeat_receiver.HeartbeatReceiver)
 
     # Main loop: do work.
+    # Call utilities.workers.worker_statistics.record_iteration() once per loop for the statistics
+    # main logs
 
 
 # =================================================================================================
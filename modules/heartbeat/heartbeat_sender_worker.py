@@ -49,6 +49,10 @@ def heartbeat_sender_worker(
     # Instantiate class object (heartbeat_sender.HeartbeatSender)
 
     # Main loop: do work.
+    # Call utilities.workers.worker_statistics.record_iteration() once per loop for the statistics
+    # main logs
+    # Send with modules.mavlink_writer.mavlink_writer.request() to the writer's queue rather than
+    # connection.mav.*_send(), so that messages from different workers do not interleave on the link
 
 
 # =================================================================================================
@@ -0,0 +1,143 @@
+"""
+Records the MAVLink traffic from the drone to a file that can be replayed.
+"""
+
+import io
+import struct
+
+from pymavlink import mavutil
+
+from ..common.modules.logger import logger
+
+
+# The recording is a telemetry log (.tlog) as written by pymavlink and ground stations:
+# each frame is preceded by the time it was received, in microseconds since the epoch
+TIMESTAMP_STRUCT = struct.Struct(">Q")
+
+# The index is a separate file next to the recording, starting with the magic bytes
+# Each entry is the offset of the frame's timestamp in the recording, the length of the frame
+# and the time_boot_ms of the frame (or of the latest frame with one before it)
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"MAVIDX01"
+INDEX_ENTRY_STRUCT = struct.Struct("<QII")
+
+
+class MavlinkRecorder:
+    """
+    Appends every message received to the recording, as the raw frame that arrived, and its
+    entry to the index, so that a replay can map both files and seek by time_boot_ms without
+    parsing the recording.
+
+    Both files are only appended to, so a recording cut short by a crash can still be replayed
+    up to the last frame written in full.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls, path: str, local_logger: logger.Logger
+    ) -> "tuple[bool, MavlinkRecorder | None]":
+        """
+        path: File of the recording, which is replaced, the index is written next to it.
+        local_logger: Existing logger from process.
+
+        Returns whether the recorder was created and the recorder.
+        """
+        try:
+            # Closed by close()
+            # pylint: disable-next=consider-using-with
+            recording_file = open(path, "wb")
+        except OSError as exception:
+            local_logger.error(f"Could not open recording {path}: {exception}", True)
+            return False, None
+
+        try:
+            # Closed by close()
+            # pylint: disable-next=consider-using-with
+            index_file = open(path + INDEX_SUFFIX, "wb")
+        except OSError as exception:
+            recording_file.close()
+            local_logger.error(f"Could not open index {path + INDEX_SUFFIX}: {exception}", True)
+            return False, None
+
+        index_file.write(INDEX_MAGIC)
+
+        return True, MavlinkRecorder(cls.__create_key, recording_file, index_file)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        recording_file: io.BufferedWriter,
+        index_file: io.BufferedWriter,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is MavlinkRecorder.__create_key, "Use create() method"
+
+        self.__recording_file = recording_file
+        self.__index_file = index_file
+
+        self.__offset = 0
+        self.__time_boot_ms = 0
+        self.__frame_count = 0
+
+    def record(self, messages: "list[mavutil.mavlink.MAVLink_message]", now: float) -> None:
+        """
+        Appends the messages, all received at the same time.
+
+        messages: Messages received, in order of arrival.
+        now: Time they were received, in seconds since the epoch.
+        """
+        # Low bits are flags in the telemetry log format, as pymavlink writes them
+        timestamp = TIMESTAMP_STRUCT.pack(int(now * 1e6) & ~3)
+
+        recording = bytearray()
+        index = bytearray()
+        for message in messages:
+            if message.get_type() == "BAD_DATA":
+                continue
+
+            frame = message.get_msgbuf()
+            time_boot_ms = getattr(message, "time_boot_ms", None)
+            if time_boot_ms is not None:
+                self.__time_boot_ms = time_boot_ms
+
+            index += INDEX_ENTRY_STRUCT.pack(
+                self.__offset + len(recording), len(frame), self.__time_boot_ms
+            )
+            recording += timestamp
+            recording += frame
+
+        self.__recording_file.write(recording)
+        self.__index_file.write(index)
+        self.__offset += len(recording)
+        self.__frame_count += len(index) // INDEX_ENTRY_STRUCT.size
+
+    def flush(self) -> None:
+        """
+        Writes everything recorded so far to the files.
+        """
+        self.__recording_file.flush()
+        self.__index_file.flush()
+
+    def close(self) -> None:
+        """
+        Flushes and closes the files.
+        """
+        self.flush()
+        self.__recording_file.close()
+        self.__index_file.close()
+
+    def get_frame_count(self) -> int:
+        """
+        Returns the number of frames recorded.
+        """
+        return self.__frame_count
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        return f"frames: {self.__frame_count}, bytes: {self.__offset}"
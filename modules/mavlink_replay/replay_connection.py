@@ -0,0 +1,277 @@
+"""
+Connection that plays back a recording in place of the drone.
+"""
+
+import bisect
+import io
+import math
+import mmap
+import time
+
+from pymavlink import mavutil
+
+from . import mavlink_recorder
+from ..common.modules.logger import logger
+
+
+# Plays back as fast as the recording can be read
+MAX_SPEED = math.inf
+
+
+def _map(file: io.BufferedReader) -> "mmap.mmap | bytes":
+    """
+    Maps the whole file read only, an empty file cannot be mapped.
+    """
+    try:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        return b""
+
+
+class ReplayConnection(mavutil.mavfile):  # pylint: disable=too-many-instance-attributes
+    """
+    Plays back a recording from mavlink_recorder as if it were arriving from the drone: at the
+    speed it was recorded, a multiple of it, or as fast as it can be read (MAX_SPEED), so the
+    workers can be profiled offline against real flights.
+
+    The recording and its index are memory mapped, so opening hours of recording takes no time and
+    only the frames played are read. Each recv() returns the whole frames that are due, as a
+    datagram connection does. Messages sent to the drone are counted and discarded.
+
+    The connection has no file descriptor, select() waits for the next frame instead.
+    """
+
+    __create_key = object()
+
+    __READ_SIZE = 65536  # bytes
+
+    @classmethod
+    def create(
+        cls, path: str, speed: float, local_logger: logger.Logger
+    ) -> "tuple[bool, ReplayConnection | None]":
+        """
+        path: File of the recording, the index is read from next to it.
+        speed: Multiple of the recorded speed, MAX_SPEED for as fast as possible.
+        local_logger: Existing logger from process.
+
+        Returns whether the connection was created and the connection.
+        """
+        if not speed > 0.0:
+            local_logger.error(f"Speed must be greater than 0, got {speed}", True)
+            return False, None
+
+        try:
+            with (
+                open(path, "rb") as recording_file,
+                open(path + mavlink_recorder.INDEX_SUFFIX, "rb") as index_file,
+            ):
+                recording = _map(recording_file)
+                index = _map(index_file)
+        except OSError as exception:
+            local_logger.error(f"Could not open recording {path}: {exception}", True)
+            return False, None
+
+        if index[: len(mavlink_recorder.INDEX_MAGIC)] != mavlink_recorder.INDEX_MAGIC:
+            local_logger.error(f"{path + mavlink_recorder.INDEX_SUFFIX} is not an index", True)
+            return False, None
+
+        # Frames cut short when the recorder stopped are not played
+        frame_count = (
+            len(index) - len(mavlink_recorder.INDEX_MAGIC)
+        ) // mavlink_recorder.INDEX_ENTRY_STRUCT.size
+        while frame_count > 0:
+            offset, length, _ = mavlink_recorder.INDEX_ENTRY_STRUCT.unpack_from(
+                index,
+                len(mavlink_recorder.INDEX_MAGIC)
+                + (frame_count - 1) * mavlink_recorder.INDEX_ENTRY_STRUCT.size,
+            )
+            if offset + mavlink_recorder.TIMESTAMP_STRUCT.size + length <= len(recording):
+                break
+
+            frame_count -= 1
+
+        return True, ReplayConnection(cls.__create_key, path, recording, index, frame_count, speed)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        path: str,
+        recording: "mmap.mmap | bytes",
+        index: "mmap.mmap | bytes",
+        frame_count: int,
+        speed: float,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is ReplayConnection.__create_key, "Use create() method"
+
+        super().__init__(None, path)
+
+        self.__recording = recording
+        self.__index = index
+        self.__frame_count = frame_count
+        self.__speed = speed
+
+        self.__position = 0
+        self.__anchor_wall_time = 0.0
+        self.__anchor_recorded_time = 0.0
+        self.__anchor()
+
+        self.__discarded_byte_count = 0
+
+    def __get_entry(self, position: int) -> "tuple[int, int, int]":
+        """
+        Returns the offset, length and time_boot_ms of the frame.
+        """
+        return mavlink_recorder.INDEX_ENTRY_STRUCT.unpack_from(
+            self.__index,
+            len(mavlink_recorder.INDEX_MAGIC) + position * mavlink_recorder.INDEX_ENTRY_STRUCT.size,
+        )
+
+    def __get_recorded_time(self, offset: int) -> float:
+        """
+        Returns the time the frame at the offset was received, in seconds since the epoch.
+        """
+        return mavlink_recorder.TIMESTAMP_STRUCT.unpack_from(self.__recording, offset)[0] / 1e6
+
+    def __anchor(self) -> None:
+        """
+        Plays the next frame now and the ones after relative to it.
+        """
+        self.__anchor_wall_time = time.monotonic()
+        if self.__position < self.__frame_count:
+            offset, _, _ = self.__get_entry(self.__position)
+            self.__anchor_recorded_time = self.__get_recorded_time(offset)
+
+    def __get_wait_time(self, offset: int, now: float) -> float:
+        """
+        Returns the seconds until the frame at the offset is due.
+        """
+        if self.__speed == MAX_SPEED:
+            return 0.0
+
+        recorded_elapsed = self.__get_recorded_time(offset) - self.__anchor_recorded_time
+        return self.__anchor_wall_time + recorded_elapsed / self.__speed - now
+
+    def recv(self, n: "int | None" = None) -> bytes:
+        """
+        Returns the whole frames that are due, at least one if any is due even if longer than n.
+        Nothing once the recording has ended.
+        """
+        limit = self.__READ_SIZE if n is None else n
+        now = time.monotonic()
+
+        frames = []
+        size = 0
+        while self.__position < self.__frame_count:
+            offset, length, _ = self.__get_entry(self.__position)
+            if len(frames) > 0 and size + length > limit:
+                break
+
+            if self.__get_wait_time(offset, now) > 0.0:
+                break
+
+            start = offset + mavlink_recorder.TIMESTAMP_STRUCT.size
+            frames.append(self.__recording[start : start + length])
+            size += length
+            self.__position += 1
+
+        return b"".join(frames)
+
+    def select(self, timeout: float) -> bool:
+        """
+        Waits for up to the timeout for the next frame to be due.
+
+        Returns whether a frame is due or the recording has ended.
+        """
+        # Readable once ended so that recv() reports it, after the timeout so waiting is not a spin
+        if self.__position >= self.__frame_count:
+            time.sleep(max(timeout, 0.0))
+            return True
+
+        offset, _, _ = self.__get_entry(self.__position)
+        wait_time = self.__get_wait_time(offset, time.monotonic())
+        if wait_time > timeout:
+            time.sleep(max(timeout, 0.0))
+            return False
+
+        if wait_time > 0.0:
+            time.sleep(wait_time)
+
+        return True
+
+    def write(self, buf: bytes) -> int:
+        """
+        Discards the bytes, there is no drone to send them to.
+        """
+        self.__discarded_byte_count += len(buf)
+        return len(buf)
+
+    def seek(self, time_boot_ms: int) -> None:
+        """
+        Plays from the first frame at or after the time since the drone booted, now.
+        Assumes the drone did not reboot during the recording.
+        Frames already returned by recv() are not taken back from the parser.
+
+        time_boot_ms: Milliseconds since the drone booted.
+        """
+        self.__position = bisect.bisect_left(
+            range(0, self.__frame_count),
+            time_boot_ms,
+            key=lambda position: self.__get_entry(position)[2],
+        )
+        self.__anchor()
+
+    def set_speed(self, speed: float) -> None:
+        """
+        Plays the next frame now and the ones after at the speed.
+
+        speed: Multiple of the recorded speed, MAX_SPEED for as fast as possible.
+        """
+        assert speed > 0.0, "Speed must be greater than 0"
+        self.__speed = speed
+        self.__anchor()
+
+    def is_ended(self) -> bool:
+        """
+        Returns whether every frame has been played.
+        """
+        return self.__position >= self.__frame_count
+
+    def get_position(self) -> int:
+        """
+        Returns the index of the next frame to play.
+        """
+        return self.__position
+
+    def get_frame_count(self) -> int:
+        """
+        Returns the number of frames in the recording.
+        """
+        return self.__frame_count
+
+    def get_discarded_byte_count(self) -> int:
+        """
+        Returns the number of bytes sent to the drone and discarded.
+        """
+        return self.__discarded_byte_count
+
+    def close(self) -> None:
+        """
+        Unmaps the recording.
+        """
+        if isinstance(self.__recording, mmap.mmap):
+            self.__recording.close()
+
+        if isinstance(self.__index, mmap.mmap):
+            self.__index.close()
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        return (
+            f"frame {self.__position}/{self.__frame_count} at {self.__speed}x, "
+            f"discarded: {self.__discarded_byte_count} bytes"
+        )
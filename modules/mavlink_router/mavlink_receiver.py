@@ -0,0 +1,203 @@
+"""
+Receives every message that has arrived on the connection to the drone in one pass.
+"""
+
+import selectors
+import socket
+
+from pymavlink import mavutil
+
+from ..common.modules.logger import logger
+
+
+class MavlinkReceiver:  # pylint: disable=too-many-instance-attributes
+    """
+    Waits until the connection is readable, reads all the bytes available and parses every
+    complete message in them, instead of recv_msg() making a system call for the header and the
+    payload of each message. A message split across reads is kept by the parser until the rest
+    arrives.
+
+    Messages are posted to the connection as recv_msg() does, so its state (latest message of
+    each type, sequence loss, vehicle system ID) stays up to date.
+
+    A connection without a file descriptor, such as a replay, is waited on with its own select().
+    """
+
+    __create_key = object()
+
+    __READ_SIZE = 16384  # bytes
+    # Bytes read per wakeup, so a fast sender cannot keep the receiver reading forever
+    __MAX_READ_SIZE = 65536  # bytes
+
+    @classmethod
+    def create(
+        cls, connection: mavutil.mavfile, local_logger: logger.Logger
+    ) -> "tuple[bool, MavlinkReceiver | None]":
+        """
+        connection: Connection to the drone, only read by the receiver.
+        local_logger: Existing logger from process.
+
+        Returns whether the receiver was created and the receiver.
+        """
+        if not hasattr(connection, "fd"):
+            local_logger.error("Connection is not a MAVLink connection", True)
+            return False, None
+
+        return True, MavlinkReceiver(cls.__create_key, connection)
+
+    def __init__(self, class_private_create_key: object, connection: mavutil.mavfile) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is MavlinkReceiver.__create_key, "Use create() method"
+
+        self.__connection = connection
+
+        # epoll on Linux
+        self.__selector = selectors.DefaultSelector()
+        self.__fd = connection.fd
+        if self.__fd is not None:
+            self.__selector.register(self.__fd, selectors.EVENT_READ)
+
+        self.__wakeup_count = 0
+        self.__byte_count = 0
+        self.__message_count = 0
+
+    def __update_fd(self) -> None:
+        """
+        Waits on the current file descriptor, which changes when a listening connection accepts.
+        """
+        if self.__connection.fd == self.__fd:
+            return
+
+        if self.__fd is not None:
+            self.__selector.unregister(self.__fd)
+
+        self.__fd = self.__connection.fd
+        if self.__fd is not None:
+            self.__selector.register(self.__fd, selectors.EVENT_READ)
+
+    def __wait(self, timeout: float) -> bool:
+        """
+        Waits until the connection is readable, up to the timeout.
+
+        Returns whether it is readable.
+        """
+        self.__update_fd()
+        if self.__fd is None:
+            return self.__connection.select(timeout)
+
+        return len(self.__selector.select(timeout)) > 0
+
+    def __read(self) -> "bytes | None":
+        """
+        Reads the bytes available, up to the maximum read size.
+
+        Returns the bytes, None if the other end closed the stream.
+        """
+        port = getattr(self.__connection, "port", None)
+        is_stream = isinstance(port, socket.socket) and port.type == socket.SOCK_STREAM
+
+        # pymavlink makes its sockets non-blocking, checked here as there is no per call
+        # MSG_DONTWAIT on Windows
+        if is_stream and port.getblocking():  # type: ignore
+            port.setblocking(False)  # type: ignore
+
+        chunks = []
+        size = 0
+        while size < self.__MAX_READ_SIZE:
+            if is_stream:
+                # pymavlink would try to reconnect on a closed stream, so it is read directly
+                try:
+                    data = port.recv(self.__READ_SIZE)  # type: ignore
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError:
+                    return None
+
+                # Readable with nothing to read means the other end closed it
+                if len(data) == 0 and size == 0:
+                    return None
+            else:
+                # Datagram and serial connections keep pymavlink's handling
+                data = self.__connection.recv(self.__READ_SIZE)
+
+                # Without a file descriptor, readable with nothing to read means it has ended
+                if len(data) == 0 and size == 0 and self.__fd is None:
+                    return None
+
+            if len(data) == 0:
+                break
+
+            chunks.append(data)
+            size += len(data)
+
+            # A short read from a stream has taken everything
+            if is_stream and len(data) < self.__READ_SIZE:
+                break
+
+        return b"".join(chunks)
+
+    def receive(self, timeout: float) -> "tuple[bool, list[mavutil.mavlink.MAVLink_message]]":
+        """
+        Waits for data up to the timeout and parses all of it.
+
+        timeout: Seconds to wait for data.
+
+        Returns whether the connection is still open and the messages in order of arrival.
+        """
+        # Complete messages the parser already has, e.g. from an earlier recv_msg()
+        messages = self.__connection.mav.parse_buffer(b"") or []
+
+        is_connected = True
+        if self.__wait(0.0 if len(messages) > 0 else timeout):
+            data = self.__read()
+            if data is None:
+                is_connected = False
+                data = b""
+            else:
+                self.__wakeup_count += 1
+                self.__byte_count += len(data)
+
+            if len(data) > 0:
+                if self.__connection.logfile_raw:
+                    self.__connection.logfile_raw.write(data)
+
+                if self.__connection.first_byte:
+                    self.__connection.auto_mavlink_version(data)
+
+                messages.extend(self.__connection.mav.parse_buffer(data) or [])
+
+        for message in messages:
+            self.__connection.post_message(message)
+
+        self.__message_count += len(messages)
+        return is_connected, messages
+
+    def get_wakeup_count(self) -> int:
+        """
+        Returns the number of times the connection was read.
+        """
+        return self.__wakeup_count
+
+    def get_message_count(self) -> int:
+        """
+        Returns the number of messages received.
+        """
+        return self.__message_count
+
+    def close(self) -> None:
+        """
+        Stops waiting on the connection, which stays open.
+        """
+        self.__selector.close()
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        messages_per_wakeup = self.__message_count / max(self.__wakeup_count, 1)
+        return (
+            f"messages: {self.__message_count}, bytes: {self.__byte_count}, "
+            f"wakeups: {self.__wakeup_count} ({messages_per_wakeup:.1f} messages per wakeup)"
+        )
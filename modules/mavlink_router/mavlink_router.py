@@ -0,0 +1,156 @@
+"""
+Reads the connection to the drone and hands each message to the workers subscribed to its type.
+"""
+
+import time
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+from . import mavlink_receiver
+from ..mavlink_replay import mavlink_recorder
+from ..common.modules.logger import logger
+
+
+# Message types each bootcamp worker reads
+HEARTBEAT_RECEIVER_MESSAGE_TYPES = ["HEARTBEAT"]
+TELEMETRY_MESSAGE_TYPES = ["ATTITUDE", "LOCAL_POSITION_NED"]
+COMMAND_MESSAGE_TYPES = ["COMMAND_ACK"]
+
+
+class MavlinkRouter:
+    """
+    Sole reader of the connection. Every inbound message is parsed once, together with the others
+    that arrived with it, and put into the queue of each subscriber of its type, so workers no
+    longer read the connection themselves and take each other's messages.
+
+    Each subscriber queue is a bounded buffer whose overflow policy must not block, so a slow
+    subscriber loses its own oldest (or newest) messages instead of stalling the others.
+    The queue counts what it drops.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        connection: mavutil.mavfile,
+        subscriptions: "list[tuple[list[str], queue_proxy_wrapper.QueueProxyWrapper]]",
+        recorder: mavlink_recorder.MavlinkRecorder | None,
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, MavlinkRouter | None]":
+        """
+        connection: Connection to the drone, only read by the router.
+        subscriptions: Message types and the queue of each subscriber.
+            A message type can have several subscribers.
+        recorder: Records every message read, None to not record.
+        local_logger: Existing logger from process.
+
+        Returns whether the router was created and the router.
+        """
+        routes: "dict[str, list[queue_proxy_wrapper.QueueProxyWrapper]]" = {}
+        for message_types, queue in subscriptions:
+            if queue.overflow_policy == queue_proxy_wrapper.OverflowPolicy.BLOCK:
+                local_logger.error(
+                    f"Subscriber queue of {message_types} blocks when full, which would stall "
+                    "the router, use another overflow policy",
+                    True,
+                )
+                return False, None
+
+            for message_type in message_types:
+                routes.setdefault(message_type, []).append(queue)
+
+        result, receiver = mavlink_receiver.MavlinkReceiver.create(connection, local_logger)
+        if not result:
+            return False, None
+
+        # Get Pylance to stop complaining
+        assert receiver is not None
+
+        return True, MavlinkRouter(cls.__create_key, receiver, subscriptions, routes, recorder)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        receiver: mavlink_receiver.MavlinkReceiver,
+        subscriptions: "list[tuple[list[str], queue_proxy_wrapper.QueueProxyWrapper]]",
+        routes: "dict[str, list[queue_proxy_wrapper.QueueProxyWrapper]]",
+        recorder: mavlink_recorder.MavlinkRecorder | None,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is MavlinkRouter.__create_key, "Use create() method"
+
+        self.__receiver = receiver
+        self.__subscriptions = subscriptions
+        self.__routes = routes
+        self.__recorder = recorder
+
+        self.__received_counts: "dict[str, int]" = {}
+        self.__unrouted_count = 0
+
+    def run(self, timeout: float) -> "tuple[bool, int]":
+        """
+        Waits for data up to the timeout and routes all the messages that have arrived.
+        Messages for the same subscriber are put in a single transfer.
+
+        timeout: Seconds to wait for data.
+
+        Returns whether the connection is still open and the number of messages read.
+        """
+        is_connected, messages = self.__receiver.receive(timeout)
+        if self.__recorder is not None and len(messages) > 0:
+            self.__recorder.record(messages, time.time())
+
+        batches: "dict[queue_proxy_wrapper.QueueProxyWrapper, list]" = {}
+        for message in messages:
+            message_type = message.get_type()
+            self.__received_counts[message_type] = self.__received_counts.get(message_type, 0) + 1
+
+            queues = self.__routes.get(message_type)
+            if queues is None:
+                self.__unrouted_count += 1
+                continue
+
+            for queue in queues:
+                batches.setdefault(queue, []).append(message)
+
+        for queue, batch in batches.items():
+            queue.put_many(batch)
+
+        return is_connected, len(messages)
+
+    def get_received_counts(self) -> "dict[str, int]":
+        """
+        Returns the number of messages read of each type.
+        """
+        return dict(self.__received_counts)
+
+    def get_unrouted_count(self) -> int:
+        """
+        Returns the number of messages read that no subscriber wanted.
+        """
+        return self.__unrouted_count
+
+    def get_dropped_counts(self) -> "list[int]":
+        """
+        Returns the number of messages each subscriber queue dropped, in subscription order.
+        """
+        return [queue.get_dropped_count() for _, queue in self.__subscriptions]
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        dropped = ", ".join(
+            f"{message_types}: {dropped_count}"
+            for (message_types, _), dropped_count in zip(
+                self.__subscriptions, self.get_dropped_counts()
+            )
+        )
+        return (
+            f"received: {sum(self.__received_counts.values())} {self.__received_counts}, "
+            f"unrouted: {self.__unrouted_count}, dropped: {{{dropped}}}, {self.__receiver}"
+        )
@@ -0,0 +1,97 @@
+"""
+Router worker that alone reads the connection to the drone.
+"""
+
+import os
+import pathlib
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_statistics
+from . import mavlink_router
+from ..mavlink_replay import mavlink_recorder
+from ..common.modules.logger import logger
+
+
+READ_TIMEOUT = 0.1  # seconds
+
+
+def mavlink_router_worker(
+    connection: mavutil.mavfile,
+    message_types_per_queue: "list[list[str]]",
+    recording_path: "str | None",
+    *args: "queue_proxy_wrapper.QueueProxyWrapper | worker_controller.WorkerController",
+) -> None:
+    """
+    Worker process.
+
+    connection is the connection to the drone, which no other worker reads.
+    message_types_per_queue are the message types of each output queue, in the same order.
+    recording_path is the file to record every message read to for replay, None to not record.
+    args are the output queues, one per subscriber, followed by the controller.
+    Output queues must have an overflow policy other than BLOCK.
+    """
+    output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]" = list(args[:-1])  # type: ignore
+    controller: worker_controller.WorkerController = args[-1]  # type: ignore
+
+    # Instantiate logger
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    if len(message_types_per_queue) != len(output_queues):
+        local_logger.error(
+            f"{len(message_types_per_queue)} subscriptions for {len(output_queues)} queues", True
+        )
+        return
+
+    recorder = None
+    if recording_path is not None:
+        result, recorder = mavlink_recorder.MavlinkRecorder.create(recording_path, local_logger)
+        if not result:
+            local_logger.error("Failed to create recorder", True)
+            return
+
+    # Instantiate class object
+    result, router = mavlink_router.MavlinkRouter.create(
+        connection, list(zip(message_types_per_queue, output_queues)), recorder, local_logger
+    )
+    if not result:
+        local_logger.error("Failed to create router", True)
+        if recorder is not None:
+            recorder.close()
+
+        return
+
+    # Get Pylance to stop complaining
+    assert router is not None
+
+    # Loop forever until exit has been requested or the drone disconnects
+    while not controller.is_exit_requested():
+        # Method blocks worker if pause has been requested
+        controller.check_pause()
+
+        # Loop iterations and their times are published to main with the worker statistics
+        worker_statistics.record_iteration()
+
+        # Waits for the drone with a timeout so that exit requests are seen
+        is_connected, _ = router.run(READ_TIMEOUT)
+        if not is_connected:
+            local_logger.warning("Drone closed the connection", True)
+            break
+
+    local_logger.info(f"Router {router}", True)
+
+    if recorder is not None:
+        recorder.close()
+        local_logger.info(f"Recorded {recorder} to {recording_path}", True)
@@ -0,0 +1,376 @@
+"""
+Writes the messages of every worker to the connection to the drone, one at a time.
+"""
+
+import time
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+from ..common.modules.logger import logger
+
+
+# Sent before any other message waiting
+PRIORITY_MESSAGE_TYPES = ["HEARTBEAT"]
+
+# Messages that set a state, so only the newest is worth sending, and the fields that tell apart
+# the states they set, e.g. each data stream has its own rate
+# Every other message is sent as requested
+COALESCE_MESSAGE_FIELDS = {
+    "HEARTBEAT": [],
+    "REQUEST_DATA_STREAM": ["target_system", "target_component", "req_stream_id"],
+    "PARAM_SET": ["target_system", "target_component", "param_id"],
+}
+
+# Commands that set a state, and the parameters that tell apart the states they set
+COMMAND_MESSAGE_TYPES = ["COMMAND_LONG", "COMMAND_INT"]
+COALESCE_COMMAND_PARAMS = {
+    mavutil.mavlink.MAV_CMD_CONDITION_YAW: [],
+    mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT: [],
+    mavutil.mavlink.MAV_CMD_DO_CHANGE_SPEED: ["param1"],
+    # Message ID
+    mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL: ["param1"],
+}
+
+
+class OutboundMessage:
+    """
+    Message a worker asks the writer to send.
+
+    message: Encoded MAVLink message that has not been sent,
+        e.g. from connection.mav.command_long_encode() .
+    request_time: When the message was requested, time.monotonic() .
+    """
+
+    def __init__(self, message: mavutil.mavlink.MAVLink_message, request_time: float) -> None:
+        self.message = message
+        self.request_time = request_time
+
+
+def request(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    message: mavutil.mavlink.MAVLink_message,
+    timeout: float | None = None,
+) -> bool:
+    """
+    Asks the writer to send the message, use instead of connection.mav.*_send() .
+
+    output_queue: Input queue of the writer.
+    message: Encoded MAVLink message.
+    timeout: Time waiting in seconds before giving up, None is forever.
+
+    Returns whether the request was put.
+    """
+    return output_queue.put(OutboundMessage(message, time.monotonic()), timeout)
+
+
+def get_coalesce_key(message: mavutil.mavlink.MAVLink_message) -> "tuple | None":
+    """
+    Messages with the same key supersede each other, see COALESCE_MESSAGE_FIELDS and
+    COALESCE_COMMAND_PARAMS.
+
+    Returns the key, None if the message is never superseded.
+    """
+    message_type = message.get_type()
+    if message_type in COMMAND_MESSAGE_TYPES:
+        params = COALESCE_COMMAND_PARAMS.get(message.command)  # type: ignore
+        if params is None:
+            return None
+
+        return (
+            message_type,
+            message.target_system,  # type: ignore
+            message.target_component,  # type: ignore
+            message.command,  # type: ignore
+            *[getattr(message, param) for param in params],
+        )
+
+    fields = COALESCE_MESSAGE_FIELDS.get(message_type)
+    if fields is None:
+        return None
+
+    return message_type, *[getattr(message, field) for field in fields]
+
+
+class TokenBucket:
+    """
+    Allows `rate` events per second on average and bursts of up to `capacity` events.
+    """
+
+    def __init__(self, rate: float, capacity: int, now: float) -> None:
+        """
+        rate: Events per second, must be greater than 0 .
+        capacity: Largest burst, must be at least 1 .
+        now: Current time in seconds, the bucket starts full.
+        """
+        assert rate > 0.0, "Rate must be greater than 0"
+        assert capacity >= 1, "Capacity must be at least 1"
+
+        self.rate = rate
+        self.capacity = capacity
+
+        self.__tokens = float(capacity)
+        self.__last_time = now
+
+    def __refill(self, now: float) -> None:
+        """
+        Adds the tokens earned since the last refill.
+        """
+        self.__tokens = min(self.__tokens + (now - self.__last_time) * self.rate, self.capacity)
+        self.__last_time = now
+
+    def take(self, now: float) -> bool:
+        """
+        Takes a token if there is one.
+
+        now: Current time in seconds.
+
+        Returns whether the event is allowed.
+        """
+        self.__refill(now)
+        if self.__tokens < 1.0:
+            return False
+
+        self.__tokens -= 1.0
+        return True
+
+    def get_wait_time(self, now: float) -> float:
+        """
+        Returns the seconds until a token is available.
+        """
+        self.__refill(now)
+        return max((1.0 - self.__tokens) / self.rate, 0.0)
+
+
+class MavlinkWriterReport:  # pylint: disable=too-many-instance-attributes
+    """
+    Writer counters at a point in time.
+
+    sent_counts: Messages sent of each type.
+    coalesced_count: Messages replaced by a newer one before being sent.
+    rate_limited_count: Times a waiting message was held back by its rate limit.
+    pending_count: Messages waiting to be sent.
+    bytes_per_second: Bytes written per second since the writer was created.
+    utilization: Fraction of the link rate used, None if the link rate is unknown.
+    mean_latency: Average seconds between request and send.
+    max_latency: Longest seconds between request and send.
+    """
+
+    def __init__(
+        self,
+        sent_counts: "dict[str, int]",
+        coalesced_count: int,
+        rate_limited_count: int,
+        pending_count: int,
+        bytes_per_second: float,
+        utilization: "float | None",
+        mean_latency: float,
+        max_latency: float,
+    ) -> None:
+        self.sent_counts = sent_counts
+        self.coalesced_count = coalesced_count
+        self.rate_limited_count = rate_limited_count
+        self.pending_count = pending_count
+        self.bytes_per_second = bytes_per_second
+        self.utilization = utilization
+        self.mean_latency = mean_latency
+        self.max_latency = max_latency
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        utilization = "" if self.utilization is None else f" ({self.utilization * 100:.1f}%)"
+        return (
+            f"sent: {sum(self.sent_counts.values())} {self.sent_counts}, "
+            f"coalesced: {self.coalesced_count}, rate limited: {self.rate_limited_count}, "
+            f"pending: {self.pending_count}, link: {self.bytes_per_second:.0f}B/s{utilization}, "
+            f"latency: mean {self.mean_latency * 1000:.1f}ms, max {self.max_latency * 1000:.1f}ms"
+        )
+
+
+class MavlinkWriter:  # pylint: disable=too-many-instance-attributes
+    """
+    Sole writer of the connection. Workers put their messages into the writer's queue
+    with request(), and the writer sends them one at a time so their bytes never interleave.
+
+    A message replaces a waiting message with the same coalesce key and takes its place in line.
+    Only superseded state setting messages are coalesced, all other messages are sent.
+    Heartbeats go before any other waiting message. Message types can be given a token bucket
+    rate limit, waiting messages of a limited type are sent once a token is available.
+    """
+
+    __create_key = object()
+
+    # Requests taken from the queue per receive
+    __MAX_RECEIVE_COUNT = 64
+
+    @classmethod
+    def create(
+        cls,
+        connection: mavutil.mavfile,
+        input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        rate_limits: "dict[str, tuple[float, int]]",
+        link_rate: "float | None",
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, MavlinkWriter | None]":
+        """
+        connection: Connection to the drone, only written by the writer.
+        input_queue: Requests from the workers.
+        rate_limits: Messages per second and largest burst of each rate limited message type.
+        link_rate: Bytes per second the link carries, e.g. baud rate / 10 for a serial link,
+            None if unknown.
+        local_logger: Existing logger from process.
+
+        Returns whether the writer was created and the writer.
+        """
+        for message_type, (rate, capacity) in rate_limits.items():
+            if rate <= 0.0 or capacity < 1:
+                local_logger.error(
+                    f"Rate limit of {message_type} must have a rate greater than 0 "
+                    f"and a burst of at least 1, got {rate} and {capacity}",
+                    True,
+                )
+                return False, None
+
+        if link_rate is not None and link_rate <= 0.0:
+            local_logger.error(f"Link rate must be greater than 0, got {link_rate}", True)
+            return False, None
+
+        return True, MavlinkWriter(
+            cls.__create_key, connection, input_queue, rate_limits, link_rate
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        connection: mavutil.mavfile,
+        input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        rate_limits: "dict[str, tuple[float, int]]",
+        link_rate: "float | None",
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is MavlinkWriter.__create_key, "Use create() method"
+
+        self.__connection = connection
+        self.__input_queue = input_queue
+        self.__link_rate = link_rate
+
+        self.__start_time = time.monotonic()
+        self.__buckets = {
+            message_type: TokenBucket(rate, capacity, self.__start_time)
+            for message_type, (rate, capacity) in rate_limits.items()
+        }
+
+        # Insertion ordered, a replaced message keeps its place
+        self.__pending: "dict[object, OutboundMessage]" = {}
+
+        self.__sent_counts: "dict[str, int]" = {}
+        self.__sent_bytes = 0
+        self.__coalesced_count = 0
+        self.__rate_limited_count = 0
+        self.__total_latency = 0.0
+        self.__max_latency = 0.0
+
+    def __get_wait_time(self, timeout: float) -> float:
+        """
+        Seconds to wait for requests before the next waiting message can be sent.
+        """
+        if len(self.__pending) == 0:
+            return timeout
+
+        now = time.monotonic()
+        wait_time = timeout
+        for outbound in self.__pending.values():
+            bucket = self.__buckets.get(outbound.message.get_type())
+            if bucket is None:
+                return 0.0
+
+            wait_time = min(wait_time, bucket.get_wait_time(now))
+
+        return wait_time
+
+    def __send(self, outbound: OutboundMessage) -> None:
+        """
+        Writes the message and records it.
+        """
+        self.__connection.mav.send(outbound.message)
+
+        message_type = outbound.message.get_type()
+        self.__sent_counts[message_type] = self.__sent_counts.get(message_type, 0) + 1
+        self.__sent_bytes += len(outbound.message.get_msgbuf())
+
+        latency = time.monotonic() - outbound.request_time
+        self.__total_latency += latency
+        self.__max_latency = max(self.__max_latency, latency)
+
+    def run(self, timeout: float) -> bool:
+        """
+        Waits for requests up to the timeout, or until a waiting message may be sent,
+        and sends the waiting messages that the rate limits allow.
+
+        timeout: Seconds to wait for requests.
+
+        Returns whether the queue is still open, False once the sentinel has been received.
+        """
+        is_open = True
+        requests = self.__input_queue.get_many(
+            self.__MAX_RECEIVE_COUNT, self.__get_wait_time(timeout)
+        )
+        for outbound in requests:
+            if outbound is None:
+                is_open = False
+                break
+
+            key = get_coalesce_key(outbound.message)
+            if key is None:
+                # Never replaced
+                key = object()
+            elif key in self.__pending:
+                self.__coalesced_count += 1
+
+            self.__pending[key] = outbound
+
+        priority_keys = []
+        other_keys = []
+        for key, outbound in self.__pending.items():
+            if outbound.message.get_type() in PRIORITY_MESSAGE_TYPES:
+                priority_keys.append(key)
+            else:
+                other_keys.append(key)
+
+        now = time.monotonic()
+        for key in priority_keys + other_keys:
+            outbound = self.__pending[key]
+            bucket = self.__buckets.get(outbound.message.get_type())
+            if bucket is not None and not bucket.take(now):
+                self.__rate_limited_count += 1
+                continue
+
+            self.__send(outbound)
+            del self.__pending[key]
+
+        return is_open
+
+    def get_report(self) -> MavlinkWriterReport:
+        """
+        Returns the counters, link utilization and latency so far.
+        """
+        sent_count = sum(self.__sent_counts.values())
+        bytes_per_second = self.__sent_bytes / max(time.monotonic() - self.__start_time, 1e-9)
+        utilization = None
+        if self.__link_rate is not None:
+            utilization = bytes_per_second / self.__link_rate
+
+        return MavlinkWriterReport(
+            dict(self.__sent_counts),
+            self.__coalesced_count,
+            self.__rate_limited_count,
+            len(self.__pending),
+            bytes_per_second,
+            utilization,
+            self.__total_latency / sent_count if sent_count > 0 else 0.0,
+            self.__max_latency,
+        )
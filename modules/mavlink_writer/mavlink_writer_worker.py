@@ -0,0 +1,77 @@
+"""
+Writer worker that alone writes the connection to the drone.
+"""
+
+import os
+import pathlib
+import time
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_statistics
+from . import mavlink_writer
+from ..common.modules.logger import logger
+
+
+READ_TIMEOUT = 0.1  # seconds
+REPORT_PERIOD = 10  # seconds
+
+
+def mavlink_writer_worker(
+    connection: mavutil.mavfile,
+    rate_limits: "dict[str, tuple[float, int]]",
+    link_rate: "float | None",
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker process.
+
+    connection is the connection to the drone, which no other worker writes.
+    rate_limits are the messages per second and largest burst of each rate limited message type.
+    link_rate is the bytes per second the link carries, None if unknown.
+    input_queue is where the other workers put their messages with mavlink_writer.request() .
+    """
+    # Instantiate logger
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    # Instantiate class object
+    result, writer = mavlink_writer.MavlinkWriter.create(
+        connection, input_queue, rate_limits, link_rate, local_logger
+    )
+    if not result:
+        local_logger.error("Failed to create writer", True)
+        return
+
+    # Get Pylance to stop complaining
+    assert writer is not None
+
+    # Loop forever until exit has been requested or the queue has been shut down
+    next_report_time = time.monotonic() + REPORT_PERIOD
+    while not controller.is_exit_requested():
+        # Method blocks worker if pause has been requested
+        controller.check_pause()
+
+        # Loop iterations and their times are published to main with the worker statistics
+        worker_statistics.record_iteration()
+
+        if not writer.run(READ_TIMEOUT):
+            break
+
+        if time.monotonic() >= next_report_time:
+            local_logger.info(f"Writer {writer.get_report()}", True)
+            next_report_time += REPORT_PERIOD
+
+    local_logger.info(f"Writer {writer.get_report()}", True)
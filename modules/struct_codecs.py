@@ -0,0 +1,40 @@
+"""
+Fixed layout encodings of the structs sent between the workers.
+"""
+
+from utilities.workers import struct_codec
+from .command import command
+from .telemetry import telemetry
+
+
+TELEMETRY_DATA_CODEC = struct_codec.StructCodec(
+    1,
+    telemetry.TelemetryData,
+    [
+        "time_since_boot",
+        "x",
+        "y",
+        "z",
+        "x_velocity",
+        "y_velocity",
+        "z_velocity",
+        "roll",
+        "pitch",
+        "yaw",
+        "roll_speed",
+        "pitch_speed",
+        "yaw_speed",
+    ],
+    ["time_since_boot"],
+)
+
+POSITION_CODEC = struct_codec.StructCodec(2, command.Position, ["x", "y", "z"])
+
+
+def register_codecs() -> None:
+    """
+    Registers the codecs so that queues encode TelemetryData and Position automatically.
+    Call in main before creating the queues, which carry the codecs to the workers.
+    """
+    struct_codec.register_codec(TELEMETRY_DATA_CODEC)
+    struct_codec.register_codec(POSITION_CODEC)
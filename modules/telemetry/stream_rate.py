@@ -0,0 +1,351 @@
+"""
+Requests the telemetry message rates from the autopilot and checks that they are achieved.
+"""
+
+import enum
+
+from pymavlink import mavutil
+
+from ..common.modules.logger import logger
+
+
+# The drone, as assumed throughout the bootcamp
+TARGET_SYSTEM = 1
+TARGET_COMPONENT = 0
+
+# Legacy data stream of each message, for autopilots without MAV_CMD_SET_MESSAGE_INTERVAL
+DATA_STREAM_IDS = {
+    "ATTITUDE": mavutil.mavlink.MAV_DATA_STREAM_EXTRA1,
+    "LOCAL_POSITION_NED": mavutil.mavlink.MAV_DATA_STREAM_POSITION,
+}
+
+# Message types the negotiator reads, in addition to the streams it negotiates
+NEGOTIATION_MESSAGE_TYPES = ["HEARTBEAT", "COMMAND_ACK"]
+
+
+class StreamState(enum.Enum):
+    """
+    Negotiation of a single message stream.
+
+    PENDING: Waiting to request the rate.
+    REQUESTED: MAV_CMD_SET_MESSAGE_INTERVAL sent, waiting for the acknowledgement.
+    VERIFYING: Rate requested, measuring the rate achieved.
+    VERIFIED: Rate achieved, still measured to catch the autopilot resetting it.
+    FAILED: Rate not achieved with either request, retried after the drone reconnects.
+    """
+
+    PENDING = 0
+    REQUESTED = 1
+    VERIFYING = 2
+    VERIFIED = 3
+    FAILED = 4
+
+
+class _Stream:  # pylint: disable=too-many-instance-attributes
+    """
+    Negotiation progress of a message type.
+    """
+
+    def __init__(self, message_id: int, rate: float) -> None:
+        self.message_id = message_id
+        self.rate = rate
+
+        self.state = StreamState.PENDING
+        self.is_fallback = False
+        self.attempt_count = 0
+        self.deadline = 0.0
+        self.verify_start = 0.0
+        self.received_count = 0
+        self.achieved_rate = 0.0
+
+
+class StreamRateNegotiator:
+    """
+    Asks the autopilot to stream each telemetry message at exactly its configured rate,
+    rather than taking whatever it streams, which is often far more than command needs.
+
+    Each rate is requested with MAV_CMD_SET_MESSAGE_INTERVAL, one at a time since the
+    acknowledgement does not say which message it is for. If the command is refused or never
+    acknowledged, the legacy REQUEST_DATA_STREAM is sent instead. The rate received is then
+    measured and a rate outside the tolerance is requested again.
+    All rates are requested again when heartbeats resume after the drone was lost.
+
+    The negotiator does not read or write the connection: run() takes the messages received
+    and returns the messages to send, e.g. through the writer's queue.
+    """
+
+    __create_key = object()
+
+    __ACK_TIMEOUT = 1.0  # seconds
+    __MAX_ATTEMPT_COUNT = 3
+    __VERIFY_PERIOD = 2.0  # seconds
+    # Largest relative difference between the requested and achieved rates
+    __RATE_TOLERANCE = 0.2
+    __HEARTBEAT_TIMEOUT = 3.0  # seconds
+
+    @classmethod
+    def create(
+        cls,
+        connection: mavutil.mavfile,
+        rates: "dict[str, float]",
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, StreamRateNegotiator | None]":
+        """
+        connection: Connection to the drone, only used to encode messages.
+        rates: Messages per second of each message type.
+        local_logger: Existing logger from process.
+
+        Returns whether the negotiator was created and the negotiator.
+        """
+        streams = {}
+        for message_type, rate in rates.items():
+            message_id = getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{message_type}", None)
+            if message_id is None:
+                local_logger.error(f"Unknown message type {message_type}", True)
+                return False, None
+
+            if rate <= 0.0:
+                local_logger.error(
+                    f"Rate of {message_type} must be greater than 0, got {rate}", True
+                )
+                return False, None
+
+            streams[message_type] = _Stream(message_id, rate)
+
+        return True, StreamRateNegotiator(cls.__create_key, connection, streams, local_logger)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        connection: mavutil.mavfile,
+        streams: "dict[str, _Stream]",
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is StreamRateNegotiator.__create_key, "Use create() method"
+
+        self.__connection = connection
+        self.__streams = streams
+        self.__logger = local_logger
+
+        # The drone may not send heartbeats, so it is only considered lost once they stop
+        self.__last_heartbeat_time: "float | None" = None
+        self.__is_connected = True
+
+    def __request_interval(self, message_type: str, now: float) -> mavutil.mavlink.MAVLink_message:
+        """
+        MAV_CMD_SET_MESSAGE_INTERVAL for the stream.
+        """
+        stream = self.__streams[message_type]
+        stream.state = StreamState.REQUESTED
+        stream.attempt_count += 1
+        stream.deadline = now + self.__ACK_TIMEOUT
+        return self.__connection.mav.command_long_encode(
+            TARGET_SYSTEM,
+            TARGET_COMPONENT,
+            mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL,
+            0,
+            stream.message_id,
+            1e6 / stream.rate,  # us
+            0,
+            0,
+            0,
+            0,
+            0,
+        )
+
+    def __request_data_stream(
+        self, message_type: str, now: float
+    ) -> "mavutil.mavlink.MAVLink_message | None":
+        """
+        REQUEST_DATA_STREAM for the stream, None if the message has no data stream.
+        """
+        stream = self.__streams[message_type]
+        stream_id = DATA_STREAM_IDS.get(message_type)
+        if stream_id is None:
+            self.__fail(message_type)
+            return None
+
+        stream.is_fallback = True
+        self.__start_verifying(message_type, now)
+        return self.__connection.mav.request_data_stream_encode(
+            TARGET_SYSTEM, TARGET_COMPONENT, stream_id, max(round(stream.rate), 1), 1
+        )
+
+    def __start_verifying(self, message_type: str, now: float) -> None:
+        """
+        Starts measuring the rate of the stream.
+        """
+        stream = self.__streams[message_type]
+        stream.state = StreamState.VERIFYING
+        stream.verify_start = now
+        stream.deadline = now + self.__VERIFY_PERIOD
+        stream.received_count = 0
+
+    def __fail(self, message_type: str) -> None:
+        """
+        Gives up on the stream until the drone reconnects.
+        """
+        stream = self.__streams[message_type]
+        stream.state = StreamState.FAILED
+        self.__logger.warning(
+            f"Could not get {message_type} at {stream.rate}/s, receiving {stream.achieved_rate}/s",
+            True,
+        )
+
+    def __restart(self) -> None:
+        """
+        Requests every rate again.
+        """
+        for stream in self.__streams.values():
+            stream.state = StreamState.PENDING
+            stream.is_fallback = False
+            stream.attempt_count = 0
+
+    def __read(self, message: mavutil.mavlink.MAVLink_message, now: float) -> None:
+        """
+        Updates the negotiation with a received message.
+        """
+        message_type = message.get_type()
+        if message_type == "HEARTBEAT":
+            self.__last_heartbeat_time = now
+            if not self.__is_connected:
+                self.__logger.info("Drone reconnected, requesting telemetry rates again", True)
+                self.__is_connected = True
+                self.__restart()
+
+            return
+
+        if message_type in self.__streams:
+            self.__streams[message_type].received_count += 1
+            return
+
+        if (
+            message_type != "COMMAND_ACK"
+            or message.command != mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL  # type: ignore
+        ):
+            return
+
+        for requested_type, stream in self.__streams.items():
+            if stream.state != StreamState.REQUESTED:
+                continue
+
+            if message.result == mavutil.mavlink.MAV_RESULT_ACCEPTED:  # type: ignore
+                self.__start_verifying(requested_type, now)
+            else:
+                # Given up on with the next timeout check, which sends the fallback
+                stream.attempt_count = self.__MAX_ATTEMPT_COUNT
+                stream.deadline = now
+
+            return
+
+    def __check_rate(
+        self, message_type: str, now: float
+    ) -> "mavutil.mavlink.MAVLink_message | None":
+        """
+        Measures the rate of a stream at the end of its period.
+
+        Returns the message that requests the rate again, if any.
+        """
+        stream = self.__streams[message_type]
+        # Checked at the first run after the deadline, which can be well past it
+        stream.achieved_rate = stream.received_count / (now - stream.verify_start)
+        is_achieved = abs(stream.achieved_rate - stream.rate) <= self.__RATE_TOLERANCE * stream.rate
+        was_verified = stream.state == StreamState.VERIFIED
+        self.__start_verifying(message_type, now)
+
+        if is_achieved:
+            stream.state = StreamState.VERIFIED
+            stream.attempt_count = 0
+            return None
+
+        if was_verified or stream.attempt_count < self.__MAX_ATTEMPT_COUNT:
+            # Back in line to request it again
+            stream.state = StreamState.PENDING
+            return None
+
+        if not stream.is_fallback:
+            return self.__request_data_stream(message_type, now)
+
+        self.__fail(message_type)
+        return None
+
+    def run(
+        self, messages: "list[mavutil.mavlink.MAVLink_message]", now: float
+    ) -> "list[mavutil.mavlink.MAVLink_message]":
+        """
+        Updates the negotiation with the messages received and its timeouts.
+
+        messages: Messages received since the last run, other types are ignored.
+        now: Current time in seconds.
+
+        Returns the messages to send.
+        """
+        for message in messages:
+            self.__read(message, now)
+
+        if (
+            self.__is_connected
+            and self.__last_heartbeat_time is not None
+            and now - self.__last_heartbeat_time > self.__HEARTBEAT_TIMEOUT
+        ):
+            self.__logger.warning("Drone lost, pausing telemetry rate negotiation", True)
+            self.__is_connected = False
+
+        # Nothing to request from a drone that is not there
+        if not self.__is_connected:
+            return []
+
+        requests = []
+        for message_type, stream in self.__streams.items():
+            if now < stream.deadline:
+                continue
+
+            if stream.state == StreamState.REQUESTED:
+                if stream.attempt_count < self.__MAX_ATTEMPT_COUNT:
+                    # Not acknowledged, requested again below
+                    stream.state = StreamState.PENDING
+                else:
+                    request = self.__request_data_stream(message_type, now)
+                    if request is not None:
+                        requests.append(request)
+            elif stream.state in (StreamState.VERIFYING, StreamState.VERIFIED):
+                request = self.__check_rate(message_type, now)
+                if request is not None:
+                    requests.append(request)
+
+        # One interval request in flight at a time
+        if not any(stream.state == StreamState.REQUESTED for stream in self.__streams.values()):
+            for message_type, stream in self.__streams.items():
+                if stream.state == StreamState.PENDING:
+                    requests.append(self.__request_interval(message_type, now))
+                    break
+
+        return requests
+
+    def get_states(self) -> "dict[str, StreamState]":
+        """
+        Returns the negotiation state of each message type.
+        """
+        return {message_type: stream.state for message_type, stream in self.__streams.items()}
+
+    def get_achieved_rates(self) -> "dict[str, float]":
+        """
+        Returns the messages per second last measured of each message type.
+        """
+        return {
+            message_type: stream.achieved_rate for message_type, stream in self.__streams.items()
+        }
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        return ", ".join(
+            f"{message_type}: {stream.state.name} "
+            f"{stream.achieved_rate:.1f}/{stream.rate:.1f}/s"
+            f"{' (data stream)' if stream.is_fallback else ''}"
+            for message_type, stream in self.__streams.items()
+        )
@@ -47,8 +47,15 @@ def telemetry_worker(
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
     # Instantiate class object (telemetry.Telemetry)
+    # Optionally, instantiate modules.telemetry.stream_rate.StreamRateNegotiator with the rates to
+    # request
+    # Have the router also send it modules.telemetry.stream_rate.NEGOTIATION_MESSAGE_TYPES, give it
+    # every message received and put the messages it returns into the writer's queue
+    # (modules.mavlink_writer.mavlink_writer.request)
 
     # Main loop: do work.
+    # Call utilities.workers.worker_statistics.record_iteration() once per loop for the statistics
+    # main logs
 
 
 # =================================================================================================
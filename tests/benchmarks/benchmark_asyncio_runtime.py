@@ -0,0 +1,332 @@
+"""
+Compares the asyncio runtime with worker processes on telemetry to command latency and CPU usage.
+To run:
+```
+python -m tests.benchmarks.benchmark_asyncio_runtime
+```
+
+A mock drone sends ATTITUDE at TELEMETRY_RATE and measures the time until the COMMAND_LONG
+made from it arrives. Stand-ins for the bootcamp workers forward telemetry to command.
+In the multiprocess version only the telemetry worker reads the connection,
+as several processes reading one socket split its bytes between them.
+"""
+
+import asyncio
+import multiprocessing as mp
+import multiprocessing.sharedctypes
+import multiprocessing.synchronize
+import resource
+import select
+import statistics
+import time
+
+from pymavlink import mavutil
+
+from modules.telemetry import telemetry
+from utilities.workers import asyncio_runtime
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+PORT = 14571
+TELEMETRY_RATE = 100  # Hz
+HEARTBEAT_PERIOD = 1  # seconds
+DURATION = 5  # seconds
+# Pipeline keeps running after the drone is done, so the drone never waits on it
+RUN_TIME = DURATION + 2  # seconds
+CONNECT_DELAY = 0.5  # seconds
+RECEIVE_TIMEOUT = 0.1  # seconds
+
+
+def drone(results: mp.Queue, done: multiprocessing.synchronize.Event) -> None:
+    """
+    Sends telemetry numbered by its time since boot, and measures the latency of each command
+    that echoes the number. Keeps the connection open until done, as a closed connection
+    keeps the pipeline's socket readable.
+    """
+    connection = mavutil.mavlink_connection(
+        f"tcpin:127.0.0.1:{PORT}", source_system=1, source_component=0
+    )
+    connection.wait_heartbeat()
+
+    send_times = {}
+    latencies = []
+    start_time = time.monotonic()
+    next_telemetry_time = start_time
+    next_heartbeat_time = start_time
+    while time.monotonic() - start_time < DURATION:
+        now = time.monotonic()
+        if now >= next_heartbeat_time:
+            connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_QUADROTOR, 0, 0, 0, 0)
+            next_heartbeat_time += HEARTBEAT_PERIOD
+
+        if now >= next_telemetry_time:
+            sequence = len(send_times)
+            send_times[sequence] = time.monotonic()
+            connection.mav.attitude_send(sequence, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+            next_telemetry_time += 1 / TELEMETRY_RATE
+
+        timeout = max(min(next_telemetry_time, next_heartbeat_time) - time.monotonic(), 0.0)
+        select.select([connection.fd], [], [], timeout)
+        while True:
+            message = connection.recv_msg()
+            if message is None:
+                break
+
+            if message.get_type() == "COMMAND_LONG":
+                latencies.append(time.monotonic() - send_times[int(message.param1)])
+
+    results.put((len(send_times), latencies))
+    done.wait()
+    connection.close()
+
+
+def connect() -> mavutil.mavfile:
+    """
+    Connects to the drone as the ground station.
+    """
+    connection = mavutil.mavlink_connection(f"tcp:127.0.0.1:{PORT}")
+    connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_GCS, 0, 0, 0, 0)
+    return connection
+
+
+def send_command(connection: mavutil.mavfile, data: telemetry.TelemetryData) -> None:
+    """
+    Command stand-in, echoes the time since boot of the telemetry it is based on.
+    """
+    connection.mav.command_long_send(
+        1,
+        0,
+        mavutil.mavlink.MAV_CMD_CONDITION_YAW,
+        0,
+        data.time_since_boot,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+    )
+
+
+def to_telemetry_data(message: object) -> telemetry.TelemetryData:
+    """
+    Telemetry stand-in.
+    """
+    return telemetry.TelemetryData(
+        time_since_boot=message.time_boot_ms,  # type: ignore
+        roll=message.roll,  # type: ignore
+        pitch=message.pitch,  # type: ignore
+        yaw=message.yaw,  # type: ignore
+    )
+
+
+def heartbeat_sender_worker(
+    connection: mavutil.mavfile, controller: worker_controller.WorkerController
+) -> None:
+    """
+    Heartbeat sender process.
+    """
+    while not controller.is_exit_requested():
+        connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_GCS, 0, 0, 0, 0)
+        time.sleep(HEARTBEAT_PERIOD)
+
+
+def telemetry_worker(
+    connection: mavutil.mavfile,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Telemetry process.
+    """
+    while not controller.is_exit_requested():
+        message = connection.recv_match(type="ATTITUDE", blocking=True, timeout=RECEIVE_TIMEOUT)
+        if message is not None:
+            output_queue.put(to_telemetry_data(message))
+
+
+def command_worker(
+    connection: mavutil.mavfile,
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Command process.
+    """
+    while not controller.is_exit_requested():
+        result, data = input_queue.get(RECEIVE_TIMEOUT)
+        if result and data is not None:
+            send_command(connection, data)
+
+
+def run_processes() -> None:
+    """
+    Runs each worker in its own process sharing the connection, as bootcamp main does.
+    """
+    connection = connect()
+    controller = worker_controller.WorkerController()
+    telemetry_to_command_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        None, backend=queue_proxy_wrapper.QueueBackend.PIPE
+    )
+
+    managers = []
+    for target, input_queues, output_queues in [
+        (heartbeat_sender_worker, [], []),
+        (telemetry_worker, [], [telemetry_to_command_queue]),
+        (command_worker, [telemetry_to_command_queue], []),
+    ]:
+        result, properties = worker_manager.WorkerProperties.create(
+            1, target, (connection,), input_queues, output_queues, controller, None  # type: ignore
+        )
+        assert result
+        assert properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(properties, None)  # type: ignore
+        assert result
+        assert manager is not None
+        managers.append(manager)
+
+    for manager in managers:
+        manager.start_workers()
+
+    time.sleep(RUN_TIME)
+
+    controller.request_exit()
+    for manager in managers:
+        manager.join_workers()
+
+    telemetry_to_command_queue.close()
+
+
+async def run_coroutines_async() -> None:
+    """
+    Runs each worker as a coroutine reading through the dispatcher.
+    """
+    connection = connect()
+    dispatcher = asyncio_runtime.MavlinkDispatcher(connection)
+    dispatcher.start()
+    exit_event = asyncio.Event()
+
+    heartbeat_queue = dispatcher.subscribe(["HEARTBEAT"])
+    attitude_queue = dispatcher.subscribe(["ATTITUDE"])
+    telemetry_to_command_queue = asyncio.Queue()
+
+    async def heartbeat_receiver() -> None:
+        while True:
+            await heartbeat_queue.get()
+
+    async def telemetry_coroutine() -> None:
+        while True:
+            message = await attitude_queue.get()
+            telemetry_to_command_queue.put_nowait(to_telemetry_data(message))
+
+    async def command_coroutine() -> None:
+        while True:
+            send_command(connection, await telemetry_to_command_queue.get())
+
+    tasks = [
+        asyncio.create_task(
+            asyncio_runtime.run_periodically(
+                HEARTBEAT_PERIOD,
+                lambda: connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_GCS, 0, 0, 0, 0),
+                exit_event,
+            )
+        ),
+        asyncio.create_task(heartbeat_receiver()),
+        asyncio.create_task(telemetry_coroutine()),
+        asyncio.create_task(command_coroutine()),
+    ]
+
+    await asyncio.sleep(RUN_TIME)
+
+    exit_event.set()
+    for task in tasks:
+        task.cancel()
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+    dispatcher.stop()
+
+
+def run_coroutines() -> None:
+    """
+    Runs the workers as coroutines in this process.
+    """
+    asyncio.run(run_coroutines_async())
+
+
+def run_pipeline(target: "() -> None", cpu_time: multiprocessing.sharedctypes.Synchronized) -> None:  # type: ignore
+    """
+    Runs the pipeline and measures the CPU time of this process and all of its children.
+    """
+    target()
+
+    cpu_time.value = sum(
+        usage.ru_utime + usage.ru_stime
+        for usage in [
+            resource.getrusage(resource.RUSAGE_SELF),
+            resource.getrusage(resource.RUSAGE_CHILDREN),
+        ]
+    )
+
+
+def run_trial(target: "() -> None") -> "tuple[int, list[float], float]":  # type: ignore
+    """
+    Runs the drone against the pipeline.
+
+    Returns the number of telemetry messages sent, the latencies in seconds,
+    and the CPU time of the pipeline in seconds.
+    """
+    results = mp.Queue()
+    done = mp.Event()
+    cpu_time = mp.Value("d", 0.0)
+    drone_process = mp.Process(target=drone, args=(results, done))
+    drone_process.start()
+    time.sleep(CONNECT_DELAY)
+
+    pipeline_process = mp.Process(target=run_pipeline, args=(target, cpu_time))
+    pipeline_process.start()
+
+    sent_count, latencies = results.get()
+    pipeline_process.join()
+    done.set()
+    drone_process.join()
+
+    return sent_count, latencies, cpu_time.value
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    # Workers share the connection, which needs fork
+    mp.set_start_method("fork", force=True)
+
+    print(
+        f"{'runtime':<12}{'commands':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+        f"{'CPU s':>8}{'CPU %':>8}"
+    )
+    for name, target in [("processes", run_processes), ("asyncio", run_coroutines)]:
+        sent_count, latencies, cpu_time = run_trial(target)
+        if len(latencies) == 0:
+            print(f"{name:<12}no commands received")
+            return -1
+
+        latencies.sort()
+        print(
+            f"{name:<12}{f'{len(latencies)}/{sent_count}':>10}"
+            f"{statistics.median(latencies) * 1e3:>10.2f}"
+            f"{latencies[int(len(latencies) * 0.99)] * 1e3:>10.2f}{latencies[-1] * 1e3:>10.2f}"
+            f"{cpu_time:>8.2f}{cpu_time / RUN_TIME * 100:>8.1f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,139 @@
+"""
+Compares the memory and startup time of the four bootcamp workers for each execution kind.
+To run:
+```
+python -m tests.benchmarks.benchmark_execution_kind
+```
+"""
+
+import multiprocessing as mp
+import multiprocessing.sharedctypes
+import pathlib
+import time
+
+# Imported by every worker, as in bootcamp main
+from pymavlink import mavutil  # pylint: disable=unused-import
+
+from utilities.workers import worker_controller
+from utilities.workers import worker_host
+from utilities.workers import worker_manager
+
+
+# Heartbeat sender, heartbeat receiver, telemetry, command
+BOOTCAMP_WORKER_NAMES = ["heartbeat_sender", "heartbeat_receiver", "telemetry", "command"]
+START_METHODS = ["fork", "spawn"]
+PERIOD = 0.01  # seconds
+SETTLE_TIME = 0.5  # seconds
+
+
+def io_worker(
+    running_count: multiprocessing.sharedctypes.Synchronized,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Stands in for a bootcamp worker, which mostly waits on the connection.
+    """
+    with running_count.get_lock():
+        running_count.value += 1
+
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        time.sleep(PERIOD)
+
+
+def read_memory(pid: int) -> "tuple[int, int]":
+    """
+    Returns the resident and proportional set sizes of the process in kB,
+    the proportional size splitting pages shared with other processes between them.
+    """
+    resident = 0
+    proportional = 0
+    for line in pathlib.Path(f"/proc/{pid}/smaps_rollup").read_text(encoding="utf-8").splitlines():
+        fields = line.split()
+        if fields[0] == "Rss:":
+            resident = int(fields[1])
+        elif fields[0] == "Pss:":
+            proportional = int(fields[1])
+
+    return resident, proportional
+
+
+def run_trial(execution_kind: worker_host.ExecutionKind) -> "tuple[float, int, int, int]":
+    """
+    Starts the workers and measures them once all are running.
+
+    Returns the startup time in seconds, the number of processes, and their total
+    resident and proportional set sizes in kB.
+    """
+    controller = worker_controller.WorkerController()
+    running_count = mp.Value("i", 0)
+    host = worker_host.WorkerHost()
+
+    managers = []
+    for _ in BOOTCAMP_WORKER_NAMES:
+        result, properties = worker_manager.WorkerProperties.create(
+            1, io_worker, (running_count,), [], [], controller, None, execution_kind  # type: ignore
+        )
+        assert result
+        assert properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(properties, None, host=host)  # type: ignore
+        assert result
+        assert manager is not None
+        managers.append(manager)
+
+    start_time = time.monotonic()
+    for manager in managers:
+        manager.start_workers()
+
+    while running_count.value < len(BOOTCAMP_WORKER_NAMES):
+        time.sleep(0.0001)
+
+    startup_time = time.monotonic() - start_time
+
+    # Let the workers reach their steady state
+    time.sleep(SETTLE_TIME)
+    processes = mp.active_children()
+    resident = 0
+    proportional = 0
+    for process in processes:
+        process_resident, process_proportional = read_memory(process.pid)
+        resident += process_resident
+        proportional += process_proportional
+
+    controller.request_exit()
+    for manager in managers:
+        manager.join_workers()
+
+    return startup_time, len(processes), resident, proportional
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    print(
+        f"{'start method':<14}{'execution kind':<16}{'processes':>10}{'startup ms':>12}"
+        f"{'RSS MB':>10}{'PSS MB':>10}"
+    )
+    for start_method in START_METHODS:
+        if start_method not in mp.get_all_start_methods():
+            continue
+
+        mp.set_start_method(start_method, force=True)
+        for execution_kind in worker_host.ExecutionKind:
+            startup_time, process_count, resident, proportional = run_trial(execution_kind)
+            print(
+                f"{start_method:<14}{execution_kind.name:<16}{process_count:>10}"
+                f"{startup_time * 1e3:>12.1f}{resident / 1024:>10.1f}{proportional / 1024:>10.1f}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
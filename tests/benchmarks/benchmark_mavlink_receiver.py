@@ -0,0 +1,120 @@
+"""
+Compares the CPU time per message of a recv_match() loop with the bulk receiver.
+To run:
+```
+python -m tests.benchmarks.benchmark_mavlink_receiver
+```
+
+The telemetry rate mock drone sends ATTITUDE and LOCAL_POSITION_NED for DURATION at each rate,
+and each loop receives for as long.
+The recv_match() loop asks for the telemetry types as the telemetry worker would, reading each
+message with its own system calls. The receiver waits on the socket and parses all the bytes
+that arrived with each wakeup.
+"""
+
+import subprocess
+import time
+
+from pymavlink import mavutil
+
+from modules.mavlink_router import mavlink_receiver
+from modules.mavlink_router import mavlink_router
+
+
+MOCK_DRONE_MODULE = "tests.integration.mock_drones.telemetry_rate_drone"
+CONNECTION_STRING = "tcp:localhost:12345"
+RATES = [100, 1000, 10000]  # messages per second
+DURATION = 5  # seconds
+CONNECT_DELAY = 1  # seconds
+READ_TIMEOUT = 0.1  # seconds
+
+
+def run_recv_match(connection: mavutil.mavfile) -> "tuple[int, str]":
+    """
+    Receives one message per call for the duration.
+
+    Returns the number of messages received and a note.
+    """
+    received_count = 0
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < DURATION + CONNECT_DELAY:
+        message = connection.recv_match(
+            type=mavlink_router.TELEMETRY_MESSAGE_TYPES, blocking=True, timeout=READ_TIMEOUT
+        )
+        if message is not None:
+            received_count += 1
+
+    return received_count, ""
+
+
+def run_receiver(connection: mavutil.mavfile) -> "tuple[int, str]":
+    """
+    Receives all messages available per wakeup for the duration.
+
+    Returns the number of messages received and the receiver counters.
+    """
+    result, receiver = mavlink_receiver.MavlinkReceiver.create(connection, None)  # type: ignore
+    assert result
+    assert receiver is not None
+
+    received_count = 0
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < DURATION + CONNECT_DELAY:
+        _, messages = receiver.receive(READ_TIMEOUT)
+        received_count += len(messages)
+
+    receiver.close()
+    return received_count, str(receiver)
+
+
+def run_trial(rate: int, target: "(mavutil.mavfile) -> tuple[int, str]") -> "tuple[int, float, str]":  # type: ignore
+    """
+    Runs the receive loop against the drone.
+
+    Returns the number of messages received, the CPU time in seconds and a note.
+    """
+    with subprocess.Popen(
+        ["python", "-m", MOCK_DRONE_MODULE, str(rate), str(DURATION)], stdout=subprocess.DEVNULL
+    ) as drone_process:
+        time.sleep(CONNECT_DELAY)
+
+        connection = mavutil.mavlink_connection(CONNECTION_STRING)
+        connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_GCS, 0, 0, 0, 0)
+
+        start_cpu_time = time.process_time()
+        received_count, note = target(connection)
+        cpu_time = time.process_time() - start_cpu_time
+
+        # The drone closes once the receiver has
+        connection.close()
+        drone_process.wait()
+
+    return received_count, cpu_time, note
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    print(f"{'rate':>8}  {'loop':<12}{'received':>10}{'CPU s':>8}{'us/message':>12}")
+    for rate in RATES:
+        for name, target in [("recv_match", run_recv_match), ("receiver", run_receiver)]:
+            received_count, cpu_time, note = run_trial(rate, target)
+            if received_count == 0:
+                print(f"{rate:>8}  {name:<12}no messages received")
+                return -1
+
+            print(
+                f"{rate:>8}  {name:<12}{received_count:>10}{cpu_time:>8.2f}"
+                f"{cpu_time / received_count * 1e6:>12.1f}  {note}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
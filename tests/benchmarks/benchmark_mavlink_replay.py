@@ -0,0 +1,162 @@
+"""
+Measures how fast a recorded flight replays through the router at the maximum speed.
+To run:
+```
+python -m tests.benchmarks.benchmark_mavlink_replay
+```
+
+A flight of FLIGHT_DURATION is recorded with ATTITUDE and LOCAL_POSITION_NED at TELEMETRY_RATE
+each and a HEARTBEAT every second, as the router would record it.
+It is then replayed as fast as possible, once with the recv_match() loop a worker would use and
+once through the router into a telemetry subscriber queue, which includes the transfer through
+shared memory that recv_match() does not have.
+"""
+
+import pathlib
+import tempfile
+import time
+
+from pymavlink import mavutil
+
+from modules.mavlink_replay import mavlink_recorder
+from modules.mavlink_replay import replay_connection
+from modules.mavlink_router import mavlink_router
+from utilities.workers import queue_proxy_wrapper
+
+
+FLIGHT_DURATION = 3600  # seconds
+TELEMETRY_RATE = 50  # messages per second
+READ_TIMEOUT = 0.1  # seconds
+QUEUE_MAX_SIZE = 10000
+
+
+def record_flight(path: str) -> int:
+    """
+    Records the synthetic flight.
+
+    Returns the number of frames recorded.
+    """
+    result, recorder = mavlink_recorder.MavlinkRecorder.create(path, None)  # type: ignore
+    assert result
+    assert recorder is not None
+
+    encoder = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=0)
+    start_time = time.time()
+    for i in range(0, FLIGHT_DURATION * TELEMETRY_RATE):
+        time_boot_ms = i * 1000 // TELEMETRY_RATE
+        messages = [
+            encoder.attitude_encode(time_boot_ms, 0, 0, i / TELEMETRY_RATE, 0, 0, 0),
+            encoder.local_position_ned_encode(time_boot_ms, i / TELEMETRY_RATE, 0, 0, 1, 0, 0),
+        ]
+        if i % TELEMETRY_RATE == 0:
+            messages.append(
+                encoder.heartbeat_encode(mavutil.mavlink.MAV_TYPE_QUADROTOR, 0, 0, 0, 0)
+            )
+
+        for message in messages:
+            message.pack(encoder)
+            encoder.seq = (encoder.seq + 1) % 256
+
+        recorder.record(messages, start_time + i / TELEMETRY_RATE)
+
+    recorder.close()
+    return recorder.get_frame_count()
+
+
+def run_recv_match(connection: replay_connection.ReplayConnection) -> int:
+    """
+    Receives one message per call until the replay ends.
+
+    Returns the number of telemetry messages received.
+    """
+    received_count = 0
+    while not connection.is_ended():
+        message = connection.recv_match(
+            type=mavlink_router.TELEMETRY_MESSAGE_TYPES, blocking=True, timeout=READ_TIMEOUT
+        )
+        if message is not None:
+            received_count += 1
+
+    return received_count
+
+
+def run_router(connection: replay_connection.ReplayConnection) -> int:
+    """
+    Routes the telemetry into its queue until the replay ends.
+
+    Returns the number of telemetry messages received.
+    """
+    queue = queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        overflow_policy=queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST,
+    )
+    result, router = mavlink_router.MavlinkRouter.create(
+        connection, [(mavlink_router.TELEMETRY_MESSAGE_TYPES, queue)], None, None  # type: ignore
+    )
+    assert result
+    assert router is not None
+
+    received_count = 0
+    is_connected = True
+    while is_connected:
+        is_connected, _ = router.run(READ_TIMEOUT)
+        received_count += len(queue.get_many(QUEUE_MAX_SIZE, 0.0))
+
+    queue.close()
+    return received_count
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(pathlib.Path(directory) / "flight.tlog")
+
+        start_time = time.monotonic()
+        frame_count = record_flight(path)
+        elapsed_time = time.monotonic() - start_time
+        size = pathlib.Path(path).stat().st_size
+        print(
+            f"Recorded {FLIGHT_DURATION}s flight: {frame_count} frames, {size / 1e6:.1f} MB "
+            f"in {elapsed_time:.1f}s"
+        )
+
+        print(f"{'loop':<12}{'received':>10}{'wall s':>8}{'speedup':>9}{'us/message':>12}")
+        for name, target in [("recv_match", run_recv_match), ("router", run_router)]:
+            result, connection = replay_connection.ReplayConnection.create(
+                path, replay_connection.MAX_SPEED, None  # type: ignore
+            )
+            if not result:
+                print("Could not open the recording")
+                return -1
+
+            # Get Pylance to stop complaining
+            assert connection is not None
+
+            start_time = time.monotonic()
+            received_count = target(connection)
+            elapsed_time = time.monotonic() - start_time
+            connection.close()
+
+            if received_count == 0:
+                print(f"{name:<12}no messages received")
+                return -1
+
+            print(
+                f"{name:<12}{received_count:>10}{elapsed_time:>8.1f}"
+                f"{FLIGHT_DURATION / elapsed_time:>8.0f}x"
+                f"{elapsed_time / received_count * 1e6:>12.1f}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,173 @@
+"""
+Measures how many messages per second the MAVLink router sustains and what slow subscribers drop.
+To run:
+```
+python -m tests.benchmarks.benchmark_mavlink_router
+```
+
+A mock drone sends a mix of HEARTBEAT, ATTITUDE, LOCAL_POSITION_NED, COMMAND_ACK and SYS_STATUS
+as fast as it can. The router runs in this process and fans the messages out to the queues of the
+heartbeat, telemetry and command workers, which are stand-ins that only drain their queue.
+SYS_STATUS has no subscriber and is only counted.
+"""
+
+import multiprocessing as mp
+import multiprocessing.synchronize
+import time
+
+from pymavlink import mavutil
+
+from modules.mavlink_router import mavlink_router
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+PORT = 14572
+DURATION = 5  # seconds
+CONNECT_DELAY = 0.5  # seconds
+READ_TIMEOUT = 0.1  # seconds
+SEND_TIMEOUT = 0.1  # seconds
+# Messages packed into a single send
+SEND_BATCH_SIZE = 50
+QUEUE_MAX_SIZE = 100
+# Queue items per transfer
+BATCH_SIZE = 32
+# Delay of the slow subscriber per message, 0 for none
+SLOW_DELAY = 0.001  # seconds
+
+
+def drone(done: multiprocessing.synchronize.Event) -> None:
+    """
+    Sends pre-packed messages until done, then closes the connection.
+    Sends time out so that done is seen once the router stops reading.
+    """
+    connection = mavutil.mavlink_connection(
+        f"tcpin:127.0.0.1:{PORT}", source_system=1, source_component=0
+    )
+    connection.wait_heartbeat()
+
+    mav = connection.mav
+    messages = [
+        mav.heartbeat_encode(mavutil.mavlink.MAV_TYPE_QUADROTOR, 0, 0, 0, 0),
+        mav.attitude_encode(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+        mav.local_position_ned_encode(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+        mav.command_ack_encode(mavutil.mavlink.MAV_CMD_CONDITION_YAW, 0),
+        mav.sys_status_encode(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+    ]
+    data = b"".join(
+        messages[i % len(messages)].pack(mav) for i in range(0, SEND_BATCH_SIZE)  # type: ignore
+    )
+
+    connection.port.settimeout(SEND_TIMEOUT)
+    while not done.is_set():
+        try:
+            connection.port.sendall(data)
+        except TimeoutError:
+            continue
+
+    connection.close()
+
+
+def subscriber_worker(
+    delay: float,
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Subscriber stand-in, drains its queue with a delay per message.
+    """
+    while not controller.is_exit_requested():
+        for message in input_queue.get_many(0, READ_TIMEOUT):
+            if message is None:
+                return
+
+            if delay > 0.0:
+                time.sleep(delay)
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    done = mp.Event()
+    drone_process = mp.Process(target=drone, args=(done,))
+    drone_process.start()
+    time.sleep(CONNECT_DELAY)
+
+    connection = mavutil.mavlink_connection(f"tcp:127.0.0.1:{PORT}")
+    connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_GCS, 0, 0, 0, 0)
+
+    controller = worker_controller.WorkerController()
+    subscriptions = []
+    managers = []
+    for message_types, delay in [
+        (mavlink_router.HEARTBEAT_RECEIVER_MESSAGE_TYPES, 0.0),
+        (mavlink_router.TELEMETRY_MESSAGE_TYPES, 0.0),
+        (mavlink_router.COMMAND_MESSAGE_TYPES, SLOW_DELAY),
+    ]:
+        queue = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            QUEUE_MAX_SIZE,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+            batch_size=BATCH_SIZE,
+            overflow_policy=queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST,
+        )
+        subscriptions.append((message_types, queue))
+
+        result, properties = worker_manager.WorkerProperties.create(
+            1, subscriber_worker, (delay,), [queue], [], controller, None  # type: ignore
+        )
+        assert result
+        assert properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(properties, None)  # type: ignore
+        assert result
+        assert manager is not None
+        managers.append(manager)
+
+    result, router = mavlink_router.MavlinkRouter.create(
+        connection, subscriptions, None, None  # type: ignore
+    )
+    assert result
+    assert router is not None
+
+    for manager in managers:
+        manager.start_workers()
+
+    read_count = 0
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < DURATION:
+        _, count = router.run(READ_TIMEOUT)
+        read_count += count
+
+    elapsed_time = time.monotonic() - start_time
+
+    done.set()
+    controller.request_exit()
+    for _, queue in subscriptions:
+        queue.shutdown()
+
+    for manager in managers:
+        manager.join_workers()
+
+    for _, queue in subscriptions:
+        queue.close()
+
+    drone_process.join()
+
+    print(f"Read {read_count} messages in {elapsed_time:.1f} s")
+    print(f"Sustained: {read_count / elapsed_time:.0f} messages/s")
+    print(f"Unrouted: {router.get_unrouted_count()}")
+    for (message_types, _), dropped_count in zip(subscriptions, router.get_dropped_counts()):
+        print(f"{str(message_types):<36} dropped: {dropped_count}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
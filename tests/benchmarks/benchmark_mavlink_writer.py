@@ -0,0 +1,195 @@
+"""
+Compares workers writing the connection directly with writing through the MAVLink writer.
+To run:
+```
+python -m tests.benchmarks.benchmark_mavlink_writer
+```
+
+A heartbeat worker and a command worker send to a mock drone for DURATION. The command worker
+sends a yaw command at COMMAND_RATE, far faster than the link should carry.
+Written directly, every command goes on the wire and the processes' sequence numbers collide,
+which the drone counts as lost messages. Through the writer, superseded yaw commands are
+coalesced, commands are rate limited and the link carries a single sequence.
+"""
+
+import multiprocessing as mp
+import multiprocessing.synchronize
+import time
+
+from pymavlink import mavutil
+
+from modules.mavlink_writer import mavlink_writer
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+PORT = 14573
+DURATION = 5  # seconds
+CONNECT_DELAY = 0.5  # seconds
+READ_TIMEOUT = 0.1  # seconds
+HEARTBEAT_PERIOD = 1  # seconds
+COMMAND_RATE = 200  # Hz
+# 57600 baud telemetry radio
+LINK_RATE = 5760  # bytes per second
+RATE_LIMITS = {"COMMAND_LONG": (10.0, 2)}
+# MAVLink 1 frame sizes
+HEARTBEAT_SIZE = 17  # bytes
+COMMAND_LONG_SIZE = 41  # bytes
+
+
+def drone(results: mp.Queue, done: multiprocessing.synchronize.Event) -> None:
+    """
+    Counts the messages received and lost until done.
+    """
+    connection = mavutil.mavlink_connection(
+        f"tcpin:127.0.0.1:{PORT}", source_system=1, source_component=0
+    )
+    connection.wait_heartbeat()
+
+    counts = {}
+    while not done.is_set():
+        message = connection.recv_match(blocking=True, timeout=READ_TIMEOUT)
+        if message is not None:
+            counts[message.get_type()] = counts.get(message.get_type(), 0) + 1
+
+    results.put((counts, connection.mav_loss))
+    connection.close()
+
+
+def heartbeat_worker(
+    output_queue: "queue_proxy_wrapper.QueueProxyWrapper | None",
+    connection: mavutil.mavfile,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Heartbeat sender stand-in, writes directly if there is no writer queue.
+    """
+    while not controller.is_exit_requested():
+        message = connection.mav.heartbeat_encode(mavutil.mavlink.MAV_TYPE_GCS, 0, 0, 0, 0)
+        if output_queue is None:
+            connection.mav.send(message)
+        else:
+            mavlink_writer.request(output_queue, message)
+
+        time.sleep(HEARTBEAT_PERIOD)
+
+
+def command_worker(
+    output_queue: "queue_proxy_wrapper.QueueProxyWrapper | None",
+    connection: mavutil.mavfile,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Command stand-in, turns to a new yaw at the command rate.
+    """
+    angle = 0
+    while not controller.is_exit_requested():
+        message = connection.mav.command_long_encode(
+            1, 0, mavutil.mavlink.MAV_CMD_CONDITION_YAW, 0, angle, 0, 0, 0, 0, 0, 0
+        )
+        if output_queue is None:
+            connection.mav.send(message)
+        else:
+            mavlink_writer.request(output_queue, message)
+
+        angle = (angle + 1) % 360
+        time.sleep(1 / COMMAND_RATE)
+
+
+def run_trial(use_writer: bool) -> "tuple[dict[str, int], int, str]":
+    """
+    Runs the workers against the drone.
+
+    Returns the messages the drone received of each type, the messages it lost,
+    and the writer report.
+    """
+    results = mp.Queue()
+    done = mp.Event()
+    drone_process = mp.Process(target=drone, args=(results, done))
+    drone_process.start()
+    time.sleep(CONNECT_DELAY)
+
+    connection = mavutil.mavlink_connection(f"tcp:127.0.0.1:{PORT}")
+    controller = worker_controller.WorkerController()
+    input_queue = None
+    if use_writer:
+        input_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            None, 0, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY, batch_size=64
+        )
+
+    managers = []
+    for target in [heartbeat_worker, command_worker]:
+        result, properties = worker_manager.WorkerProperties.create(
+            1, target, (input_queue, connection), [], [], controller, None  # type: ignore
+        )
+        assert result
+        assert properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(properties, None)  # type: ignore
+        assert result
+        assert manager is not None
+        managers.append(manager)
+
+    writer = None
+    if input_queue is not None:
+        result, writer = mavlink_writer.MavlinkWriter.create(
+            connection, input_queue, RATE_LIMITS, LINK_RATE, None  # type: ignore
+        )
+        assert result
+        assert writer is not None
+
+    for manager in managers:
+        manager.start_workers()
+
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < DURATION:
+        if writer is None:
+            time.sleep(READ_TIMEOUT)
+        else:
+            writer.run(READ_TIMEOUT)
+
+    controller.request_exit()
+    for manager in managers:
+        manager.join_workers()
+
+    done.set()
+    counts, lost_count = results.get()
+    drone_process.join()
+    connection.close()
+
+    if input_queue is not None:
+        input_queue.close()
+
+    return counts, lost_count, "" if writer is None else str(writer.get_report())
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    # Workers share the connection, which needs fork
+    mp.set_start_method("fork", force=True)
+
+    for name, use_writer in [("direct", False), ("writer", True)]:
+        counts, lost_count, report = run_trial(use_writer)
+        sent_bytes = (
+            counts.get("HEARTBEAT", 0) * HEARTBEAT_SIZE
+            + counts.get("COMMAND_LONG", 0) * COMMAND_LONG_SIZE
+        )
+        print(
+            f"{name:<8}received: {counts}, lost: {lost_count}, "
+            f"link: {sent_bytes / DURATION / LINK_RATE * 100:.0f}% of {LINK_RATE}B/s"
+        )
+        if report != "":
+            print(f"{'':<8}{report}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,121 @@
+"""
+Compares telemetry to command latency of the queue backends for a hop with a single producer and
+a single consumer. To run:
+```
+python -m tests.benchmarks.benchmark_pipe_channel
+```
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+import statistics
+import time
+
+from modules.telemetry import telemetry
+from utilities.workers import queue_proxy_wrapper
+
+
+ITEM_COUNT = 2000
+# Telemetry arrives at a fixed rate, so latency is not dominated by items waiting in the queue
+ITEM_PERIOD = 0.001  # seconds
+QUEUE_MAX_SIZE = 16
+BACKENDS = [
+    queue_proxy_wrapper.QueueBackend.MANAGER,
+    queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+    queue_proxy_wrapper.QueueBackend.PIPE,
+]
+
+
+def telemetry_producer(output_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Puts telemetry stamped with the time it was put.
+    """
+    for _ in range(ITEM_COUNT):
+        # Sleep rather than spin so that the consumer gets the core on single core machines
+        time.sleep(ITEM_PERIOD)
+        output_queue.put(
+            telemetry.TelemetryData(
+                time_since_boot=time.perf_counter_ns(),
+                x=1.0,
+                y=2.0,
+                z=-3.0,
+                x_velocity=0.0,
+                y_velocity=0.0,
+                z_velocity=0.0,
+                roll=0.0,
+                pitch=0.0,
+                yaw=0.0,
+                roll_speed=0.0,
+                pitch_speed=0.0,
+                yaw_speed=0.0,
+            )
+        )
+
+
+def command_consumer(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    result_queue: queue_proxy_wrapper.QueueProxyWrapper,
+) -> None:
+    """
+    Gets telemetry and reports the latencies.
+    """
+    latencies = []
+    for _ in range(ITEM_COUNT):
+        _, telemetry_data = input_queue.get()
+        latencies.append((time.perf_counter_ns() - telemetry_data.time_since_boot) / 1e9)
+
+    result_queue.queue.put(latencies)
+
+
+def run_trial(
+    mp_manager: multiprocessing.managers.SyncManager,
+    backend: queue_proxy_wrapper.QueueBackend,
+) -> "tuple[float, float, float]":
+    """
+    Runs a producer and a consumer to completion.
+
+    Returns mean, median, and 99th percentile latency in seconds.
+    """
+    telemetry_to_command_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, QUEUE_MAX_SIZE, backend
+    )
+    result_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+
+    consumer = mp.Process(target=command_consumer, args=(telemetry_to_command_queue, result_queue))
+    producer = mp.Process(target=telemetry_producer, args=(telemetry_to_command_queue,))
+    consumer.start()
+    producer.start()
+
+    latencies = result_queue.queue.get()
+    producer.join()
+    consumer.join()
+    telemetry_to_command_queue.close()
+
+    latencies.sort()
+    return (
+        statistics.fmean(latencies),
+        statistics.median(latencies),
+        latencies[int(len(latencies) * 0.99)],
+    )
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    mp_manager = mp.Manager()
+
+    print(f"{'backend':<14}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}")
+    for backend in BACKENDS:
+        mean, median, p99 = run_trial(mp_manager, backend)
+        print(f"{backend.name:<14}{mean * 1e6:>10.0f}{median * 1e6:>10.0f}{p99 * 1e6:>10.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
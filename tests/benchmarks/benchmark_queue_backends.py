@@ -0,0 +1,142 @@
+"""
+Compares throughput and latency of the queue backends. To run:
+```
+python -m tests.benchmarks.benchmark_queue_backends
+```
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+import multiprocessing.synchronize
+import statistics
+import time
+
+from utilities.workers import queue_proxy_wrapper
+
+
+ITEMS_PER_PRODUCER = 2000
+QUEUE_MAX_SIZE = 16
+WORKER_COUNTS = [1, 2, 4]
+BACKENDS = [
+    queue_proxy_wrapper.QueueBackend.MANAGER,
+    queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+]
+
+
+def producer(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    item_count: int,
+    start_event: multiprocessing.synchronize.Event,
+) -> None:
+    """
+    Puts timestamps into the queue.
+    """
+    start_event.wait()
+    for _ in range(item_count):
+        input_queue.queue.put(time.perf_counter())
+
+
+def consumer(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    result_queue: queue_proxy_wrapper.QueueProxyWrapper,
+) -> None:
+    """
+    Gets timestamps until sentinel and reports the latencies.
+    """
+    latencies = []
+    while True:
+        timestamp = input_queue.queue.get()
+        if timestamp is None:
+            break
+
+        latencies.append(time.perf_counter() - timestamp)
+
+    result_queue.queue.put(latencies)
+
+
+def run_trial(
+    mp_manager: multiprocessing.managers.SyncManager,
+    backend: queue_proxy_wrapper.QueueBackend,
+    producer_count: int,
+    consumer_count: int,
+) -> "tuple[float, float, float, float]":
+    """
+    Runs producers and consumers to completion.
+
+    Returns throughput in items per second, and mean, median, and 99th percentile latency in seconds.
+    """
+    input_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+    result_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+    start_event = mp.Event()
+
+    producers = [
+        mp.Process(target=producer, args=(input_queue, ITEMS_PER_PRODUCER, start_event))
+        for _ in range(producer_count)
+    ]
+    consumers = [
+        mp.Process(target=consumer, args=(input_queue, result_queue)) for _ in range(consumer_count)
+    ]
+    for process in producers + consumers:
+        process.start()
+
+    # Exclude process startup
+    start = time.perf_counter()
+    start_event.set()
+
+    for process in producers:
+        process.join()
+
+    for _ in range(consumer_count):
+        input_queue.queue.put(None)
+
+    latencies = []
+    for _ in range(consumer_count):
+        latencies += result_queue.queue.get()
+
+    elapsed = time.perf_counter() - start
+
+    for process in consumers:
+        process.join()
+
+    input_queue.close()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    return (
+        len(latencies) / elapsed,
+        statistics.fmean(latencies),
+        statistics.median(latencies),
+        p99,
+    )
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    mp_manager = mp.Manager()
+
+    print(
+        f"{'backend':<14}{'producers':>10}{'consumers':>10}"
+        f"{'items/s':>12}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}"
+    )
+    for backend in BACKENDS:
+        for producer_count in WORKER_COUNTS:
+            for consumer_count in WORKER_COUNTS:
+                throughput, mean, median, p99 = run_trial(
+                    mp_manager, backend, producer_count, consumer_count
+                )
+                print(
+                    f"{backend.name:<14}{producer_count:>10}{consumer_count:>10}"
+                    f"{throughput:>12.0f}{mean * 1e6:>10.0f}{median * 1e6:>10.0f}{p99 * 1e6:>10.0f}"
+                )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,76 @@
+"""
+Compares pickle against the struct codecs for the structs sent between workers. To run:
+```
+python -m tests.benchmarks.benchmark_struct_codec
+```
+"""
+
+import pickle
+import timeit
+
+from modules import struct_codecs
+from modules.command import command
+from modules.telemetry import telemetry
+from utilities.workers import struct_codec
+
+
+REPETITIONS = 100_000
+
+
+def benchmark(name: str, item: object, codec: struct_codec.StructCodec) -> None:
+    """
+    Prints size and per item time of encoding and decoding.
+    """
+    pickled = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+    encoded = codec.encode(item)
+
+    pickle_dumps = timeit.timeit(
+        lambda: pickle.dumps(item, pickle.HIGHEST_PROTOCOL), number=REPETITIONS
+    )
+    pickle_loads = timeit.timeit(lambda: pickle.loads(pickled), number=REPETITIONS)
+    codec_encode = timeit.timeit(lambda: codec.encode(item), number=REPETITIONS)
+    codec_decode = timeit.timeit(lambda: codec.decode(encoded), number=REPETITIONS)
+
+    scale = 1e9 / REPETITIONS
+    print(
+        f"{name:<14}{'pickle':<8}{len(pickled):>8}{pickle_dumps * scale:>12.0f}{pickle_loads * scale:>12.0f}"
+    )
+    print(
+        f"{name:<14}{'codec':<8}{len(encoded):>8}{codec_encode * scale:>12.0f}{codec_decode * scale:>12.0f}"
+    )
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    telemetry_data = telemetry.TelemetryData(
+        time_since_boot=123456,
+        x=1.0,
+        y=2.0,
+        z=-3.0,
+        x_velocity=0.1,
+        y_velocity=0.2,
+        z_velocity=0.3,
+        roll=0.01,
+        pitch=0.02,
+        yaw=1.57,
+        roll_speed=0.0,
+        pitch_speed=0.0,
+        yaw_speed=None,
+    )
+    position = command.Position(10.0, 20.0, 30.0)
+
+    print(f"{'struct':<14}{'format':<8}{'bytes':>8}{'encode ns':>12}{'decode ns':>12}")
+    benchmark("TelemetryData", telemetry_data, struct_codecs.TELEMETRY_DATA_CODEC)
+    benchmark("Position", position, struct_codecs.POSITION_CODEC)
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,186 @@
+"""
+Compares the loop latency of a worker under CPU load with and without pinning and niceness.
+To run:
+```
+python -m tests.benchmarks.benchmark_worker_affinity
+```
+
+A latency worker stands in for telemetry or command, sleeping for PERIOD each loop and measuring
+how late it wakes up. Load workers stand in for logging and housekeeping, one busy loop per CPU.
+Pinning gives the latency worker a CPU of its own and the load workers the rest,
+which needs more than one CPU. Lowering the niceness of the latency worker needs privileges,
+so the load workers are made nicer instead.
+"""
+
+import multiprocessing as mp
+import os
+import statistics
+import time
+
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+PERIOD = 0.001  # seconds
+DURATION = 3  # seconds
+LOAD_NICENESS = 19
+# Load workers check for exit every this many iterations
+LOAD_CHECK_INTERVAL = 10000
+
+
+class PrintLogger:
+    """
+    Prints warnings, such as settings that were not permitted.
+    """
+
+    def info(self, message: str, _: bool = False) -> None:
+        """
+        Ignores the message.
+        """
+
+    def warning(self, message: str, _: bool = False) -> None:
+        """
+        Prints the message.
+        """
+        print(f"WARNING: {message}")
+
+    def error(self, message: str, _: bool = False) -> None:
+        """
+        Prints the message.
+        """
+        print(f"ERROR: {message}")
+
+
+def latency_worker(results: mp.Queue, controller: worker_controller.WorkerController) -> None:
+    """
+    Measures how late each sleep wakes up.
+    """
+    latencies = []
+    while not controller.is_exit_requested():
+        wake_time = time.monotonic() + PERIOD
+        time.sleep(PERIOD)
+        latencies.append(time.monotonic() - wake_time)
+
+    results.put(latencies)
+
+
+def load_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Keeps a CPU busy.
+    """
+    while not controller.is_exit_requested():
+        total = 0
+        for i in range(0, LOAD_CHECK_INTERVAL):
+            total += i
+
+
+def create_manager(
+    count: int,
+    target: "(...) -> object",  # type: ignore
+    work_arguments: "tuple",
+    controller: worker_controller.WorkerController,
+    cpu_affinity: "set[int] | None",
+    niceness: "int | None",
+) -> worker_manager.WorkerManager:
+    """
+    Manager of the workers with the scheduling settings.
+    """
+    local_logger = PrintLogger()
+    result, properties = worker_manager.WorkerProperties.create(
+        count,
+        target,
+        work_arguments,
+        [],
+        [],
+        controller,
+        local_logger,  # type: ignore
+        cpu_affinity=cpu_affinity,
+        niceness=niceness,
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(properties, local_logger)  # type: ignore
+    assert result
+    assert manager is not None
+
+    return manager
+
+
+def run_trial(load_count: int, is_pinned: bool, is_niced: bool) -> "list[float]":
+    """
+    Runs the latency worker alongside the load workers.
+
+    Returns the latencies in seconds, sorted.
+    """
+    controller = worker_controller.WorkerController()
+    results = mp.Queue()
+
+    cpus = sorted(os.sched_getaffinity(0))
+    latency_affinity = {cpus[0]} if is_pinned else None
+    load_affinity = set(cpus[1:]) if is_pinned else None
+    managers = [
+        create_manager(1, latency_worker, (results,), controller, latency_affinity, None),
+    ]
+    if load_count > 0:
+        managers.append(
+            create_manager(
+                load_count,
+                load_worker,
+                (),
+                controller,
+                load_affinity,
+                LOAD_NICENESS if is_niced else None,
+            )
+        )
+
+    for manager in managers:
+        manager.start_workers()
+
+    time.sleep(DURATION)
+
+    controller.request_exit()
+    latencies = results.get()
+    for manager in managers:
+        manager.join_workers()
+
+    return sorted(latencies)
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        print("CPU affinity is not supported on this platform")
+        return -1
+
+    cpu_count = len(os.sched_getaffinity(0))
+    print(f"{cpu_count} CPUs, sleeping {PERIOD * 1e3:.0f}ms per loop")
+    print(f"{'configuration':<24}{'loops':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, load_count, is_pinned, is_niced in [
+        ("idle", 0, False, False),
+        ("load", cpu_count, False, False),
+        ("load, pinned", cpu_count, True, False),
+        ("load, niced", cpu_count, False, True),
+        ("load, pinned, niced", cpu_count, True, True),
+    ]:
+        if is_pinned and cpu_count < 2:
+            print(f"{name:<24}skipped, pinning needs at least 2 CPUs")
+            continue
+
+        latencies = run_trial(load_count, is_pinned, is_niced)
+        print(
+            f"{name:<24}{len(latencies):>8}{statistics.median(latencies) * 1e3:>10.3f}"
+            f"{latencies[int(len(latencies) * 0.99)] * 1e3:>10.3f}{latencies[-1] * 1e3:>10.3f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
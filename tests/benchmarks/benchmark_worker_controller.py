@@ -0,0 +1,125 @@
+"""
+Compares the per iteration overhead and exit latency of the worker controller
+against the previous queue and semaphore based implementation. To run:
+```
+python -m tests.benchmarks.benchmark_worker_controller
+```
+"""
+
+import multiprocessing as mp
+import multiprocessing.sharedctypes
+import time
+import timeit
+
+from utilities.workers import worker_controller
+
+
+ITERATIONS = 100_000
+EXIT_TRIALS = 5
+
+
+class QueueWorkerController:
+    """
+    Previous implementation, for comparison.
+    """
+
+    __QUEUE_DELAY = 0.1  # seconds
+
+    def __init__(self) -> None:
+        self.__pause = mp.BoundedSemaphore(1)
+        self.__exit_queue = mp.Queue(1)
+
+    def check_pause(self) -> None:
+        """
+        Semaphore round trip.
+        """
+        self.__pause.acquire()
+        self.__pause.release()
+
+    def request_exit(self) -> None:
+        """
+        Sleep and queue put.
+        """
+        time.sleep(self.__QUEUE_DELAY)
+        if self.__exit_queue.empty():
+            self.__exit_queue.put(None)
+
+    def is_exit_requested(self) -> bool:
+        """
+        Queue empty check.
+        """
+        return not self.__exit_queue.empty()
+
+
+def loop_until_exit(
+    controller: "worker_controller.WorkerController | QueueWorkerController",
+    is_started: multiprocessing.sharedctypes.Synchronized,
+    exit_seen_time: multiprocessing.sharedctypes.Synchronized,
+) -> None:
+    """
+    Worker loop recording when it saw the exit request.
+    """
+    is_started.value = True
+    while not controller.is_exit_requested():
+        controller.check_pause()
+
+    exit_seen_time.value = time.perf_counter()
+
+
+def measure_iteration(
+    controller: "worker_controller.WorkerController | QueueWorkerController",
+) -> float:
+    """
+    Returns the time of a single loop iteration check in seconds.
+    """
+
+    def iteration() -> None:
+        controller.is_exit_requested()
+        controller.check_pause()
+
+    return timeit.timeit(iteration, number=ITERATIONS) / ITERATIONS
+
+
+def measure_exit_latency(controller_type: type) -> float:
+    """
+    Returns the average time from requesting exit to the worker seeing it in seconds.
+    """
+    total = 0.0
+    for _ in range(EXIT_TRIALS):
+        controller = controller_type()
+        is_started = mp.Value("b", False)
+        exit_seen_time = mp.Value("d", 0.0)
+        worker = mp.Process(target=loop_until_exit, args=(controller, is_started, exit_seen_time))
+        worker.start()
+        while not is_started.value:
+            time.sleep(0.001)
+
+        request_time = time.perf_counter()
+        controller.request_exit()
+        worker.join()
+        total += exit_seen_time.value - request_time
+
+    return total / EXIT_TRIALS
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    print(f"{'controller':<24}{'iteration ns':>14}{'exit latency us':>18}")
+    for controller_type in [QueueWorkerController, worker_controller.WorkerController]:
+        iteration_time = measure_iteration(controller_type())
+        exit_latency = measure_exit_latency(controller_type)
+        print(
+            f"{controller_type.__name__:<24}{iteration_time * 1e9:>14.0f}{exit_latency * 1e6:>18.0f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
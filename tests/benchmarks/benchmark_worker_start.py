@@ -0,0 +1,81 @@
+"""
+Compares the time from starting a worker until it is running for each start method. To run:
+```
+python -m tests.benchmarks.benchmark_worker_start
+```
+"""
+
+import ctypes
+import multiprocessing as mp
+import multiprocessing.forkserver
+import multiprocessing.sharedctypes
+import statistics
+import time
+
+# Imported by every worker, as in bootcamp main
+from pymavlink import mavutil  # pylint: disable=unused-import
+
+from utilities.workers import worker_manager
+
+
+WORKER_COUNT = 10
+START_METHODS = ["fork", "spawn", "forkserver"]
+
+
+def worker(started_time: multiprocessing.sharedctypes.Synchronized) -> None:
+    """
+    Records when the worker started running.
+    """
+    started_time.value = time.monotonic()
+
+
+def run_trial(start_method: str) -> "list[float]":
+    """
+    Starts workers one at a time, as when restarting a crashed worker.
+
+    Returns the latencies in seconds.
+    """
+    context = mp.get_context(start_method)
+    if start_method == "forkserver":
+        context.set_forkserver_preload(worker_manager.DEFAULT_PRELOAD_MODULES + [__name__])
+        # Started ahead of time, as by worker_manager.enable_warm_start()
+        multiprocessing.forkserver.ensure_running()
+
+    latencies = []
+    for _ in range(WORKER_COUNT):
+        started_time = context.RawValue(ctypes.c_double, 0.0)
+        process = context.Process(target=worker, args=(started_time,))
+
+        start = time.monotonic()
+        process.start()
+        process.join()
+
+        latencies.append(started_time.value - start)
+
+    return latencies
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    print(f"{'start method':<14}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}")
+    for start_method in START_METHODS:
+        if start_method not in mp.get_all_start_methods():
+            continue
+
+        latencies = run_trial(start_method)
+        print(
+            f"{start_method:<14}{statistics.fmean(latencies) * 1e3:>10.1f}"
+            f"{statistics.median(latencies) * 1e3:>10.1f}{max(latencies) * 1e3:>10.1f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,76 @@
+"""
+Measures the cost of recording a loop iteration into the worker statistics.
+To run:
+```
+python -m tests.benchmarks.benchmark_worker_statistics
+```
+"""
+
+import time
+
+from utilities.workers import worker_statistics
+
+
+ITERATION_COUNT = 1_000_000
+# Loop times of the bootcamp workers, telemetry at 10 Hz down to a fast command loop
+LOOP_TIMES = [0.1, 0.01, 0.001]  # seconds
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    # Empty loop, subtracted from the others
+    start_time = time.perf_counter()
+    for _ in range(0, ITERATION_COUNT):
+        pass
+
+    empty_time = time.perf_counter() - start_time
+
+    # Outside of a worker
+    start_time = time.perf_counter()
+    for _ in range(0, ITERATION_COUNT):
+        worker_statistics.record_iteration()
+
+    disabled_time = (time.perf_counter() - start_time - empty_time) / ITERATION_COUNT
+
+    # Publishing every PUBLISH_PERIOD included
+    worker_statistics.set_current_statistics(worker_statistics.WorkerStatistics())
+    start_time = time.perf_counter()
+    for _ in range(0, ITERATION_COUNT):
+        worker_statistics.record_iteration()
+
+    enabled_time = (time.perf_counter() - start_time - empty_time) / ITERATION_COUNT
+    worker_statistics.set_current_statistics(None)
+
+    # Publishing alone
+    statistics = worker_statistics.WorkerStatistics()
+    publish_count = 1000
+    start_time = time.perf_counter()
+    for _ in range(0, publish_count):
+        statistics.publish()
+
+    publish_time = (time.perf_counter() - start_time) / publish_count
+
+    print(f"record_iteration() outside of a worker: {disabled_time * 1e9:.0f} ns")
+    print(f"record_iteration() in a worker: {enabled_time * 1e9:.0f} ns")
+    print(
+        f"publish(): {publish_time * 1e6:.1f} us, once every "
+        f"{worker_statistics.PUBLISH_PERIOD:g}s "
+        f"({publish_time / worker_statistics.PUBLISH_PERIOD * 100:.4f}%)"
+    )
+    for loop_time in LOOP_TIMES:
+        print(
+            f"Overhead on a {loop_time * 1000:g}ms loop: "
+            f"{enabled_time / loop_time * 100 + publish_time / worker_statistics.PUBLISH_PERIOD * 100:.4f}%"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
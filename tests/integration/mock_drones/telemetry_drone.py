@@ -20,6 +20,16 @@ NUM_TRIALS = 5
 YAW_SPEED = math.pi
 X_SPEED = 1
 
+# Messages whose rate can be requested
+INTERVAL_MESSAGE_TYPES = {
+    mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE: "ATTITUDE",
+    mavutil.mavlink.MAVLINK_MSG_ID_LOCAL_POSITION_NED: "LOCAL_POSITION_NED",
+}
+DATA_STREAM_MESSAGE_TYPES = {
+    mavutil.mavlink.MAV_DATA_STREAM_EXTRA1: "ATTITUDE",
+    mavutil.mavlink.MAV_DATA_STREAM_POSITION: "LOCAL_POSITION_NED",
+}
+
 
 def main() -> int:
     """
@@ -44,8 +54,49 @@ def main() -> int:
 
     local_logger.info("Logger initialized")
 
+    # Periods requested by the ground station, which replace the scripted ones
+    requested_periods = {}
+
+    # Honor MAV_CMD_SET_MESSAGE_INTERVAL and REQUEST_DATA_STREAM as an autopilot would
+    def handle_rate_requests() -> bool:
+        is_changed = False
+        while True:
+            message = connection.recv_match(
+                type=["COMMAND_LONG", "REQUEST_DATA_STREAM"], blocking=False
+            )
+            if message is None:
+                return is_changed
+
+            if message.get_type() == "REQUEST_DATA_STREAM":
+                message_type = DATA_STREAM_MESSAGE_TYPES.get(message.req_stream_id)
+                if message_type is not None and message.start_stop == 1:
+                    requested_periods[message_type] = 1 / max(message.req_message_rate, 1)
+                    is_changed = True
+                    local_logger.info(f"Drone: {message_type} at {message.req_message_rate}/s")
+
+                continue
+
+            if message.command != mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL:
+                continue
+
+            message_type = INTERVAL_MESSAGE_TYPES.get(int(message.param1))
+            if message_type is None or message.param2 <= 0:
+                connection.mav.command_ack_send(
+                    mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL, mavutil.mavlink.MAV_RESULT_DENIED
+                )
+                continue
+
+            requested_periods[message_type] = message.param2 / 1e6
+            is_changed = True
+            connection.mav.command_ack_send(
+                mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL, mavutil.mavlink.MAV_RESULT_ACCEPTED
+            )
+            local_logger.info(f"Drone: {message_type} every {message.param2}us")
+
     # Task is to send ATTITUDE and LOCAL_POSITION_NED messages
     def send_telemetry(attitude_period: float, position_period: float) -> int:
+        attitude_period = requested_periods.get("ATTITUDE", attitude_period)
+        position_period = requested_periods.get("LOCAL_POSITION_NED", position_period)
         attitude_count = -1
         position_count = -1
         for i in range(NUM_TRIALS):
@@ -53,6 +104,17 @@ def main() -> int:
             start = time.time()
             now = start
             while now - start < TOTAL_PERIOD:
+                if handle_rate_requests():
+                    # Continue the counts from now at the requested periods
+                    attitude_period = requested_periods.get("ATTITUDE", attitude_period)
+                    position_period = requested_periods.get("LOCAL_POSITION_NED", position_period)
+                    attitude_count = (
+                        now - start
+                    ) // attitude_period + i * TOTAL_PERIOD // attitude_period
+                    position_count = (
+                        now - start
+                    ) // position_period + i * TOTAL_PERIOD // position_period
+
                 if (
                     now - start
                 ) // attitude_period + i * TOTAL_PERIOD // attitude_period > attitude_count:
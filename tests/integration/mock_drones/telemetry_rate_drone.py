@@ -0,0 +1,94 @@
+"""
+Mock drone sending telemetry at a given rate, for benchmarking receive loops.
+To run:
+```
+python -m tests.integration.mock_drones.telemetry_rate_drone <messages per second> <seconds>
+```
+"""
+
+import os
+import pathlib
+import sys
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+
+
+CONNECTION_STRING = "tcpin:localhost:12345"
+# Messages due within a tick are sent in a single write
+TICK_PERIOD = 0.001  # seconds
+DEFAULT_RATE = 1000  # messages per second
+DEFAULT_DURATION = 5  # seconds
+
+
+def main() -> int:
+    """
+    Begin mock drone simulation sending ATTITUDE and LOCAL_POSITION_NED alternately.
+    """
+    rate = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RATE
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_DURATION
+
+    # Mocked autopilot/drone
+    # source_system = 1 (airside on drone)
+    # source_component = 0 (autopilot)
+    connection = mavutil.mavlink_connection(CONNECTION_STRING, source_system=1, source_component=0)
+    connection.wait_heartbeat()
+
+    # Instantiate logger after main starts
+    drone_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{drone_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create drone logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized")
+
+    # Blocks rather than sending part of a write when the receiver falls behind
+    connection.port.setblocking(True)
+
+    mav = connection.mav
+    sent_count = 0
+    start = time.monotonic()
+    now = start
+    while now - start < duration:
+        data = b""
+        due_count = int((now - start) * rate)
+        while sent_count < due_count:
+            time_boot_ms = int((now - start) * 1000)
+            if sent_count % 2 == 0:
+                message = mav.attitude_encode(time_boot_ms, 0, 0, 0, 0, 0, 0)
+            else:
+                message = mav.local_position_ned_encode(time_boot_ms, 0, 0, 0, 0, 0, 0)
+
+            data += message.pack(mav)
+            mav.seq = (mav.seq + 1) % 256
+            sent_count += 1
+
+        if len(data) > 0:
+            connection.port.sendall(data)
+
+        time.sleep(TICK_PERIOD)
+        now = time.monotonic()
+
+    # Wait for the receiver to close first, as pymavlink keeps reading a closed connection
+    while len(connection.port.recv(1024)) > 0:
+        pass
+
+    connection.close()
+
+    local_logger.info(f"Sent {sent_count} messages in {now - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Drone: Failed with return code {result_main}")
+    else:
+        print("Drone: Success!")
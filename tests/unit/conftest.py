@@ -0,0 +1,23 @@
+"""
+Fixtures shared by the unit tests.
+"""
+
+import socket
+
+import pytest
+
+from pymavlink import mavutil
+
+
+@pytest.fixture
+def link() -> "tuple[socket.socket, mavutil.mavfile]":  # type: ignore
+    """
+    Drone end and ground connection of a TCP link.
+    """
+    server = socket.create_server(("127.0.0.1", 0))
+    connection = mavutil.mavlink_connection(f"tcp:127.0.0.1:{server.getsockname()[1]}")
+    drone_socket, _ = server.accept()
+    server.close()
+    yield drone_socket, connection  # type: ignore
+    connection.close()
+    drone_socket.close()
@@ -0,0 +1,30 @@
+"""
+Logger stand-in shared by the unit tests.
+"""
+
+
+class RecordingLogger:
+    """
+    Stands in for the logger, keeping the messages.
+    """
+
+    def __init__(self) -> None:
+        self.messages = []
+
+    def info(self, message: str, _: bool = False) -> None:
+        """
+        Records the message.
+        """
+        self.messages.append(message)
+
+    def warning(self, message: str, _: bool = False) -> None:
+        """
+        Records the message.
+        """
+        self.messages.append(message)
+
+    def error(self, message: str, _: bool = False) -> None:
+        """
+        Records the message.
+        """
+        self.messages.append(message)
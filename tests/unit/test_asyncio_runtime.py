@@ -0,0 +1,183 @@
+"""
+Test the asyncio runtime.
+"""
+
+import asyncio
+import socket
+
+import pytest
+
+from utilities.workers import asyncio_runtime
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+MESSAGE_TYPES = {b"h": "HEARTBEAT", b"a": "ATTITUDE", b"p": "LOCAL_POSITION_NED"}
+
+
+class FakeMessage:
+    """
+    Stands in for a MAVLink message.
+    """
+
+    def __init__(self, message_type: str) -> None:
+        self.message_type = message_type
+
+    def get_type(self) -> str:
+        """
+        Returns the message name.
+        """
+        return self.message_type
+
+
+class FakeConnection:
+    """
+    Stands in for a stream connection, each byte received is a message.
+    """
+
+    def __init__(self, port: socket.socket) -> None:
+        port.setblocking(False)
+        self.port = port
+        self.fd = port.fileno()
+
+    def recv_msg(self) -> "FakeMessage | None":
+        """
+        Returns the next message, None if there is none, as pymavlink does.
+        """
+        try:
+            data = self.port.recv(1)
+        except BlockingIOError:
+            return None
+
+        if len(data) == 0:
+            return None
+
+        return FakeMessage(MESSAGE_TYPES[data])
+
+
+@pytest.fixture
+def sockets() -> "tuple[socket.socket, socket.socket]":  # type: ignore
+    """
+    Drone end and ground end of a stream connection.
+    """
+    drone_socket, ground_socket = socket.socketpair()
+    yield drone_socket, ground_socket  # type: ignore
+    drone_socket.close()
+    ground_socket.close()
+
+
+class TestDispatcher:
+    """
+    Messages are delivered to the subscribers of their type.
+    """
+
+    def test_subscriptions(self, sockets: "tuple[socket.socket, socket.socket]") -> None:
+        """
+        Each queue receives its types in order, full queues drop the oldest.
+        """
+        # Setup
+        drone_socket, ground_socket = sockets
+        dispatcher = asyncio_runtime.MavlinkDispatcher(FakeConnection(ground_socket))  # type: ignore
+
+        async def run() -> "tuple[list[str], list[str]]":
+            telemetry_queue = dispatcher.subscribe(["ATTITUDE", "LOCAL_POSITION_NED"])
+            heartbeat_queue = dispatcher.subscribe(["HEARTBEAT"], maxsize=1)
+            dispatcher.start()
+
+            drone_socket.sendall(b"hahph")
+            telemetry = [(await telemetry_queue.get()).get_type() for _ in range(2)]
+            await asyncio.sleep(0.01)
+            heartbeats = []
+            while not heartbeat_queue.empty():
+                heartbeats.append(heartbeat_queue.get_nowait().get_type())
+
+            dispatcher.stop()
+            return telemetry, heartbeats
+
+        # Run
+        telemetry, heartbeats = asyncio.run(run())
+
+        # Test
+        assert telemetry == ["ATTITUDE", "LOCAL_POSITION_NED"]
+        assert heartbeats == ["HEARTBEAT"]
+        assert dispatcher.get_received_count() == 5
+        assert dispatcher.get_dropped_count() == 2
+
+    def test_disconnect(self, sockets: "tuple[socket.socket, socket.socket]") -> None:
+        """
+        Other end closing the connection is noticed.
+        """
+        # Setup
+        drone_socket, ground_socket = sockets
+        dispatcher = asyncio_runtime.MavlinkDispatcher(FakeConnection(ground_socket))  # type: ignore
+
+        async def run() -> None:
+            dispatcher.start()
+            drone_socket.close()
+            await asyncio.wait_for(dispatcher.wait_disconnected(), 5.0)
+
+        # Run
+        asyncio.run(run())
+
+        # Test
+        assert dispatcher.is_disconnected()
+
+    def test_loop_without_readers(
+        self, sockets: "tuple[socket.socket, socket.socket]", monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        An event loop that cannot wait on sockets, as on Windows, is polled instead.
+        """
+        # Setup
+        drone_socket, ground_socket = sockets
+        dispatcher = asyncio_runtime.MavlinkDispatcher(FakeConnection(ground_socket))  # type: ignore
+
+        def add_reader(*_: object) -> None:
+            raise NotImplementedError()
+
+        async def run() -> "list[str]":
+            monkeypatch.setattr(asyncio.get_running_loop(), "add_reader", add_reader)
+            queue = dispatcher.subscribe(["HEARTBEAT", "ATTITUDE"])
+            dispatcher.start()
+
+            drone_socket.sendall(b"ha")
+            received = [(await asyncio.wait_for(queue.get(), 5.0)).get_type() for _ in range(2)]
+            dispatcher.stop()
+            return received
+
+        # Run
+        received = asyncio.run(run())
+
+        # Test
+        assert received == ["HEARTBEAT", "ATTITUDE"]
+
+
+class TestRunPeriodically:
+    """
+    Periodic calls.
+    """
+
+    def test_until_exit(self) -> None:
+        """
+        Function is called each period until the event is set.
+        """
+        # Setup
+        calls = []
+
+        async def run() -> None:
+            exit_event = asyncio.Event()
+            task = asyncio.create_task(
+                asyncio_runtime.run_periodically(0.01, lambda: calls.append(1), exit_event)
+            )
+            await asyncio.sleep(0.055)
+            exit_event.set()
+            await asyncio.wait_for(task, 1.0)
+
+        # Run
+        asyncio.run(run())
+
+        # Test
+        assert 4 <= len(calls) <= 7
@@ -0,0 +1,203 @@
+"""
+Test scaling workers and the autoscaler.
+"""
+
+import multiprocessing as mp
+import time
+
+import pytest
+
+from tests.unit import recording_logger
+from utilities.workers import autoscaler
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 0
+ITEM_COUNT = 40
+WORK_TIME = 0.005  # seconds
+
+
+def forward(
+    work_time: float,
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Forwards each item after working on it, until the sentinel.
+    """
+    while not controller.is_exit_requested():
+        result, item = input_queue.get()
+        if not result or item is None:
+            break
+
+        time.sleep(work_time)
+        output_queue.put(item)
+
+
+def get_items(queue: queue_proxy_wrapper.QueueProxyWrapper, count: int) -> list:
+    """
+    Gets count items, waiting up to 5 seconds for each.
+    """
+    items = []
+    for _ in range(count):
+        result, item = queue.get(5.0)
+        assert result
+        items.append(item)
+
+    return items
+
+
+def wait_for_retired(manager: worker_manager.WorkerManager, count: int) -> None:
+    """
+    Removes retired workers until there are count left.
+    """
+    deadline = time.monotonic() + 5.0
+    while len(manager.get_workers()) > count and time.monotonic() < deadline:
+        assert manager.check_and_restart_dead_workers()
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def pipeline() -> "tuple[worker_manager.WorkerManager, queue_proxy_wrapper.QueueProxyWrapper, queue_proxy_wrapper.QueueProxyWrapper, recording_logger.RecordingLogger]":  # type: ignore
+    """
+    Single forwarding worker between two instrumented queues.
+    """
+    mp_manager = mp.Manager()
+    input_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, QUEUE_MAX_SIZE, is_instrumented=True
+    )
+    output_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE)
+    controller = worker_controller.WorkerController()
+    local_logger = recording_logger.RecordingLogger()
+
+    result, properties = worker_manager.WorkerProperties.create(
+        1, forward, (WORK_TIME,), [input_queue], [output_queue], controller, local_logger  # type: ignore
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(properties, local_logger)  # type: ignore
+    assert result
+    assert manager is not None
+
+    manager.start_workers()
+
+    yield manager, input_queue, output_queue, local_logger  # type: ignore
+
+    controller.request_exit()
+    input_queue.shutdown()
+    output_queue.shutdown()
+    manager.join_workers()
+    mp_manager.shutdown()
+
+
+class TestScaleTo:
+    """
+    Adding and retiring workers.
+    """
+
+    def test_scale_up_and_down(self, pipeline: tuple) -> None:
+        """
+        Workers are added and retired without losing any item.
+        """
+        # Setup
+        manager, input_queue, output_queue, _ = pipeline
+
+        # Run
+        assert manager.scale_to(3)
+        workers_scaled_up = len(manager.get_workers())
+        input_queue.put_many(list(range(ITEM_COUNT)))
+
+        # Retire while items are in flight
+        assert manager.scale_to(1)
+        input_queue.put_many(list(range(ITEM_COUNT, 2 * ITEM_COUNT)))
+        items = get_items(output_queue, 2 * ITEM_COUNT)
+        wait_for_retired(manager, 1)
+
+        # Test
+        assert workers_scaled_up == 3
+        assert sorted(items) == list(range(2 * ITEM_COUNT))
+        assert len(manager.get_workers()) == 1
+        assert manager.get_worker_count() == 1
+        assert manager.get_restart_statistics().restart_count == 0
+        assert input_queue.get_consumer_count() == 1
+        assert output_queue.get_producer_count() == 1
+
+    def test_invalid_count(self, pipeline: tuple) -> None:
+        """
+        At least 1 worker is required.
+        """
+        # Setup
+        manager, _, _, _ = pipeline
+
+        # Run
+        result = manager.scale_to(0)
+
+        # Test
+        assert not result
+        assert manager.get_worker_count() == 1
+
+
+class TestAutoscaler:
+    """
+    Scaling with the input queue.
+    """
+
+    def test_invalid_bounds(self, pipeline: tuple) -> None:
+        """
+        Bounds must be ordered and the queue instrumented.
+        """
+        # Setup
+        manager, input_queue, output_queue, local_logger = pipeline
+
+        # Run
+        bounds_result, _ = autoscaler.Autoscaler.create(
+            manager, input_queue, local_logger, 2, 1  # type: ignore
+        )
+        instrumented_result, _ = autoscaler.Autoscaler.create(
+            manager, output_queue, local_logger, 1, 2  # type: ignore
+        )
+
+        # Test
+        assert not bounds_result
+        assert not instrumented_result
+
+    def test_scales_with_backlog(self, pipeline: tuple) -> None:
+        """
+        Backlog adds workers up to the maximum, idle workers are retired down to the minimum.
+        """
+        # Setup
+        manager, input_queue, output_queue, local_logger = pipeline
+        result, instance = autoscaler.Autoscaler.create(
+            manager, input_queue, local_logger, 1, 2, scale_up_depth=4, cooldown=0.0  # type: ignore
+        )
+        assert result
+        assert instance is not None
+
+        # Run
+        input_queue.put_many(list(range(ITEM_COUNT)))
+        time.sleep(0.01)
+        _, is_scaled_up = instance.check()
+        _, is_scaled_beyond_maximum = instance.check()
+        scaled_up_count = manager.get_worker_count()
+
+        get_items(output_queue, ITEM_COUNT)
+        time.sleep(0.05)
+        _, is_scaled_down = instance.check()
+        wait_for_retired(manager, 1)
+
+        # Test
+        assert is_scaled_up
+        assert not is_scaled_beyond_maximum
+        assert scaled_up_count == 2
+        assert is_scaled_down
+        assert len(manager.get_workers()) == 1
+        assert any("depth" in message for message in local_logger.messages)
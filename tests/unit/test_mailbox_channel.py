@@ -0,0 +1,99 @@
+"""
+Test the mailbox channel.
+"""
+
+import multiprocessing as mp
+
+import pytest
+
+from utilities.workers import mailbox_channel
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def mailbox() -> mailbox_channel.MailboxChannel:  # type: ignore
+    """
+    Creates a mailbox.
+    """
+    channel = mailbox_channel.MailboxChannel()
+    yield channel  # type: ignore
+    channel.close()
+
+
+def get_once(channel: mailbox_channel.MailboxChannel, output: "mp.Queue") -> None:  # type: ignore
+    """
+    Consumer process that receives a single item.
+    """
+    output.put(channel.get(timeout=5.0))
+
+
+class TestLatestValue:
+    """
+    Consumers only see the newest item.
+    """
+
+    def test_overwrite(self, mailbox: mailbox_channel.MailboxChannel) -> None:
+        """
+        Unread items are replaced and counted.
+        """
+        # Run
+        for i in range(5):
+            mailbox.put(i)
+
+        result, sequence_number, item = mailbox.get_with_sequence_number(timeout=1.0)
+
+        # Test
+        assert result
+        assert item == 4
+        assert sequence_number == 5
+        assert mailbox.get_overwritten_count() == 4
+
+    def test_received_once(self, mailbox: mailbox_channel.MailboxChannel) -> None:
+        """
+        The same item is not received twice, and reading it prevents an overwrite count.
+        """
+        # Setup
+        mailbox.put("a")
+
+        # Run
+        first = mailbox.get(timeout=1.0)
+        second = mailbox.get(timeout=0.01)
+        mailbox.put("b")
+
+        # Test
+        assert first == (True, "a")
+        assert second == (False, None)
+        assert mailbox.get_overwritten_count() == 0
+
+    def test_sentinel_kept(self, mailbox: mailbox_channel.MailboxChannel) -> None:
+        """
+        Puts after the sentinel are rejected.
+        """
+        # Run
+        mailbox.fill_and_drain_queue()
+        is_put = mailbox.put(1)
+
+        # Test
+        assert not is_put
+        assert mailbox.get(timeout=1.0) == (True, None)
+
+    def test_across_processes(self, mailbox: mailbox_channel.MailboxChannel) -> None:
+        """
+        A consumer process waiting on the mailbox is woken by a put.
+        """
+        # Setup
+        output = mp.Queue()
+        consumer = mp.Process(target=get_once, args=(mailbox, output))
+        consumer.start()
+
+        # Run
+        mailbox.put({"yaw": 1.0})
+        actual = output.get(timeout=5.0)
+        consumer.join()
+
+        # Test
+        assert actual == (True, {"yaw": 1.0})
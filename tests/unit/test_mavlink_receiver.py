@@ -0,0 +1,160 @@
+"""
+Test receiving all the messages that have arrived in one pass.
+"""
+
+import socket
+import time
+
+from pymavlink import mavutil
+
+from modules.mavlink_router import mavlink_receiver
+from tests.unit import recording_logger
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+def pack_attitudes(count: int) -> bytes:
+    """
+    Drone bytes of attitudes numbered by their time since boot.
+    """
+    encoder = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=0)
+    data = b""
+    for i in range(0, count):
+        data += encoder.attitude_encode(i, 0, 0, 0, 0, 0, 0).pack(encoder)
+        encoder.seq = (encoder.seq + 1) % 256
+
+    return data
+
+
+def create_receiver(connection: mavutil.mavfile) -> mavlink_receiver.MavlinkReceiver:
+    """
+    Receiver of the connection.
+    """
+    result, receiver = mavlink_receiver.MavlinkReceiver.create(
+        connection, recording_logger.RecordingLogger()  # type: ignore
+    )
+    assert result
+    assert receiver is not None
+    return receiver
+
+
+class TestMavlinkReceiver:
+    """
+    All messages available are returned by a single receive.
+    """
+
+    def test_batch(self, link: "tuple[socket.socket, mavutil.mavfile]") -> None:
+        """
+        Messages sent together are read in one wakeup and posted to the connection.
+        """
+        # Setup
+        drone_socket, connection = link
+        receiver = create_receiver(connection)
+        drone_socket.sendall(pack_attitudes(100))
+
+        # Run
+        is_connected, messages = receiver.receive(1.0)
+
+        # Test
+        assert is_connected
+        assert [message.time_boot_ms for message in messages] == list(range(0, 100))
+        assert receiver.get_wakeup_count() == 1
+        assert connection.sysid_state[1].messages["ATTITUDE"].time_boot_ms == 99
+        assert connection.mav_loss == 0
+
+    def test_split_message(self, link: "tuple[socket.socket, mavutil.mavfile]") -> None:
+        """
+        A message split across reads is returned once its last byte arrives.
+        """
+        # Setup
+        drone_socket, connection = link
+        receiver = create_receiver(connection)
+        data = pack_attitudes(2)
+        split = len(data) // 2 + 5
+
+        # Run
+        drone_socket.sendall(data[:split])
+        _, messages_first = receiver.receive(1.0)
+        drone_socket.sendall(data[split:])
+        _, messages_second = receiver.receive(1.0)
+
+        # Test
+        assert [message.time_boot_ms for message in messages_first] == [0]
+        assert [message.time_boot_ms for message in messages_second] == [1]
+
+    def test_leftover_from_recv_msg(self, link: "tuple[socket.socket, mavutil.mavfile]") -> None:
+        """
+        Messages the parser already holds are returned without waiting.
+        """
+        # Setup
+        drone_socket, connection = link
+        receiver = create_receiver(connection)
+        drone_socket.sendall(pack_attitudes(2))
+        assert connection.select(1.0)
+        connection.mav.parse_char(connection.port.recv(1024))
+
+        # Run
+        _, messages = receiver.receive(1.0)
+
+        # Test
+        assert [message.time_boot_ms for message in messages] == [1]
+
+    def test_blocking_socket(self, link: "tuple[socket.socket, mavutil.mavfile]") -> None:
+        """
+        A blocking socket is made non-blocking, so reading until it is empty does not wait.
+        """
+        # Setup
+        drone_socket, connection = link
+        receiver = create_receiver(connection)
+        connection.port.setblocking(True)
+        # Exactly filling the reads, so only a would-block read finds the end
+        data = pack_attitudes(2000)
+        drone_socket.sendall(data[: receiver._MavlinkReceiver__READ_SIZE])  # type: ignore
+
+        # Run
+        start = time.monotonic()
+        is_connected, messages = receiver.receive(1.0)
+
+        # Test
+        assert is_connected
+        assert len(messages) > 0
+        assert time.monotonic() - start < 0.5
+        assert not connection.port.getblocking()
+
+    def test_timeout(self, link: "tuple[socket.socket, mavutil.mavfile]") -> None:
+        """
+        Nothing is returned when nothing arrives.
+        """
+        # Setup
+        _, connection = link
+        receiver = create_receiver(connection)
+
+        # Run
+        is_connected, messages = receiver.receive(0.05)
+
+        # Test
+        assert is_connected
+        assert len(messages) == 0
+        assert receiver.get_wakeup_count() == 0
+
+    def test_disconnect(self, link: "tuple[socket.socket, mavutil.mavfile]") -> None:
+        """
+        Messages sent before the drone closed the connection are received, then the close.
+        """
+        # Setup
+        drone_socket, connection = link
+        receiver = create_receiver(connection)
+        drone_socket.sendall(pack_attitudes(3))
+        drone_socket.close()
+
+        # Run
+        is_connected_first, messages = receiver.receive(1.0)
+        is_connected_second, _ = receiver.receive(1.0)
+
+        # Test
+        assert is_connected_first
+        assert len(messages) == 3
+        assert not is_connected_second
@@ -0,0 +1,253 @@
+"""
+Test recording the MAVLink traffic and playing it back.
+"""
+
+import pathlib
+import time
+
+import pytest
+
+from pymavlink import mavutil
+
+from modules.mavlink_replay import mavlink_recorder
+from modules.mavlink_replay import replay_connection
+from modules.mavlink_router import mavlink_receiver
+from tests.unit import recording_logger
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+# Time the recording starts, in seconds since the epoch
+START_TIME = 1700000000.0
+# Time between attitudes in the recording
+PERIOD = 0.01  # seconds
+
+
+@pytest.fixture
+def recording(tmp_path: pathlib.Path) -> str:
+    """
+    Recording of 100 attitudes numbered 0, 10, 20... by their time since boot, each followed by a
+    heartbeat, one pair every period.
+    """
+    path = str(tmp_path / "flight.tlog")
+    result, recorder = mavlink_recorder.MavlinkRecorder.create(
+        path, recording_logger.RecordingLogger()  # type: ignore
+    )
+    assert result
+    assert recorder is not None
+
+    encoder = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=0)
+    for i in range(0, 100):
+        attitude = encoder.attitude_encode(i * 10, 0, 0, 0, 0, 0, 0)
+        attitude.pack(encoder)
+        encoder.seq = (encoder.seq + 1) % 256
+        heartbeat = encoder.heartbeat_encode(mavutil.mavlink.MAV_TYPE_QUADROTOR, 0, 0, 0, 0)
+        heartbeat.pack(encoder)
+        encoder.seq = (encoder.seq + 1) % 256
+        recorder.record([attitude, heartbeat], START_TIME + i * PERIOD)
+
+    recorder.close()
+    assert recorder.get_frame_count() == 200
+    return path
+
+
+def create_replay(path: str, speed: float) -> replay_connection.ReplayConnection:
+    """
+    Replay of the recording.
+    """
+    result, connection = replay_connection.ReplayConnection.create(
+        path, speed, recording_logger.RecordingLogger()  # type: ignore
+    )
+    assert result
+    assert connection is not None
+    return connection
+
+
+def receive_all(connection: mavutil.mavfile) -> "list[mavutil.mavlink.MAVLink_message]":
+    """
+    Every message until the replay ends.
+    """
+    result, receiver = mavlink_receiver.MavlinkReceiver.create(
+        connection, recording_logger.RecordingLogger()  # type: ignore
+    )
+    assert result
+    assert receiver is not None
+
+    messages = []
+    is_connected = True
+    while is_connected:
+        is_connected, received = receiver.receive(0.1)
+        messages += received
+
+    return messages
+
+
+class TestMavlinkRecorder:
+    """
+    Frames are written as a telemetry log with an index next to it.
+    """
+
+    def test_telemetry_log(self, recording: str) -> None:
+        """
+        The recording can be read by pymavlink as a telemetry log.
+        """
+        # Setup
+        connection = mavutil.mavlink_connection(recording)
+
+        # Run
+        attitude = connection.recv_match(type="ATTITUDE")
+        heartbeat = connection.recv_match(type="HEARTBEAT")
+        connection.close()
+
+        # Test
+        assert attitude.time_boot_ms == 0
+        assert attitude._timestamp == pytest.approx(START_TIME)
+        assert heartbeat is not None
+
+    def test_index(self, recording: str) -> None:
+        """
+        Each frame has its entry, a heartbeat taking the time since boot of the attitude before.
+        """
+        # Setup
+        index = pathlib.Path(recording + mavlink_recorder.INDEX_SUFFIX).read_bytes()
+
+        # Run
+        entries = [
+            mavlink_recorder.INDEX_ENTRY_STRUCT.unpack_from(index, offset)
+            for offset in range(
+                len(mavlink_recorder.INDEX_MAGIC),
+                len(index),
+                mavlink_recorder.INDEX_ENTRY_STRUCT.size,
+            )
+        ]
+
+        # Test
+        assert index.startswith(mavlink_recorder.INDEX_MAGIC)
+        assert len(entries) == 200
+        assert entries[0][0] == 0
+        assert [time_boot_ms for _, _, time_boot_ms in entries[:4]] == [0, 0, 10, 10]
+        assert entries[-1][0] + entries[-1][1] + mavlink_recorder.TIMESTAMP_STRUCT.size == len(
+            pathlib.Path(recording).read_bytes()
+        )
+
+
+class TestReplayConnection:
+    """
+    Recordings are played back at the requested speed.
+    """
+
+    def test_max_speed(self, recording: str) -> None:
+        """
+        Every message is received in order, without waiting, then the end.
+        """
+        # Setup
+        connection = create_replay(recording, replay_connection.MAX_SPEED)
+
+        # Run
+        start = time.monotonic()
+        messages = receive_all(connection)
+        elapsed = time.monotonic() - start
+        connection.close()
+
+        # Test
+        attitudes = [
+            message.time_boot_ms for message in messages if message.get_type() == "ATTITUDE"
+        ]
+        assert attitudes == list(range(0, 1000, 10))
+        assert len(messages) == 200
+        assert connection.mav_loss == 0
+        # One receive timeout to see the end
+        assert elapsed < 0.5
+
+    def test_speed(self, recording: str) -> None:
+        """
+        A recording of a second takes a fifth of a second at 5x.
+        """
+        # Setup
+        connection = create_replay(recording, 5.0)
+
+        # Run
+        start = time.monotonic()
+        while not connection.is_ended():
+            connection.recv_match(blocking=True, timeout=1.0)
+
+        elapsed = time.monotonic() - start
+        connection.close()
+
+        # Test
+        assert 0.99 / 5.0 <= elapsed < 0.99 / 5.0 + 0.5
+
+    def test_recv_match(self, recording: str) -> None:
+        """
+        The replay works as a pymavlink connection, discarding what is sent.
+        """
+        # Setup
+        connection = create_replay(recording, replay_connection.MAX_SPEED)
+
+        # Run
+        heartbeat = connection.wait_heartbeat(timeout=1.0)
+        connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_GCS, 0, 0, 0, 0)
+        attitude = connection.recv_match(type="ATTITUDE", blocking=True, timeout=1.0)
+        connection.close()
+
+        # Test
+        assert heartbeat is not None
+        assert attitude.time_boot_ms == 10
+        assert connection.get_discarded_byte_count() > 0
+        assert connection.sysid_state[1].messages["ATTITUDE"].time_boot_ms == 10
+
+    def test_seek(self, recording: str) -> None:
+        """
+        Plays from the first frame at or after the time since boot.
+        """
+        # Setup
+        connection = create_replay(recording, replay_connection.MAX_SPEED)
+
+        # Run
+        connection.seek(505)
+        position = connection.get_position()
+        messages = receive_all(connection)
+        connection.close()
+
+        # Test
+        assert position == 102
+        assert messages[0].time_boot_ms == 510
+        assert len(messages) == 98
+
+    def test_truncated(self, recording: str) -> None:
+        """
+        The frame cut short by the recorder stopping is not played.
+        """
+        # Setup
+        with open(recording, "r+b") as file:
+            file.truncate(len(pathlib.Path(recording).read_bytes()) - 1)
+
+        # Run
+        connection = create_replay(recording, replay_connection.MAX_SPEED)
+        messages = receive_all(connection)
+        connection.close()
+
+        # Test
+        assert connection.get_frame_count() == 199
+        assert len(messages) == 199
+
+    @pytest.mark.parametrize("speed, suffix", [(0.0, ""), (1.0, ".missing")])
+    def test_invalid(self, recording: str, speed: float, suffix: str) -> None:
+        """
+        Replay is not created and the problem is logged.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+
+        # Run
+        result, connection = replay_connection.ReplayConnection.create(
+            recording + suffix, speed, local_logger  # type: ignore
+        )
+
+        # Test
+        assert not result
+        assert connection is None
+        assert len(local_logger.messages) == 1
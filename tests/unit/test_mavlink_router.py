@@ -0,0 +1,181 @@
+"""
+Test routing messages to subscribers by type.
+"""
+
+import socket
+
+from pymavlink import mavutil
+
+from modules.mavlink_router import mavlink_router
+from tests.unit import recording_logger
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+def pack(messages: "list[tuple[str, int]]") -> bytes:
+    """
+    Drone bytes of each message type, numbered by the custom mode or time since boot.
+    """
+    encoder = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=0)
+    data = b""
+    for message_type, value in messages:
+        if message_type == "HEARTBEAT":
+            message = encoder.heartbeat_encode(0, 0, 0, value, 0)
+        elif message_type == "ATTITUDE":
+            message = encoder.attitude_encode(value, 0, 0, 0, 0, 0, 0)
+        elif message_type == "LOCAL_POSITION_NED":
+            message = encoder.local_position_ned_encode(value, 0, 0, 0, 0, 0, 0)
+        else:
+            message = encoder.system_time_encode(0, value)
+
+        data += message.pack(encoder)
+
+    return data
+
+
+def create_queue(
+    maxsize: int,
+    overflow_policy: queue_proxy_wrapper.OverflowPolicy = queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST,
+) -> queue_proxy_wrapper.QueueProxyWrapper:
+    """
+    Subscriber queue in shared memory.
+    """
+    return queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        maxsize,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        overflow_policy=overflow_policy,
+    )
+
+
+def get_values(queue: queue_proxy_wrapper.QueueProxyWrapper) -> "list[tuple[str, int]]":
+    """
+    Returns the type and number of every message in the queue.
+    """
+    return [
+        (
+            message.get_type(),
+            message.custom_mode if message.get_type() == "HEARTBEAT" else message.time_boot_ms,
+        )
+        for message in queue.get_many(100, 0.1)
+    ]
+
+
+def create_router(
+    connection: mavutil.mavfile,
+    subscriptions: "list[tuple[list[str], queue_proxy_wrapper.QueueProxyWrapper]]",
+) -> mavlink_router.MavlinkRouter:
+    """
+    Router of the connection.
+    """
+    result, router = mavlink_router.MavlinkRouter.create(
+        connection, subscriptions, None, recording_logger.RecordingLogger()  # type: ignore
+    )
+    assert result
+    assert router is not None
+    return router
+
+
+class TestMavlinkRouter:
+    """
+    Messages are read once and put into the queues of their subscribers.
+    """
+
+    def test_route_by_type(self, link: "tuple[socket.socket, mavutil.mavfile]") -> None:
+        """
+        Each subscriber receives its types in order, other types are counted as unrouted.
+        """
+        # Setup
+        drone_socket, connection = link
+        heartbeat_queue = create_queue(10)
+        telemetry_queue = create_queue(10)
+        all_queue = create_queue(10)
+        router = create_router(
+            connection,
+            [
+                (mavlink_router.HEARTBEAT_RECEIVER_MESSAGE_TYPES, heartbeat_queue),
+                (mavlink_router.TELEMETRY_MESSAGE_TYPES, telemetry_queue),
+                (["HEARTBEAT", "ATTITUDE"], all_queue),
+            ],
+        )
+        drone_socket.sendall(
+            pack(
+                [
+                    ("HEARTBEAT", 1),
+                    ("ATTITUDE", 2),
+                    ("SYSTEM_TIME", 3),
+                    ("LOCAL_POSITION_NED", 4),
+                ]
+            )
+        )
+
+        # Run
+        is_connected, read_count = router.run(1.0)
+
+        # Test
+        assert is_connected
+        assert read_count == 4
+        assert get_values(heartbeat_queue) == [("HEARTBEAT", 1)]
+        assert get_values(telemetry_queue) == [("ATTITUDE", 2), ("LOCAL_POSITION_NED", 4)]
+        assert get_values(all_queue) == [("HEARTBEAT", 1), ("ATTITUDE", 2)]
+        assert router.get_unrouted_count() == 1
+        assert router.get_received_counts()["SYSTEM_TIME"] == 1
+
+    def test_slow_subscriber_drops(self, link: "tuple[socket.socket, mavutil.mavfile]") -> None:
+        """
+        A full subscriber drops its oldest messages and counts them, others are unaffected.
+        """
+        # Setup
+        drone_socket, connection = link
+        slow_queue = create_queue(2)
+        fast_queue = create_queue(10)
+        router = create_router(connection, [(["ATTITUDE"], slow_queue), (["ATTITUDE"], fast_queue)])
+        drone_socket.sendall(pack([("ATTITUDE", i) for i in range(0, 5)]))
+
+        # Run
+        router.run(1.0)
+
+        # Test
+        assert get_values(slow_queue) == [("ATTITUDE", 3), ("ATTITUDE", 4)]
+        assert len(get_values(fast_queue)) == 5
+        assert router.get_dropped_counts() == [3, 0]
+
+    def test_disconnect(self, link: "tuple[socket.socket, mavutil.mavfile]") -> None:
+        """
+        The router reports when the drone closes the connection.
+        """
+        # Setup
+        drone_socket, connection = link
+        router = create_router(connection, [(["HEARTBEAT"], create_queue(2))])
+        drone_socket.close()
+
+        # Run
+        is_connected, _ = router.run(1.0)
+
+        # Test
+        assert not is_connected
+
+    def test_blocking_subscriber(self, link: "tuple[socket.socket, mavutil.mavfile]") -> None:
+        """
+        Queues that block when full are refused.
+        """
+        # Setup
+        _, connection = link
+        local_logger = recording_logger.RecordingLogger()
+
+        # Run
+        result, router = mavlink_router.MavlinkRouter.create(
+            connection,
+            [(["HEARTBEAT"], create_queue(2, queue_proxy_wrapper.OverflowPolicy.BLOCK))],
+            None,
+            local_logger,  # type: ignore
+        )
+
+        # Test
+        assert not result
+        assert router is None
+        assert len(local_logger.messages) == 1
@@ -0,0 +1,295 @@
+"""
+Test serializing, coalescing and rate limiting outbound messages.
+"""
+
+import pytest
+
+from pymavlink import mavutil
+
+from modules.mavlink_writer import mavlink_writer
+from tests.unit import recording_logger
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+class RecordingFile:
+    """
+    Stands in for the link, keeping the bytes written.
+    """
+
+    def __init__(self) -> None:
+        self.writes = []
+
+    def write(self, data: bytes) -> None:
+        """
+        Records the data.
+        """
+        self.writes.append(data)
+
+
+class FakeConnection:
+    """
+    Stands in for the connection, with a real encoder writing to the recording file.
+    """
+
+    def __init__(self) -> None:
+        self.file = RecordingFile()
+        self.mav = mavutil.mavlink.MAVLink(self.file)
+
+    def get_sent(self) -> "list[tuple[str, float]]":
+        """
+        Returns the type and first parameter of every message written.
+        """
+        decoder = mavutil.mavlink.MAVLink(None)
+        sent = []
+        for data in self.file.writes:
+            message = decoder.decode(bytearray(data))
+            sent.append((message.get_type(), getattr(message, "param1", 0.0)))
+
+        return sent
+
+
+@pytest.fixture
+def connection() -> FakeConnection:  # type: ignore
+    """
+    Connection that records what is written.
+    """
+    yield FakeConnection()  # type: ignore
+
+
+@pytest.fixture
+def input_queue() -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Requests to the writer.
+    """
+    queue = queue_proxy_wrapper.QueueProxyWrapper(
+        None, 0, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY, batch_size=64
+    )
+    yield queue  # type: ignore
+    queue.close()
+
+
+def yaw(connection: FakeConnection, angle: float) -> mavutil.mavlink.MAVLink_message:
+    """
+    Yaw command.
+    """
+    return connection.mav.command_long_encode(
+        1, 0, mavutil.mavlink.MAV_CMD_CONDITION_YAW, 0, angle, 0, 0, 0, 0, 0, 0
+    )
+
+
+def change_altitude(connection: FakeConnection, delta: float) -> mavutil.mavlink.MAVLink_message:
+    """
+    Altitude command.
+    """
+    return connection.mav.command_long_encode(
+        1, 0, mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT, 0, delta, 0, 0, 0, 0, 0, 0
+    )
+
+
+def set_message_interval(
+    connection: FakeConnection, message_id: int
+) -> mavutil.mavlink.MAVLink_message:
+    """
+    Request for a message every 100 ms.
+    """
+    return connection.mav.command_long_encode(
+        1, 0, mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL, 0, message_id, 100000, 0, 0, 0, 0, 0
+    )
+
+
+def heartbeat(connection: FakeConnection) -> mavutil.mavlink.MAVLink_message:
+    """
+    Heartbeat.
+    """
+    return connection.mav.heartbeat_encode(mavutil.mavlink.MAV_TYPE_GCS, 0, 0, 0, 0)
+
+
+def create_writer(
+    connection: FakeConnection,
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    rate_limits: "dict[str, tuple[float, int]]",
+) -> mavlink_writer.MavlinkWriter:
+    """
+    Writer of the connection.
+    """
+    result, writer = mavlink_writer.MavlinkWriter.create(
+        connection, input_queue, rate_limits, 1000.0, recording_logger.RecordingLogger()  # type: ignore
+    )
+    assert result
+    assert writer is not None
+    return writer
+
+
+class TestMavlinkWriter:
+    """
+    Requests from the workers are written one at a time.
+    """
+
+    def test_coalesce_and_priority(
+        self, connection: FakeConnection, input_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        A newer yaw replaces the waiting one in its place and the heartbeat goes first.
+        """
+        # Setup
+        writer = create_writer(connection, input_queue, {})
+        for message in [
+            yaw(connection, 10.0),
+            change_altitude(connection, 2.0),
+            yaw(connection, 20.0),
+            heartbeat(connection),
+        ]:
+            assert mavlink_writer.request(input_queue, message)
+
+        # Run
+        is_open = writer.run(0.1)
+
+        # Test
+        assert is_open
+        assert connection.get_sent() == [
+            ("HEARTBEAT", 0.0),
+            ("COMMAND_LONG", 20.0),
+            ("COMMAND_LONG", 2.0),
+        ]
+        report = writer.get_report()
+        assert report.coalesced_count == 1
+        assert report.sent_counts == {"HEARTBEAT": 1, "COMMAND_LONG": 2}
+        assert report.pending_count == 0
+        assert report.utilization is not None
+        assert report.utilization > 0.0
+
+    def test_distinct_requests_not_coalesced(
+        self, connection: FakeConnection, input_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        Requests for different streams or messages are all sent, only the same one is replaced.
+        """
+        # Setup
+        writer = create_writer(connection, input_queue, {})
+        for message in [
+            connection.mav.request_data_stream_encode(
+                1, 0, mavutil.mavlink.MAV_DATA_STREAM_EXTRA1, 10, 1
+            ),
+            connection.mav.request_data_stream_encode(
+                1, 0, mavutil.mavlink.MAV_DATA_STREAM_POSITION, 5, 1
+            ),
+            set_message_interval(connection, mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE),
+            set_message_interval(connection, mavutil.mavlink.MAVLINK_MSG_ID_LOCAL_POSITION_NED),
+            set_message_interval(connection, mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE),
+            connection.mav.mission_item_int_encode(1, 0, 0, 0, 16, 0, 1, 0, 0, 0, 0, 0, 0, 0),
+            connection.mav.mission_item_int_encode(1, 0, 1, 0, 16, 0, 1, 0, 0, 0, 0, 0, 0, 0),
+        ]:
+            assert mavlink_writer.request(input_queue, message)
+
+        # Run
+        writer.run(0.1)
+
+        # Test
+        assert connection.get_sent() == [
+            ("REQUEST_DATA_STREAM", 0.0),
+            ("REQUEST_DATA_STREAM", 0.0),
+            ("COMMAND_LONG", mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE),
+            ("COMMAND_LONG", mavutil.mavlink.MAVLINK_MSG_ID_LOCAL_POSITION_NED),
+            ("MISSION_ITEM_INT", 0.0),
+            ("MISSION_ITEM_INT", 0.0),
+        ]
+        assert writer.get_report().coalesced_count == 1
+
+    def test_rate_limit(
+        self, connection: FakeConnection, input_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        Commands beyond the burst wait for a token while heartbeats are not limited.
+        """
+        # Setup
+        writer = create_writer(connection, input_queue, {"COMMAND_LONG": (20.0, 1)})
+        for message in [
+            yaw(connection, 10.0),
+            change_altitude(connection, 2.0),
+            heartbeat(connection),
+        ]:
+            assert mavlink_writer.request(input_queue, message)
+
+        # Run
+        writer.run(0.0)
+        sent_first = connection.get_sent()
+        writer.run(0.1)
+
+        # Test
+        assert sent_first == [("HEARTBEAT", 0.0), ("COMMAND_LONG", 10.0)]
+        assert connection.get_sent()[-1] == ("COMMAND_LONG", 2.0)
+        report = writer.get_report()
+        assert report.rate_limited_count >= 1
+        assert report.pending_count == 0
+        assert report.max_latency >= 0.04
+
+    def test_sentinel(
+        self, connection: FakeConnection, input_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        The writer stops once the queue is shut down.
+        """
+        # Setup
+        writer = create_writer(connection, input_queue, {})
+        input_queue.shutdown(1)
+
+        # Run
+        is_open = writer.run(0.1)
+
+        # Test
+        assert not is_open
+
+    @pytest.mark.parametrize(
+        "rate_limits,link_rate",
+        [({"COMMAND_LONG": (0.0, 1)}, None), ({"COMMAND_LONG": (1.0, 0)}, None), ({}, 0.0)],
+    )
+    def test_invalid(
+        self,
+        connection: FakeConnection,
+        input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        rate_limits: "dict[str, tuple[float, int]]",
+        link_rate: "float | None",
+    ) -> None:
+        """
+        Writer is not created and the problem is logged.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+
+        # Run
+        result, writer = mavlink_writer.MavlinkWriter.create(
+            connection, input_queue, rate_limits, link_rate, local_logger  # type: ignore
+        )
+
+        # Test
+        assert not result
+        assert writer is None
+        assert len(local_logger.messages) == 1
+
+
+class TestTokenBucket:
+    """
+    Rate limit of a message type.
+    """
+
+    def test_burst_then_rate(self) -> None:
+        """
+        A full bucket allows its burst, then one event per period.
+        """
+        # Setup
+        bucket = mavlink_writer.TokenBucket(10.0, 2, 0.0)
+
+        # Run
+        allowed = [bucket.take(0.0), bucket.take(0.0), bucket.take(0.0)]
+        wait_time = bucket.get_wait_time(0.05)
+        allowed_later = [bucket.take(0.1), bucket.take(0.1)]
+
+        # Test
+        assert allowed == [True, True, False]
+        assert wait_time == pytest.approx(0.05)
+        assert allowed_later == [True, False]
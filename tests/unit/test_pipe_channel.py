@@ -0,0 +1,203 @@
+"""
+Test the pipe channel.
+"""
+
+import multiprocessing as mp
+import queue
+
+import pytest
+
+from utilities.workers import pipe_channel
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+CAPACITY = 3
+
+
+@pytest.fixture()
+def channel() -> pipe_channel.PipeChannel:  # type: ignore
+    """
+    Creates a small channel.
+    """
+    created_channel = pipe_channel.PipeChannel(CAPACITY)
+    yield created_channel  # type: ignore
+    created_channel.unlink()
+
+
+def put_items(channel: pipe_channel.PipeChannel, count: int) -> None:
+    """
+    Producer process.
+    """
+    for i in range(count):
+        channel.put(i)
+
+    channel.put(None)
+
+
+class TestPutGet:
+    """
+    Items go in and out in order.
+    """
+
+    def test_fifo_order(self, channel: pipe_channel.PipeChannel) -> None:
+        """
+        Items are returned in insertion order.
+        """
+        # Setup
+        expected = [1, "two", (3.0, None)]
+
+        # Run
+        channel.put_many(expected)
+        actual = [channel.get(), channel.get(), channel.get()]
+
+        # Test
+        assert actual == expected
+
+    def test_bounded(self, channel: pipe_channel.PipeChannel) -> None:
+        """
+        Puts beyond the capacity time out until items are received.
+        """
+        # Setup
+        channel.put_many(list(range(CAPACITY)))
+
+        # Run and test
+        with pytest.raises(queue.Full):
+            channel.put(CAPACITY, timeout=0.01)
+
+        assert channel.get_many(CAPACITY, timeout=1.0) == list(range(CAPACITY))
+        channel.put(CAPACITY, timeout=0.01)
+
+    def test_get_timeout(self, channel: pipe_channel.PipeChannel) -> None:
+        """
+        Get on an empty channel times out.
+        """
+        # Run and test
+        with pytest.raises(queue.Empty):
+            channel.get(timeout=0.01)
+
+    def test_across_processes(self, channel: pipe_channel.PipeChannel) -> None:
+        """
+        Producer in another process blocks on credits until the consumer catches up.
+        """
+        # Setup
+        item_count = 20
+        producer = mp.Process(target=put_items, args=(channel, item_count))
+        producer.start()
+
+        # Run
+        received = []
+        while True:
+            item = channel.get(timeout=5.0)
+            if item is None:
+                break
+
+            received.append(item)
+
+        producer.join(timeout=5.0)
+
+        # Test
+        assert received == list(range(item_count))
+
+    def test_sentinel_read_alone(self, channel: pipe_channel.PipeChannel) -> None:
+        """
+        Getting the sentinel does not read the messages after it into the local buffer.
+        """
+        # Setup
+        channel.put(None)
+        channel.put(1)
+
+        # Run
+        sentinel = channel.get(timeout=1.0)
+
+        # Test
+        assert sentinel is None
+        assert len(channel._PipeChannel__received_items) == 0
+
+
+class TestDiscard:
+    """
+    Removing items without receiving them.
+    """
+
+    def test_take_whole_messages(self, channel: pipe_channel.PipeChannel) -> None:
+        """
+        Take stops after enough messages and leaves nothing behind.
+        """
+        # Setup
+        channel.put_many([1, 2])
+        channel.put(3)
+
+        # Run
+        taken = channel.take(1)
+        remaining = channel.get_many(CAPACITY, timeout=1.0)
+
+        # Test
+        assert taken == [1, 2]
+        assert remaining == [3]
+
+    def test_drain(self, channel: pipe_channel.PipeChannel) -> None:
+        """
+        Drain counts items and sentinels and returns the credits.
+        """
+        # Setup
+        channel.put_many([1, None, 2])
+
+        # Run
+        item_count, sentinel_count = channel.drain()
+
+        # Test
+        assert item_count == 3
+        assert sentinel_count == 1
+        assert channel.put_many(list(range(CAPACITY)), block=False) == CAPACITY
+
+
+class TestInFlight:
+    """
+    Items in flight are bounded in number and in bytes.
+    """
+
+    def test_local_buffer_counts(self, channel: pipe_channel.PipeChannel) -> None:
+        """
+        Items read into the consumer's buffer but not yet returned still count towards capacity.
+        """
+        # Setup
+        channel.put_many(list(range(CAPACITY)))
+
+        # Run
+        first = channel.get_many(1, timeout=1.0)
+        put_count = channel.put_many(list(range(CAPACITY)), block=False)
+
+        # Test
+        assert first == [0]
+        assert put_count == 1
+
+    def test_byte_budget(self) -> None:
+        """
+        Put without blocking stops at the byte budget rather than blocking in the write.
+        """
+        # Setup
+        channel = pipe_channel.PipeChannel(100)
+        item = bytes(6000)
+
+        # Run
+        put_count = channel.put_many([item] * 5, block=False)
+        received = channel.get_many(100, timeout=1.0)
+        put_after_count = channel.put_many([item] * 5, block=False)
+        channel.unlink()
+
+        # Test
+        assert put_count == 2
+        assert received == [item, item]
+        assert put_after_count == 2
+
+    def test_item_too_large(self, channel: pipe_channel.PipeChannel) -> None:
+        """
+        Item that can never fit in the pipe buffer is rejected.
+        """
+        # Run and test
+        with pytest.raises(ValueError):
+            channel.put(bytes(100000), block=False)
@@ -0,0 +1,225 @@
+"""
+Test the priority queue proxy wrapper.
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+
+import pytest
+
+from utilities.workers import priority_queue_proxy_wrapper
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+STARVATION_LIMIT = 3
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> multiprocessing.managers.SyncManager:  # type: ignore
+    """
+    Manager shared by all tests in the module.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture(params=list(queue_proxy_wrapper.QueueBackend))
+def priority_queue(
+    request: pytest.FixtureRequest, mp_manager: multiprocessing.managers.SyncManager
+) -> priority_queue_proxy_wrapper.PriorityQueueProxyWrapper:  # type: ignore
+    """
+    Queue of 2 lanes for each backend.
+    """
+    wrapper = priority_queue_proxy_wrapper.PriorityQueueProxyWrapper(
+        mp_manager,
+        backend=request.param,
+        starvation_limit=STARVATION_LIMIT,
+    )
+    yield wrapper  # type: ignore
+    wrapper.close()
+
+
+def get_all(wrapper: priority_queue_proxy_wrapper.PriorityQueueProxyWrapper) -> list:
+    """
+    Gets items until the queue is empty.
+    """
+    items = []
+    while True:
+        result, item = wrapper.get(timeout=0.05)
+        if not result:
+            return items
+
+        items.append(item)
+
+
+class TestPriority:
+    """
+    Order of items across lanes.
+    """
+
+    def test_high_lane_first(
+        self, priority_queue: priority_queue_proxy_wrapper.PriorityQueueProxyWrapper
+    ) -> None:
+        """
+        High priority items put later are received earlier.
+        """
+        # Setup
+        priority_queue.put("telemetry 1")
+        priority_queue.put("telemetry 2")
+        priority_queue.put("command", 0)
+
+        # Run
+        items = get_all(priority_queue)
+
+        # Test
+        assert items == ["command", "telemetry 1", "telemetry 2"]
+
+    def test_starvation(
+        self, priority_queue: priority_queue_proxy_wrapper.PriorityQueueProxyWrapper
+    ) -> None:
+        """
+        Low lane is served after being passed over the limit.
+        """
+        # Setup
+        expected = ["high"] * STARVATION_LIMIT + ["low"] + ["high"] * 2
+        priority_queue.put("low", 1)
+        for _ in range(STARVATION_LIMIT + 2):
+            priority_queue.put("high", 0)
+
+        # Run
+        items = get_all(priority_queue)
+
+        # Test
+        assert items == expected
+
+    def test_lane_stats(
+        self, priority_queue: priority_queue_proxy_wrapper.PriorityQueueProxyWrapper
+    ) -> None:
+        """
+        Depth and latency are per lane.
+        """
+        # Setup
+        priority_queue.put(1, 0)
+        priority_queue.put(2, 1)
+        priority_queue.put(3, 1)
+
+        # Run
+        priority_queue.get(timeout=1.0)
+        priority_queue.get(timeout=1.0)
+        high_lane, low_lane = priority_queue.lane_stats()
+
+        # Test
+        assert high_lane.depth == 0
+        assert high_lane.received_count == 1
+        assert low_lane.depth == 1
+        assert low_lane.received_count == 1
+        assert 0.0 < low_lane.mean_latency <= low_lane.max_latency
+
+    def test_shutdown(
+        self, priority_queue: priority_queue_proxy_wrapper.PriorityQueueProxyWrapper
+    ) -> None:
+        """
+        Each consumer receives a sentinel and queued items are discarded.
+        """
+        # Setup
+        priority_queue.put(1, 0)
+        priority_queue.put(2, 1)
+
+        # Run
+        result = priority_queue.shutdown(consumer_count=2)
+        items = get_all(priority_queue)
+
+        # Test
+        assert result
+        assert items == [None, None]
+
+    def test_shutdown_depth(
+        self, priority_queue: priority_queue_proxy_wrapper.PriorityQueueProxyWrapper
+    ) -> None:
+        """
+        Discarded items no longer count in the depth of their lane.
+        """
+        # Setup
+        priority_queue.put(1, 0)
+        priority_queue.put(2, 1)
+        priority_queue.put(3, 1)
+
+        # Run
+        priority_queue.shutdown(consumer_count=1)
+        high_lane, low_lane = priority_queue.lane_stats()
+
+        # Test
+        assert high_lane.depth == 0
+        assert low_lane.depth == 0
+        assert high_lane.received_count == 0
+        assert low_lane.received_count == 0
+
+    def test_retire_depth(
+        self, priority_queue: priority_queue_proxy_wrapper.PriorityQueueProxyWrapper
+    ) -> None:
+        """
+        Retiring a consumer while items are queued keeps the depth and received count exact.
+        """
+        # Setup
+        priority_queue.put(1, 0)
+        assert priority_queue.put_sentinel(1.0)
+        priority_queue.put(2, 0)
+        priority_queue.put(3, 1)
+
+        # Run
+        first = [priority_queue.get(1.0)[1] for _ in range(2)]
+        high_lane_retired, _ = priority_queue.lane_stats()
+        rest = get_all(priority_queue)
+        high_lane, low_lane = priority_queue.lane_stats()
+
+        # Test
+        assert first == [1, None]
+        assert high_lane_retired.depth == 1
+        assert high_lane_retired.received_count == 1
+        assert rest == [2, 3]
+        assert high_lane.depth == 0
+        assert high_lane.received_count == 2
+        assert low_lane.depth == 0
+        assert low_lane.received_count == 1
+
+
+class TestLock:
+    """
+    Consumers do not hold the shared lock while receiving.
+    """
+
+    def test_lock_released_during_get(
+        self, priority_queue: priority_queue_proxy_wrapper.PriorityQueueProxyWrapper
+    ) -> None:
+        """
+        Lock is free while the lane transfers the item.
+        """
+        # Setup
+        lane = priority_queue.lanes[0]
+        lane_get = lane.get
+        is_lock_free = []
+
+        def get(timeout: float | None = None) -> "tuple[bool, object]":
+            lock = priority_queue._PriorityQueueProxyWrapper__lock
+            is_lock_free.append(lock.acquire(False))
+            if is_lock_free[-1]:
+                lock.release()
+
+            return lane_get(timeout)
+
+        lane.get = get
+        priority_queue.put("command", 0)
+
+        # Run
+        result, item = priority_queue.get(timeout=1.0)
+
+        # Test
+        assert result
+        assert item == "command"
+        assert is_lock_free == [True]
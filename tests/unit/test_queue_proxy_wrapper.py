@@ -0,0 +1,573 @@
+"""
+Test the queue proxy wrapper.
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+import threading
+import time
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 8
+BATCH_SIZE = 4
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> multiprocessing.managers.SyncManager:  # type: ignore
+    """
+    Manager shared by all tests in the module.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture(params=list(queue_proxy_wrapper.QueueBackend))
+def batched_queue(
+    request: pytest.FixtureRequest, mp_manager: multiprocessing.managers.SyncManager
+) -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Batched queue for each backend.
+    """
+    wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager,
+        QUEUE_MAX_SIZE,
+        request.param,
+        batch_size=BATCH_SIZE,
+    )
+    yield wrapper  # type: ignore
+    wrapper.close()
+
+
+@pytest.fixture(params=list(queue_proxy_wrapper.QueueBackend))
+def infinite_queue(
+    request: pytest.FixtureRequest, mp_manager: multiprocessing.managers.SyncManager
+) -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Infinite size queue for each backend.
+    """
+    wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 0, request.param)
+    yield wrapper  # type: ignore
+    wrapper.close()
+
+
+@pytest.fixture(params=list(queue_proxy_wrapper.QueueBackend))
+def instrumented_queue(
+    request: pytest.FixtureRequest, mp_manager: multiprocessing.managers.SyncManager
+) -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Instrumented batched queue for each backend.
+    """
+    wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager,
+        QUEUE_MAX_SIZE,
+        request.param,
+        batch_size=BATCH_SIZE,
+        is_instrumented=True,
+    )
+    yield wrapper  # type: ignore
+    wrapper.close()
+
+
+def make_overflow_queue(
+    mp_manager: multiprocessing.managers.SyncManager,
+    backend: queue_proxy_wrapper.QueueBackend,
+    overflow_policy: queue_proxy_wrapper.OverflowPolicy,
+) -> queue_proxy_wrapper.QueueProxyWrapper:
+    """
+    Queue of 2 items with the overflow policy.
+    """
+    return queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager,
+        2,
+        backend,
+        overflow_policy=overflow_policy,
+        overflow_timeout=0.05,
+        coalesce_key=key_of_pair,
+    )
+
+
+def key_of_pair(item: "tuple[str, int]") -> str:
+    """
+    Coalescing key of a (key, value) pair.
+    """
+    return item[0]
+
+
+def get_until_sentinel(
+    wrapper: queue_proxy_wrapper.QueueProxyWrapper, results: mp.SimpleQueue
+) -> None:
+    """
+    Consumer process that exits at its sentinel, reporting the items it received.
+    """
+    items = []
+    while True:
+        result, item = wrapper.get(timeout=5.0)
+        if not result:
+            break
+
+        items.append(item)
+        if item is None:
+            break
+
+    results.put(items)
+
+
+def get_all(wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> list:
+    """
+    Gets items until the queue is empty.
+    """
+    items = []
+    while True:
+        result, item = wrapper.get(timeout=0.05)
+        if not result:
+            return items
+
+        items.append(item)
+
+
+class TestBatches:
+    """
+    Batched put and get.
+    """
+
+    def test_order(self, batched_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items come out in order regardless of batching.
+        """
+        # Setup
+        expected = list(range(6))
+
+        # Run
+        put_count = batched_queue.put_many(expected, timeout=1.0)
+        actual = batched_queue.get_many(timeout=1.0)
+        actual += batched_queue.get_many(timeout=1.0)
+
+        # Test
+        assert put_count == len(expected)
+        assert actual == expected
+
+    def test_single_items(self, batched_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Single gets drain a batch one item at a time.
+        """
+        # Setup
+        expected = ["a", "b", "c"]
+        batched_queue.put_many(expected, timeout=1.0)
+
+        # Run
+        actual = []
+        for _ in expected:
+            result, item = batched_queue.get(timeout=1.0)
+            assert result
+            actual.append(item)
+
+        # Test
+        assert actual == expected
+
+    def test_empty(self, batched_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Get gives up after the timeout.
+        """
+        # Run
+        result, item = batched_queue.get(timeout=0.01)
+        items = batched_queue.get_many(timeout=0.01)
+
+        # Test
+        assert not result
+        assert item is None
+        assert items == []
+
+    def test_sentinel_per_call(self, batched_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Each call returns at most one sentinel, always last.
+        """
+        # Setup
+        batched_queue.put_many([1, None, None, 2], timeout=1.0)
+
+        # Run
+        first = batched_queue.get_many(timeout=1.0)
+        second = batched_queue.get_many(timeout=1.0)
+        third = batched_queue.get_many(timeout=1.0)
+
+        # Test
+        assert first == [1, None]
+        assert second == [None]
+        assert third == [2]
+
+    def test_average_batch_sizes(
+        self, batched_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        Averages count items per transfer.
+        """
+        # Setup
+        expected_put = 3.0
+        expected_get = 3.0
+
+        # Run
+        batched_queue.put_many(list(range(6)), timeout=1.0)
+        batched_queue.get_many(timeout=1.0)
+        batched_queue.get_many(timeout=1.0)
+        actual_put, actual_get = batched_queue.get_average_batch_sizes()
+
+        # Test
+        assert actual_put == expected_put
+        assert actual_get == expected_get
+
+
+class TestShutdown:
+    """
+    Closing the queue and delivering sentinels.
+    """
+
+    def test_full_queue(self, batched_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items are discarded and each registered consumer gets one sentinel.
+        """
+        # Setup
+        batched_queue.register_consumers(3)
+        batched_queue.put_many(list(range(QUEUE_MAX_SIZE)), timeout=1.0)
+
+        # Run
+        result = batched_queue.shutdown()
+        items = get_all(batched_queue)
+
+        # Test
+        assert result
+        assert items == [None, None, None]
+
+    def test_infinite_queue(self, infinite_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Works when fill and drain would do nothing.
+        """
+        # Setup
+        infinite_queue.put_many(list(range(100)), timeout=1.0)
+
+        # Run
+        start = time.monotonic()
+        result = infinite_queue.shutdown(consumer_count=2)
+        elapsed = time.monotonic() - start
+        items = get_all(infinite_queue)
+
+        # Test
+        assert result
+        assert elapsed < 0.5
+        assert items == [None, None]
+
+    def test_put_after_shutdown(self, batched_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items put after shutdown are discarded.
+        """
+        # Setup
+        batched_queue.shutdown(consumer_count=1)
+
+        # Run
+        result = batched_queue.put(1, timeout=1.0)
+        items = get_all(batched_queue)
+
+        # Test
+        assert batched_queue.is_shut_down()
+        assert not result
+        assert items == [None]
+
+    def test_blocked_producer(self, batched_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Producer blocked on a full queue returns on shutdown.
+        It may put its item into the space made by shutdown before noticing it, which does not
+        affect the sentinel count.
+        """
+        # Setup
+        batched_queue.put_many(list(range(QUEUE_MAX_SIZE)), timeout=1.0)
+        results = []
+        producer = threading.Thread(target=lambda: results.append(batched_queue.put(1)))
+        producer.start()
+        time.sleep(0.05)
+
+        # Run
+        batched_queue.shutdown(consumer_count=1)
+        producer.join(timeout=1.0)
+
+        items = get_all(batched_queue)
+
+        # Test
+        assert not producer.is_alive()
+        assert len(results) == 1
+        assert items.count(None) == 1
+        assert set(items) <= {1, None}
+
+
+class TestStatistics:
+    """
+    Instrumented queue.
+    """
+
+    def test_not_instrumented(self, batched_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        No statistics by default.
+        """
+        # Run
+        batched_queue.put(1, timeout=1.0)
+
+        # Test
+        assert batched_queue.stats() is None
+
+    def test_counts(self, instrumented_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Counts items rather than transfers and does not count waits that did not happen.
+        """
+        # Run
+        instrumented_queue.put_many(list(range(6)), timeout=1.0)
+        instrumented_queue.get_many(timeout=1.0)
+        snapshot = instrumented_queue.stats()
+
+        # Test
+        assert snapshot is not None
+        assert snapshot.put_count == 6
+        assert snapshot.get_count == 4
+        assert snapshot.depth == 2
+        assert snapshot.peak_depth == 6
+        assert snapshot.put_blocked_time == 0.0
+        assert snapshot.get_blocked_time == 0.0
+
+    def test_blocked(self, instrumented_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Timed out waits on a full and an empty queue are recorded.
+        """
+        # Setup
+        # A manager batch takes a single slot, so fill one item at a time
+        for i in range(QUEUE_MAX_SIZE):
+            instrumented_queue.put(i, timeout=1.0)
+
+        # Run
+        instrumented_queue.put(1, timeout=0.05)
+        instrumented_queue.shutdown(consumer_count=0)
+        instrumented_queue.get(timeout=0.05)
+        snapshot = instrumented_queue.stats()
+
+        # Test
+        assert snapshot is not None
+        assert snapshot.put_blocked_time >= 0.04
+        assert snapshot.get_blocked_time >= 0.04
+        assert sum(snapshot.put_blocked_histogram) == 1
+        assert sum(snapshot.get_blocked_histogram) == 1
+        assert snapshot.discarded_count == QUEUE_MAX_SIZE
+        assert snapshot.depth == 0
+
+
+class TestOverflowPolicy:
+    """
+    Putting into a full queue.
+    """
+
+    @pytest.mark.parametrize("backend", list(queue_proxy_wrapper.QueueBackend))
+    def test_drop_newest(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Items put into a full queue are dropped without waiting.
+        """
+        # Setup
+        wrapper = make_overflow_queue(
+            mp_manager, backend, queue_proxy_wrapper.OverflowPolicy.DROP_NEWEST
+        )
+
+        # Run
+        start = time.monotonic()
+        put_count = wrapper.put_many([1, 2, 3, 4])
+        elapsed = time.monotonic() - start
+        items = get_all(wrapper)
+        wrapper.close()
+
+        # Test
+        assert put_count == 2
+        assert elapsed < 0.05
+        assert items == [1, 2]
+        assert wrapper.get_dropped_count() == 2
+
+    @pytest.mark.parametrize("backend", list(queue_proxy_wrapper.QueueBackend))
+    def test_drop_oldest(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Oldest items make space for new ones.
+        """
+        # Setup
+        wrapper = make_overflow_queue(
+            mp_manager, backend, queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST
+        )
+
+        # Run
+        put_count = wrapper.put_many([1, 2, 3, 4])
+        items = get_all(wrapper)
+        wrapper.close()
+
+        # Test
+        assert put_count == 4
+        assert items == [3, 4]
+        assert wrapper.get_dropped_count() == 2
+
+    @pytest.mark.parametrize("backend", list(queue_proxy_wrapper.QueueBackend))
+    def test_drop_oldest_keeps_sentinel(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Sentinels are never dropped.
+        """
+        # Setup
+        wrapper = make_overflow_queue(
+            mp_manager, backend, queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST
+        )
+        wrapper.put_many([None, 1])
+
+        # Run
+        wrapper.put(2)
+        items = get_all(wrapper)
+        wrapper.close()
+
+        # Test
+        assert items == [None, 2]
+        assert wrapper.get_dropped_count() == 1
+
+    @pytest.mark.parametrize("backend", list(queue_proxy_wrapper.QueueBackend))
+    def test_coalesce_by_key(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Newer items replace queued ones of the same key in place.
+        """
+        # Setup
+        wrapper = make_overflow_queue(
+            mp_manager, backend, queue_proxy_wrapper.OverflowPolicy.COALESCE_BY_KEY
+        )
+
+        # Run
+        put_count = wrapper.put_many([("a", 1), ("b", 1), ("a", 2), ("b", 2), ("c", 1)])
+        items = get_all(wrapper)
+        wrapper.close()
+
+        # Test
+        assert put_count == 5
+        assert items == [("b", 2), ("c", 1)]
+        assert wrapper.get_dropped_count() == 3
+
+    @pytest.mark.parametrize("backend", list(queue_proxy_wrapper.QueueBackend))
+    def test_coalesce_around_sentinel(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Items put back behind a sentinel are not lost with the consumer that exits at it.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            2,
+            backend,
+            batch_size=BATCH_SIZE,
+            overflow_policy=queue_proxy_wrapper.OverflowPolicy.COALESCE_BY_KEY,
+            coalesce_key=key_of_pair,
+        )
+        wrapper.put_many([("a", 1), None, ("b", 1)])
+        wrapper.put(("a", 2))
+        results = mp.SimpleQueue()
+
+        # Run
+        consumer = mp.Process(target=get_until_sentinel, args=(wrapper, results))
+        consumer.start()
+        consumed = results.get()
+        consumer.join()
+        remaining = get_all(wrapper)
+        wrapper.close()
+
+        # Test
+        assert consumed[-1] is None
+        assert len(consumed) + len(remaining) == 4 - wrapper.get_dropped_count()
+        assert len(remaining) > 0
+
+    @pytest.mark.parametrize("backend", list(queue_proxy_wrapper.QueueBackend))
+    def test_timeout_then_drop(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Waits up to the overflow timeout even if the put has no timeout.
+        """
+        # Setup
+        wrapper = make_overflow_queue(
+            mp_manager, backend, queue_proxy_wrapper.OverflowPolicy.TIMEOUT_THEN_DROP
+        )
+        wrapper.put_many([1, 2])
+
+        # Run
+        start = time.monotonic()
+        result = wrapper.put(3)
+        elapsed = time.monotonic() - start
+        wrapper.close()
+
+        # Test
+        assert not result
+        assert 0.04 <= elapsed < 1.0
+        assert wrapper.get_dropped_count() == 1
+
+
+class TestAutomaticBackend:
+    """
+    Backend chosen from the registered workers.
+    """
+
+    @pytest.mark.parametrize(
+        "producer_count,consumer_count,expected",
+        [
+            (1, 1, queue_proxy_wrapper.QueueBackend.PIPE),
+            (2, 1, queue_proxy_wrapper.QueueBackend.MANAGER),
+            (1, 0, queue_proxy_wrapper.QueueBackend.MANAGER),
+        ],
+    )
+    def test_resolve(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        producer_count: int,
+        consumer_count: int,
+        expected: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Pipe only for 1 producer and 1 consumer.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.AUTO
+        )
+        wrapper.register_producers(producer_count)
+        wrapper.register_consumers(consumer_count)
+
+        # Run
+        actual = wrapper.resolve_backend()
+        wrapper.put(1, timeout=1.0)
+        result, item = wrapper.get(timeout=1.0)
+        wrapper.close()
+
+        # Test
+        assert actual == expected
+        assert wrapper.backend == expected
+        assert result
+        assert item == 1
@@ -0,0 +1,81 @@
+"""
+Test the queue statistics.
+"""
+
+import pytest
+
+from utilities.workers import queue_statistics
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture
+def statistics() -> queue_statistics.QueueStatistics:  # type: ignore
+    """
+    Zeroed statistics.
+    """
+    yield queue_statistics.QueueStatistics()  # type: ignore
+
+
+class TestCounters:
+    """
+    Depth and counts.
+    """
+
+    def test_depth(self, statistics: queue_statistics.QueueStatistics) -> None:
+        """
+        Depth follows puts, gets and discards, peak keeps the highest.
+        """
+        # Run
+        statistics.record_put(3)
+        statistics.record_put(2)
+        statistics.record_get(4)
+        statistics.record_put(1)
+        statistics.record_discard(1)
+        snapshot = statistics.snapshot()
+
+        # Test
+        assert snapshot.depth == 1
+        assert snapshot.peak_depth == 5
+        assert snapshot.put_count == 6
+        assert snapshot.get_count == 4
+        assert snapshot.discarded_count == 1
+        assert snapshot.put_rate > 0.0
+
+    def test_waiting(self, statistics: queue_statistics.QueueStatistics) -> None:
+        """
+        Waiting consumers are counted until they stop waiting.
+        """
+        # Run
+        statistics.record_waiting(1)
+        statistics.record_waiting(1)
+        statistics.record_waiting(-1)
+        snapshot = statistics.snapshot()
+
+        # Test
+        assert snapshot.waiting_count == 1
+
+    def test_blocked_histogram(self, statistics: queue_statistics.QueueStatistics) -> None:
+        """
+        Waits are totalled and sorted into buckets, transfers that did not wait are not.
+        """
+        # Setup
+        expected_put_histogram = [1, 0, 1, 0, 1]
+        expected_get_histogram = [0, 1, 0, 0, 0]
+
+        # Run
+        statistics.record_put(1, 0.0)
+        statistics.record_put(1, 0.0005)
+        statistics.record_put(1, 0.05)
+        statistics.record_put(1, 2.0)
+        statistics.record_get(1, 0.005)
+        snapshot = statistics.snapshot()
+
+        # Test
+        assert snapshot.put_blocked_time == pytest.approx(2.0505)
+        assert snapshot.get_blocked_time == pytest.approx(0.005)
+        assert snapshot.put_blocked_histogram == expected_put_histogram
+        assert snapshot.get_blocked_histogram == expected_get_histogram
@@ -0,0 +1,203 @@
+"""
+Test the restart policy of the worker manager.
+"""
+
+import time
+
+import pytest
+
+from tests.unit import recording_logger
+from utilities.workers import restart_policy
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+CRASH_EXIT_CODE = 3
+
+
+def crash(_: worker_controller.WorkerController) -> None:
+    """
+    Fails to start every time.
+    """
+    raise SystemExit(CRASH_EXIT_CODE)
+
+
+def create_manager(
+    policy: restart_policy.RestartPolicy, controller: worker_controller.WorkerController
+) -> worker_manager.WorkerManager:
+    """
+    Manager of a single worker that always crashes.
+    """
+    local_logger = recording_logger.RecordingLogger()
+    result, properties = worker_manager.WorkerProperties.create(
+        1, crash, (), [], [], controller, local_logger  # type: ignore
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(properties, local_logger, policy)  # type: ignore
+    assert result
+    assert manager is not None
+
+    return manager
+
+
+def restart_until_given_up(manager: worker_manager.WorkerManager, timeout: float) -> float:
+    """
+    Checks the workers until the manager gives up.
+
+    Returns the seconds it took.
+    """
+    start_time = time.monotonic()
+    while not manager.is_given_up() and time.monotonic() - start_time < timeout:
+        manager.join_workers()
+        manager.check_and_restart_dead_workers()
+        time.sleep(0.001)
+
+    manager.join_workers()
+    return time.monotonic() - start_time
+
+
+@pytest.fixture
+def controller() -> worker_controller.WorkerController:  # type: ignore
+    """
+    Worker controller.
+    """
+    yield worker_controller.WorkerController()  # type: ignore
+
+
+class TestBackoff:
+    """
+    Delay between restarts.
+    """
+
+    def test_default_unlimited(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Without a policy, dead workers are restarted immediately however often they die.
+        """
+        # Setup
+        manager = create_manager(None, controller)  # type: ignore
+
+        # Run
+        manager.start_workers()
+        start_time = time.monotonic()
+        while (
+            manager.get_restart_statistics().restart_count < 8
+            and time.monotonic() - start_time < 5.0
+        ):
+            manager.join_workers()
+            assert manager.check_and_restart_dead_workers()
+            time.sleep(0.001)
+
+        manager.join_workers()
+        statistics = manager.get_restart_statistics()
+
+        # Test
+        assert statistics.restart_count >= 8
+        assert not manager.is_given_up()
+        assert restart_policy.RestartPolicy().get_backoff(10) == 0.0
+
+    def test_exponential_and_capped(self) -> None:
+        """
+        Backoff doubles for each failed start up to the maximum.
+        """
+        # Setup
+        policy = restart_policy.RestartPolicy(
+            initial_backoff=0.1, max_backoff=0.5, backoff_multiplier=2.0
+        )
+
+        # Run
+        backoffs = [policy.get_backoff(count) for count in range(5)]
+
+        # Test
+        assert backoffs == pytest.approx([0.0, 0.1, 0.2, 0.4, 0.5])
+
+    def test_failed_starts_are_delayed(
+        self, controller: worker_controller.WorkerController
+    ) -> None:
+        """
+        Restarts of a worker that keeps failing to start are spread out by the backoff.
+        """
+        # Setup
+        policy = restart_policy.RestartPolicy(
+            initial_backoff=0.02, max_backoff=1.0, max_restarts=3, restart_window=60.0
+        )
+        manager = create_manager(policy, controller)
+
+        # Run
+        manager.start_workers()
+        elapsed_time = restart_until_given_up(manager, 5.0)
+        statistics = manager.get_restart_statistics()
+
+        # Test
+        # Backoffs of 0.02 + 0.04 + 0.08 before the 3 restarts
+        assert elapsed_time >= 0.14
+        assert statistics.restart_count == 3
+        assert statistics.failed_start_count == 4
+        assert statistics.is_given_up
+
+
+class TestEscalation:
+    """
+    Restarts within the window are limited.
+    """
+
+    def test_give_up(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Manager stops restarting and leaves the pipeline running.
+        """
+        # Setup
+        policy = restart_policy.RestartPolicy(initial_backoff=0.0, max_restarts=2)
+        manager = create_manager(policy, controller)
+
+        # Run
+        manager.start_workers()
+        restart_until_given_up(manager, 5.0)
+        dead_worker = manager.get_workers()[0]
+
+        # Test
+        assert manager.is_given_up()
+        assert not manager.restart_worker(dead_worker)
+        assert not manager.check_and_restart_dead_workers()
+        assert manager.get_restart_statistics().window_restart_count == 2
+        assert not controller.is_exit_requested()
+
+    def test_stop_pipeline(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Manager requests all workers to exit.
+        """
+        # Setup
+        policy = restart_policy.RestartPolicy(
+            initial_backoff=0.0, max_restarts=1, escalation=restart_policy.Escalation.STOP_PIPELINE
+        )
+        manager = create_manager(policy, controller)
+
+        # Run
+        manager.start_workers()
+        restart_until_given_up(manager, 5.0)
+
+        # Test
+        assert manager.is_given_up()
+        assert controller.is_exit_requested()
+
+    def test_time_to_recover(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Recovery is measured for each replacement that ran.
+        """
+        # Setup
+        policy = restart_policy.RestartPolicy(initial_backoff=0.0, max_restarts=2)
+        manager = create_manager(policy, controller)
+
+        # Run
+        manager.start_workers()
+        restart_until_given_up(manager, 5.0)
+        statistics = manager.get_restart_statistics()
+
+        # Test
+        assert statistics.recovered_count == 2
+        assert 0.0 < statistics.mean_time_to_recover <= statistics.max_time_to_recover
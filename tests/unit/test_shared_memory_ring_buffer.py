@@ -0,0 +1,148 @@
+"""
+Test the shared memory ring buffer.
+"""
+
+import multiprocessing as mp
+import queue
+
+import pytest
+
+from utilities.workers import shared_memory_ring_buffer
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+CAPACITY = 3
+SLOT_SIZE = 256
+
+
+@pytest.fixture()
+def ring_buffer() -> shared_memory_ring_buffer.SharedMemoryRingBuffer:  # type: ignore
+    """
+    Creates a small ring buffer.
+    """
+    buffer = shared_memory_ring_buffer.SharedMemoryRingBuffer(CAPACITY, SLOT_SIZE)
+    yield buffer  # type: ignore
+    buffer.unlink()
+
+
+def put_items(buffer: shared_memory_ring_buffer.SharedMemoryRingBuffer, count: int) -> None:
+    """
+    Producer process.
+    """
+    for i in range(count):
+        buffer.put(i)
+
+    buffer.put(None)
+
+
+class TestPutGet:
+    """
+    Items go in and out in order.
+    """
+
+    def test_fifo_order(
+        self, ring_buffer: shared_memory_ring_buffer.SharedMemoryRingBuffer
+    ) -> None:
+        """
+        Items are returned in insertion order, including after wrapping around.
+        """
+        # Setup
+        expected = [1, "two", (3.0, None), {"four": 4}, None]
+
+        # Run
+        actual = []
+        for item in expected:
+            ring_buffer.put(item)
+            actual.append(ring_buffer.get())
+
+        # Test
+        assert actual == expected
+
+    def test_qsize(self, ring_buffer: shared_memory_ring_buffer.SharedMemoryRingBuffer) -> None:
+        """
+        Size follows puts and gets.
+        """
+        # Run
+        ring_buffer.put(1)
+        ring_buffer.put(2)
+        _ = ring_buffer.get()
+
+        # Test
+        assert ring_buffer.qsize() == 1
+        assert not ring_buffer.empty()
+        assert not ring_buffer.full()
+
+    def test_across_processes(
+        self, ring_buffer: shared_memory_ring_buffer.SharedMemoryRingBuffer
+    ) -> None:
+        """
+        Producer process blocks on the small buffer until main consumes.
+        """
+        # Setup
+        count = 20
+        expected = list(range(count))
+        producer = mp.Process(target=put_items, args=(ring_buffer, count))
+
+        # Run
+        producer.start()
+        actual = []
+        while True:
+            item = ring_buffer.get(timeout=5.0)
+            if item is None:
+                break
+
+            actual.append(item)
+
+        producer.join()
+
+        # Test
+        assert actual == expected
+
+
+class TestLimits:
+    """
+    Capacity, timeouts, and slot size.
+    """
+
+    def test_put_full(self, ring_buffer: shared_memory_ring_buffer.SharedMemoryRingBuffer) -> None:
+        """
+        Put times out when all slots are taken.
+        """
+        # Setup
+        for i in range(CAPACITY):
+            ring_buffer.put(i)
+
+        # Run and test
+        assert ring_buffer.full()
+        with pytest.raises(queue.Full):
+            ring_buffer.put(CAPACITY, timeout=0.01)
+
+        with pytest.raises(queue.Full):
+            ring_buffer.put_nowait(CAPACITY)
+
+    def test_get_empty(self, ring_buffer: shared_memory_ring_buffer.SharedMemoryRingBuffer) -> None:
+        """
+        Get times out when there are no items.
+        """
+        # Run and test
+        with pytest.raises(queue.Empty):
+            ring_buffer.get(timeout=0.01)
+
+        with pytest.raises(queue.Empty):
+            ring_buffer.get_nowait()
+
+    def test_item_too_large(
+        self, ring_buffer: shared_memory_ring_buffer.SharedMemoryRingBuffer
+    ) -> None:
+        """
+        Item larger than a slot is rejected without taking a slot.
+        """
+        # Run and test
+        with pytest.raises(ValueError):
+            ring_buffer.put(b"0" * SLOT_SIZE)
+
+        assert ring_buffer.empty()
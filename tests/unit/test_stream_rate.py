@@ -0,0 +1,264 @@
+"""
+Test negotiating the telemetry message rates.
+"""
+
+import pytest
+
+from pymavlink import mavutil
+
+from modules.mavlink_writer import mavlink_writer
+from modules.telemetry import stream_rate
+from tests.unit import recording_logger
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+class FakeConnection:
+    """
+    Stands in for the connection, keeping the bytes written.
+    """
+
+    def __init__(self) -> None:
+        self.mav = mavutil.mavlink.MAVLink(self)
+        self.writes = []
+
+    def write(self, data: bytes) -> None:
+        """
+        Records the data.
+        """
+        self.writes.append(data)
+
+    def get_sent(self) -> "list[mavutil.mavlink.MAVLink_message]":
+        """
+        Returns every message written.
+        """
+        decoder = mavutil.mavlink.MAVLink(None)
+        return [decoder.decode(bytearray(data)) for data in self.writes]
+
+
+# Messages from the drone
+DRONE = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=0)
+HEARTBEAT = DRONE.heartbeat_encode(mavutil.mavlink.MAV_TYPE_QUADROTOR, 0, 0, 0, 0)
+ATTITUDE = DRONE.attitude_encode(0, 0, 0, 0, 0, 0, 0)
+
+
+def ack(result: int) -> mavutil.mavlink.MAVLink_message:
+    """
+    Acknowledgement of MAV_CMD_SET_MESSAGE_INTERVAL.
+    """
+    return DRONE.command_ack_encode(mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL, result)
+
+
+def create_negotiator(
+    rates: "dict[str, float]",
+    local_logger: "recording_logger.RecordingLogger | None" = None,
+    connection: "FakeConnection | None" = None,
+) -> stream_rate.StreamRateNegotiator:
+    """
+    Negotiator of the rates.
+    """
+    result, negotiator = stream_rate.StreamRateNegotiator.create(
+        connection or FakeConnection(), rates, local_logger or recording_logger.RecordingLogger()  # type: ignore
+    )
+    assert result
+    assert negotiator is not None
+    return negotiator
+
+
+def describe(messages: "list[mavutil.mavlink.MAVLink_message]") -> "list[tuple]":
+    """
+    Returns the type and request of each message sent.
+    """
+    described = []
+    for message in messages:
+        if message.get_type() == "COMMAND_LONG":
+            described.append((message.command, message.param1, message.param2))
+        else:
+            described.append((message.req_stream_id, message.req_message_rate))
+
+    return described
+
+
+INTERVAL = mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL
+ATTITUDE_ID = mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE
+POSITION_ID = mavutil.mavlink.MAVLINK_MSG_ID_LOCAL_POSITION_NED
+
+
+class TestStreamRateNegotiator:
+    """
+    Rates are requested, verified and requested again when lost.
+    """
+
+    def test_accepted(self) -> None:
+        """
+        Intervals are requested one at a time and verified once the rate is received.
+        """
+        # Setup
+        negotiator = create_negotiator({"ATTITUDE": 10.0, "LOCAL_POSITION_NED": 5.0})
+
+        # Run
+        sent_first = negotiator.run([], 0.0)
+        sent_waiting = negotiator.run([], 0.5)
+        sent_after_ack = negotiator.run([ack(mavutil.mavlink.MAV_RESULT_ACCEPTED)], 0.6)
+        negotiator.run([ATTITUDE] * 20, 2.6)
+
+        # Test
+        assert describe(sent_first) == [(INTERVAL, ATTITUDE_ID, 100000.0)]
+        assert len(sent_waiting) == 0
+        assert describe(sent_after_ack) == [(INTERVAL, POSITION_ID, 200000.0)]
+        assert negotiator.get_states()["ATTITUDE"] == stream_rate.StreamState.VERIFIED
+        assert negotiator.get_achieved_rates()["ATTITUDE"] == 10.0
+
+    def test_late_check(self) -> None:
+        """
+        Rate is measured over the time actually elapsed, not the nominal period.
+        """
+        # Setup
+        negotiator = create_negotiator({"ATTITUDE": 10.0})
+        negotiator.run([], 0.0)
+        negotiator.run([ack(mavutil.mavlink.MAV_RESULT_ACCEPTED)], 0.5)
+
+        # Run
+        negotiator.run([ATTITUDE] * 20, 4.5)
+
+        # Test
+        assert negotiator.get_achieved_rates()["ATTITUDE"] == 5.0
+        assert negotiator.get_states()["ATTITUDE"] != stream_rate.StreamState.VERIFIED
+
+    def test_refused_falls_back(self) -> None:
+        """
+        A refused interval is requested as a data stream.
+        """
+        # Setup
+        negotiator = create_negotiator({"ATTITUDE": 4.0})
+        negotiator.run([], 0.0)
+
+        # Run
+        sent = negotiator.run([ack(mavutil.mavlink.MAV_RESULT_UNSUPPORTED)], 0.1)
+
+        # Test
+        assert describe(sent) == [(mavutil.mavlink.MAV_DATA_STREAM_EXTRA1, 4)]
+        assert negotiator.get_states()["ATTITUDE"] == stream_rate.StreamState.VERIFYING
+
+    def test_unacknowledged_retries(self) -> None:
+        """
+        An unacknowledged interval is requested again, then as a data stream.
+        """
+        # Setup
+        negotiator = create_negotiator({"ATTITUDE": 4.0})
+
+        # Run
+        sent = [describe(negotiator.run([], now)) for now in [0.0, 1.0, 2.0, 3.0]]
+
+        # Test
+        assert sent == [[(INTERVAL, ATTITUDE_ID, 250000.0)]] * 3 + [
+            [(mavutil.mavlink.MAV_DATA_STREAM_EXTRA1, 4)]
+        ]
+
+    def test_rate_not_achieved(self) -> None:
+        """
+        A rate still not achieved after every request is given up on and logged.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+        negotiator = create_negotiator({"ATTITUDE": 10.0}, local_logger)
+        now = 0.0
+        accepted = [ack(mavutil.mavlink.MAV_RESULT_ACCEPTED)]
+
+        # Run
+        for _ in range(0, 3):
+            negotiator.run([], now)
+            negotiator.run(accepted, now + 0.1)
+            now += 2.1
+
+        sent_fallback = negotiator.run([], now)
+        negotiator.run([], now + 2.0)
+
+        # Test
+        assert describe(sent_fallback) == [(mavutil.mavlink.MAV_DATA_STREAM_EXTRA1, 10)]
+        assert negotiator.get_states()["ATTITUDE"] == stream_rate.StreamState.FAILED
+        assert len(local_logger.messages) == 1
+
+    def test_reconnect(self) -> None:
+        """
+        Nothing is requested while the drone is lost and everything is requested again after.
+        """
+        # Setup
+        negotiator = create_negotiator({"ATTITUDE": 10.0})
+        negotiator.run([HEARTBEAT], 0.0)
+        negotiator.run([ack(mavutil.mavlink.MAV_RESULT_ACCEPTED)], 0.1)
+        negotiator.run([HEARTBEAT] + [ATTITUDE] * 20, 2.1)
+        assert negotiator.get_states()["ATTITUDE"] == stream_rate.StreamState.VERIFIED
+
+        # Run
+        sent_lost = negotiator.run([], 6.0)
+        sent_reconnected = negotiator.run([HEARTBEAT], 10.0)
+
+        # Test
+        assert len(sent_lost) == 0
+        assert describe(sent_reconnected) == [(INTERVAL, ATTITUDE_ID, 100000.0)]
+
+    @pytest.mark.parametrize("rates", [{"ATTITUDE": 0.0}, {"MISSING": 1.0}])
+    def test_invalid(self, rates: "dict[str, float]") -> None:
+        """
+        Negotiator is not created and the problem is logged.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+
+        # Run
+        result, negotiator = stream_rate.StreamRateNegotiator.create(
+            FakeConnection(), rates, local_logger  # type: ignore
+        )
+
+        # Test
+        assert not result
+        assert negotiator is None
+        assert len(local_logger.messages) == 1
+
+
+class TestStreamRateThroughWriter:
+    """
+    Requests waiting in the writer together are all sent.
+    """
+
+    def test_requests_not_coalesced(self) -> None:
+        """
+        Fallbacks and intervals for different streams do not replace each other in the writer.
+        """
+        # Setup
+        connection = FakeConnection()
+        negotiator = create_negotiator(
+            {"ATTITUDE": 4.0, "LOCAL_POSITION_NED": 2.0}, connection=connection
+        )
+        input_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            None, 0, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY, batch_size=64
+        )
+        result, writer = mavlink_writer.MavlinkWriter.create(
+            connection, input_queue, {}, None, recording_logger.RecordingLogger()  # type: ignore
+        )
+        assert result
+        assert writer is not None
+        refused = [ack(mavutil.mavlink.MAV_RESULT_UNSUPPORTED)]
+
+        # Run
+        # All the requests wait in the writer's queue before it runs
+        for received, now in [([], 0.0), (refused, 0.1), (refused, 0.2)]:
+            for message in negotiator.run(received, now):
+                assert mavlink_writer.request(input_queue, message)
+
+        writer.run(0.1)
+        input_queue.close()
+
+        # Test
+        assert describe(connection.get_sent()) == [
+            (INTERVAL, ATTITUDE_ID, 250000.0),
+            (mavutil.mavlink.MAV_DATA_STREAM_EXTRA1, 4),
+            (INTERVAL, POSITION_ID, 500000.0),
+            (mavutil.mavlink.MAV_DATA_STREAM_POSITION, 2),
+        ]
+        assert writer.get_report().coalesced_count == 0
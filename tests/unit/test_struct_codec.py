@@ -0,0 +1,187 @@
+"""
+Test the struct codec.
+"""
+
+import math
+import multiprocessing as mp
+import multiprocessing.managers
+import pickle
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import struct_codec
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+class Sample:
+    """
+    Struct with optional fields.
+    """
+
+    def __init__(
+        self, timestamp: int | None = None, value: float | None = None, other: float | None = None
+    ) -> None:
+        self.timestamp = timestamp
+        self.value = value
+        self.other = other
+
+
+SAMPLE_CODEC = struct_codec.StructCodec(255, Sample, ["timestamp", "value", "other"], ["timestamp"])
+struct_codec.register_codec(SAMPLE_CODEC)
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> multiprocessing.managers.SyncManager:  # type: ignore
+    """
+    Manager shared by all tests in the module.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+class TestCodec:
+    """
+    Encoding and decoding.
+    """
+
+    def test_round_trip(self) -> None:
+        """
+        Values and None survive encoding.
+        """
+        # Setup
+        sample = Sample(12345, -1.5, None)
+
+        # Run
+        data = SAMPLE_CODEC.encode(sample)
+        actual = SAMPLE_CODEC.decode(data)
+
+        # Test
+        assert len(data) == SAMPLE_CODEC.size
+        assert isinstance(actual, Sample)
+        assert actual.timestamp == 12345
+        assert isinstance(actual.timestamp, int)
+        assert math.isclose(actual.value, -1.5)
+        assert actual.other is None
+
+    def test_duplicate_registration(self) -> None:
+        """
+        Type and type ID can only be registered once.
+        """
+        # Setup
+        same_type = struct_codec.StructCodec(254, Sample, ["value"])
+        same_id = struct_codec.StructCodec(255, int, ["real"])
+
+        # Run and test
+        assert not struct_codec.register_codec(SAMPLE_CODEC)
+        assert not struct_codec.register_codec(same_type)
+        assert not struct_codec.register_codec(same_id)
+
+    def test_pickle(self) -> None:
+        """
+        Codec survives pickling, so queues can carry it to workers.
+        """
+        # Setup
+        sample = Sample(1, 2.0, 3.0)
+
+        # Run
+        codec = pickle.loads(pickle.dumps(SAMPLE_CODEC))
+        actual = codec.decode(SAMPLE_CODEC.encode(sample))
+
+        # Test
+        assert codec.type_id == SAMPLE_CODEC.type_id
+        assert codec.size == SAMPLE_CODEC.size
+        assert isinstance(actual.timestamp, int)
+        assert actual.__dict__ == sample.__dict__
+
+    def test_unknown_type_id(self) -> None:
+        """
+        Decoding a type ID without a codec is an error.
+        """
+        # Run and test
+        with pytest.raises(LookupError):
+            struct_codec.deserialize(253, bytes(8))
+
+
+class TestQueue:
+    """
+    Queues encode registered structs automatically.
+    """
+
+    @pytest.mark.parametrize("backend", list(queue_proxy_wrapper.QueueBackend))
+    def test_through_queue(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Struct and sentinel come out of the queue intact.
+        """
+        # Setup
+        sample = Sample(7, None, 0.25)
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 4, backend)
+
+        # Run
+        wrapper.put_many([sample, None], timeout=1.0)
+        _, actual = wrapper.get(timeout=1.0)
+        _, sentinel = wrapper.get(timeout=1.0)
+        wrapper.close()
+
+        # Test
+        assert isinstance(actual, Sample)
+        assert actual.__dict__ == sample.__dict__
+        assert sentinel is None
+
+    def test_manager_raw_items(self, mp_manager: multiprocessing.managers.SyncManager) -> None:
+        """
+        Manager backend holds the structs themselves, so the queue can be read directly.
+        """
+        # Setup
+        sample = Sample(8, 1.0, None)
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 4)
+
+        # Run
+        wrapper.put(sample)
+        actual = wrapper.queue.get(timeout=1.0)
+
+        # Test
+        assert isinstance(actual, Sample)
+        assert actual.__dict__ == sample.__dict__
+
+    @pytest.mark.parametrize(
+        "backend",
+        [queue_proxy_wrapper.QueueBackend.SHARED_MEMORY, queue_proxy_wrapper.QueueBackend.PIPE],
+    )
+    def test_carries_codecs(
+        self, monkeypatch: pytest.MonkeyPatch, backend: queue_proxy_wrapper.QueueBackend
+    ) -> None:
+        """
+        A process receiving the queue registers the codecs of the process that passed it.
+        """
+        # Setup
+        sample = Sample(9, None, -2.0)
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(None, 4, backend)
+        state = wrapper.__getstate__()
+        codecs = pickle.loads(pickle.dumps(state["codecs"]))
+        # Receiving process has not registered anything
+        monkeypatch.setattr(struct_codec, "_CODECS_BY_TYPE", {})
+        monkeypatch.setattr(struct_codec, "_CODECS_BY_ID", {})
+
+        # Run
+        received = queue_proxy_wrapper.QueueProxyWrapper.__new__(
+            queue_proxy_wrapper.QueueProxyWrapper
+        )
+        received.__setstate__({"codecs": codecs, "attributes": state["attributes"]})
+        wrapper.put(sample)
+        _, actual = received.get(timeout=1.0)
+        wrapper.close()
+
+        # Test
+        assert struct_codec._CODECS_BY_ID[SAMPLE_CODEC.type_id].struct_type is Sample
+        assert isinstance(actual, Sample)
+        assert actual.__dict__ == sample.__dict__
@@ -0,0 +1,187 @@
+"""
+Test building a pipeline from the configuration.
+"""
+
+import copy
+import multiprocessing.shared_memory
+
+import pytest
+
+from tests.unit import recording_logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import topology
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+def source(
+    start: int,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Puts increasing numbers until exit.
+    """
+    value = start
+    while not controller.is_exit_requested():
+        if output_queue.put(value, 0.1):
+            value += 1
+
+
+def forward(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Passes items on until the sentinel.
+    """
+    while not controller.is_exit_requested():
+        result, item = input_queue.get(0.1)
+        if not result:
+            continue
+
+        if item is None:
+            break
+
+        output_queue.put(item, 0.1)
+
+
+# Source to forward to main, written in the order of the stages to check it is not relied on
+CONFIG = {
+    "topology": {
+        "queues": {
+            "source_to_forward": {"maxsize": 4, "backend": "SHARED_MEMORY"},
+            "forward_to_main": {"maxsize": 0, "backend": "SHARED_MEMORY"},
+        },
+        "stages": {
+            "forward": {
+                "target": "tests.unit.test_topology.forward",
+                "count": 2,
+                "inputs": ["source_to_forward"],
+                "outputs": ["forward_to_main"],
+                "worker_rate": 5,
+            },
+            "source": {
+                "target": "tests.unit.test_topology.source",
+                "count": 1,
+                "args": [10],
+                "outputs": ["source_to_forward"],
+                "worker_rate": 20,
+            },
+        },
+    },
+}
+
+
+@pytest.fixture
+def config() -> dict:  # type: ignore
+    """
+    Configuration that can be modified.
+    """
+    yield copy.deepcopy(CONFIG)  # type: ignore
+
+
+def create_topology(
+    config: dict, local_logger: recording_logger.RecordingLogger
+) -> "topology.Topology | None":
+    """
+    Topology, None if it failed to create.
+    """
+    result, pipeline = topology.Topology.create(
+        config, worker_controller.WorkerController(), local_logger  # type: ignore
+    )
+    assert result == (pipeline is not None)
+    return pipeline
+
+
+class TestTopology:
+    """
+    Graph of the pipeline.
+    """
+
+    def test_build(self, config: dict) -> None:
+        """
+        Stages are ordered from the start and queues are shut down from the end.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+
+        # Run
+        pipeline = create_topology(config, local_logger)
+
+        # Test
+        assert pipeline is not None
+        assert pipeline.get_stage_order() == ["source", "forward"]
+        assert pipeline.get_shutdown_order() == ["forward_to_main", "source_to_forward"]
+        forward_manager = pipeline.get_manager("forward")
+        assert forward_manager is not None
+        assert forward_manager.get_worker_count() == 2
+        assert pipeline.get_managers()[1] is forward_manager
+        queue = pipeline.get_queue("source_to_forward")
+        assert queue is not None
+        assert queue.maxsize == 4
+        assert pipeline.get_bottleneck_report().startswith("bottleneck: forward at 10.0/s")
+
+    def test_run(self, config: dict) -> None:
+        """
+        Items flow through the stages to main, every worker exits on shutdown and the shared
+        memory of the queues is released.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+        pipeline = create_topology(config, local_logger)
+        assert pipeline is not None
+        output_queue = pipeline.get_queue("forward_to_main")
+        assert output_queue is not None
+        memory_names = []
+        for queue_name in pipeline.get_shutdown_order():
+            queue = pipeline.get_queue(queue_name)
+            assert queue is not None
+            memory_names.append(queue.queue._SharedMemoryRingBuffer__memory.name)
+
+        # Run
+        pipeline.start()
+        result, item = output_queue.get(5.0)
+        report = pipeline.shutdown(5.0)
+
+        # Test
+        assert result
+        assert isinstance(item, int)
+        assert item >= 10
+        assert len(report.joined) == 3
+        assert not report.is_forced()
+        for name in memory_names:
+            with pytest.raises(FileNotFoundError):
+                multiprocessing.shared_memory.SharedMemory(name)
+
+    @pytest.mark.parametrize(
+        "stage,setting,value,message",
+        [
+            ("forward", "count", 5, "maxsize 4 is less than"),
+            ("source", "inputs", ["forward_to_main"], "cycle"),
+            ("forward", "outputs", ["missing"], "unknown queue"),
+            ("forward", "target", "tests.unit.test_topology.missing", "not found"),
+            ("forward", "execution_kind", "MISSING", "invalid setting"),
+        ],
+    )
+    def test_invalid(
+        self, config: dict, stage: str, setting: str, value: object, message: str
+    ) -> None:
+        """
+        Topology is not created and the problem is logged.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+        config["topology"]["stages"][stage][setting] = value
+
+        # Run
+        pipeline = create_topology(config, local_logger)
+
+        # Test
+        assert pipeline is None
+        assert any(message in logged for logged in local_logger.messages)
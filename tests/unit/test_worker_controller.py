@@ -0,0 +1,118 @@
+"""
+Test the worker controller.
+"""
+
+import multiprocessing as mp
+import multiprocessing.sharedctypes
+import time
+
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+def loop_until_exit(
+    controller: worker_controller.WorkerController,
+    iterations: multiprocessing.sharedctypes.Synchronized,
+) -> None:
+    """
+    Worker loop counting its iterations.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        iterations.value += 1
+        time.sleep(0.001)
+
+
+class TestExit:
+    """
+    Exit request and clear.
+    """
+
+    def test_request_and_clear(self) -> None:
+        """
+        Flag follows requests and repeated requests do nothing.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+
+        # Run and test
+        assert not controller.is_exit_requested()
+
+        controller.request_exit()
+        controller.request_exit()
+        assert controller.is_exit_requested()
+
+        controller.clear_exit()
+        controller.clear_exit()
+        assert not controller.is_exit_requested()
+
+    def test_worker_exits(self) -> None:
+        """
+        Worker process leaves its loop promptly.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        iterations = mp.Value("i", 0)
+        worker = mp.Process(target=loop_until_exit, args=(controller, iterations))
+        worker.start()
+
+        # Run
+        controller.request_exit()
+        worker.join(timeout=5.0)
+
+        # Test
+        assert not worker.is_alive()
+
+
+class TestPause:
+    """
+    Pause and resume.
+    """
+
+    def test_pause_blocks_worker(self) -> None:
+        """
+        Paused worker stops iterating until resumed.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        iterations = mp.Value("i", 0)
+        worker = mp.Process(target=loop_until_exit, args=(controller, iterations))
+        worker.start()
+        while iterations.value == 0:
+            time.sleep(0.001)
+
+        # Run
+        controller.request_pause()
+        time.sleep(0.05)
+        paused_iterations = iterations.value
+        time.sleep(0.05)
+        still_paused_iterations = iterations.value
+
+        controller.request_resume()
+        controller.request_exit()
+        worker.join(timeout=5.0)
+
+        # Test
+        assert paused_iterations == still_paused_iterations
+        assert not worker.is_alive()
+
+    def test_check_pause_not_paused(self) -> None:
+        """
+        Check does not block when not paused, including after resume.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+
+        # Run
+        controller.check_pause()
+        controller.request_pause()
+        controller.request_resume()
+        controller.request_resume()
+        controller.check_pause()
+
+        # Test
+        assert not controller.is_exit_requested()
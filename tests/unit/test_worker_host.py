@@ -0,0 +1,190 @@
+"""
+Test running workers as threads and asyncio tasks in a worker host.
+"""
+
+import asyncio
+import multiprocessing as mp
+import os
+import time
+
+import pytest
+
+from tests.unit import recording_logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_host
+from utilities.workers import worker_manager
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+def report_pid(
+    name: str,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Reports its process and waits until exit is requested, as a process worker does.
+    """
+    output_queue.put((name, os.getpid()))
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        time.sleep(0.01)
+
+
+async def report_pid_async(
+    name: str,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Coroutine version of report_pid().
+    """
+    output_queue.put((name, os.getpid()))
+    while not controller.is_exit_requested():
+        await asyncio.sleep(0.01)
+
+
+def raise_error(controller: worker_controller.WorkerController) -> None:
+    """
+    Fails, which must not stop the other workers in the host.
+    """
+    raise ValueError(f"Failed with {controller}")
+
+
+@pytest.fixture
+def mp_manager() -> mp.Manager:  # type: ignore
+    """
+    Multiprocessing manager.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    work_arguments: tuple,
+    output_queues: list,
+    controller: worker_controller.WorkerController,
+    execution_kind: worker_host.ExecutionKind,
+    host: "worker_host.WorkerHost | None",
+) -> "tuple[bool, worker_manager.WorkerManager | None]":
+    """
+    Manager of a single worker.
+    """
+    local_logger = recording_logger.RecordingLogger()
+    result, properties = worker_manager.WorkerProperties.create(
+        1, target, work_arguments, [], output_queues, controller, local_logger, execution_kind  # type: ignore
+    )
+    assert result
+    assert properties is not None
+
+    return worker_manager.WorkerManager.create(properties, local_logger, host=host)  # type: ignore
+
+
+class TestWorkerHost:
+    """
+    Lightweight workers share a single process.
+    """
+
+    def test_shared_process(self, mp_manager: mp.Manager) -> None:
+        """
+        Thread and asyncio task workers, synchronous or not, run in the same host process.
+        """
+        # Setup
+        output_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+        controller = worker_controller.WorkerController()
+        host = worker_host.WorkerHost()
+        workers = [
+            ("thread", report_pid, worker_host.ExecutionKind.THREAD),
+            ("task", report_pid, worker_host.ExecutionKind.ASYNCIO_TASK),
+            ("coroutine", report_pid_async, worker_host.ExecutionKind.ASYNCIO_TASK),
+            ("process", report_pid, worker_host.ExecutionKind.PROCESS),
+        ]
+        managers = []
+        for name, target, execution_kind in workers:
+            result, manager = create_manager(
+                target, (name,), [output_queue], controller, execution_kind, host
+            )
+            assert result
+            assert manager is not None
+            managers.append(manager)
+
+        # Run
+        for manager in managers:
+            manager.start_workers()
+
+        pids = dict(output_queue.get(5.0)[1] for _ in workers)  # type: ignore
+
+        controller.request_exit()
+        for manager in managers:
+            manager.join_workers()
+
+        # Test
+        host_process = host.get_process()
+        assert host_process is not None
+        assert pids["thread"] == pids["task"] == pids["coroutine"] == host_process.pid
+        assert pids["process"] != host_process.pid
+        assert host.get_spawn_latency() > 0.0
+        assert "worker host" in managers[0].get_spawn_latency_report()
+        assert not managers[0].scale_to(2)
+
+    def test_raising_worker(self, mp_manager: mp.Manager) -> None:
+        """
+        A worker that raises is logged and the others keep running.
+        """
+        # Setup
+        output_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+        controller = worker_controller.WorkerController()
+        host = worker_host.WorkerHost()
+        for target, work_arguments, output_queues in [
+            (raise_error, (), []),
+            (report_pid, ("thread",), [output_queue]),
+        ]:
+            result, _ = create_manager(
+                target,
+                work_arguments,
+                output_queues,
+                controller,
+                worker_host.ExecutionKind.THREAD,
+                host,
+            )
+            assert result
+
+        # Run
+        host.start()
+        result, _ = output_queue.get(5.0)
+        controller.request_exit()
+        host.join()
+
+        # Test
+        assert result
+        host_process = host.get_process()
+        assert host_process is not None
+        assert host_process.exitcode == 0
+
+    def test_requires_host(self) -> None:
+        """
+        Lightweight workers cannot be created without a host, or once it has started.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        host = worker_host.WorkerHost()
+        host.start()
+
+        # Run
+        without_host_result, _ = create_manager(
+            raise_error, (), [], controller, worker_host.ExecutionKind.THREAD, None
+        )
+        started_host_result, _ = create_manager(
+            raise_error, (), [], controller, worker_host.ExecutionKind.THREAD, host
+        )
+        host.join()
+
+        # Test
+        assert not without_host_result
+        assert not started_host_result
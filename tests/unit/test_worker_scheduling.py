@@ -0,0 +1,219 @@
+"""
+Test the CPU affinity and niceness of workers.
+"""
+
+import multiprocessing as mp
+import os
+
+import pytest
+
+from tests.unit import recording_logger
+from utilities.workers import restart_policy
+from utilities.workers import worker_controller
+from utilities.workers import worker_host
+from utilities.workers import worker_manager
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+# Used by the workers to report their settings and by the manager to apply them, Linux only
+SCHEDULING_FUNCTIONS = ["sched_getaffinity", "sched_setaffinity", "getpriority", "setpriority"]
+
+
+def report_scheduling(results: mp.Queue, controller: worker_controller.WorkerController) -> None:
+    """
+    Reports the CPU affinity and niceness it starts with.
+    """
+    controller.check_pause()
+    results.put((os.sched_getaffinity(0), os.getpriority(os.PRIO_PROCESS, 0)))
+
+
+class QueueLogger:
+    """
+    Stands in for the logger of a worker, sending its warnings to the test.
+    """
+
+    def __init__(self, warnings: mp.Queue) -> None:
+        self.warnings = warnings
+
+    # Same signature as Logger
+    # pylint: disable-next=unused-argument
+    def warning(self, message: str, log_with_frame_info: bool = True) -> None:
+        """
+        Sends the message.
+        """
+        self.warnings.put(message)
+
+
+@pytest.fixture
+def controller() -> worker_controller.WorkerController:  # type: ignore
+    """
+    Worker controller.
+    """
+    yield worker_controller.WorkerController()  # type: ignore
+
+
+def create_manager(
+    results: mp.Queue,
+    controller: worker_controller.WorkerController,
+    local_logger: recording_logger.RecordingLogger,
+    cpu_affinity: "set[int] | None",
+    niceness: "int | None",
+) -> worker_manager.WorkerManager:
+    """
+    Manager of a single worker reporting its scheduling settings.
+    """
+    result, properties = worker_manager.WorkerProperties.create(
+        1,
+        report_scheduling,
+        (results,),
+        [],
+        [],
+        controller,
+        local_logger,  # type: ignore
+        cpu_affinity=cpu_affinity,
+        niceness=niceness,
+    )
+    assert result
+    assert properties is not None
+
+    # Restart without waiting
+    policy = restart_policy.RestartPolicy(initial_backoff=0.0)
+    result, manager = worker_manager.WorkerManager.create(properties, local_logger, policy)  # type: ignore
+    assert result
+    assert manager is not None
+
+    return manager
+
+
+@pytest.mark.skipif(
+    not all(hasattr(os, name) for name in SCHEDULING_FUNCTIONS),
+    reason="CPU affinity and niceness are not supported on this platform",
+)
+class TestScheduling:
+    """
+    Settings are applied to each worker process on start and restart.
+    """
+
+    def test_applied_on_start_and_restart(
+        self, controller: worker_controller.WorkerController
+    ) -> None:
+        """
+        Workers run with the settings, including replacements.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+        results = mp.Queue()
+        cpu_affinity = {min(os.sched_getaffinity(0))}
+        # Raising niceness is always permitted
+        niceness = min(os.getpriority(os.PRIO_PROCESS, 0) + 1, 19)
+        manager = create_manager(results, controller, local_logger, cpu_affinity, niceness)
+
+        # Run
+        manager.start_workers()
+        first_result = results.get(timeout=10)
+        manager.join_workers()
+
+        assert manager.restart_worker(manager.get_workers()[0])
+        second_result = results.get(timeout=10)
+        manager.join_workers()
+
+        # Test
+        assert first_result == (cpu_affinity, niceness)
+        assert second_result == (cpu_affinity, niceness)
+
+    def test_not_permitted_is_logged(
+        self, monkeypatch: pytest.MonkeyPatch, controller: worker_controller.WorkerController
+    ) -> None:
+        """
+        Worker runs with the inherited settings and logs the failure.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+        results = mp.Queue()
+        warnings = mp.Queue()
+        # Worker creates its logger only to report the failure
+        monkeypatch.setattr(
+            worker_manager.logger.Logger,
+            "create",
+            lambda name, enable_log_to_file: (True, QueueLogger(warnings)),
+        )
+        # No such CPU
+        cpu_affinity = {os.cpu_count() + 1024}  # type: ignore
+        manager = create_manager(results, controller, local_logger, cpu_affinity, None)
+
+        # Run
+        manager.start_workers()
+        scheduling_affinity, _ = results.get(timeout=10)
+        warning = warnings.get(timeout=10)
+        manager.join_workers()
+
+        # Test
+        assert scheduling_affinity == os.sched_getaffinity(0)
+        assert "Could not set CPU affinity of report_scheduling" in warning
+
+
+class TestProperties:
+    """
+    Settings are validated.
+    """
+
+    @pytest.mark.parametrize(
+        "cpu_affinity,niceness", [(set(), None), ({-1}, None), (None, -21), (None, 20)]
+    )
+    def test_invalid(
+        self,
+        controller: worker_controller.WorkerController,
+        cpu_affinity: "set[int] | None",
+        niceness: "int | None",
+    ) -> None:
+        """
+        Properties are not created.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+
+        # Run
+        result, properties = worker_manager.WorkerProperties.create(
+            1,
+            report_scheduling,
+            (),
+            [],
+            [],
+            controller,
+            local_logger,  # type: ignore
+            cpu_affinity=cpu_affinity,
+            niceness=niceness,
+        )
+
+        # Test
+        assert not result
+        assert properties is None
+
+    def test_host_workers_rejected(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Workers in a worker host share its process, so they cannot have settings of their own.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+
+        # Run
+        result, properties = worker_manager.WorkerProperties.create(
+            1,
+            report_scheduling,
+            (),
+            [],
+            [],
+            controller,
+            local_logger,  # type: ignore
+            worker_host.ExecutionKind.THREAD,
+            niceness=10,
+        )
+
+        # Test
+        assert not result
+        assert properties is None
+        assert any("only apply to process workers" in message for message in local_logger.messages)
@@ -0,0 +1,155 @@
+"""
+Test joining workers within a bounded time.
+"""
+
+import signal
+import time
+
+import pytest
+
+from tests.unit import recording_logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_host
+from utilities.workers import worker_manager
+from utilities.workers import worker_shutdown
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+TIMEOUT = 0.5  # seconds
+TERMINATE_TIMEOUT = 0.5  # seconds
+KILL_TIMEOUT = 1.0  # seconds
+
+
+def cooperative(controller: worker_controller.WorkerController) -> None:
+    """
+    Exits when requested.
+    """
+    while not controller.is_exit_requested():
+        time.sleep(0.01)
+
+
+def stuck(_: worker_controller.WorkerController) -> None:
+    """
+    Never checks for exit, as if blocked reading.
+    """
+    while True:
+        time.sleep(0.01)
+
+
+def ignoring_terminate(_: worker_controller.WorkerController) -> None:
+    """
+    Stuck and ignores being terminated.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    while True:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def controller() -> worker_controller.WorkerController:  # type: ignore
+    """
+    Worker controller.
+    """
+    yield worker_controller.WorkerController()  # type: ignore
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    count: int,
+    controller: worker_controller.WorkerController,
+    execution_kind: worker_host.ExecutionKind = worker_host.ExecutionKind.PROCESS,
+    host: "worker_host.WorkerHost | None" = None,
+) -> worker_manager.WorkerManager:
+    """
+    Manager of the workers.
+    """
+    result, properties = worker_manager.WorkerProperties.create(
+        count, target, (), [], [], controller, None, execution_kind  # type: ignore
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(properties, None, host=host)  # type: ignore
+    assert result
+    assert manager is not None
+
+    return manager
+
+
+def shut_down(
+    managers: "list[worker_manager.WorkerManager]",
+    controller: worker_controller.WorkerController,
+    local_logger: recording_logger.RecordingLogger,
+) -> worker_shutdown.ShutdownReport:
+    """
+    Starts the workers, requests exit and joins them.
+    """
+    for manager in managers:
+        manager.start_workers()
+
+    # Let stuck workers install their signal handlers
+    time.sleep(0.2)
+
+    controller.request_exit()
+    return worker_shutdown.join_all(
+        managers, local_logger, TIMEOUT, TERMINATE_TIMEOUT, KILL_TIMEOUT  # type: ignore
+    )
+
+
+class TestJoinAll:
+    """
+    Workers are joined in parallel and forced in turn.
+    """
+
+    def test_cooperative(self, controller: worker_controller.WorkerController) -> None:
+        """
+        All workers exit on their own, including those in a worker host.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+        host = worker_host.WorkerHost()
+        managers = [
+            create_manager(cooperative, 2, controller),
+            create_manager(cooperative, 2, controller, worker_host.ExecutionKind.THREAD, host),
+            create_manager(cooperative, 1, controller, worker_host.ExecutionKind.THREAD, host),
+        ]
+
+        # Run
+        report = shut_down(managers, controller, local_logger)
+
+        # Test
+        # The host is a single process
+        assert len(report.joined) == 3
+        assert not report.is_forced()
+        assert report.elapsed_time < TIMEOUT
+        assert len(local_logger.messages) == 0
+
+    def test_forced(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Stuck workers are terminated and killed within the timeouts.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+        stuck_manager = create_manager(stuck, 1, controller)
+        ignoring_manager = create_manager(ignoring_terminate, 1, controller)
+        managers = [create_manager(cooperative, 2, controller), stuck_manager, ignoring_manager]
+
+        # Run
+        report = shut_down(managers, controller, local_logger)
+
+        # Test
+        assert len(report.joined) == 2
+        assert report.terminated == [f"stuck {stuck_manager.get_workers()[0].name}"]
+        assert report.killed == [f"ignoring_terminate {ignoring_manager.get_workers()[0].name}"]
+        assert report.unexited == []
+        assert report.is_forced()
+        assert TIMEOUT + TERMINATE_TIMEOUT <= report.elapsed_time
+        assert report.elapsed_time < TIMEOUT + TERMINATE_TIMEOUT + KILL_TIMEOUT
+        assert all(
+            not worker.is_alive() for manager in managers for worker in manager.get_workers()
+        )
+        assert len(local_logger.messages) == 3
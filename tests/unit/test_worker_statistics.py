@@ -0,0 +1,152 @@
+"""
+Test the worker statistics.
+"""
+
+import os
+import sys
+
+import pytest
+
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+from utilities.workers import worker_statistics
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+ITERATION_COUNT = 5
+
+
+@pytest.fixture
+def statistics() -> worker_statistics.WorkerStatistics:  # type: ignore
+    """
+    Zeroed statistics.
+    """
+    yield worker_statistics.WorkerStatistics()  # type: ignore
+
+
+def iterate(controller: worker_controller.WorkerController) -> None:
+    """
+    Worker recording a few loop iterations.
+    """
+    for _ in range(0, ITERATION_COUNT):
+        controller.check_pause()
+        worker_statistics.record_iteration()
+
+
+class TestStatistics:
+    """
+    Counters published by the worker.
+    """
+
+    def test_not_published(self, statistics: worker_statistics.WorkerStatistics) -> None:
+        """
+        Iterations are only visible once published.
+        """
+        # Run
+        statistics.record_iteration()
+        statistics.record_iteration()
+        first_snapshot = statistics.snapshot()
+        statistics.publish()
+        second_snapshot = statistics.snapshot()
+
+        # Test
+        # The first iteration publishes
+        assert first_snapshot.iteration_count == 1
+        assert second_snapshot.iteration_count == 2
+        assert second_snapshot.pid == os.getpid()
+        assert second_snapshot.resident_set_size > 0
+
+    def test_loop_times(self, statistics: worker_statistics.WorkerStatistics) -> None:
+        """
+        Time between iterations goes into the histogram, the first iteration only starts timing.
+        """
+        # Run
+        for _ in range(0, ITERATION_COUNT):
+            statistics.record_iteration()
+
+        statistics.publish()
+        snapshot = statistics.snapshot()
+
+        # Test
+        assert sum(snapshot.loop_time_histogram) == ITERATION_COUNT - 1
+        assert (
+            len(snapshot.loop_time_histogram) == len(worker_statistics.LOOP_TIME_BUCKET_BOUNDS) + 1
+        )
+        assert 0.0 < snapshot.max_loop_time < 1.0
+
+    def test_memory_not_available(
+        self, statistics: worker_statistics.WorkerStatistics, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Without /proc or the resource module, as on Windows, the memory is not known.
+        """
+
+        # Setup
+        def open_missing(*_: object, **__: object) -> None:
+            raise OSError("No /proc")
+
+        monkeypatch.setattr(worker_statistics, "open", open_missing, raising=False)
+        monkeypatch.setitem(sys.modules, "resource", None)
+
+        # Run
+        statistics.publish()
+        snapshot = statistics.snapshot()
+        table = worker_statistics.format_table([("worker", snapshot)])
+
+        # Test
+        assert snapshot.resident_set_size is None
+        assert snapshot.pid == os.getpid()
+        assert " - " in table
+
+    def test_outside_worker(self) -> None:
+        """
+        Recording outside of a worker does nothing.
+        """
+        # Run
+        worker_statistics.record_iteration()
+
+        # Test
+        assert worker_statistics._current_statistics is None
+
+
+class TestWorkerManager:
+    """
+    Statistics of the workers of a manager.
+    """
+
+    def test_published_by_worker(self) -> None:
+        """
+        Main reads what each worker published, including on exit.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, properties = worker_manager.WorkerProperties.create(
+            2, iterate, (), [], [], controller, None  # type: ignore
+        )
+        assert result
+        assert properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(properties, None)  # type: ignore
+        assert result
+        assert manager is not None
+
+        # Run
+        before_rows = manager.get_worker_statistics()
+        manager.start_workers()
+        manager.join_workers()
+        after_rows = manager.get_worker_statistics()
+        table = worker_statistics.format_table(after_rows)
+
+        # Test
+        assert [snapshot.pid for _, snapshot in before_rows] == [0, 0]
+        assert [snapshot.pid for _, snapshot in after_rows] == [
+            worker.pid for worker in manager.get_workers()
+        ]
+        assert all(snapshot.iteration_count == ITERATION_COUNT for _, snapshot in after_rows)
+        # Header and a row per worker
+        assert len(table.splitlines()) == 3
+        assert after_rows[0][0] in table
@@ -0,0 +1,268 @@
+"""
+Test the worker supervisor.
+"""
+
+import multiprocessing as mp
+import multiprocessing.connection
+import multiprocessing.sharedctypes
+import multiprocessing.synchronize
+import time
+
+import pytest
+
+from tests.unit import recording_logger
+from utilities.workers import restart_policy
+from utilities.workers import worker_controller
+from utilities.workers import worker_host
+from utilities.workers import worker_manager
+from utilities.workers import worker_supervisor
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+CRASH_EXIT_CODE = 3
+
+
+def crash_once(
+    run_count: multiprocessing.sharedctypes.Synchronized,
+    done: multiprocessing.synchronize.Event,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Crashes on the first run, later runs wait until done.
+    """
+    with run_count.get_lock():
+        run_count.value += 1
+        is_first_run = run_count.value == 1
+
+    if is_first_run:
+        raise SystemExit(CRASH_EXIT_CODE)
+
+    while not controller.is_exit_requested() and not done.wait(0.01):
+        pass
+
+
+def crash_always(controller: worker_controller.WorkerController) -> None:
+    """
+    Crashes on every run.
+    """
+    controller.check_pause()
+    raise SystemExit(CRASH_EXIT_CODE)
+
+
+def create_manager(
+    done: multiprocessing.synchronize.Event,
+    policy: "restart_policy.RestartPolicy | None" = None,
+    host: "worker_host.WorkerHost | None" = None,
+) -> worker_manager.WorkerManager:
+    """
+    Manager of a single worker that crashes once.
+    """
+    local_logger = recording_logger.RecordingLogger()
+    execution_kind = (
+        worker_host.ExecutionKind.PROCESS if host is None else worker_host.ExecutionKind.THREAD
+    )
+    result, properties = worker_manager.WorkerProperties.create(
+        1, crash_once, (mp.Value("i", 0), done), [], [], worker_controller.WorkerController(), local_logger, execution_kind  # type: ignore
+    )
+    assert result
+    assert properties is not None
+
+    result, created_manager = worker_manager.WorkerManager.create(properties, local_logger, policy, host)  # type: ignore
+    assert result
+    assert created_manager is not None
+
+    return created_manager
+
+
+@pytest.fixture
+def manager() -> worker_manager.WorkerManager:  # type: ignore
+    """
+    Manager of a single worker that crashes once.
+    """
+    done = mp.Event()
+    created_manager = create_manager(done)
+
+    yield created_manager  # type: ignore
+
+    done.set()
+    created_manager.join_workers()
+
+
+@pytest.fixture
+def backoff_manager() -> worker_manager.WorkerManager:  # type: ignore
+    """
+    Manager of a single worker that crashes once and is restarted after a backoff.
+    """
+    done = mp.Event()
+    created_manager = create_manager(done, restart_policy.RestartPolicy(initial_backoff=0.5))
+
+    yield created_manager  # type: ignore
+
+    done.set()
+    created_manager.join_workers()
+
+
+class TestSupervisor:
+    """
+    Exits are noticed and restarted.
+    """
+
+    def test_restart_on_exit(self, manager: worker_manager.WorkerManager) -> None:
+        """
+        Crash produces an exit event and a running replacement.
+        """
+        # Setup
+        result, supervisor = worker_supervisor.WorkerSupervisor.create(
+            [manager], recording_logger.RecordingLogger()  # type: ignore
+        )
+        assert result
+        assert supervisor is not None
+
+        # Run
+        manager.start_workers()
+        supervisor.start()
+        ready = multiprocessing.connection.wait([supervisor.get_waitable()], timeout=5.0)
+        result, event = supervisor.get_exit_event()
+        supervisor.stop()
+
+        # Test
+        assert len(ready) == 1
+        assert result
+        assert event is not None
+        assert event.target_name == "crash_once"
+        assert event.exit_code == CRASH_EXIT_CODE
+        assert event.restart_time is not None
+        assert all(worker.is_alive() for worker in manager.get_workers())
+
+    def test_callback_and_queue(self, manager: worker_manager.WorkerManager) -> None:
+        """
+        Events are also delivered to the callback and the queue.
+        """
+        # Setup
+        events = []
+        exit_event_queue = mp.SimpleQueue()
+        result, supervisor = worker_supervisor.WorkerSupervisor.create(
+            [manager], recording_logger.RecordingLogger(), events.append, exit_event_queue  # type: ignore
+        )
+        assert result
+        assert supervisor is not None
+
+        # Run
+        manager.start_workers()
+        supervisor.start()
+        result, _ = supervisor.get_exit_event(timeout=5.0)
+        supervisor.stop()
+
+        # Test
+        assert result
+        assert len(events) == 1
+        assert exit_event_queue.get().exit_code == CRASH_EXIT_CODE
+
+    def test_exit_reported_before_backoff(
+        self, backoff_manager: worker_manager.WorkerManager
+    ) -> None:
+        """
+        Exit event arrives when the worker exits, not when its restart is due.
+        """
+        # Setup
+        result, supervisor = worker_supervisor.WorkerSupervisor.create(
+            [backoff_manager], recording_logger.RecordingLogger()  # type: ignore
+        )
+        assert result
+        assert supervisor is not None
+
+        # Run
+        backoff_manager.start_workers()
+        supervisor.start()
+        result, event = supervisor.get_exit_event(timeout=5.0)
+        received_time = time.monotonic()
+        is_replaced = all(worker.is_alive() for worker in backoff_manager.get_workers())
+        time.sleep(1.0)
+        is_restarted = all(worker.is_alive() for worker in backoff_manager.get_workers())
+        supervisor.stop()
+
+        # Test
+        assert result
+        assert event is not None
+        assert event.restart_time == pytest.approx(event.exit_time + 0.5, abs=0.1)
+        assert received_time < event.restart_time
+        assert not is_replaced
+        assert is_restarted
+
+    def test_unread_events_bounded(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Supervisor keeps restarting while main never reads the exit events,
+        and only the newest are kept.
+        """
+        # Setup
+        monkeypatch.setattr(
+            worker_supervisor.WorkerSupervisor, "_WorkerSupervisor__MAX_EVENT_COUNT", 2
+        )
+        local_logger = recording_logger.RecordingLogger()
+        controller = worker_controller.WorkerController()
+        result, properties = worker_manager.WorkerProperties.create(
+            1, crash_always, (), [], [], controller, local_logger  # type: ignore
+        )
+        assert result
+        assert properties is not None
+        result, crashing_manager = worker_manager.WorkerManager.create(
+            properties, local_logger, restart_policy.RestartPolicy(initial_backoff=0.0)  # type: ignore
+        )
+        assert result
+        assert crashing_manager is not None
+
+        events = []
+        supervisor_logger = recording_logger.RecordingLogger()
+        result, supervisor = worker_supervisor.WorkerSupervisor.create(
+            [crashing_manager], supervisor_logger, events.append  # type: ignore
+        )
+        assert result
+        assert supervisor is not None
+
+        # Run
+        crashing_manager.start_workers()
+        supervisor.start()
+        deadline = time.monotonic() + 10.0
+        while len(events) < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        supervisor.stop()
+        controller.request_exit()
+        crashing_manager.join_workers()
+
+        received = []
+        while True:
+            result, event = supervisor.get_exit_event()
+            if not result:
+                break
+
+            received.append(event)
+
+        # Test
+        assert len(events) >= 5
+        assert received == events[-2:]
+        assert len(supervisor_logger.messages) == len(events) - 2
+        assert not supervisor.get_waitable().poll()
+
+    def test_hosted_not_supervised(self) -> None:
+        """
+        Managers of workers in a worker host are reported as not supervised.
+        """
+        # Setup
+        local_logger = recording_logger.RecordingLogger()
+        hosted_manager = create_manager(mp.Event(), host=worker_host.WorkerHost())
+
+        # Run
+        result, supervisor = worker_supervisor.WorkerSupervisor.create(
+            [hosted_manager], local_logger  # type: ignore
+        )
+
+        # Test
+        assert result
+        assert supervisor is not None
+        assert len(local_logger.messages) == 1
+        assert "not supervised" in local_logger.messages[0]
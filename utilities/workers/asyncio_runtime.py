@@ -0,0 +1,177 @@
+"""
+For running the workers as coroutines in a single process that owns the MAVLink connection.
+"""
+
+import asyncio
+import socket
+import time
+
+from pymavlink import mavutil
+
+
+class MavlinkDispatcher:
+    """
+    Reads the connection whenever its socket is readable and delivers each message to the
+    asyncio queues subscribed to its type, so coroutines wait on messages without blocking the
+    event loop or each other, and without a process per reader.
+
+    Sending does not go through the dispatcher, coroutines send on the connection directly.
+    Only a single coroutine may wait on each subscribed queue.
+    """
+
+    __POLL_PERIOD = 0.01  # seconds
+
+    def __init__(self, connection: mavutil.mavfile) -> None:
+        """
+        connection: Connection to read, owned by the dispatcher until stopped.
+        """
+        self.__connection = connection
+        self.__subscribers: "dict[str, list[asyncio.Queue]]" = {}
+        self.__dropped_count = 0
+        self.__received_count = 0
+
+        self.__disconnected: "asyncio.Event | None" = None
+        self.__poll_task: "asyncio.Task | None" = None
+        self.__fd: "int | None" = None
+
+    def subscribe(self, message_types: "list[str]", maxsize: int = 0) -> asyncio.Queue:
+        """
+        Creates a queue receiving every message of the types, in the order received.
+
+        message_types: MAVLink message names, for example "HEARTBEAT".
+        maxsize: Maximum number of messages in the queue, the oldest are dropped when full.
+            Less than or equal to 0 is infinite.
+
+        Returns the queue.
+        """
+        queue = asyncio.Queue(maxsize)
+        for message_type in message_types:
+            self.__subscribers.setdefault(message_type, []).append(queue)
+
+        return queue
+
+    def start(self) -> None:
+        """
+        Starts reading, call from a coroutine of the event loop.
+        Connections without a file descriptor, and event loops that cannot wait on one (the
+        default proactor event loop on Windows), are polled instead.
+        """
+        loop = asyncio.get_running_loop()
+        self.__disconnected = asyncio.Event()
+
+        self.__fd = getattr(self.__connection, "fd", None)
+        if self.__fd is not None:
+            try:
+                loop.add_reader(self.__fd, self.__read_available)
+                return
+            except NotImplementedError:
+                self.__fd = None
+
+        self.__poll_task = loop.create_task(self.__poll())
+
+    def stop(self) -> None:
+        """
+        Stops reading, does nothing if not started.
+        """
+        if self.__fd is not None:
+            asyncio.get_running_loop().remove_reader(self.__fd)
+            self.__fd = None
+
+        if self.__poll_task is not None:
+            self.__poll_task.cancel()
+            self.__poll_task = None
+
+    async def wait_disconnected(self) -> None:
+        """
+        Waits until the other end closes a stream connection.
+        """
+        assert self.__disconnected is not None, "Call start() first"
+        await self.__disconnected.wait()
+
+    def is_disconnected(self) -> bool:
+        """
+        Returns whether the other end closed a stream connection.
+        """
+        return self.__disconnected is not None and self.__disconnected.is_set()
+
+    def get_received_count(self) -> int:
+        """
+        Returns the number of messages read from the connection.
+        """
+        return self.__received_count
+
+    def get_dropped_count(self) -> int:
+        """
+        Returns the number of messages dropped from full subscriber queues.
+        """
+        return self.__dropped_count
+
+    def __is_closed_by_peer(self) -> bool:
+        """
+        Whether the stream socket is readable because the other end closed it.
+        """
+        port = getattr(self.__connection, "port", None)
+        if not isinstance(port, socket.socket) or port.type != socket.SOCK_STREAM:
+            return False
+
+        try:
+            return len(port.recv(1, socket.MSG_PEEK)) == 0
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError:
+            return True
+
+    def __read_available(self) -> None:
+        """
+        Delivers all messages that can be read without waiting.
+        """
+        # pymavlink reports a closed stream as no data, which would keep the socket readable
+        if self.__is_closed_by_peer():
+            self.stop()
+            assert self.__disconnected is not None
+            self.__disconnected.set()
+            return
+
+        while True:
+            message = self.__connection.recv_msg()
+            if message is None:
+                return
+
+            self.__received_count += 1
+            for queue in self.__subscribers.get(message.get_type(), []):
+                if queue.full():
+                    queue.get_nowait()
+                    self.__dropped_count += 1
+
+                queue.put_nowait(message)
+
+    async def __poll(self) -> None:
+        """
+        Reads the connection periodically.
+        """
+        while True:
+            self.__read_available()
+            await asyncio.sleep(self.__POLL_PERIOD)
+
+
+async def run_periodically(
+    period: float,
+    function: "() -> object",  # type: ignore
+    exit_event: asyncio.Event,
+) -> None:
+    """
+    Calls the function every period without drifting, until the exit event is set.
+
+    period: Seconds between calls.
+    function: Called with no arguments, must not block.
+    exit_event: Set to stop.
+    """
+    next_time = time.monotonic()
+    while not exit_event.is_set():
+        function()
+
+        next_time += period
+        try:
+            await asyncio.wait_for(exit_event.wait(), max(next_time - time.monotonic(), 0.0))
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,159 @@
+"""
+For scaling the number of workers with their input queue.
+"""
+
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_manager
+
+
+class Autoscaler:  # pylint: disable=too-many-instance-attributes
+    """
+    Adds a worker when items pile up in the input queue faster than the workers receive them,
+    and retires one when several workers are waiting on the empty queue.
+
+    Call check() periodically from main, rates are measured between calls.
+    The input queue must be instrumented.
+    """
+
+    __create_key = object()
+
+    __SCALE_UP_DEPTH = 8  # items
+    __SCALE_DOWN_DEPTH = 0  # items
+    __SCALE_DOWN_WAITING_COUNT = 2  # workers
+    __COOLDOWN = 2.0  # seconds
+
+    @classmethod
+    def create(
+        cls,
+        manager: worker_manager.WorkerManager,
+        input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        local_logger: logger.Logger,
+        min_count: int,
+        max_count: int,
+        scale_up_depth: int = __SCALE_UP_DEPTH,
+        scale_down_depth: int = __SCALE_DOWN_DEPTH,
+        scale_down_waiting_count: int = __SCALE_DOWN_WAITING_COUNT,
+        cooldown: float = __COOLDOWN,
+    ) -> "tuple[bool, Autoscaler | None]":
+        """
+        Creates an autoscaler.
+
+        manager: Manager of the workers to scale.
+        input_queue: Instrumented input queue of the workers.
+        local_logger: Existing logger from process.
+        min_count: Fewest workers, must be greater than 0 .
+        max_count: Most workers, must be at least min_count .
+        scale_up_depth: Depth at or above which a worker is added if the queue is not draining.
+        scale_down_depth: Depth at or below which a worker may be retired.
+        scale_down_waiting_count: Workers waiting on the empty queue at or above which a worker
+            is retired, greater than 1 so the rest keep up.
+        cooldown: Seconds after scaling before scaling again, so the change takes effect.
+
+        Returns whether the autoscaler was created and the autoscaler.
+        """
+        if min_count <= 0 or max_count < min_count:
+            local_logger.error(f"Invalid worker count bounds: {min_count} to {max_count}", True)
+            return False, None
+
+        snapshot = input_queue.stats()
+        if snapshot is None:
+            local_logger.error("Input queue is not instrumented", True)
+            return False, None
+
+        return True, Autoscaler(
+            cls.__create_key,
+            manager,
+            input_queue,
+            local_logger,
+            min_count,
+            max_count,
+            scale_up_depth,
+            scale_down_depth,
+            scale_down_waiting_count,
+            cooldown,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        manager: worker_manager.WorkerManager,
+        input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        local_logger: logger.Logger,
+        min_count: int,
+        max_count: int,
+        scale_up_depth: int,
+        scale_down_depth: int,
+        scale_down_waiting_count: int,
+        cooldown: float,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is Autoscaler.__create_key, "Use create() method"
+
+        self.__manager = manager
+        self.__input_queue = input_queue
+        self.__local_logger = local_logger
+        self.__min_count = min_count
+        self.__max_count = max_count
+        self.__scale_up_depth = scale_up_depth
+        self.__scale_down_depth = scale_down_depth
+        self.__scale_down_waiting_count = scale_down_waiting_count
+        self.__cooldown = cooldown
+
+        self.__previous_snapshot = input_queue.stats()
+        self.__previous_check_time = time.monotonic()
+        self.__scale_time = self.__previous_check_time
+
+    def check(self) -> "tuple[bool, bool]":
+        """
+        Measures the input queue since the previous check and scales the workers by at most one.
+
+        Returns whether the check succeeded and whether the number of workers changed.
+        """
+        now = time.monotonic()
+        snapshot = self.__input_queue.stats()
+        assert snapshot is not None
+        previous_snapshot = self.__previous_snapshot
+        assert previous_snapshot is not None
+
+        interval = now - self.__previous_check_time
+        if interval <= 0.0:
+            return True, False
+
+        self.__previous_snapshot = snapshot
+        self.__previous_check_time = now
+
+        put_rate = (snapshot.put_count - previous_snapshot.put_count) / interval
+        get_rate = (snapshot.get_count - previous_snapshot.get_count) / interval
+
+        if now - self.__scale_time < self.__cooldown:
+            return True, False
+
+        count = self.__manager.get_worker_count()
+        new_count = count
+        if snapshot.depth >= self.__scale_up_depth and put_rate >= get_rate:
+            new_count = min(count + 1, self.__max_count)
+        elif (
+            snapshot.depth <= self.__scale_down_depth
+            and snapshot.waiting_count >= self.__scale_down_waiting_count
+        ):
+            new_count = max(count - 1, self.__min_count)
+
+        if new_count == count:
+            return True, False
+
+        self.__local_logger.info(
+            f"Autoscaling {self.__manager.get_target_name()} from {count} to {new_count}, "
+            f"depth: {snapshot.depth}, put: {put_rate:.1f}/s, get: {get_rate:.1f}/s, "
+            f"waiting workers: {snapshot.waiting_count}",
+            True,
+        )
+        self.__scale_time = now
+        if not self.__manager.scale_to(new_count):
+            return False, False
+
+        return True, True
@@ -0,0 +1,239 @@
+"""
+Latest value channel.
+"""
+
+import multiprocessing as mp
+import multiprocessing.shared_memory
+import pickle
+import struct
+
+from utilities.workers import struct_codec
+
+
+class MailboxChannel:
+    """
+    Single slot channel where every put overwrites the previous item.
+
+    Consumers always receive the newest item, so a slow consumer skips stale data instead of
+    falling behind. Each consumer process receives each item at most once.
+    Once the sentinel (None) is put it is never overwritten, so every consumer receives it.
+
+    Has the same put/get interface as QueueProxyWrapper.
+    """
+
+    # Sequence number, overwritten count, length, type ID, whether the item has been received
+    __HEADER = struct.Struct("<QQIB?")
+    __SLOT_SIZE = 4096  # bytes
+
+    __SENTINEL_DATA = pickle.dumps(None, pickle.HIGHEST_PROTOCOL)
+
+    def __init__(self, slot_size: int = __SLOT_SIZE) -> None:
+        """
+        slot_size: Maximum serialized item size in bytes.
+        """
+        self.__slot_size = slot_size
+        self.__memory = multiprocessing.shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER.size + slot_size,
+        )
+        self.__HEADER.pack_into(self.__memory.buf, 0, 0, 0, 0, 0, True)
+
+        # Notified on every put
+        self.__condition = mp.Condition(mp.Lock())
+
+        # Highest sequence number received, local to each process
+        self.__last_received = 0
+
+    def __getstate__(self) -> dict:
+        """
+        Pickles the registered codecs along with the channel, so that a worker receiving it
+        decodes the structs without registering their codecs itself.
+        """
+        return {"codecs": struct_codec.get_codecs(), "attributes": self.__dict__}
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Registers the codecs of the pickling process before restoring the channel.
+        """
+        for codec in state["codecs"]:
+            struct_codec.register_codec(codec)
+
+        self.__dict__.update(state["attributes"])
+
+    def __read_data(self, length: int) -> bytes:
+        """
+        Copies the current item out of the slot.
+        """
+        start = self.__HEADER.size
+        return bytes(self.__memory.buf[start : start + length])
+
+    # Same signature as QueueProxyWrapper
+    # pylint: disable-next=unused-argument
+    def put(self, item: object, timeout: float | None = None) -> bool:
+        """
+        Replaces the current item, never blocks on consumers.
+
+        item: Item, None is the sentinel.
+        timeout: Unused, putting never waits.
+
+        Returns whether the item was put, False if it does not fit or the sentinel was put.
+        """
+        type_id, data = struct_codec.serialize(item)
+        if len(data) > self.__slot_size:
+            return False
+
+        with self.__condition:
+            sequence_number, overwritten, length, current_type_id, is_received = (
+                self.__HEADER.unpack_from(self.__memory.buf, 0)
+            )
+            if (
+                current_type_id == struct_codec.PICKLE_TYPE_ID
+                and self.__read_data(length) == self.__SENTINEL_DATA
+            ):
+                return False
+
+            if not is_received:
+                overwritten += 1
+
+            start = self.__HEADER.size
+            self.__memory.buf[start : start + len(data)] = data
+            self.__HEADER.pack_into(
+                self.__memory.buf, 0, sequence_number + 1, overwritten, len(data), type_id, False
+            )
+            self.__condition.notify_all()
+
+        return True
+
+    def put_many(self, items: list, timeout: float | None = None) -> int:
+        """
+        Puts the items in order, so only the last one is kept.
+
+        Returns the number of items put.
+        """
+        put_count = 0
+        for item in items:
+            if not self.put(item, timeout):
+                break
+
+            put_count += 1
+
+        return put_count
+
+    def get(self, timeout: float | None = None) -> "tuple[bool, object]":
+        """
+        Gets the newest item not yet received by this process.
+
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns whether an item was received and the item, None being the sentinel.
+        """
+        result, _, item = self.get_with_sequence_number(timeout)
+        return result, item
+
+    # Same signature as QueueProxyWrapper
+    # pylint: disable-next=unused-argument
+    def get_many(self, max_items: int = 0, timeout: float | None = None) -> list:
+        """
+        Gets the newest item not yet received by this process, there is never more than 1.
+
+        Returns the item in a list, empty if there was none in time.
+        """
+        result, item = self.get(timeout)
+        if not result:
+            return []
+
+        return [item]
+
+    def get_with_sequence_number(self, timeout: float | None = None) -> "tuple[bool, int, object]":
+        """
+        Gets the newest item not yet received by this process.
+        Gaps in the sequence number are the items that this process skipped.
+
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns whether an item was received, its sequence number, and the item.
+        """
+        with self.__condition:
+            is_available = self.__condition.wait_for(
+                lambda: self.get_sequence_number() > self.__last_received,
+                timeout,
+            )
+            if not is_available:
+                return False, 0, None
+
+            sequence_number, overwritten, length, type_id, _ = self.__HEADER.unpack_from(
+                self.__memory.buf, 0
+            )
+            data = self.__read_data(length)
+            self.__HEADER.pack_into(
+                self.__memory.buf, 0, sequence_number, overwritten, length, type_id, True
+            )
+
+        self.__last_received = sequence_number
+        return True, sequence_number, struct_codec.deserialize(type_id, data)
+
+    def get_sequence_number(self) -> int:
+        """
+        Returns the number of items put so far, which is also the sequence number of the newest.
+        """
+        sequence_number, _, _, _, _ = self.__HEADER.unpack_from(self.__memory.buf, 0)
+        return sequence_number
+
+    def get_overwritten_count(self) -> int:
+        """
+        Returns the number of items replaced before any consumer received them.
+        """
+        _, overwritten, _, _, _ = self.__HEADER.unpack_from(self.__memory.buf, 0)
+        return overwritten
+
+    # Same signature as QueueProxyWrapper
+    # pylint: disable-next=unused-argument
+    def register_producers(self, count: int) -> None:
+        """
+        Does nothing, any number of producers can share the slot.
+        """
+
+    # Same signature as QueueProxyWrapper
+    # pylint: disable-next=unused-argument
+    def register_consumers(self, count: int) -> None:
+        """
+        Does nothing, the sentinel is delivered to every consumer.
+        """
+
+    def resolve_backend(self) -> None:
+        """
+        Does nothing, there is a single backend.
+        """
+
+    # Same signature as QueueProxyWrapper
+    # pylint: disable-next=unused-argument
+    def shutdown(self, consumer_count: int | None = None, timeout: float = 1.0) -> bool:
+        """
+        Puts the sentinel, which every consumer receives and which is never overwritten.
+
+        Returns True.
+        """
+        self.put(None)
+        return True
+
+    # pylint: disable-next=unused-argument
+    def put_sentinel(self, timeout: float | None = None) -> bool:
+        """
+        Consumers cannot be retired one at a time, as every consumer receives the sentinel.
+
+        Returns False.
+        """
+        return False
+
+    def fill_and_drain_queue(self) -> None:
+        """
+        Puts the sentinel, which every consumer receives.
+        """
+        self.shutdown()
+
+    def close(self) -> None:
+        """
+        Frees the shared memory, call from main after all workers have been joined.
+        """
+        self.__memory.close()
+        self.__memory.unlink()
@@ -0,0 +1,301 @@
+"""
+Point to point channel over a pipe.
+"""
+
+import collections
+import ctypes
+import multiprocessing as mp
+import queue
+import struct
+import time
+
+from utilities.workers import struct_codec
+
+
+class PipeChannel:  # pylint: disable=too-many-instance-attributes
+    """
+    Bounded FIFO over a one way pipe, for hops with a single producer and a single consumer.
+    Items with a registered struct codec are encoded with it, all others are pickled.
+
+    Has the same put/get interface as SharedMemoryRingBuffer so it can replace it.
+    Each transfer is a single message written straight to the consumer without a server process.
+
+    Items in flight are bounded both in number and in bytes: the producer reserves both before
+    writing and the consumer releases them as items leave its local buffer. The bytes in flight
+    never exceed the pipe buffer, so a write that has its reservation never blocks, and a put
+    without blocking, including the sentinels of shutdown, cannot hang behind a slow consumer.
+
+    The locks are only contended when main discards items or delivers sentinels on shutdown.
+    """
+
+    # Number of items in the message
+    __MESSAGE_HEADER = struct.Struct("<I")
+    # Length of the item in bytes, type ID of the serialization
+    __ITEM_HEADER = struct.Struct("<IB")
+    # Length prefix written by the connection for each message
+    __FRAME_OVERHEAD = 4  # bytes
+    # Smallest default pipe buffer of the supported platforms
+    __BYTE_BUDGET = 16384  # bytes
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Constructor creates the pipe and synchronization primitives.
+
+        capacity: Maximum number of items in flight, must be greater than 0 .
+        """
+        self.__reader, self.__writer = mp.Pipe(duplex=False)
+
+        self.__send_lock = mp.Lock()
+        self.__receive_lock = mp.Lock()
+
+        # Items and bytes reserved by producers and not yet released by consumers
+        self.__capacity = capacity
+        self.__in_flight = mp.Condition()
+        self.__item_count = mp.RawValue(ctypes.c_int64, 0)
+        self.__byte_count = mp.RawValue(ctypes.c_int64, 0)
+
+        # Items received in a message but not yet returned with their size in flight,
+        # local to each process
+        self.__received_items: "collections.deque[tuple[int, object]]" = collections.deque()
+
+    @classmethod
+    def __get_size(cls, data: bytes) -> int:
+        """
+        Bytes in flight of a serialized item, counted as if it were a message of its own.
+        """
+        return cls.__FRAME_OVERHEAD + cls.__MESSAGE_HEADER.size + cls.__ITEM_HEADER.size + len(data)
+
+    def __reserve(self, sizes: "list[int]", block: bool, timeout: float | None) -> int:
+        """
+        Waits until the first item fits and then reserves as many of the items as fit.
+
+        sizes: Bytes in flight of each item.
+
+        Returns the number of items reserved.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__in_flight:
+            while True:
+                count = 0
+                byte_count = self.__byte_count.value
+                while (
+                    count < len(sizes)
+                    and self.__item_count.value + count < self.__capacity
+                    and byte_count + sizes[count] <= self.__BYTE_BUDGET
+                ):
+                    byte_count += sizes[count]
+                    count += 1
+
+                if count > 0:
+                    self.__item_count.value += count
+                    self.__byte_count.value = byte_count
+                    return count
+
+                if not block:
+                    return 0
+
+                wait = None
+                if deadline is not None:
+                    wait = deadline - time.monotonic()
+                    if wait <= 0.0:
+                        return 0
+
+                self.__in_flight.wait(wait)
+
+    def __release(self, entries: "list[tuple[int, object]]") -> None:
+        """
+        Releases the items and bytes in flight of the entries leaving the local buffer.
+        """
+        if len(entries) == 0:
+            return
+
+        with self.__in_flight:
+            self.__item_count.value -= len(entries)
+            self.__byte_count.value -= sum(size for size, _ in entries)
+            self.__in_flight.notify_all()
+
+    def __send(self, serialized: "list[tuple[int, bytes]]") -> None:
+        """
+        Writes the items as a single message, the caller has already reserved them.
+        """
+        message = bytearray(self.__MESSAGE_HEADER.pack(len(serialized)))
+        for type_id, data in serialized:
+            message += self.__ITEM_HEADER.pack(len(data), type_id)
+            message += data
+
+        with self.__send_lock:
+            self.__writer.send_bytes(message)
+
+    def __receive_messages(
+        self, block: bool, timeout: float | None, max_items: int | None = None
+    ) -> None:
+        """
+        Reads the messages available into the local buffer, waiting for the first one.
+
+        max_items: Stop once the messages read hold this many items, None is all of them.
+        """
+        deadline = None if timeout is None or not block else time.monotonic() + timeout
+        if not self.__receive_lock.acquire(block, timeout):
+            return
+
+        messages = []
+        item_count = 0
+        try:
+            wait = None
+            if deadline is not None:
+                wait = max(deadline - time.monotonic(), 0.0)
+            elif not block:
+                wait = 0.0
+
+            if self.__reader.poll(wait):
+                while max_items is None or item_count < max_items:
+                    message = self.__reader.recv_bytes()
+                    messages.append(message)
+                    item_count += self.__MESSAGE_HEADER.unpack_from(message)[0]
+                    if not self.__reader.poll(0.0):
+                        break
+        finally:
+            self.__receive_lock.release()
+
+        # Deserialize after releasing the lock
+        for message in messages:
+            view = memoryview(message)
+            offset = self.__MESSAGE_HEADER.size
+            while offset < len(view):
+                length, type_id = self.__ITEM_HEADER.unpack_from(view, offset)
+                offset += self.__ITEM_HEADER.size
+                data = view[offset : offset + length]
+                self.__received_items.append(
+                    (self.__get_size(data), struct_codec.deserialize(type_id, data))
+                )
+                offset += length
+
+    def __pop_all(self) -> "list[tuple[int, object]]":
+        """
+        Removes everything from the local buffer and releases it.
+        """
+        entries = list(self.__received_items)
+        self.__received_items.clear()
+        self.__release(entries)
+        return entries
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> None:
+        """
+        Puts the item into the channel.
+
+        item: Picklable object.
+        block: Whether to wait for a credit.
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Raises queue.Full if there is no credit in time.
+        """
+        if self.put_many([item], block, timeout) == 0:
+            raise queue.Full
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Removes and returns the oldest item in the channel.
+
+        block: Whether to wait for an item.
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Raises queue.Empty if there is no item in time.
+        """
+        items = self.get_many(1, block, timeout)
+        if len(items) == 0:
+            raise queue.Empty
+
+        return items[0]
+
+    def put_many(self, items: list, block: bool = True, timeout: float | None = None) -> int:
+        """
+        Puts the items into the channel in order, as many as fit in flight in each message.
+
+        items: Picklable objects.
+        block: Whether to wait for room in flight.
+        timeout: Time waiting in seconds for each message before giving up, None is forever.
+
+        Returns the number of items put, which is less than requested on timeout.
+        Raises ValueError if an item is too large to ever fit in the pipe buffer.
+        """
+        serialized = [struct_codec.serialize(item) for item in items]
+        sizes = [self.__get_size(data) for _, data in serialized]
+        for size in sizes:
+            if size > self.__BYTE_BUDGET:
+                raise ValueError(f"Item of {size} bytes exceeds pipe budget {self.__BYTE_BUDGET}")
+
+        put_count = 0
+        while put_count < len(items):
+            reserved = self.__reserve(sizes[put_count:], block, timeout)
+            if reserved == 0:
+                break
+
+            self.__send(serialized[put_count : put_count + reserved])
+            put_count += reserved
+
+        return put_count
+
+    def get_many(self, max_items: int, block: bool = True, timeout: float | None = None) -> list:
+        """
+        Removes and returns up to max_items of the oldest items.
+        Stops after a sentinel (None), so it is always the last item returned.
+
+        max_items: Maximum number of items, must be greater than 0 .
+        block: Whether to wait for the first item.
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns the items, empty if there is no item in time.
+        """
+        # Reading no further than needed leaves the items after a sentinel to other consumers
+        if len(self.__received_items) == 0:
+            self.__receive_messages(block, timeout, max_items)
+
+        entries = []
+        while len(entries) < max_items and len(self.__received_items) > 0:
+            entry = self.__received_items.popleft()
+            entries.append(entry)
+            if entry[1] is None:
+                break
+
+        self.__release(entries)
+        return [item for _, item in entries]
+
+    def take(self, max_items: int) -> list:
+        """
+        Removes at least max_items of the oldest items if there are that many, without waiting.
+        Messages are removed whole, so there may be more. For producers and main to discard
+        items, as nothing is left behind in the local buffer.
+
+        Returns the items.
+        """
+        self.__receive_messages(False, None, max_items)
+        return [item for _, item in self.__pop_all()]
+
+    def drain(self) -> "tuple[int, int]":
+        """
+        Discards all items in flight and in the local buffer.
+
+        Returns the number of items and the number of sentinels discarded.
+        """
+        self.__receive_messages(False, None)
+        entries = self.__pop_all()
+        return len(entries), sum(1 for _, item in entries if item is None)
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def unlink(self) -> None:
+        """
+        Closes the pipe in this process.
+        """
+        self.__reader.close()
+        self.__writer.close()
@@ -0,0 +1,319 @@
+"""
+Queue with priority lanes.
+"""
+
+import ctypes
+import multiprocessing as mp
+import multiprocessing.managers
+import time
+
+from utilities.workers import queue_proxy_wrapper
+
+
+class LaneStatistics:
+    """
+    Counters of a single lane at a point in time.
+
+    depth: Items put and not yet received.
+    received_count: Items received.
+    mean_latency: Average seconds between put and get.
+    max_latency: Longest seconds between put and get.
+    """
+
+    def __init__(
+        self, depth: int, received_count: int, mean_latency: float, max_latency: float
+    ) -> None:
+        self.depth = depth
+        self.received_count = received_count
+        self.mean_latency = mean_latency
+        self.max_latency = max_latency
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        return (
+            f"depth: {self.depth}, received: {self.received_count}, "
+            f"latency: mean {self.mean_latency * 1000:.1f}ms, max {self.max_latency * 1000:.1f}ms"
+        )
+
+
+class PriorityQueueProxyWrapper:  # pylint: disable=too-many-instance-attributes
+    """
+    Several queues (lanes) read as one, lane 0 having the highest priority.
+
+    A get returns an item from the highest priority lane that has one, unless a lower lane has
+    been passed over `starvation_limit` times in a row, in which case that lane goes first.
+
+    Items are timestamped when put, so each lane tracks how long its items waited.
+    A get chooses and reserves its lane under a lock shared by all consumers, and receives from
+    the lane after releasing it, so consumers do not wait on each other's transfers.
+    """
+
+    __LANE_COUNT = 2
+    __STARVATION_LIMIT = 8  # gets
+
+    # Counters of each lane
+    __PUT_COUNT = 0
+    __GET_COUNT = 1
+    __TOTAL_LATENCY = 2
+    __MAX_LATENCY = 3
+    __SKIPPED_COUNT = 4
+    __DISCARDED_COUNT = 5
+    # Sentinels put to retire a consumer and not yet reserved, only used by the highest lane
+    __SENTINEL_COUNT = 6
+    __COUNTER_COUNT = 7
+
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager | None,
+        lane_count: int = __LANE_COUNT,
+        maxsize: int = 0,
+        backend: queue_proxy_wrapper.QueueBackend = queue_proxy_wrapper.QueueBackend.MANAGER,
+        starvation_limit: int = __STARVATION_LIMIT,
+    ) -> None:
+        """
+        mp_manager: Multiprocess manager, only required by the manager backend.
+        lane_count: Number of lanes, must be greater than 0 .
+        maxsize: Maximum number of items in each lane.
+        backend: Underlying queue implementation of the lanes.
+        starvation_limit: Gets that may pass over a lane with items before it is served first.
+        """
+        assert lane_count > 0, "Must have at least 1 lane"
+
+        self.lanes = [
+            queue_proxy_wrapper.QueueProxyWrapper(mp_manager, maxsize, backend)
+            for _ in range(lane_count)
+        ]
+        self.__starvation_limit = max(starvation_limit, 1)
+
+        # Items across all lanes, so that a get waits on all of them at once
+        self.__available = mp.Semaphore(0)
+
+        # Shared by all consumers so that starvation is tracked across processes
+        self.__counters = mp.RawArray(ctypes.c_double, lane_count * self.__COUNTER_COUNT)
+        self.__lock = mp.Lock()
+
+    def __counter_index(self, lane: int, counter: int) -> int:
+        """
+        Index of the counter of the lane.
+        """
+        return lane * self.__COUNTER_COUNT + counter
+
+    def __get_depth(self, lane: int) -> int:
+        """
+        Items in the lane not yet reserved by a get nor discarded, lock must be held.
+        """
+        return int(
+            self.__counters[self.__counter_index(lane, self.__PUT_COUNT)]
+            - self.__counters[self.__counter_index(lane, self.__GET_COUNT)]
+            - self.__counters[self.__counter_index(lane, self.__DISCARDED_COUNT)]
+        )
+
+    def put(self, item: object, lane: int = -1, timeout: float | None = None) -> bool:
+        """
+        Puts the item into the lane.
+
+        item: Item, use shutdown() rather than putting the sentinel.
+        lane: Lane index, 0 is the highest priority and the default -1 is the lowest.
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns whether the item was put.
+        """
+        lane %= len(self.lanes)
+        if not self.lanes[lane].put((time.monotonic(), item), timeout):
+            return False
+
+        with self.__lock:
+            self.__counters[self.__counter_index(lane, self.__PUT_COUNT)] += 1
+
+        self.__available.release()
+        return True
+
+    def __get_lane_order(self) -> "list[int]":
+        """
+        Starved lanes first, then by priority. Lock must be held.
+        """
+        starved = [
+            lane
+            for lane in range(len(self.lanes))
+            if self.__counters[self.__counter_index(lane, self.__SKIPPED_COUNT)]
+            >= self.__starvation_limit
+        ]
+        return starved + [lane for lane in range(len(self.lanes)) if lane not in starved]
+
+    def __reserve(self) -> "int | None":
+        """
+        Chooses the lane to get from and counts the get, so other consumers choose another item.
+        Updates the lanes with items that were passed over. Lock must be held.
+
+        Returns the lane, None if no lane has items.
+        """
+        lane = next((lane for lane in self.__get_lane_order() if self.__get_depth(lane) > 0), None)
+        if lane is None:
+            return None
+
+        self.__counters[self.__counter_index(lane, self.__GET_COUNT)] += 1
+
+        for other_lane in range(len(self.lanes)):
+            skipped_index = self.__counter_index(other_lane, self.__SKIPPED_COUNT)
+            if other_lane == lane:
+                self.__counters[skipped_index] = 0
+            elif other_lane > lane and self.__get_depth(other_lane) > 0:
+                self.__counters[skipped_index] += 1
+
+        return lane
+
+    def __record_latency(self, lane: int, latency: float) -> None:
+        """
+        Updates the latency of the lane served. Lock must be held.
+        """
+        self.__counters[self.__counter_index(lane, self.__TOTAL_LATENCY)] += latency
+        max_latency_index = self.__counter_index(lane, self.__MAX_LATENCY)
+        self.__counters[max_latency_index] = max(self.__counters[max_latency_index], latency)
+
+    def get(self, timeout: float | None = None) -> "tuple[bool, object]":
+        """
+        Gets the next item by priority.
+
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns whether an item was received and the item, None being the sentinel.
+        """
+        if not self.__available.acquire(True, timeout):
+            return False, None
+
+        sentinel_index = self.__counter_index(0, self.__SENTINEL_COUNT)
+        get_index = self.__counter_index(0, self.__GET_COUNT)
+        with self.__lock:
+            lane = self.__reserve()
+            is_sentinel_reserved = lane is None and self.__counters[sentinel_index] > 0
+            if is_sentinel_reserved:
+                self.__counters[sentinel_index] -= 1
+
+        # Without items the semaphore was released for a sentinel, which is in the highest lane
+        # Items are in their lane before being counted, so the get does not need to wait
+        result, timestamped_item = self.lanes[0 if lane is None else lane].get(0.0)
+        if not result:
+            # The item was discarded by shutdown
+            return False, None
+
+        # The highest lane is read in order, so a sentinel put to retire a consumer can be received
+        # by a get that reserved an item behind it, and the other way around. The counts are
+        # swapped to match, after shutdown sentinels are no longer counted.
+        if timestamped_item is None:
+            if lane == 0 and not self.lanes[0].is_shut_down():
+                with self.__lock:
+                    self.__counters[get_index] -= 1
+                    self.__counters[sentinel_index] -= 1
+
+            return True, None
+
+        put_time, item = timestamped_item
+        with self.__lock:
+            if lane is None:
+                self.__counters[get_index] += 1
+                if is_sentinel_reserved:
+                    self.__counters[sentinel_index] += 1
+
+            self.__record_latency(0 if lane is None else lane, time.monotonic() - put_time)
+
+        return True, item
+
+    def lane_stats(self) -> "list[LaneStatistics]":
+        """
+        Snapshot of the counters of each lane, in priority order.
+        """
+        with self.__lock:
+            counters = list(self.__counters)
+            depths = [self.__get_depth(lane) for lane in range(len(self.lanes))]
+
+        lane_statistics = []
+        for lane, depth in enumerate(depths):
+            received_count = int(counters[self.__counter_index(lane, self.__GET_COUNT)])
+            total_latency = counters[self.__counter_index(lane, self.__TOTAL_LATENCY)]
+            mean_latency = total_latency / received_count if received_count > 0 else 0.0
+            lane_statistics.append(
+                LaneStatistics(
+                    depth,
+                    received_count,
+                    mean_latency,
+                    counters[self.__counter_index(lane, self.__MAX_LATENCY)],
+                )
+            )
+
+        return lane_statistics
+
+    def register_producers(self, count: int) -> None:
+        """
+        Adds producer workers, called when creating worker properties.
+        """
+        for lane in self.lanes:
+            lane.register_producers(count)
+
+    def register_consumers(self, count: int) -> None:
+        """
+        Adds consumer workers, called when creating worker properties.
+        """
+        self.lanes[0].register_consumers(count)
+
+    def resolve_backend(self) -> None:
+        """
+        Chooses the automatic backend of each lane.
+        """
+        for lane in self.lanes:
+            lane.resolve_backend()
+
+    def shutdown(self, consumer_count: int | None = None, timeout: float = 1.0) -> bool:
+        """
+        Closes all lanes and delivers exactly one sentinel to each consumer,
+        through the highest priority lane. The items discarded are no longer counted in the depth.
+
+        consumer_count: Number of consumers, the registered count if None.
+        timeout: Time in seconds to keep making room for the sentinels before giving up.
+
+        Returns whether all sentinels were delivered.
+        """
+        if consumer_count is None:
+            consumer_count = self.lanes[0].get_consumer_count()
+
+        for lane in self.lanes[1:]:
+            lane.shutdown(0, timeout)
+
+        result = self.lanes[0].shutdown(consumer_count, timeout)
+
+        # The lanes only have sentinels left, the other items not yet reserved were discarded
+        with self.__lock:
+            for lane in range(len(self.lanes)):
+                discarded_index = self.__counter_index(lane, self.__DISCARDED_COUNT)
+                self.__counters[discarded_index] += self.__get_depth(lane)
+
+        for _ in range(consumer_count):
+            self.__available.release()
+
+        return result
+
+    def put_sentinel(self, timeout: float | None = None) -> bool:
+        """
+        Puts a single sentinel behind the items in the highest priority lane,
+        so that one consumer exits. Used to retire a consumer.
+
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns whether the sentinel was put.
+        """
+        if not self.lanes[0].put_sentinel(timeout):
+            return False
+
+        with self.__lock:
+            self.__counters[self.__counter_index(0, self.__SENTINEL_COUNT)] += 1
+
+        self.__available.release()
+        return True
+
+    def close(self) -> None:
+        """
+        Releases the lanes, call from main after all workers have been joined.
+        """
+        for lane in self.lanes:
+            lane.close()
@@ -2,24 +2,709 @@
 Queue.
 """
 
+import collections
+import ctypes
+import enum
+import multiprocessing as mp
 import multiprocessing.managers
 import queue
 import time
 
+from utilities.workers import pipe_channel
+from utilities.workers import queue_statistics
+from utilities.workers import shared_memory_ring_buffer
+from utilities.workers import struct_codec
 
-class QueueProxyWrapper:
+
+class QueueBackend(enum.Enum):
+    """
+    Underlying queue implementation.
+
+    MANAGER: Queue proxy of a SyncManager, every operation is a round trip to the server process.
+    SHARED_MEMORY: Ring buffer in shared memory, operations stay within the calling process.
+    PIPE: Pipe straight from a single producer to a single consumer.
+    AUTO: PIPE if the workers registered on the queue are 1 producer and 1 consumer,
+        otherwise MANAGER if there is a manager and SHARED_MEMORY if not.
+    """
+
+    MANAGER = 0
+    SHARED_MEMORY = 1
+    PIPE = 2
+    AUTO = 3
+
+
+class OverflowPolicy(enum.Enum):
+    """
+    What a put does when the queue is full.
+
+    BLOCK: Wait until there is space or the timeout expires.
+    DROP_NEWEST: Discard the items being put.
+    DROP_OLDEST: Discard the oldest items in the queue to make space.
+    COALESCE_BY_KEY: Keep only the newest queued item of each key, then discard the oldest.
+    TIMEOUT_THEN_DROP: Wait up to the overflow timeout and then discard the items being put.
+
+    All policies except BLOCK never wait longer than the overflow timeout,
+    and only TIMEOUT_THEN_DROP waits at all.
+    """
+
+    BLOCK = 0
+    DROP_NEWEST = 1
+    DROP_OLDEST = 2
+    COALESCE_BY_KEY = 3
+    TIMEOUT_THEN_DROP = 4
+
+
+class ItemBatch:
+    """
+    Items transferred through the manager backend as a single queue item.
+    """
+
+    def __init__(self, items: list) -> None:
+        self.items = items
+
+
+class QueueProxyWrapper:  # pylint: disable=too-many-instance-attributes
     """
     Wrapper for an underlying queue proxy which also stores `maxsize`.
 
     `maxsize <= 0` means infinite size.
+    The shared memory and pipe backends cannot grow, so infinite size is a large fixed capacity
+    instead.
+
+    put_many() transfers up to `batch_size` items per round trip. With the manager backend a batch
+    takes a single slot of `maxsize`, so a queue with batched producers must be consumed with
+    get() or get_many() rather than directly through `queue`.
+
+    With the shared memory and pipe backends, structs with a registered codec (see struct_codec)
+    cross processes in their fixed layout binary encoding instead of being pickled. The manager
+    backend pickles them, so `queue` holds the items themselves. The queue carries the registered
+    codecs to the workers it is passed to.
+
+    shutdown() closes the queue: producers stop blocking and their items are discarded,
+    and each consumer receives exactly one sentinel.
+
+    An instrumented queue records depth, throughput and time blocked in shared memory,
+    see stats().
+
+    The overflow policy lets producers in the real time path never block on a slow consumer.
+    Sentinels are never dropped, use shutdown() rather than putting them.
     """
 
     __QUEUE_TIMEOUT = 0.1  # seconds
     __QUEUE_DELAY = 0.1  # seconds
+    __OVERFLOW_TIMEOUT = 0.1  # seconds
 
-    def __init__(self, mp_manager: multiprocessing.managers.SyncManager, maxsize: int = 0) -> None:
-        self.queue = mp_manager.Queue(maxsize)
+    # Attempts at making space before dropping the newest items instead
+    __EVICTION_ATTEMPTS = 3
+
+    # Backends that cannot grow use a large fixed capacity for infinite size
+    __INFINITE_CAPACITY = 1024  # items
+    __SHARED_MEMORY_SLOT_SIZE = 4096  # bytes
+
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager | None,
+        maxsize: int = 0,
+        backend: QueueBackend = QueueBackend.MANAGER,
+        slot_size: int = __SHARED_MEMORY_SLOT_SIZE,
+        batch_size: int = 1,
+        is_instrumented: bool = False,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        overflow_timeout: float = __OVERFLOW_TIMEOUT,
+        coalesce_key: "(object) -> object" = type,  # type: ignore
+    ) -> None:
+        """
+        mp_manager: Multiprocess manager, only required by the manager backend.
+            The automatic backend falls back to the manager backend if there is one.
+        maxsize: Maximum number of items in the queue.
+        backend: Underlying queue implementation.
+        slot_size: Maximum serialized item size in bytes, only used by the shared memory backend.
+        batch_size: Maximum number of items per transfer, must be greater than 0 .
+        is_instrumented: Whether to record statistics, which costs a lock per transfer.
+        overflow_policy: What a put does when the queue is full.
+        overflow_timeout: Time waiting in seconds before dropping, only used by TIMEOUT_THEN_DROP .
+        coalesce_key: Items with the same key replace each other, only used by COALESCE_BY_KEY .
+            Must be a module level function to be passed to workers, the default is the type.
+        """
         self.maxsize = maxsize
+        self.batch_size = max(batch_size, 1)
+
+        # Registered by WorkerProperties, only meaningful in main
+        self.__producer_count = 0
+        self.__consumer_count = 0
+
+        # Only main writes the flag, so it does not need a lock
+        self.__is_closed = mp.RawValue(ctypes.c_bool, False)
+
+        self.__statistics = queue_statistics.QueueStatistics() if is_instrumented else None
+
+        self.overflow_policy = overflow_policy
+        self.__overflow_timeout = overflow_timeout
+        self.__coalesce_key = coalesce_key
+        self.__dropped_count = mp.Value(ctypes.c_uint64, 0)
+
+        # Items received in a batch but not yet returned, local to each process
+        self.__received_items = collections.deque()
+
+        # Transfers and items, local to each process
+        self.__put_transfer_count = 0
+        self.__put_item_count = 0
+        self.__get_transfer_count = 0
+        self.__get_item_count = 0
+
+        # Created up front so that the automatic backend does not need to keep the manager
+        self.__pending_pipe = None
+        if backend == QueueBackend.AUTO:
+            self.__pending_pipe = self.__create_queue(QueueBackend.PIPE, mp_manager, slot_size)
+            backend = QueueBackend.MANAGER if mp_manager is not None else QueueBackend.SHARED_MEMORY
+
+        self.backend = backend
+        self.queue = self.__create_queue(backend, mp_manager, slot_size)
+        self.__capacity = self.__get_capacity(backend)
+
+    def __getstate__(self) -> dict:
+        """
+        Pickles the registered codecs along with the queue, so that a worker receiving it
+        decodes the structs without registering their codecs itself.
+        """
+        return {"codecs": struct_codec.get_codecs(), "attributes": self.__dict__}
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Registers the codecs of the pickling process before restoring the queue.
+        """
+        for codec in state["codecs"]:
+            struct_codec.register_codec(codec)
+
+        self.__dict__.update(state["attributes"])
+
+    def __get_capacity(self, backend: QueueBackend) -> int:
+        """
+        Maximum number of items the underlying queue of the backend holds.
+        """
+        if backend == QueueBackend.MANAGER:
+            # Each slot of the manager queue holds up to a batch
+            return self.maxsize * self.batch_size
+
+        return self.maxsize if self.maxsize > 0 else self.__INFINITE_CAPACITY
+
+    def __create_queue(
+        self,
+        backend: QueueBackend,
+        mp_manager: multiprocessing.managers.SyncManager | None,
+        slot_size: int,
+    ) -> object:
+        """
+        Creates the underlying queue of the backend.
+        """
+        if backend == QueueBackend.MANAGER:
+            assert mp_manager is not None, "Manager backend requires a SyncManager"
+            return mp_manager.Queue(self.maxsize)
+
+        capacity = self.__get_capacity(backend)
+        if backend == QueueBackend.PIPE:
+            return pipe_channel.PipeChannel(capacity)
+
+        return shared_memory_ring_buffer.SharedMemoryRingBuffer(capacity, slot_size)
+
+    def resolve_backend(self) -> QueueBackend:
+        """
+        Chooses the automatic backend from the registered workers, does nothing otherwise.
+        Called by WorkerManager, so all worker properties must be created before the managers.
+        Must be called before the queue is used.
+
+        Returns the backend.
+        """
+        if self.__pending_pipe is None:
+            return self.backend
+
+        if self.__producer_count == 1 and self.__consumer_count == 1:
+            self.close()
+            self.backend = QueueBackend.PIPE
+            self.queue = self.__pending_pipe
+            self.__capacity = self.__get_capacity(QueueBackend.PIPE)
+        else:
+            self.__pending_pipe.unlink()
+
+        self.__pending_pipe = None
+        return self.backend
+
+    def __put_items(self, items: list, wait: float) -> int:
+        """
+        Puts the items in a single transfer.
+
+        wait: Time waiting in seconds before giving up, 0 does not block.
+
+        Returns the number of items put.
+        """
+        if self.backend != QueueBackend.MANAGER:
+            return self.queue.put_many(items, block=wait > 0.0, timeout=wait)
+
+        try:
+            self.queue.put(
+                items[0] if len(items) == 1 else ItemBatch(items),
+                block=wait > 0.0,
+                timeout=wait,
+            )
+        except queue.Full:
+            return 0
+
+        return len(items)
+
+    def __transfer(self, batch: list, timeout: float | None) -> int:
+        """
+        Puts the batch in a single transfer, waiting in slices to notice shutdown.
+        A full queue is handled according to the overflow policy.
+
+        Returns the number of items put, 0 on timeout, shutdown, or if dropped.
+        """
+        if self.overflow_policy == OverflowPolicy.TIMEOUT_THEN_DROP:
+            timeout = (
+                self.__overflow_timeout
+                if timeout is None
+                else min(timeout, self.__overflow_timeout)
+            )
+        elif self.overflow_policy != OverflowPolicy.BLOCK:
+            timeout = 0.0
+
+        start_time = time.monotonic()
+        deadline = None if timeout is None else start_time + timeout
+        # The first attempt does not block, so only actual waits count as blocked time
+        wait = 0.0
+        transferred = 0
+        while not self.__is_closed.value:
+            transferred = self.__put_items(batch, wait)
+            if transferred > 0:
+                break
+
+            current_time = time.monotonic()
+            if deadline is not None and current_time >= deadline:
+                break
+
+            wait = self.__QUEUE_TIMEOUT
+            if deadline is not None:
+                wait = min(wait, deadline - current_time)
+
+        if transferred == 0 and not self.__is_closed.value:
+            if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+                transferred = self.__evict_and_put(batch)
+            elif self.overflow_policy == OverflowPolicy.COALESCE_BY_KEY:
+                transferred = self.__coalesce_and_put(batch)
+
+        if self.__statistics is not None:
+            blocked_time = 0.0 if wait == 0.0 else time.monotonic() - start_time
+            self.__statistics.record_put(transferred, blocked_time)
+
+        return transferred
+
+    def __record_drop(self, count: int, is_queued: bool) -> None:
+        """
+        Counts dropped items.
+
+        is_queued: Whether the items are counted as put in the statistics.
+        """
+        if count == 0:
+            return
+
+        with self.__dropped_count.get_lock():
+            self.__dropped_count.value += count
+
+        if is_queued and self.__statistics is not None:
+            self.__statistics.record_discard(count)
+
+    def __take_items(self, max_items: int) -> list:
+        """
+        Removes up to `max_items` of the oldest items without blocking.
+        The manager and pipe backends may return a few more, as a batch is removed whole.
+        """
+        if self.backend == QueueBackend.PIPE:
+            return self.queue.take(max_items)
+
+        items = []
+        while len(items) < max_items:
+            if self.backend == QueueBackend.SHARED_MEMORY:
+                received = self.queue.get_many(max_items - len(items), block=False)
+                if len(received) == 0:
+                    break
+
+                items.extend(received)
+                continue
+
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            items.extend(item.items if isinstance(item, ItemBatch) else [item])
+
+        return items
+
+    def __put_back(self, items: list) -> int:
+        """
+        Puts the items back without blocking, in transfers of up to `batch_size` items.
+
+        Returns the number of items put.
+        """
+        put_count = 0
+        while put_count < len(items):
+            batch = items[put_count : put_count + self.batch_size]
+            # A sentinel ends the transfer so that each consumer receives its own
+            for i, item in enumerate(batch):
+                if item is None:
+                    batch = batch[: i + 1]
+                    break
+
+            transferred = self.__put_items(batch, 0.0)
+            if transferred == 0:
+                break
+
+            put_count += transferred
+
+        return put_count
+
+    def __evict_and_put(self, batch: list) -> int:
+        """
+        Discards the oldest items to make space for the batch, sentinels are put back.
+
+        Returns the number of items put.
+        """
+        # The manager backend needs 1 slot for the whole batch
+        evict_count = len(batch) if self.backend != QueueBackend.MANAGER else 1
+        for _ in range(self.__EVICTION_ATTEMPTS):
+            evicted = self.__take_items(evict_count)
+            sentinel_count = sum(1 for item in evicted if item is None)
+            self.__record_drop(len(evicted) - sentinel_count, True)
+
+            # Sentinels go back first so they cannot be crowded out
+            self.__put_back([None] * sentinel_count)
+            transferred = self.__put_items(batch, 0.0)
+            if transferred > 0:
+                return transferred
+
+        return 0
+
+    def __coalesce_and_put(self, batch: list) -> int:
+        """
+        Replaces queued items with newer ones of the same key, each keeping the position of the
+        oldest. Discards the oldest items if that is still not enough space.
+
+        Returns the number of items put, which is all of them as coalescing replaces items.
+        """
+        queued = self.__take_items(self.__capacity)
+
+        items = []
+        key_indices = {}
+        for item in queued + batch:
+            if item is None:
+                items.append(item)
+                continue
+
+            key = self.__coalesce_key(item)
+            index = key_indices.get(key)
+            if index is None:
+                key_indices[key] = len(items)
+                items.append(item)
+                continue
+
+            items[index] = item
+
+        # Sentinels are never discarded
+        excess = len(items) - self.__capacity
+        kept = []
+        for item in items:
+            if excess > 0 and item is not None:
+                excess -= 1
+                continue
+
+            kept.append(item)
+
+        # Space taken by other producers in the meantime drops the newest items
+        put_count = self.__put_back(kept)
+        self.__record_drop(len(queued) + len(batch) - put_count, True)
+        return len(batch)
+
+    def put(self, item: object, timeout: float | None = None) -> bool:
+        """
+        Puts a single item into the queue.
+
+        item: Item, None is the sentinel.
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns whether the item was put, False on timeout or after shutdown.
+        """
+        return self.put_many([item], timeout) == 1
+
+    def put_many(self, items: list, timeout: float | None = None) -> int:
+        """
+        Puts the items into the queue in order, in transfers of up to `batch_size` items.
+
+        items: Items, None is the sentinel.
+        timeout: Time waiting in seconds for each transfer before giving up, None is forever.
+
+        Returns the number of items put, which is less than requested on timeout, after shutdown,
+        or if items were dropped.
+        """
+        index = 0
+        put_count = 0
+        while index < len(items):
+            batch = items[index : index + self.batch_size]
+            # A sentinel ends the transfer so that each consumer receives its own
+            for i, item in enumerate(batch):
+                if item is None:
+                    batch = batch[: i + 1]
+                    break
+
+            transferred = self.__transfer(batch, timeout)
+            if transferred == 0:
+                if self.overflow_policy == OverflowPolicy.BLOCK or self.__is_closed.value:
+                    break
+
+                # Dropped rather than waiting on a slow consumer
+                self.__record_drop(len(batch), False)
+                index += len(batch)
+                continue
+
+            self.__put_transfer_count += 1
+            self.__put_item_count += transferred
+            index += transferred
+            put_count += transferred
+
+        return put_count
+
+    def get(self, timeout: float | None = None) -> "tuple[bool, object]":
+        """
+        Gets a single item from the queue.
+
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns whether an item was received and the item, None being the sentinel.
+        """
+        items = self.get_many(1, timeout)
+        if len(items) == 0:
+            return False, None
+
+        return True, items[0]
+
+    def __receive(self, max_items: int, block: bool, timeout: float | None) -> list:
+        """
+        Gets up to `max_items` items in a single transfer.
+
+        Returns the items, empty if there were none in time.
+        """
+        if self.backend != QueueBackend.MANAGER:
+            return self.queue.get_many(max_items, block=block, timeout=timeout)
+
+        try:
+            item = self.queue.get(block=block, timeout=timeout)
+        except queue.Empty:
+            return []
+
+        return item.items if isinstance(item, ItemBatch) else [item]
+
+    def get_many(self, max_items: int = 0, timeout: float | None = None) -> list:
+        """
+        Gets up to `max_items` items from the queue in a single transfer.
+        The sentinel is always the last item returned, so each call returns at most one.
+
+        max_items: Maximum number of items, `batch_size` if less than or equal to 0 .
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns the items, empty if there were none in time.
+        """
+        if max_items <= 0:
+            max_items = self.batch_size
+
+        if len(self.__received_items) == 0:
+            if self.__statistics is None:
+                received = self.__receive(max_items, True, timeout)
+            else:
+                # The first attempt does not block, so only actual waits count as blocked time
+                received = self.__receive(max_items, False, None)
+                blocked_time = 0.0
+                if len(received) == 0 and timeout != 0.0:
+                    self.__statistics.record_waiting(1)
+                    start_time = time.monotonic()
+                    received = self.__receive(max_items, True, timeout)
+                    blocked_time = time.monotonic() - start_time
+                    self.__statistics.record_waiting(-1)
+
+                self.__statistics.record_get(len(received), blocked_time)
+
+            if len(received) == 0:
+                return []
+
+            self.__get_transfer_count += 1
+            self.__get_item_count += len(received)
+            self.__received_items.extend(received)
+
+        items = []
+        while len(items) < max_items and len(self.__received_items) > 0:
+            item = self.__received_items.popleft()
+            items.append(item)
+            if item is None:
+                break
+
+        return items
+
+    def get_average_batch_sizes(self) -> "tuple[float, float]":
+        """
+        Average number of items per transfer achieved by this process.
+
+        Returns the average for puts and the average for gets, 0 if there were no transfers.
+        """
+        put_average = 0.0
+        if self.__put_transfer_count > 0:
+            put_average = self.__put_item_count / self.__put_transfer_count
+
+        get_average = 0.0
+        if self.__get_transfer_count > 0:
+            get_average = self.__get_item_count / self.__get_transfer_count
+
+        return put_average, get_average
+
+    def stats(self) -> "queue_statistics.QueueStatisticsSnapshot | None":
+        """
+        Snapshot of the statistics of all processes using the queue, cheap enough to call often.
+
+        Returns the snapshot, None if the queue is not instrumented.
+        """
+        if self.__statistics is None:
+            return None
+
+        return self.__statistics.snapshot()
+
+    def get_dropped_count(self) -> int:
+        """
+        Returns the number of items dropped by the overflow policy across all processes.
+        """
+        return self.__dropped_count.value
+
+    def register_producers(self, count: int) -> None:
+        """
+        Adds producer workers, called when creating worker properties.
+        """
+        self.__producer_count += count
+
+    def register_consumers(self, count: int) -> None:
+        """
+        Adds consumer workers, called when creating worker properties.
+        """
+        self.__consumer_count += count
+
+    def get_producer_count(self) -> int:
+        """
+        Returns the number of registered producer workers.
+        """
+        return self.__producer_count
+
+    def get_consumer_count(self) -> int:
+        """
+        Returns the number of registered consumer workers.
+        """
+        return self.__consumer_count
+
+    def __discard_all(self) -> int:
+        """
+        Discards every item in the queue.
+
+        Returns the number of sentinels discarded.
+        """
+        if self.backend != QueueBackend.MANAGER:
+            item_count, sentinel_count = self.queue.drain()
+        else:
+            item_count = 0
+            sentinel_count = 0
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                items = item.items if isinstance(item, ItemBatch) else [item]
+                item_count += len(items)
+                sentinel_count += sum(1 for item in items if item is None)
+
+        if self.__statistics is not None:
+            self.__statistics.record_discard(item_count)
+
+        return sentinel_count
+
+    def shutdown(self, consumer_count: int | None = None, timeout: float = 1.0) -> bool:
+        """
+        Closes the queue and delivers exactly one sentinel to each consumer.
+        Works for any maxsize and takes milliseconds, so it does not depend on the order in which
+        queues are shut down. Call from main after requesting workers to exit.
+
+        consumer_count: Number of consumers, the registered count if None.
+        timeout: Time in seconds to keep making room for the sentinels before giving up.
+
+        Returns whether all sentinels were delivered.
+        """
+        if consumer_count is None:
+            consumer_count = self.__consumer_count
+
+        # Producers blocked on a full queue give up and later puts are discarded
+        self.__is_closed.value = True
+
+        deadline = time.monotonic() + timeout
+        remaining = consumer_count
+        self.__discard_all()
+        while remaining > 0:
+            try:
+                self.queue.put_nowait(None)
+                if self.__statistics is not None:
+                    self.__statistics.record_put(1)
+
+                remaining -= 1
+                continue
+            except queue.Full:
+                pass
+
+            # A producer put an item before noticing the shutdown
+            if time.monotonic() >= deadline:
+                return False
+
+            # Any sentinels discarded have not been received, so they are delivered again
+            remaining += self.__discard_all()
+
+        return True
+
+    def put_sentinel(self, timeout: float | None = None) -> bool:
+        """
+        Puts a single sentinel behind the items in the queue, so that one consumer exits
+        once they have all been received and none are lost. Used to retire a consumer,
+        so it is never dropped by the overflow policy.
+
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns whether the sentinel was put, False on timeout or after shutdown.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.__is_closed.value:
+            wait = self.__QUEUE_TIMEOUT
+            if deadline is not None:
+                wait = min(wait, max(deadline - time.monotonic(), 0.0))
+
+            try:
+                self.queue.put(None, True, wait)
+            except queue.Full:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+
+                continue
+
+            if self.__statistics is not None:
+                self.__statistics.record_put(1)
+
+            return True
+
+        return False
+
+    def is_shut_down(self) -> bool:
+        """
+        Returns whether the queue has been shut down.
+        """
+        return self.__is_closed.value
 
     def fill_queue_with_sentinel(self, timeout: float = 0.0) -> None:
         """
@@ -54,7 +739,16 @@ class QueueProxyWrapper:
     def fill_and_drain_queue(self) -> None:
         """
         Fill with sentinel and then drain.
+        Does nothing for infinite size queues, use shutdown() instead.
         """
         self.fill_queue_with_sentinel()
         time.sleep(self.__QUEUE_DELAY)
         self.drain_queue()
+
+    def close(self) -> None:
+        """
+        Releases the underlying queue, call from main after all workers have been joined.
+        The manager backend is released when the manager shuts down instead.
+        """
+        if self.backend != QueueBackend.MANAGER:
+            self.queue.unlink()
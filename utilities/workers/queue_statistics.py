@@ -0,0 +1,204 @@
+"""
+Queue instrumentation.
+"""
+
+import bisect
+import ctypes
+import multiprocessing as mp
+import time
+
+
+# Upper bounds of the blocked time histogram buckets, the last bucket has no upper bound
+BLOCKED_TIME_BUCKET_BOUNDS = [0.001, 0.01, 0.1, 1.0]  # seconds
+
+
+class QueueStatisticsSnapshot:  # pylint: disable=too-many-instance-attributes
+    """
+    Queue counters at a point in time.
+
+    depth: Items put and not yet received, including those buffered by consumers.
+    peak_depth: Highest depth so far.
+    put_count: Items put.
+    get_count: Items received.
+    discarded_count: Items discarded by shutdown.
+    waiting_count: Consumers waiting on the empty queue right now.
+    put_blocked_time: Total seconds producers spent waiting on a full queue.
+    get_blocked_time: Total seconds consumers spent waiting on an empty queue.
+    put_blocked_histogram: Number of put waits in each bucket of BLOCKED_TIME_BUCKET_BOUNDS .
+    get_blocked_histogram: Number of get waits in each bucket of BLOCKED_TIME_BUCKET_BOUNDS .
+    elapsed_time: Seconds since the statistics were created.
+    """
+
+    def __init__(
+        self,
+        depth: int,
+        peak_depth: int,
+        put_count: int,
+        get_count: int,
+        discarded_count: int,
+        waiting_count: int,
+        put_blocked_time: float,
+        get_blocked_time: float,
+        put_blocked_histogram: "list[int]",
+        get_blocked_histogram: "list[int]",
+        elapsed_time: float,
+    ) -> None:
+        self.depth = depth
+        self.peak_depth = peak_depth
+        self.put_count = put_count
+        self.get_count = get_count
+        self.discarded_count = discarded_count
+        self.waiting_count = waiting_count
+        self.put_blocked_time = put_blocked_time
+        self.get_blocked_time = get_blocked_time
+        self.put_blocked_histogram = put_blocked_histogram
+        self.get_blocked_histogram = get_blocked_histogram
+        self.elapsed_time = elapsed_time
+
+    @property
+    def put_rate(self) -> float:
+        """
+        Items put per second.
+        """
+        if self.elapsed_time <= 0.0:
+            return 0.0
+
+        return self.put_count / self.elapsed_time
+
+    @property
+    def get_rate(self) -> float:
+        """
+        Items received per second.
+        """
+        if self.elapsed_time <= 0.0:
+            return 0.0
+
+        return self.get_count / self.elapsed_time
+
+    def __str__(self) -> str:
+        """
+        To string.
+
+        Producers blocked for long means consumers are the bottleneck and vice versa.
+        """
+        return (
+            f"depth: {self.depth} (peak {self.peak_depth}), "
+            f"put: {self.put_count} ({self.put_rate:.1f}/s, "
+            f"blocked {self.put_blocked_time:.3f}s {self.put_blocked_histogram}), "
+            f"get: {self.get_count} ({self.get_rate:.1f}/s, "
+            f"blocked {self.get_blocked_time:.3f}s {self.get_blocked_histogram}), "
+            f"discarded: {self.discarded_count}"
+        )
+
+
+class QueueStatistics:
+    """
+    Counters of a single queue in shared memory, updated by every process using the queue
+    and readable by main without going through the queue.
+    """
+
+    __DEPTH = 0
+    __PEAK_DEPTH = 1
+    __PUT_COUNT = 2
+    __GET_COUNT = 3
+    __DISCARDED_COUNT = 4
+    __WAITING_COUNT = 5
+    __PUT_BLOCKED_TIME = 6
+    __GET_BLOCKED_TIME = 7
+    __PUT_HISTOGRAM = 8
+    __GET_HISTOGRAM = __PUT_HISTOGRAM + len(BLOCKED_TIME_BUCKET_BOUNDS) + 1
+    __COUNTER_COUNT = __GET_HISTOGRAM + len(BLOCKED_TIME_BUCKET_BOUNDS) + 1
+
+    def __init__(self) -> None:
+        """
+        Constructor creates zeroed counters.
+        """
+        # Doubles count exactly up to 2^53, far beyond any item count
+        self.__counters = mp.RawArray(ctypes.c_double, self.__COUNTER_COUNT)
+        self.__lock = mp.Lock()
+
+        # Monotonic clock is system wide, so it is comparable across processes
+        self.__start_time = time.monotonic()
+
+    def __record_blocked_time(self, total_index: int, histogram_index: int, seconds: float) -> None:
+        """
+        Adds a wait to the total and its histogram bucket, lock must be held.
+        """
+        self.__counters[total_index] += seconds
+        bucket = bisect.bisect_left(BLOCKED_TIME_BUCKET_BOUNDS, seconds)
+        self.__counters[histogram_index + bucket] += 1
+
+    def record_put(self, count: int, blocked_time: float = 0.0) -> None:
+        """
+        Records items put in a single transfer.
+
+        count: Number of items.
+        blocked_time: Seconds spent waiting on a full queue, 0 if it did not wait.
+        """
+        with self.__lock:
+            self.__counters[self.__PUT_COUNT] += count
+            depth = self.__counters[self.__DEPTH] + count
+            self.__counters[self.__DEPTH] = depth
+            if depth > self.__counters[self.__PEAK_DEPTH]:
+                self.__counters[self.__PEAK_DEPTH] = depth
+
+            if blocked_time > 0.0:
+                self.__record_blocked_time(
+                    self.__PUT_BLOCKED_TIME, self.__PUT_HISTOGRAM, blocked_time
+                )
+
+    def record_get(self, count: int, blocked_time: float = 0.0) -> None:
+        """
+        Records items received in a single transfer.
+
+        count: Number of items.
+        blocked_time: Seconds spent waiting on an empty queue, 0 if it did not wait.
+        """
+        with self.__lock:
+            self.__counters[self.__GET_COUNT] += count
+            self.__counters[self.__DEPTH] -= count
+
+            if blocked_time > 0.0:
+                self.__record_blocked_time(
+                    self.__GET_BLOCKED_TIME, self.__GET_HISTOGRAM, blocked_time
+                )
+
+    def record_waiting(self, count: int) -> None:
+        """
+        Records consumers starting to wait on the empty queue, negative when they stop.
+        """
+        with self.__lock:
+            self.__counters[self.__WAITING_COUNT] += count
+
+    def record_discard(self, count: int) -> None:
+        """
+        Records items removed without being received.
+        """
+        with self.__lock:
+            self.__counters[self.__DISCARDED_COUNT] += count
+            self.__counters[self.__DEPTH] -= count
+
+    def snapshot(self) -> QueueStatisticsSnapshot:
+        """
+        Copies the counters under a single lock acquisition.
+        """
+        with self.__lock:
+            counters = list(self.__counters)
+
+        histogram_size = len(BLOCKED_TIME_BUCKET_BOUNDS) + 1
+        put_histogram = counters[self.__PUT_HISTOGRAM : self.__PUT_HISTOGRAM + histogram_size]
+        get_histogram = counters[self.__GET_HISTOGRAM : self.__GET_HISTOGRAM + histogram_size]
+
+        return QueueStatisticsSnapshot(
+            int(counters[self.__DEPTH]),
+            int(counters[self.__PEAK_DEPTH]),
+            int(counters[self.__PUT_COUNT]),
+            int(counters[self.__GET_COUNT]),
+            int(counters[self.__DISCARDED_COUNT]),
+            int(counters[self.__WAITING_COUNT]),
+            counters[self.__PUT_BLOCKED_TIME],
+            counters[self.__GET_BLOCKED_TIME],
+            [int(count) for count in put_histogram],
+            [int(count) for count in get_histogram],
+            time.monotonic() - self.__start_time,
+        )
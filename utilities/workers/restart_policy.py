@@ -0,0 +1,124 @@
+"""
+When and how often dead workers are restarted.
+"""
+
+import enum
+
+
+class Escalation(enum.Enum):
+    """
+    What to do once a worker type restarts too often.
+    """
+
+    # Stop restarting the workers, the rest of the pipeline keeps running
+    GIVE_UP = 0
+    # Stop restarting and request all workers sharing the controller to exit
+    STOP_PIPELINE = 1
+
+
+class RestartPolicy:
+    """
+    Restart policy of the workers of a single worker manager.
+
+    A worker that dies within `stable_time` of starting is a failed start, and consecutive failed
+    starts can be restarted with exponential backoff, so a worker that cannot start (e.g. no
+    connection) is not respawned in a tight loop. A worker that dies after running for longer
+    is restarted immediately.
+
+    Independently, once `max_restarts` restarts happen within `restart_window`, the manager
+    escalates instead of restarting.
+
+    The defaults restart every dead worker immediately, forever, as the manager always has.
+    Backoff and the restart limit are opted into, e.g. initial_backoff=0.1, max_restarts=5 .
+    """
+
+    __INITIAL_BACKOFF = 0.0  # seconds
+    __MAX_BACKOFF = 10.0  # seconds
+    __BACKOFF_MULTIPLIER = 2.0
+    __RESTART_WINDOW = 60.0  # seconds
+    __STABLE_TIME = 5.0  # seconds
+
+    def __init__(
+        self,
+        initial_backoff: float = __INITIAL_BACKOFF,
+        max_backoff: float = __MAX_BACKOFF,
+        backoff_multiplier: float = __BACKOFF_MULTIPLIER,
+        max_restarts: "int | None" = None,
+        restart_window: float = __RESTART_WINDOW,
+        stable_time: float = __STABLE_TIME,
+        escalation: Escalation = Escalation.GIVE_UP,
+    ) -> None:
+        """
+        initial_backoff: Seconds before restarting after the first failed start, 0 for no backoff.
+        max_backoff: Upper bound of the backoff in seconds.
+        backoff_multiplier: Factor of the backoff for each further failed start.
+        max_restarts: Restarts allowed within the window, 0 never restarts, None is unlimited.
+        restart_window: Length of the window in seconds.
+        stable_time: Seconds a worker must run for its death not to count as a failed start.
+        escalation: What to do once the restarts in the window are used up.
+        """
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.backoff_multiplier = backoff_multiplier
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.stable_time = stable_time
+        self.escalation = escalation
+
+    def get_backoff(self, failed_start_count: int) -> float:
+        """
+        Delay before a restart.
+
+        failed_start_count: Consecutive failed starts, including the one being restarted.
+
+        Returns the delay in seconds, 0 if there are no failed starts.
+        """
+        if failed_start_count <= 0:
+            return 0.0
+
+        backoff = self.initial_backoff * self.backoff_multiplier ** (failed_start_count - 1)
+        return min(backoff, self.max_backoff)
+
+
+class RestartStatistics:
+    """
+    Restarts of a single worker manager at a point in time.
+
+    restart_count: Workers restarted in total.
+    failed_start_count: Current consecutive failed starts.
+    window_restart_count: Restarts within the current window.
+    recovered_count: Restarted workers that are running.
+    mean_time_to_recover: Average seconds from noticing a death until the replacement ran.
+    max_time_to_recover: Longest seconds from noticing a death until the replacement ran.
+    is_given_up: Whether the manager escalated and no longer restarts.
+    """
+
+    def __init__(
+        self,
+        restart_count: int,
+        failed_start_count: int,
+        window_restart_count: int,
+        recovered_count: int,
+        mean_time_to_recover: float,
+        max_time_to_recover: float,
+        is_given_up: bool,
+    ) -> None:
+        self.restart_count = restart_count
+        self.failed_start_count = failed_start_count
+        self.window_restart_count = window_restart_count
+        self.recovered_count = recovered_count
+        self.mean_time_to_recover = mean_time_to_recover
+        self.max_time_to_recover = max_time_to_recover
+        self.is_given_up = is_given_up
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        given_up = ", given up" if self.is_given_up else ""
+        return (
+            f"restarts: {self.restart_count} ({self.window_restart_count} in window, "
+            f"{self.failed_start_count} failed starts), "
+            f"recovery: mean {self.mean_time_to_recover * 1000:.1f}ms, "
+            f"max {self.max_time_to_recover * 1000:.1f}ms{given_up}"
+        )
@@ -0,0 +1,276 @@
+"""
+Ring buffer in shared memory.
+"""
+
+import multiprocessing as mp
+import multiprocessing.shared_memory
+import multiprocessing.synchronize
+import pickle
+import queue
+import struct
+
+from utilities.workers import struct_codec
+
+
+class SharedMemoryRingBuffer:
+    """
+    Bounded FIFO of serialized items stored in fixed size slots of shared memory.
+    Items with a registered struct codec are encoded with it, all others are pickled.
+
+    Has the same put/get interface as `queue.Queue` so it can replace a queue proxy.
+    Slot access is serialized by a single lock, while 2 semaphores count the free and filled
+    slots to implement blocking and timeouts without a server process.
+    """
+
+    # Read index and write index, both increase forever and are wrapped on use
+    __HEADER = struct.Struct("<QQ")
+    # Length of the item in bytes, type ID of the serialization
+    __SLOT_HEADER = struct.Struct("<IB")
+    # Reading stops after a sentinel so that each consumer gets its own
+    __SENTINEL_DATA = pickle.dumps(None, pickle.HIGHEST_PROTOCOL)
+
+    def __init__(self, capacity: int, slot_size: int) -> None:
+        """
+        Constructor creates the shared memory and synchronization primitives.
+
+        capacity: Maximum number of items, must be greater than 0 .
+        slot_size: Maximum size of a serialized item in bytes, must be greater than 0 .
+        """
+        self.__capacity = capacity
+        self.__slot_size = slot_size
+        self.__slot_stride = self.__SLOT_HEADER.size + slot_size
+
+        self.__memory = multiprocessing.shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER.size + capacity * self.__slot_stride,
+        )
+        self.__HEADER.pack_into(self.__memory.buf, 0, 0, 0)
+
+        self.__lock = mp.Lock()
+        self.__free_slots = mp.Semaphore(capacity)
+        self.__filled_slots = mp.Semaphore(0)
+
+    def __slot_offset(self, index: int) -> int:
+        """
+        Byte offset of the slot for the index.
+        """
+        return self.__HEADER.size + (index % self.__capacity) * self.__slot_stride
+
+    def __serialize(self, item: object) -> "tuple[int, bytes]":
+        """
+        Serializes the item and checks that it fits in a slot.
+        """
+        type_id, data = struct_codec.serialize(item)
+        if len(data) > self.__slot_size:
+            raise ValueError(f"Item of {len(data)} bytes exceeds slot size {self.__slot_size}")
+
+        return type_id, data
+
+    def __acquire(
+        self,
+        semaphore: multiprocessing.synchronize.Semaphore,
+        count: int,
+        block: bool,
+        timeout: float | None,
+    ) -> int:
+        """
+        Waits for 1 permit and then takes up to count permits without waiting.
+
+        Returns the number of permits taken.
+        """
+        if not semaphore.acquire(block, timeout):
+            return 0
+
+        acquired = 1
+        while acquired < count and semaphore.acquire(False):
+            acquired += 1
+
+        return acquired
+
+    def __write_slots(self, data_list: "list[tuple[int, bytes]]") -> None:
+        """
+        Writes serialized items into free slots, the caller has already taken the permits.
+        """
+        with self.__lock:
+            read_index, write_index = self.__HEADER.unpack_from(self.__memory.buf, 0)
+            for type_id, data in data_list:
+                offset = self.__slot_offset(write_index)
+                self.__SLOT_HEADER.pack_into(self.__memory.buf, offset, len(data), type_id)
+                offset += self.__SLOT_HEADER.size
+                self.__memory.buf[offset : offset + len(data)] = data
+                write_index += 1
+
+            self.__HEADER.pack_into(self.__memory.buf, 0, read_index, write_index)
+
+        for _ in data_list:
+            self.__filled_slots.release()
+
+    def __read_slots(
+        self, count: int, is_stopped_by_sentinel: bool = True
+    ) -> "list[tuple[int, bytes]]":
+        """
+        Copies serialized items out of filled slots, by default up to and including the first
+        sentinel. The caller has already taken the permits and unused ones are returned.
+        """
+        data_list = []
+        with self.__lock:
+            read_index, write_index = self.__HEADER.unpack_from(self.__memory.buf, 0)
+            for _ in range(count):
+                offset = self.__slot_offset(read_index)
+                length, type_id = self.__SLOT_HEADER.unpack_from(self.__memory.buf, offset)
+                offset += self.__SLOT_HEADER.size
+                data = bytes(self.__memory.buf[offset : offset + length])
+                data_list.append((type_id, data))
+                read_index += 1
+                if is_stopped_by_sentinel and self.__is_sentinel(type_id, data):
+                    break
+
+            self.__HEADER.pack_into(self.__memory.buf, 0, read_index, write_index)
+
+        for _ in data_list:
+            self.__free_slots.release()
+
+        for _ in range(count - len(data_list)):
+            self.__filled_slots.release()
+
+        return data_list
+
+    def __is_sentinel(self, type_id: int, data: bytes) -> bool:
+        """
+        Whether the serialized item is the sentinel.
+        """
+        return type_id == struct_codec.PICKLE_TYPE_ID and data == self.__SENTINEL_DATA
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> None:
+        """
+        Puts the item into the buffer.
+
+        item: Picklable object, its serialized size must fit in a slot.
+        block: Whether to wait for a free slot.
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Raises queue.Full if there is no free slot in time,
+        and ValueError if the item does not fit in a slot.
+        """
+        serialized = self.__serialize(item)
+
+        if not self.__free_slots.acquire(block, timeout):
+            raise queue.Full
+
+        self.__write_slots([serialized])
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Removes and returns the oldest item in the buffer.
+
+        block: Whether to wait for an item.
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Raises queue.Empty if there is no item in time.
+        """
+        if not self.__filled_slots.acquire(block, timeout):
+            raise queue.Empty
+
+        # Deserialize after releasing the lock
+        type_id, data = self.__read_slots(1)[0]
+        return struct_codec.deserialize(type_id, data)
+
+    def put_many(self, items: list, block: bool = True, timeout: float | None = None) -> int:
+        """
+        Puts the items into the buffer in order, writing as many as there are free slots
+        under a single lock acquisition.
+
+        items: Picklable objects, each serialized size must fit in a slot.
+        block: Whether to wait for free slots.
+        timeout: Time waiting in seconds for each free slot before giving up, None is forever.
+
+        Returns the number of items put, which is less than requested on timeout.
+        Raises ValueError if an item does not fit in a slot.
+        """
+        data_list = [self.__serialize(item) for item in items]
+
+        put_count = 0
+        while put_count < len(data_list):
+            acquired = self.__acquire(self.__free_slots, len(data_list) - put_count, block, timeout)
+            if acquired == 0:
+                break
+
+            self.__write_slots(data_list[put_count : put_count + acquired])
+            put_count += acquired
+
+        return put_count
+
+    def get_many(self, max_items: int, block: bool = True, timeout: float | None = None) -> list:
+        """
+        Removes and returns up to max_items of the oldest items,
+        reading all available ones under a single lock acquisition.
+        Stops after a sentinel (None), so it is always the last item returned.
+
+        max_items: Maximum number of items, must be greater than 0 .
+        block: Whether to wait for the first item.
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns the items, empty if there is no item in time.
+        """
+        acquired = self.__acquire(self.__filled_slots, max_items, block, timeout)
+        if acquired == 0:
+            return []
+
+        return [
+            struct_codec.deserialize(type_id, data) for type_id, data in self.__read_slots(acquired)
+        ]
+
+    def drain(self) -> "tuple[int, int]":
+        """
+        Discards all items under a single lock acquisition, without deserializing them.
+
+        Returns the number of items and the number of sentinels discarded.
+        """
+        acquired = 0
+        while self.__filled_slots.acquire(False):
+            acquired += 1
+
+        if acquired == 0:
+            return 0, 0
+
+        data_list = self.__read_slots(acquired, False)
+        return acquired, sum(1 for type_id, data in data_list if self.__is_sentinel(type_id, data))
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in the buffer.
+        """
+        read_index, write_index = self.__HEADER.unpack_from(self.__memory.buf, 0)
+        return write_index - read_index
+
+    def empty(self) -> bool:
+        """
+        Returns whether the buffer is approximately empty.
+        """
+        return self.qsize() <= 0
+
+    def full(self) -> bool:
+        """
+        Returns whether the buffer is approximately full.
+        """
+        return self.qsize() >= self.__capacity
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory once all processes are done with it.
+        Only the process that created the buffer should call this.
+        """
+        self.__memory.close()
+        self.__memory.unlink()
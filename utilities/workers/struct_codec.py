@@ -0,0 +1,147 @@
+"""
+Fixed layout binary encoding of structs sent between processes.
+"""
+
+import math
+import operator
+import pickle
+import struct
+
+
+# Type ID of items without a registered codec, which are pickled instead
+PICKLE_TYPE_ID = 0
+
+
+class StructCodec:
+    """
+    Encodes the numeric attributes of a struct as fixed width little endian doubles.
+
+    NaN stands in for None, so an encoded struct has a constant size regardless of content.
+    """
+
+    def __init__(
+        self,
+        type_id: int,
+        struct_type: type,
+        field_names: "list[str]",
+        integer_field_names: "list[str] | None" = None,
+    ) -> None:
+        """
+        type_id: Unique identifier in range [1, 255] .
+        struct_type: Class of the struct, decoding sets its attributes without the constructor.
+        field_names: Attributes to encode, in order.
+        integer_field_names: Attributes decoded as int rather than float.
+        """
+        assert 0 < type_id < 256, "Type ID must be in range [1, 255]"
+
+        self.type_id = type_id
+        self.struct_type = struct_type
+        self.__field_names = field_names
+        self.__integer_field_names = integer_field_names
+        self.__integer_field_indices = [
+            field_names.index(name) for name in integer_field_names or []
+        ]
+        self.__struct = struct.Struct("<" + "d" * len(field_names))
+        self.__get_fields = operator.attrgetter(*field_names)
+
+    def __reduce__(self) -> "tuple[type, tuple]":
+        """
+        Pickles the codec by its definition, the compiled struct and getter are rebuilt.
+        """
+        return (
+            StructCodec,
+            (self.type_id, self.struct_type, self.__field_names, self.__integer_field_names),
+        )
+
+    @property
+    def size(self) -> int:
+        """
+        Size of an encoded struct in bytes.
+        """
+        return self.__struct.size
+
+    def encode(self, item: object) -> bytes:
+        """
+        Encodes the fields of the item.
+        """
+        values = self.__get_fields(item)
+        # Getter returns the value itself rather than a tuple for a single field
+        if len(self.__field_names) == 1:
+            values = (values,)
+
+        return self.__struct.pack(*[math.nan if value is None else value for value in values])
+
+    def decode(self, data: "bytes | memoryview") -> object:
+        """
+        Decodes a struct from the data with a single unpack, bypassing the constructor.
+        """
+        # NaN is the only value not equal to itself
+        values = [
+            None if value != value else value  # pylint: disable=comparison-with-itself
+            for value in self.__struct.unpack(data)
+        ]
+        for i in self.__integer_field_indices:
+            if values[i] is not None:
+                values[i] = int(values[i])
+
+        item = self.struct_type.__new__(self.struct_type)
+        item.__dict__.update(zip(self.__field_names, values))
+        return item
+
+
+_CODECS_BY_TYPE: "dict[type, StructCodec]" = {}
+_CODECS_BY_ID: "dict[int, StructCodec]" = {}
+
+
+def register_codec(codec: StructCodec) -> bool:
+    """
+    Registers the codec so that queues encode its struct type automatically.
+    Register codecs in main before creating the workers: queues carry the codecs registered at the
+    time they are passed to a worker, and a worker cannot decode types registered after it started.
+
+    Returns whether the codec was registered, False if the type or type ID is already taken.
+    """
+    if codec.struct_type in _CODECS_BY_TYPE or codec.type_id in _CODECS_BY_ID:
+        return False
+
+    _CODECS_BY_TYPE[codec.struct_type] = codec
+    _CODECS_BY_ID[codec.type_id] = codec
+    return True
+
+
+def get_codecs() -> "list[StructCodec]":
+    """
+    Returns the codecs registered in this process.
+    """
+    return list(_CODECS_BY_ID.values())
+
+
+def serialize(item: object) -> "tuple[int, bytes]":
+    """
+    Encodes the item with its registered codec, or pickles it if there is none.
+
+    Returns the type ID and the data.
+    """
+    codec = _CODECS_BY_TYPE.get(type(item))
+    if codec is None:
+        return PICKLE_TYPE_ID, pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+
+    return codec.type_id, codec.encode(item)
+
+
+def deserialize(type_id: int, data: "bytes | memoryview") -> object:
+    """
+    Inverse of serialize().
+    Raises LookupError if there is no codec for the type ID.
+    """
+    if type_id == PICKLE_TYPE_ID:
+        return pickle.loads(data)
+
+    codec = _CODECS_BY_ID.get(type_id)
+    if codec is None:
+        raise LookupError(
+            f"No codec registered for type ID {type_id}, "
+            "register it before passing the queue to the worker"
+        )
+
+    return codec.decode(data)
@@ -0,0 +1,395 @@
+"""
+For building the queues and workers of a pipeline from the configuration.
+"""
+
+import importlib
+import multiprocessing.managers
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import restart_policy
+from utilities.workers import worker_controller
+from utilities.workers import worker_host
+from utilities.workers import worker_manager
+from utilities.workers import worker_shutdown
+
+
+def _load_target(path: str) -> "tuple[bool, object]":
+    """
+    Imports a worker function from its module path, for example "package.module.function".
+
+    Returns whether the function was found and the function.
+    """
+    module_name, _, function_name = path.rpartition(".")
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        return False, None
+
+    target = getattr(module, function_name, None)
+    if not callable(target):
+        return False, None
+
+    return True, target
+
+
+class Topology:
+    """
+    Queues and worker managers of a pipeline, described by the "topology" section of the
+    configuration:
+
+    ```
+    topology:
+      queues:
+        <queue name>:
+          maxsize: <int, <= 0 for infinity>
+          batch_size, backend, instrumented, overflow_policy: optional, see QueueProxyWrapper
+      stages:
+        <stage name>:
+          target: <module path of the worker function>
+          count: <int>
+          args: <list of the work arguments>
+          inputs: <list of queue names, in the order of the worker arguments>
+          outputs: <list of queue names, in the order of the worker arguments>
+          worker_rate: optional, items per second a single worker processes
+          execution_kind, cpu_affinity, niceness: optional, see WorkerProperties
+          restart_policy: optional, arguments of RestartPolicy
+    ```
+
+    Queues without producers or consumers are put into or read from by main.
+    Stages must not form a cycle.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        config: dict,
+        controller: worker_controller.WorkerController,
+        local_logger: logger.Logger,
+        mp_manager: multiprocessing.managers.SyncManager | None = None,
+        host: "worker_host.WorkerHost | None" = None,
+    ) -> "tuple[bool, Topology | None]":
+        """
+        Validates the topology and creates its queues and worker managers.
+
+        config: Configuration, containing the "topology" section.
+        controller: Worker controller of all the workers.
+        local_logger: Existing logger from process.
+        mp_manager: Multiprocess manager, required by queues with the manager backend.
+        host: Worker host for stages of thread and asyncio task workers.
+
+        Returns whether the topology was created and the Topology.
+        """
+        try:
+            topology_config = config["topology"]
+            queue_configs: "dict[str, dict]" = topology_config["queues"]
+            stage_configs: "dict[str, dict]" = topology_config["stages"]
+        except (KeyError, TypeError) as e:
+            local_logger.error(f"Config is missing the topology: {e}", True)
+            return False, None
+
+        # Validate the graph before creating anything
+        producer_counts = {name: 0 for name in queue_configs}
+        consumer_counts = {name: 0 for name in queue_configs}
+        try:
+            for stage_name, stage_config in stage_configs.items():
+                count = stage_config["count"]
+                for edge, counts in [("inputs", consumer_counts), ("outputs", producer_counts)]:
+                    for queue_name in stage_config.get(edge, []):
+                        if queue_name not in counts:
+                            local_logger.error(
+                                f"Stage {stage_name} {edge} unknown queue {queue_name}", True
+                            )
+                            return False, None
+
+                        counts[queue_name] += count
+        except (KeyError, TypeError) as e:
+            local_logger.error(f"Stage is missing a setting: {e}", True)
+            return False, None
+
+        for queue_name, queue_config in queue_configs.items():
+            maxsize = queue_config.get("maxsize", 0)
+            minimum_size = max(producer_counts[queue_name], consumer_counts[queue_name])
+            if 0 < maxsize < minimum_size:
+                local_logger.error(
+                    f"Queue {queue_name} maxsize {maxsize} is less than the larger of "
+                    f"its producers and consumers count {minimum_size}",
+                    True,
+                )
+                return False, None
+
+        result, stage_order = cls.__sort_stages(stage_configs, local_logger)
+        if not result:
+            return False, None
+
+        # Create the queues
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]" = {}
+        for queue_name, queue_config in queue_configs.items():
+            try:
+                queues[queue_name] = queue_proxy_wrapper.QueueProxyWrapper(
+                    mp_manager,
+                    queue_config.get("maxsize", 0),
+                    queue_proxy_wrapper.QueueBackend[queue_config.get("backend", "MANAGER")],
+                    batch_size=queue_config.get("batch_size", 1),
+                    is_instrumented=queue_config.get("instrumented", False),
+                    overflow_policy=queue_proxy_wrapper.OverflowPolicy[
+                        queue_config.get("overflow_policy", "BLOCK")
+                    ],
+                )
+            # Catching all exceptions for library call
+            # pylint: disable-next=broad-exception-caught
+            except Exception as e:
+                local_logger.error(f"Failed to create queue {queue_name}: {e}", True)
+                return False, None
+
+        # Create the workers, in order from the start of the pipeline
+        managers: "dict[str, worker_manager.WorkerManager]" = {}
+        for stage_name in stage_order:
+            result, manager = cls.__create_stage(
+                stage_name, stage_configs[stage_name], queues, controller, local_logger, host
+            )
+            if not result:
+                return False, None
+
+            managers[stage_name] = manager
+
+        return True, Topology(
+            cls.__create_key,
+            stage_configs,
+            stage_order,
+            queues,
+            managers,
+            controller,
+            local_logger,
+        )
+
+    @staticmethod
+    def __sort_stages(
+        stage_configs: "dict[str, dict]", local_logger: logger.Logger
+    ) -> "tuple[bool, list[str]]":
+        """
+        Orders the stages so that every stage comes after the stages it receives from.
+
+        Returns whether the stages have no cycle and the stages in order.
+        """
+        consumers: "dict[str, list[str]]" = {}
+        for stage_name, stage_config in stage_configs.items():
+            for queue_name in stage_config.get("inputs", []):
+                consumers.setdefault(queue_name, []).append(stage_name)
+
+        # Number of stages each stage receives from that are not ordered yet
+        incoming_counts = {stage_name: 0 for stage_name in stage_configs}
+        for stage_config in stage_configs.values():
+            for queue_name in stage_config.get("outputs", []):
+                for consumer in consumers.get(queue_name, []):
+                    incoming_counts[consumer] += 1
+
+        # Kahn's algorithm, keeping the configured order among stages that are ready together
+        stage_order = []
+        ready = [stage_name for stage_name, count in incoming_counts.items() if count == 0]
+        while len(ready) > 0:
+            stage_name = ready.pop(0)
+            stage_order.append(stage_name)
+            for queue_name in stage_configs[stage_name].get("outputs", []):
+                for consumer in consumers.get(queue_name, []):
+                    incoming_counts[consumer] -= 1
+                    if incoming_counts[consumer] == 0:
+                        ready.append(consumer)
+
+        if len(stage_order) < len(stage_configs):
+            cycle = [stage_name for stage_name in stage_configs if stage_name not in stage_order]
+            local_logger.error(f"Stages form a cycle: {cycle}", True)
+            return False, []
+
+        return True, stage_order
+
+    @staticmethod
+    def __create_stage(
+        stage_name: str,
+        stage_config: dict,
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        controller: worker_controller.WorkerController,
+        local_logger: logger.Logger,
+        host: "worker_host.WorkerHost | None",
+    ) -> "tuple[bool, worker_manager.WorkerManager | None]":
+        """
+        Creates the worker manager of a stage.
+        """
+        result, target = _load_target(stage_config["target"])
+        if not result:
+            local_logger.error(
+                f"Stage {stage_name} target {stage_config['target']} not found", True
+            )
+            return False, None
+
+        try:
+            cpu_affinity = stage_config.get("cpu_affinity")
+            policy_config = dict(stage_config.get("restart_policy", {}))
+            if "escalation" in policy_config:
+                policy_config["escalation"] = restart_policy.Escalation[policy_config["escalation"]]
+
+            policy = restart_policy.RestartPolicy(**policy_config)
+            execution_kind = worker_host.ExecutionKind[
+                stage_config.get("execution_kind", "PROCESS")
+            ]
+        except (KeyError, TypeError) as e:
+            local_logger.error(f"Stage {stage_name} has an invalid setting: {e}", True)
+            return False, None
+
+        result, properties = worker_manager.WorkerProperties.create(
+            stage_config["count"],
+            target,  # type: ignore
+            tuple(stage_config.get("args", [])),
+            [queues[queue_name] for queue_name in stage_config.get("inputs", [])],
+            [queues[queue_name] for queue_name in stage_config.get("outputs", [])],
+            controller,
+            local_logger,
+            execution_kind,
+            None if cpu_affinity is None else set(cpu_affinity),
+            stage_config.get("niceness"),
+        )
+        if not result:
+            local_logger.error(f"Failed to create properties of stage {stage_name}", True)
+            return False, None
+
+        # Get Pylance to stop complaining
+        assert properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(
+            properties, local_logger, policy, host
+        )
+        if not result:
+            local_logger.error(f"Failed to create manager of stage {stage_name}", True)
+            return False, None
+
+        return True, manager
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        stage_configs: "dict[str, dict]",
+        stage_order: "list[str]",
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        managers: "dict[str, worker_manager.WorkerManager]",
+        controller: worker_controller.WorkerController,
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is Topology.__create_key, "Use create() method"
+
+        self.__stage_configs = stage_configs
+        self.__stage_order = stage_order
+        self.__queues = queues
+        self.__managers = managers
+        self.__controller = controller
+        self.__local_logger = local_logger
+
+    def get_queue(self, name: str) -> "queue_proxy_wrapper.QueueProxyWrapper | None":
+        """
+        Returns the queue, None if there is no queue of the name.
+        """
+        return self.__queues.get(name)
+
+    def get_manager(self, name: str) -> "worker_manager.WorkerManager | None":
+        """
+        Returns the worker manager of the stage, None if there is no stage of the name.
+        """
+        return self.__managers.get(name)
+
+    def get_managers(self) -> "list[worker_manager.WorkerManager]":
+        """
+        Returns the worker managers of all stages, from the start of the pipeline to the end.
+        """
+        return [self.__managers[stage_name] for stage_name in self.__stage_order]
+
+    def get_stage_order(self) -> "list[str]":
+        """
+        Returns the stage names, every stage after the stages it receives from.
+        """
+        return list(self.__stage_order)
+
+    def get_shutdown_order(self) -> "list[str]":
+        """
+        Queue names from the end of the pipeline to the start.
+        Queues main puts into come last.
+
+        Returns the queue names.
+        """
+
+        # Position of the last stage putting into the queue
+        def position(queue_name: str) -> int:
+            return max(
+                (
+                    self.__stage_order.index(stage_name)
+                    for stage_name, stage_config in self.__stage_configs.items()
+                    if queue_name in stage_config.get("outputs", [])
+                ),
+                default=-1,
+            )
+
+        return sorted(self.__queues, key=position, reverse=True)
+
+    def start(self) -> None:
+        """
+        Starts the workers of all stages.
+        """
+        for manager in self.get_managers():
+            manager.start_workers()
+
+    def shutdown(self, timeout: float = 5.0) -> worker_shutdown.ShutdownReport:
+        """
+        Requests the workers to exit, shuts down the queues in the shutdown order and joins the
+        workers within the timeout. Stop any supervisor first.
+        The queues are then closed, releasing their shared memory, and can no longer be used.
+
+        timeout: Seconds for the workers to exit before being terminated.
+
+        Returns how the workers exited.
+        """
+        self.__controller.request_exit()
+
+        for queue_name in self.get_shutdown_order():
+            if not self.__queues[queue_name].shutdown():
+                self.__local_logger.warning(
+                    f"Failed to deliver all sentinels of queue {queue_name}", True
+                )
+
+        report = worker_shutdown.join_all(self.get_managers(), self.__local_logger, timeout)
+
+        for queue in self.__queues.values():
+            queue.close()
+
+        return report
+
+    def get_bottleneck_report(self) -> str:
+        """
+        Theoretical throughput of each stage from its worker count and worker rate,
+        assuming every item passes through every stage. The pipeline runs no faster than its
+        slowest stage.
+
+        Returns the stage throughputs and the bottleneck.
+        """
+        throughputs = {}
+        for stage_name in self.__stage_order:
+            worker_rate = self.__stage_configs[stage_name].get("worker_rate")
+            if worker_rate is None:
+                continue
+
+            throughputs[stage_name] = self.__managers[stage_name].get_worker_count() * worker_rate
+
+        if len(throughputs) == 0:
+            return "No stage has a worker rate"
+
+        bottleneck = min(throughputs, key=lambda stage_name: throughputs[stage_name])
+        unknown = [stage_name for stage_name in self.__stage_order if stage_name not in throughputs]
+        return (
+            f"bottleneck: {bottleneck} at {throughputs[bottleneck]:.1f}/s, stages: "
+            + ", ".join(
+                f"{stage_name} {throughput:.1f}/s" for stage_name, throughput in throughputs.items()
+            )
+            + (f", unknown: {unknown}" if len(unknown) > 0 else "")
+        )
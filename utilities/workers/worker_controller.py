@@ -2,66 +2,66 @@
 For controlling workers.
 """
 
+import ctypes
 import multiprocessing as mp
-import time
 
 
 class WorkerController:
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
-    """
 
-    __QUEUE_DELAY = 0.1  # seconds
+    Requests are flags in shared memory, so the checks done every loop iteration
+    are plain memory reads. Only paused workers wait, on an event that resume sets.
+    """
 
     def __init__(self) -> None:
         """
-        Constructor creates internal queue and semaphore.
+        Constructor creates the shared flags and resume event.
         """
-        self.__pause = mp.BoundedSemaphore(1)
-        self.__is_paused = False
-        self.__exit_queue = mp.Queue(1)
+        # Only main writes the flags, so they do not need a lock
+        self.__is_pause_requested = mp.RawValue(ctypes.c_bool, False)
+        self.__is_exit_requested = mp.RawValue(ctypes.c_bool, False)
+
+        # Set while not paused
+        self.__resume = mp.Event()
+        self.__resume.set()
 
     def request_pause(self) -> None:
         """
         Requests worker processes to pause.
         """
-        if not self.__is_paused:
-            self.__pause.acquire()
-            self.__is_paused = True
+        # Clear before raising the flag so that a worker seeing the flag always waits
+        self.__resume.clear()
+        self.__is_pause_requested.value = True
 
     def request_resume(self) -> None:
         """
         Requests worker processes to resume.
         """
-        if self.__is_paused:
-            self.__pause.release()
-            self.__is_paused = False
+        self.__is_pause_requested.value = False
+        self.__resume.set()
 
     def check_pause(self) -> None:
         """
         Blocks worker if main has requested it to pause, otherwise continues.
         """
-        self.__pause.acquire()
-        self.__pause.release()
+        if self.__is_pause_requested.value:
+            self.__resume.wait()
 
     def request_exit(self) -> None:
         """
         Requests worker processes to exit.
         Does nothing if already requested.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if self.__exit_queue.empty():
-            self.__exit_queue.put(None)
+        self.__is_exit_requested.value = True
 
     def clear_exit(self) -> None:
         """
         Clears the exit request condition.
         Does nothing if already cleared.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if not self.__exit_queue.empty():
-            _ = self.__exit_queue.get()
+        self.__is_exit_requested.value = False
 
     def is_exit_requested(self) -> bool:
         """
@@ -69,4 +69,4 @@ class WorkerController:
         There is a race condition, but it's fine because the worker process
         will do at most 1 additional loop.
         """
-        return not self.__exit_queue.empty()
+        return self.__is_exit_requested.value
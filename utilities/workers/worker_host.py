@@ -0,0 +1,194 @@
+"""
+For running lightweight workers together in a single process.
+"""
+
+import asyncio
+import concurrent.futures
+import ctypes
+import enum
+import functools
+import inspect
+import multiprocessing as mp
+import multiprocessing.sharedctypes
+import os
+import threading
+import time
+
+from modules.common.modules.logger import logger
+
+
+class ExecutionKind(enum.Enum):
+    """
+    How a worker runs.
+    """
+
+    # Own process
+    PROCESS = 0
+    # Thread in a worker host
+    THREAD = 1
+    # Task on the event loop of a worker host
+    ASYNCIO_TASK = 2
+
+
+def _run_thread(
+    target: "(...) -> object",  # type: ignore
+    args: "tuple",
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Runs a worker in its thread and logs it if it raises.
+    """
+    try:
+        target(*args)
+    # Catching all exceptions so that the host keeps running the other workers
+    # pylint: disable-next=broad-exception-caught
+    except Exception as e:
+        local_logger.error(f"{target.__name__} raised: {e}", True)
+
+
+async def _run_tasks(
+    workers: "list[tuple[(...) -> object, tuple]]",  # type: ignore
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Runs coroutine function workers as tasks and the others in their own executor thread,
+    until all of them return.
+    """
+    loop = asyncio.get_running_loop()
+    blocking_count = sum(1 for target, _ in workers if not inspect.iscoroutinefunction(target))
+
+    # The default executor has fewer threads than there may be blocking workers
+    with concurrent.futures.ThreadPoolExecutor(max(blocking_count, 1)) as executor:
+        awaitables = []
+        for target, args in workers:
+            if inspect.iscoroutinefunction(target):
+                awaitables.append(target(*args))
+            else:
+                awaitables.append(loop.run_in_executor(executor, functools.partial(target, *args)))
+
+        results = await asyncio.gather(*awaitables, return_exceptions=True)
+
+    for (target, _), result in zip(workers, results):
+        if isinstance(result, Exception):
+            local_logger.error(f"{target.__name__} raised: {result}", True)
+
+
+def _run_host(
+    started_time: multiprocessing.sharedctypes.Synchronized,
+    workers: "list[tuple[ExecutionKind, (...) -> object, tuple]]",  # type: ignore
+) -> None:
+    """
+    Host process, runs thread workers in threads and asyncio task workers on the event loop
+    of the main thread.
+    """
+    started_time.value = time.monotonic()
+
+    result, local_logger = logger.Logger.create(f"worker_host_{os.getpid()}", True)
+    if not result:
+        print("ERROR: Worker host failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    threads = []
+    for kind, target, args in workers:
+        if kind != ExecutionKind.THREAD:
+            continue
+
+        thread = threading.Thread(
+            target=_run_thread, args=(target, args, local_logger), name=target.__name__
+        )
+        thread.start()
+        threads.append(thread)
+
+    tasks = [(target, args) for kind, target, args in workers if kind == ExecutionKind.ASYNCIO_TASK]
+    if len(tasks) > 0:
+        asyncio.run(_run_tasks(tasks, local_logger))
+
+    for thread in threads:
+        thread.join()
+
+
+class WorkerHost:
+    """
+    Single process running the workers added to it as threads or asyncio tasks, so that workers
+    that mostly wait on I/O do not each need their own interpreter, logger and memory.
+
+    Worker functions keep their signatures and the worker controller works as it does for
+    processes. Asyncio task workers that are coroutine functions run on the event loop of the host,
+    others run in an executor thread of the loop.
+
+    A worker that raises is logged and not restarted. The host exits once all of its workers have.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor creates an empty host, worker managers add their workers to it.
+        """
+        self.__workers: "list[tuple[ExecutionKind, (...) -> object, tuple]]" = []  # type: ignore
+        self.__started_time = mp.RawValue(ctypes.c_double, 0.0)
+        self.__start_call_time = 0.0
+        self.__process: "mp.Process | None" = None
+
+    def add_workers(
+        self,
+        kind: ExecutionKind,
+        target: "(...) -> object",  # type: ignore
+        args: "tuple",
+        count: int,
+    ) -> bool:
+        """
+        Adds identical workers, called when creating a worker manager.
+
+        kind: Thread or asyncio task.
+        target: Function.
+        args: Target function arguments.
+        count: Number of workers.
+
+        Returns whether the workers were added, False if the host has started.
+        """
+        if self.__process is not None or kind == ExecutionKind.PROCESS:
+            return False
+
+        for _ in range(count):
+            self.__workers.append((kind, target, args))
+
+        return True
+
+    def start(self) -> None:
+        """
+        Starts the host process, does nothing if already started.
+        """
+        if self.__process is not None:
+            return
+
+        self.__process = mp.Process(
+            target=_run_host, args=(self.__started_time, self.__workers), name="WorkerHost"
+        )
+        self.__start_call_time = time.monotonic()
+        self.__process.start()
+
+    def join(self) -> None:
+        """
+        Waits for the host process to exit, does nothing if not started.
+        """
+        if self.__process is None:
+            return
+
+        self.__process.join()
+
+    def get_process(self) -> "mp.Process | None":
+        """
+        Returns the host process, None if not started.
+        """
+        return self.__process
+
+    def get_spawn_latency(self) -> float:
+        """
+        Returns the seconds from start() until the host was running, 0 if it is not yet running.
+        """
+        if self.__started_time.value == 0.0:
+            return 0.0
+
+        return self.__started_time.value - self.__start_call_time
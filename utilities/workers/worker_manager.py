@@ -2,20 +2,136 @@
 For managing workers.
 """
 
+import collections
+import ctypes
 import multiprocessing as mp
+import multiprocessing.forkserver
+import multiprocessing.sharedctypes
+import os
+import sys
+import threading
+import time
 
 from modules.common.modules.logger import logger
 from utilities.workers import worker_controller
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import restart_policy
+from utilities.workers import worker_host
+from utilities.workers import worker_statistics
 
 
-class WorkerProperties:
+# Imported once by the forkserver so that workers start with them already loaded
+DEFAULT_PRELOAD_MODULES = [
+    "pymavlink.mavutil",
+    "modules.common.modules.logger.logger",
+    "modules.command.command",
+    "modules.heartbeat.heartbeat_receiver",
+    "modules.heartbeat.heartbeat_sender",
+    "modules.telemetry.telemetry",
+    "utilities.workers.queue_proxy_wrapper",
+    "utilities.workers.worker_controller",
+]
+
+
+def enable_warm_start(preload_modules: "list[str] | None" = None) -> bool:
+    """
+    Starts workers from a forkserver that has already imported the modules and the main module
+    along with everything it imports, so a worker starts and restarts without importing them again.
+    Call at the start of main, before creating any queues or controllers.
+
+    preload_modules: Modules to import in the forkserver, DEFAULT_PRELOAD_MODULES if None.
+        Modules that fail to import are skipped.
+
+    Returns whether warm start is enabled, False if the platform has no forkserver.
+    """
+    if "forkserver" not in mp.get_all_start_methods():
+        return False
+
+    if preload_modules is None:
+        preload_modules = DEFAULT_PRELOAD_MODULES
+
+    # Workers import the main module by name, or by path if it was run as a script
+    main_spec = getattr(sys.modules["__main__"], "__spec__", None)
+    main_module_name = "__main__" if main_spec is None else main_spec.name
+
+    mp.set_start_method("forkserver", force=True)
+    mp.set_forkserver_preload(preload_modules + [main_module_name])
+
+    # Pay for the imports now rather than on the first worker
+    multiprocessing.forkserver.ensure_running()
+    return True
+
+
+def _apply_scheduling(
+    cpu_affinity: "set[int] | None", niceness: "int | None", target_name: str
+) -> None:
+    """
+    Sets the CPU affinity and niceness of this worker process.
+    Settings that are not permitted are logged and left inherited.
+    """
+    failures = []
+    if cpu_affinity is not None:
+        try:
+            os.sched_setaffinity(0, cpu_affinity)  # type: ignore
+        except OSError as e:
+            failures.append(
+                f"Could not set CPU affinity of {target_name} to {sorted(cpu_affinity)}: {e}"
+            )
+
+    if niceness is not None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, niceness)  # type: ignore
+        except OSError as e:
+            failures.append(f"Could not set niceness of {target_name} to {niceness}: {e}")
+
+    if len(failures) == 0:
+        return
+
+    # The worker has no logger of its own yet
+    result, local_logger = logger.Logger.create(f"{target_name}_{os.getpid()}", True)
+    if not result:
+        print(f"ERROR: {target_name} failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    for failure in failures:
+        local_logger.warning(failure, True)
+
+
+def _run_worker(
+    started_time: multiprocessing.sharedctypes.Synchronized,
+    statistics: worker_statistics.WorkerStatistics,
+    scheduling: "tuple[set[int] | None, int | None]",
+    target: "(...) -> object",  # type: ignore
+    *args: object,
+) -> None:
+    """
+    Records when the worker started running, applies the CPU affinity and niceness and then runs
+    the target, publishing its statistics before and after.
+    """
+    started_time.value = time.monotonic()
+    # Before the target so that none of its work runs with the inherited settings
+    _apply_scheduling(*scheduling, target.__name__)
+    worker_statistics.set_current_statistics(statistics)
+    statistics.publish()
+    try:
+        target(*args)
+    finally:
+        statistics.publish()
+
+
+class WorkerProperties:  # pylint: disable=too-many-instance-attributes
     """
     Worker Properties.
     """
 
     __create_key = object()
 
+    __MIN_NICENESS = -20
+    __MAX_NICENESS = 19
+
     @classmethod
     def create(
         cls,
@@ -26,6 +142,9 @@ class WorkerProperties:
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
         local_logger: logger.Logger,
+        execution_kind: worker_host.ExecutionKind = worker_host.ExecutionKind.PROCESS,
+        cpu_affinity: "set[int] | None" = None,
+        niceness: "int | None" = None,
     ) -> "tuple[bool, WorkerProperties | None]":
         """
         Creates worker properties.
@@ -37,6 +156,13 @@ class WorkerProperties:
         output_queues: Output queues.
         controller: Worker controller.
         local_logger: Existing logger from process.
+        execution_kind: Whether each worker is a process, or a thread or asyncio task in a
+            worker host shared with other lightweight workers.
+        cpu_affinity: CPUs each worker process may run on, inherited if None.
+            Only for process workers.
+        niceness: Scheduling niceness of each worker process from -20 (highest priority)
+            to 19 (lowest), inherited if None. Lowering it usually requires privileges.
+            Only for process workers.
 
         Returns the WorkerProperties object.
         """
@@ -47,6 +173,46 @@ class WorkerProperties:
             )
             return False, None
 
+        if cpu_affinity is not None and (
+            len(cpu_affinity) == 0 or any(cpu < 0 for cpu in cpu_affinity)
+        ):
+            local_logger.error(f"CPU affinity {cpu_affinity} is not a set of CPUs", True)
+            return False, None
+
+        if niceness is not None and not cls.__MIN_NICENESS <= niceness <= cls.__MAX_NICENESS:
+            local_logger.error(
+                f"Niceness {niceness} is outside of "
+                f"{cls.__MIN_NICENESS} to {cls.__MAX_NICENESS}",
+                True,
+            )
+            return False, None
+
+        if execution_kind != worker_host.ExecutionKind.PROCESS and (
+            cpu_affinity is not None or niceness is not None
+        ):
+            local_logger.error(
+                f"CPU affinity and niceness only apply to process workers, "
+                f"not {execution_kind.name} workers",
+                True,
+            )
+            return False, None
+
+        # Reported once here rather than by every worker
+        if cpu_affinity is not None and not hasattr(os, "sched_setaffinity"):
+            local_logger.warning("CPU affinity is not supported on this platform, not set", True)
+            cpu_affinity = None
+
+        if niceness is not None and not hasattr(os, "setpriority"):
+            local_logger.warning("Niceness is not supported on this platform, not set", True)
+            niceness = None
+
+        # Queues deliver one sentinel per consumer on shutdown
+        for queue in input_queues:
+            queue.register_consumers(count)
+
+        for queue in output_queues:
+            queue.register_producers(count)
+
         return True, WorkerProperties(
             cls.__create_key,
             count,
@@ -55,6 +221,9 @@ class WorkerProperties:
             input_queues,
             output_queues,
             controller,
+            execution_kind,
+            cpu_affinity,
+            niceness,
         )
 
     def __init__(
@@ -66,6 +235,9 @@ class WorkerProperties:
         input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
+        execution_kind: worker_host.ExecutionKind,
+        cpu_affinity: "set[int] | None",
+        niceness: "int | None",
     ) -> None:
         """
         Private constructor, use create() method.
@@ -78,6 +250,9 @@ class WorkerProperties:
         self.__input_queues = input_queues
         self.__output_queues = output_queues
         self.__controller = controller
+        self.__execution_kind = execution_kind
+        self.__cpu_affinity = cpu_affinity
+        self.__niceness = niceness
 
     def get_worker_arguments(self) -> "tuple":
         """
@@ -110,6 +285,36 @@ class WorkerProperties:
         """
         return self.__input_queues
 
+    def get_output_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the output queues.
+        """
+        return self.__output_queues
+
+    def get_execution_kind(self) -> worker_host.ExecutionKind:
+        """
+        Returns how the workers run.
+        """
+        return self.__execution_kind
+
+    def get_cpu_affinity(self) -> "set[int] | None":
+        """
+        Returns the CPUs each worker process may run on, None if inherited.
+        """
+        return self.__cpu_affinity
+
+    def get_niceness(self) -> "int | None":
+        """
+        Returns the scheduling niceness of each worker process, None if inherited.
+        """
+        return self.__niceness
+
+    def get_controller(self) -> worker_controller.WorkerController:
+        """
+        Returns the worker controller.
+        """
+        return self.__controller
+
     def get_target_name(self) -> str:
         """
         Returns the name of the target.
@@ -117,7 +322,7 @@ class WorkerProperties:
         return self.__target.__name__
 
 
-class WorkerManager:
+class WorkerManager:  # pylint: disable=too-many-instance-attributes
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
@@ -130,20 +335,54 @@ class WorkerManager:
         cls,
         worker_properties: WorkerProperties,
         local_logger: logger.Logger,
+        policy: "restart_policy.RestartPolicy | None" = None,
+        host: "worker_host.WorkerHost | None" = None,
     ) -> "tuple[bool, WorkerManager | None]":
         """
         Create identical workers and append them to a workers list.
 
         worker_properties: Worker properties.
         local_logger: Existing logger from process.
+        policy: When dead workers are restarted, the default policy if None.
+        host: Worker host to run thread and asyncio task workers in, not started yet.
 
         Returns whether the workers were able to be created and the Worker Manager.
         """
+        # Automatic backends are chosen now that the workers of both ends are registered
+        for queue in worker_properties.get_input_queues() + worker_properties.get_output_queues():
+            queue.resolve_backend()
+
         workers = []
-        for _ in range(0, worker_properties.get_worker_count()):
+        started_times = {}
+        statistics = {}
+        execution_kind = worker_properties.get_execution_kind()
+        if execution_kind != worker_host.ExecutionKind.PROCESS:
+            if host is None:
+                local_logger.error(f"{execution_kind.name} workers require a worker host", True)
+                return False, None
+
+            if not host.add_workers(
+                execution_kind,
+                worker_properties.get_worker_target(),
+                worker_properties.get_worker_arguments(),
+                worker_properties.get_worker_count(),
+            ):
+                local_logger.error("Failed to add workers to worker host", True)
+                return False, None
+        else:
+            host = None
+
+        # Lightweight workers have no process of their own
+        process_count = worker_properties.get_worker_count() if host is None else 0
+        for _ in range(0, process_count):
+            started_time = mp.RawValue(ctypes.c_double, 0.0)
+            worker_statistics_instance = worker_statistics.WorkerStatistics()
             result, worker = WorkerManager.__create_single_worker(
                 worker_properties.get_worker_target(),
                 worker_properties.get_worker_arguments(),
+                started_time,
+                worker_statistics_instance,
+                (worker_properties.get_cpu_affinity(), worker_properties.get_niceness()),
                 local_logger,
             )
             if not result:
@@ -151,20 +390,30 @@ class WorkerManager:
                 return False, None
 
             workers.append(worker)
+            started_times[worker] = started_time
+            statistics[worker] = worker_statistics_instance
 
         return True, WorkerManager(
             cls.__create_key,
             workers,
+            started_times,
+            statistics,
             worker_properties,
             local_logger,
+            restart_policy.RestartPolicy() if policy is None else policy,
+            host,
         )
 
     def __init__(
         self,
         class_private_create_key: object,
         workers: "list[mp.Process]",
+        started_times: "dict[mp.Process, multiprocessing.sharedctypes.Synchronized]",
+        statistics: "dict[mp.Process, worker_statistics.WorkerStatistics]",
         worker_properties: WorkerProperties,
         local_logger: logger.Logger,
+        policy: restart_policy.RestartPolicy,
+        host: "worker_host.WorkerHost | None",
     ) -> None:
         """
         Private constructor, use create() method.
@@ -172,22 +421,55 @@ class WorkerManager:
         assert class_private_create_key is WorkerManager.__create_key, "Use create() method"
 
         self.__workers = workers
+        self.__host = host
         self.__worker_properties = worker_properties
         self.__local_logger = local_logger
 
+        # Workers may be restarted by a supervisor thread
+        self.__lock = threading.RLock()
+
+        # Set by each worker when it starts running
+        self.__started_times = started_times
+        # Published by each worker
+        self.__statistics = statistics
+        # Seconds from start() until the worker was running, for every worker started
+        self.__spawn_latencies: "list[float]" = []
+        self.__start_call_times: "dict[mp.Process, float]" = {}
+
+        # Workers asked to exit by scaling down that have not exited yet
+        self.__retiring_count = 0
+
+        self.__policy = policy
+        self.__is_given_up = False
+        # Time each dead worker may be restarted at, decided when its death is first noticed
+        self.__restart_times: "dict[mp.Process, float]" = {}
+        self.__failed_start_count = 0
+        self.__restart_count = 0
+        self.__window_restart_times: "collections.deque[float]" = collections.deque()
+        # Time each dead worker was noticed dead
+        self.__death_times: "dict[mp.Process, float]" = {}
+        # Time each replacement's predecessor was noticed dead, until the replacement runs
+        self.__recovering: "dict[mp.Process, float]" = {}
+        self.__recovery_times: "list[float]" = []
+
     @staticmethod
-    def __create_single_worker(target: "(...) -> object", args: "tuple", local_logger: logger.Logger) -> "tuple[bool, mp.Process | None]":  # type: ignore
+    def __create_single_worker(target: "(...) -> object", args: "tuple", started_time: multiprocessing.sharedctypes.Synchronized, statistics: worker_statistics.WorkerStatistics, scheduling: "tuple[set[int] | None, int | None]", local_logger: logger.Logger) -> "tuple[bool, mp.Process | None]":  # type: ignore
         """
         Creates a single worker.
 
         target: Function.
         args: Target function arguments.
+        started_time: Set by the worker when it starts running.
+        statistics: Published by the worker.
+        scheduling: CPU affinity and niceness the worker applies to itself, None to inherit.
         local_logger: Existing logger from process.
 
         Returns whether a worker was created and the worker.
         """
         try:
-            worker = mp.Process(target=target, args=args)
+            worker = mp.Process(
+                target=_run_worker, args=(started_time, statistics, scheduling, target) + args
+            )
         # Catching all exceptions for library call
         # pylint: disable-next=broad-exception-caught
         except Exception as e:
@@ -196,52 +478,415 @@ class WorkerManager:
 
         return True, worker
 
+    def __start_worker(self, worker: mp.Process) -> None:
+        """
+        Starts the worker and notes the time for the spawn latency.
+        """
+        self.__start_call_times[worker] = time.monotonic()
+        worker.start()
+
     def start_workers(self) -> None:
         """
-        Start workers.
+        Start workers, in the worker host starts the host if it has not started.
         """
+        if self.__host is not None:
+            self.__host.start()
+
         for worker in self.__workers:
-            worker.start()
+            self.__start_worker(worker)
+
+    def get_spawn_latencies(self) -> "list[float]":
+        """
+        Time from starting each worker until it was running, including restarts.
+        Workers that have not started running yet are not included.
+
+        Returns the latencies in seconds, oldest first.
+        """
+        with self.__lock:
+            for worker, start_call_time in list(self.__start_call_times.items()):
+                started_time = self.__started_times[worker].value
+                if started_time == 0.0:
+                    continue
+
+                self.__spawn_latencies.append(started_time - start_call_time)
+                del self.__start_call_times[worker]
+
+            return list(self.__spawn_latencies)
+
+    def get_spawn_latency_report(self) -> str:
+        """
+        Returns the count, mean and maximum of the spawn latencies of this worker type.
+        """
+        if self.__host is not None:
+            return (
+                f"{self.__worker_properties.get_target_name()}: in worker host, "
+                f"started in {self.__host.get_spawn_latency() * 1000:.1f}ms"
+            )
+
+        latencies = self.get_spawn_latencies()
+        if len(latencies) == 0:
+            return f"{self.__worker_properties.get_target_name()}: no workers started"
+
+        return (
+            f"{self.__worker_properties.get_target_name()}: {len(latencies)} started, "
+            f"mean {sum(latencies) / len(latencies) * 1000:.1f}ms, "
+            f"max {max(latencies) * 1000:.1f}ms"
+        )
 
     def join_workers(self) -> None:
         """
-        Join workers.
+        Join workers, in the worker host joins the host.
         """
+        if self.__host is not None:
+            self.__host.join()
+
         for worker in self.__workers:
             worker.join()
 
-    def check_and_restart_dead_workers(self) -> bool:
+    def get_worker_count(self) -> int:
         """
-        Check and restart dead workers.
+        Returns the number of workers, excluding those retiring.
+        """
+        if self.__host is not None:
+            return self.__worker_properties.get_worker_count()
+
+        with self.__lock:
+            return len(self.__workers) - self.__retiring_count
 
-        Returns whether the dead workers were able to be restarted.
+    def __register_workers(self, count: int) -> None:
         """
-        new_workers = []
-        for worker in self.__workers:
-            if worker.is_alive():
-                new_workers.append(worker)
+        Adds workers to the queues so that shutdown delivers the right number of sentinels,
+        negative removes them.
+        """
+        for queue in self.__worker_properties.get_input_queues():
+            queue.register_consumers(count)
+
+        for queue in self.__worker_properties.get_output_queues():
+            queue.register_producers(count)
+
+    def scale_to(self, count: int, timeout: float | None = 1.0) -> bool:
+        """
+        Starts or retires workers until there are count of them.
+
+        Workers are retired gracefully by a sentinel in the first input queue behind the items
+        already queued, so a worker exits once it is done with the items it has received and
+        no item is lost. Which worker exits is not known in advance; once it has exited,
+        remove_if_retired() removes it instead of it being restarted.
+
+        count: Number of workers, must be greater than 0 .
+        timeout: Time waiting in seconds for space for each sentinel, None is forever.
+
+        Returns whether the workers were started or asked to exit.
+        """
+        if count <= 0:
+            self.__local_logger.error(
+                "Worker count requested is less than or equal to zero, not scaling", True
+            )
+            return False
+
+        if self.__host is not None:
+            self.__local_logger.error("Workers in a worker host cannot be scaled", True)
+            return False
+
+        with self.__lock:
+            current_count = len(self.__workers) - self.__retiring_count
+            if count == current_count:
+                return True
+
+            target_name = self.__worker_properties.get_target_name()
+            self.__local_logger.info(f"Scaling {target_name} from {current_count} to {count}", True)
+
+            input_queues = self.__worker_properties.get_input_queues()
+            while current_count > count:
+                if len(input_queues) == 0:
+                    self.__local_logger.error(f"{target_name} has no input queue to retire", True)
+                    return False
+
+                if not input_queues[0].put_sentinel(timeout):
+                    self.__local_logger.error(f"Failed to retire {target_name}", True)
+                    return False
+
+                self.__register_workers(-1)
+                self.__retiring_count += 1
+                current_count -= 1
+
+            while current_count < count:
+                started_time = mp.RawValue(ctypes.c_double, 0.0)
+                statistics = worker_statistics.WorkerStatistics()
+                result, worker = WorkerManager.__create_single_worker(
+                    self.__worker_properties.get_worker_target(),
+                    self.__worker_properties.get_worker_arguments(),
+                    started_time,
+                    statistics,
+                    (
+                        self.__worker_properties.get_cpu_affinity(),
+                        self.__worker_properties.get_niceness(),
+                    ),
+                    self.__local_logger,
+                )
+                if not result:
+                    self.__local_logger.error(f"Failed to add {target_name}", True)
+                    return False
+
+                self.__register_workers(1)
+                self.__started_times[worker] = started_time
+                self.__statistics[worker] = statistics
+                self.__start_worker(worker)
+                self.__workers.append(worker)
+                current_count += 1
+
+        return True
+
+    def remove_if_retired(self, worker: mp.Process) -> bool:
+        """
+        Removes a worker that exited normally while workers are retiring.
+
+        worker: Dead worker of this manager.
+
+        Returns whether the worker was retired, otherwise it has died and should be restarted.
+        """
+        with self.__lock:
+            if self.__retiring_count == 0 or worker.exitcode != 0 or worker not in self.__workers:
+                return False
+
+            # Collect the spawn latency of the worker before forgetting it
+            self.get_spawn_latencies()
+            self.__start_call_times.pop(worker, None)
+            del self.__started_times[worker]
+            del self.__statistics[worker]
+
+            self.__workers.remove(worker)
+            self.__retiring_count -= 1
+
+        worker.join()
+        return True
+
+    def get_target_name(self) -> str:
+        """
+        Returns the name of the target of the workers.
+        """
+        return self.__worker_properties.get_target_name()
+
+    def is_in_host(self) -> bool:
+        """
+        Returns whether the workers run in a worker host rather than in their own processes.
+        """
+        return self.__host is not None
+
+    def get_processes(self) -> "list[mp.Process]":
+        """
+        Returns the processes running the workers, the worker host's process for workers in a host.
+        """
+        if self.__host is not None:
+            process = self.__host.get_process()
+            return [] if process is None else [process]
+
+        return self.get_workers()
+
+    def get_workers(self) -> "list[mp.Process]":
+        """
+        Returns the current workers.
+        """
+        with self.__lock:
+            return list(self.__workers)
+
+    def get_worker_statistics(
+        self,
+    ) -> "list[tuple[str, worker_statistics.WorkerStatisticsSnapshot]]":
+        """
+        Statistics last published by each current worker, none for workers in a worker host.
+
+        Returns the target and worker name and the statistics of each worker.
+        """
+        with self.__lock:
+            return [
+                (
+                    f"{self.__worker_properties.get_target_name()} {worker.name}",
+                    self.__statistics[worker].snapshot(),
+                )
+                for worker in self.__workers
+            ]
+
+    def is_given_up(self) -> bool:
+        """
+        Returns whether the manager escalated and no longer restarts workers.
+        """
+        with self.__lock:
+            return self.__is_given_up
+
+    def __collect_recovery_times(self) -> None:
+        """
+        Records the time to recover of replacements that have started running, lock must be held.
+        """
+        for worker, death_time in list(self.__recovering.items()):
+            started_time = self.__started_times.get(worker)
+            if started_time is None or started_time.value == 0.0:
                 continue
 
-            # Log dead worker
+            self.__recovery_times.append(started_time.value - death_time)
+            del self.__recovering[worker]
+
+    def get_restart_time(self, worker: mp.Process) -> float:
+        """
+        When the dead worker may be restarted, according to the restart policy.
+        The first call for a worker counts its death towards the backoff.
+
+        worker: Dead worker of this manager.
+
+        Returns the monotonic time in seconds.
+        """
+        with self.__lock:
+            restart_time = self.__restart_times.get(worker)
+            if restart_time is not None:
+                return restart_time
+
+            # The worker may be a replacement that died before its recovery was collected
+            self.__collect_recovery_times()
+
+            death_time = time.monotonic()
+            started_time = self.__started_times[worker].value
+            if started_time == 0.0 or death_time - started_time < self.__policy.stable_time:
+                self.__failed_start_count += 1
+            else:
+                self.__failed_start_count = 0
+
+            restart_time = death_time + self.__policy.get_backoff(self.__failed_start_count)
+            self.__restart_times[worker] = restart_time
+            self.__death_times[worker] = death_time
+            return restart_time
+
+    def __escalate(self, target_and_worker_name: str) -> None:
+        """
+        Stops restarting and escalates according to the restart policy, lock must be held.
+        """
+        self.__is_given_up = True
+        self.__local_logger.error(
+            f"{len(self.__window_restart_times)} restarts within "
+            f"{self.__policy.restart_window}s, not restarting {target_and_worker_name}",
+            True,
+        )
+
+        if self.__policy.escalation == restart_policy.Escalation.STOP_PIPELINE:
+            self.__local_logger.error("Stopping pipeline", True)
+            self.__worker_properties.get_controller().request_exit()
+
+    def restart_worker(self, worker: mp.Process) -> bool:
+        """
+        Replaces a dead worker with a new one and starts it, if the restart policy allows it.
+        Escalates instead once the restarts within the window are used up.
+
+        worker: Dead worker of this manager.
+
+        Returns whether the worker was restarted,
+        False if it is still backing off (see get_restart_time()) or the manager has given up.
+        """
+        with self.__lock:
+            if worker not in self.__workers or self.__is_given_up:
+                return False
+
+            restart_time = self.get_restart_time(worker)
+            now = time.monotonic()
+            if restart_time > now:
+                return False
+
             target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
+
+            while (
+                len(self.__window_restart_times) > 0
+                and now - self.__window_restart_times[0] > self.__policy.restart_window
+            ):
+                self.__window_restart_times.popleft()
+
+            if (
+                self.__policy.max_restarts is not None
+                and len(self.__window_restart_times) >= self.__policy.max_restarts
+            ):
+                self.__escalate(target_and_worker_name)
+                return False
+
+            # Log dead worker
             self.__local_logger.warning(
-                f"Worker died, restarting {target_and_worker_name}",
+                f"Worker died with exit code {worker.exitcode}, restarting {target_and_worker_name}",
                 True,
             )
 
             # Create a new worker
+            started_time = mp.RawValue(ctypes.c_double, 0.0)
+            statistics = worker_statistics.WorkerStatistics()
             result, new_worker = WorkerManager.__create_single_worker(
                 self.__worker_properties.get_worker_target(),
                 self.__worker_properties.get_worker_arguments(),
+                started_time,
+                statistics,
+                (
+                    self.__worker_properties.get_cpu_affinity(),
+                    self.__worker_properties.get_niceness(),
+                ),
                 self.__local_logger,
             )
             if not result:
                 self.__local_logger.error(f"Failed to restart {target_and_worker_name}", True)
                 return False
 
-            # Append the new worker
-            new_workers.append(new_worker)
+            # Collect the spawn latency of the dead worker before forgetting it
+            self.get_spawn_latencies()
+            self.__start_call_times.pop(worker, None)
+            del self.__started_times[worker]
+            del self.__restart_times[worker]
+            del self.__statistics[worker]
+
+            # Start and replace the dead worker
+            self.__started_times[new_worker] = started_time
+            self.__statistics[new_worker] = statistics
+            self.__recovering[new_worker] = self.__death_times.pop(worker)
+            self.__start_worker(new_worker)
+            self.__workers[self.__workers.index(worker)] = new_worker
+
+            self.__restart_count += 1
+            self.__window_restart_times.append(now)
+
+        return True
+
+    def get_restart_statistics(self) -> restart_policy.RestartStatistics:
+        """
+        Returns the restart counts and the time to recover of this worker type.
+        """
+        with self.__lock:
+            self.__collect_recovery_times()
+
+            now = time.monotonic()
+            window_restart_count = sum(
+                1
+                for restart_time in self.__window_restart_times
+                if now - restart_time <= self.__policy.restart_window
+            )
+            recovery_times = self.__recovery_times
+
+            return restart_policy.RestartStatistics(
+                self.__restart_count,
+                self.__failed_start_count,
+                window_restart_count,
+                len(recovery_times),
+                sum(recovery_times) / len(recovery_times) if len(recovery_times) > 0 else 0.0,
+                max(recovery_times, default=0.0),
+                self.__is_given_up,
+            )
+
+    def check_and_restart_dead_workers(self) -> bool:
+        """
+        Check and restart dead workers, those still backing off are restarted on a later call.
 
-        self.__workers = new_workers
+        Returns whether the dead workers were able to be restarted or are waiting to be,
+        False if a restart failed or the manager has given up.
+        """
+        for worker in self.get_workers():
+            if worker.is_alive() or self.remove_if_retired(worker):
+                continue
+
+            if self.get_restart_time(worker) > time.monotonic():
+                continue
+
+            if not self.restart_worker(worker):
+                return False
 
         return True
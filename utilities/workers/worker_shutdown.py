@@ -0,0 +1,135 @@
+"""
+For stopping workers within a bounded time.
+"""
+
+import multiprocessing as mp
+import multiprocessing.connection
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_manager
+
+
+class ShutdownReport:
+    """
+    How the workers of a shutdown exited.
+
+    joined: Names of the workers that exited on their own.
+    terminated: Names of the workers that exited once terminated.
+    killed: Names of the workers that had to be killed.
+    unexited: Names of the workers that still had not exited after being killed.
+    elapsed_time: Seconds the shutdown took.
+    """
+
+    def __init__(
+        self,
+        joined: "list[str]",
+        terminated: "list[str]",
+        killed: "list[str]",
+        unexited: "list[str]",
+        elapsed_time: float,
+    ) -> None:
+        self.joined = joined
+        self.terminated = terminated
+        self.killed = killed
+        self.unexited = unexited
+        self.elapsed_time = elapsed_time
+
+    def is_forced(self) -> bool:
+        """
+        Returns whether any worker did not exit on its own.
+        """
+        return len(self.terminated) + len(self.killed) + len(self.unexited) > 0
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        return (
+            f"shutdown in {self.elapsed_time * 1000:.1f}ms, joined: {len(self.joined)}, "
+            f"terminated: {self.terminated}, killed: {self.killed}, unexited: {self.unexited}"
+        )
+
+
+def _wait_until(processes: "list[mp.Process]", deadline: float) -> "list[mp.Process]":
+    """
+    Waits for all the processes to exit or the deadline to pass, whichever comes first.
+
+    Returns the processes that have not exited.
+    """
+    remaining = {process.sentinel: process for process in processes}
+    while len(remaining) > 0:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0.0:
+            break
+
+        for sentinel in multiprocessing.connection.wait(list(remaining), timeout):
+            del remaining[sentinel]  # type: ignore
+
+    return list(remaining.values())
+
+
+def join_all(
+    managers: "list[worker_manager.WorkerManager]",
+    local_logger: logger.Logger,
+    timeout: float = 5.0,
+    terminate_timeout: float = 1.0,
+    kill_timeout: float = 1.0,
+) -> ShutdownReport:
+    """
+    Joins the workers of all the managers in parallel, forcing those that do not exit in time.
+    Workers still running at the deadline are terminated, and those still running after that are
+    killed, so the shutdown takes at most the sum of the timeouts.
+    Request the workers to exit and stop any supervisor first.
+
+    managers: Managers of the workers.
+    local_logger: Existing logger from process.
+    timeout: Seconds for all the workers to exit on their own.
+    terminate_timeout: Seconds for the terminated workers to exit.
+    kill_timeout: Seconds for the killed workers to exit.
+
+    Returns which workers needed force and how long the shutdown took.
+    """
+    start_time = time.monotonic()
+
+    # Managers of workers in the same worker host share its process
+    names: "dict[mp.Process, str]" = {}
+    for manager in managers:
+        for process in manager.get_processes():
+            # Not started
+            if process.pid is None:
+                continue
+
+            names.setdefault(process, f"{manager.get_target_name()} {process.name}")
+
+    remaining = _wait_until(list(names), start_time + timeout)
+
+    for process in remaining:
+        local_logger.warning(f"{names[process]} did not exit in time, terminating", True)
+        process.terminate()
+
+    terminated = remaining
+    remaining = _wait_until(terminated, time.monotonic() + terminate_timeout)
+
+    for process in remaining:
+        local_logger.error(f"{names[process]} did not exit when terminated, killing", True)
+        process.kill()
+
+    killed = remaining
+    remaining = _wait_until(killed, time.monotonic() + kill_timeout)
+
+    for process in remaining:
+        local_logger.error(f"{names[process]} did not exit when killed", True)
+
+    # Reap the exited processes
+    for process in names:
+        if process not in remaining:
+            process.join()
+
+    return ShutdownReport(
+        [name for process, name in names.items() if process not in terminated],
+        [names[process] for process in terminated if process not in killed],
+        [names[process] for process in killed if process not in remaining],
+        [names[process] for process in remaining],
+        time.monotonic() - start_time,
+    )
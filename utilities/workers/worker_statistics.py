@@ -0,0 +1,247 @@
+"""
+Worker instrumentation.
+"""
+
+import bisect
+import ctypes
+import multiprocessing as mp
+import os
+import sys
+import time
+
+
+# Upper bounds of the loop time histogram buckets, the last bucket has no upper bound
+LOOP_TIME_BUCKET_BOUNDS = [0.0001, 0.001, 0.01, 0.1, 1.0]  # seconds
+
+# How often a worker copies its counters to shared memory
+PUBLISH_PERIOD = 1.0  # seconds
+
+
+def _read_resident_set_size() -> "int | None":
+    """
+    Returns the current resident set size of this process in kB,
+    the peak where the current size is not available, None where neither is (Windows).
+    """
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as file:
+            resident_pages = int(file.read().split()[1])
+    except OSError:
+        # Unix only
+        try:
+            import resource  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            return None
+
+        # Bytes on macOS, which has no /proc, kilobytes elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+class WorkerStatisticsSnapshot:  # pylint: disable=too-many-instance-attributes
+    """
+    Worker counters as last published by the worker.
+
+    pid: Process ID, 0 if the worker has not published yet.
+    cpu_time: Seconds of CPU used by the worker process.
+    resident_set_size: Memory of the worker process in kB, None if not available.
+    iteration_count: Loop iterations recorded.
+    iteration_rate: Loop iterations per second over the last publish period.
+    max_loop_time: Longest loop iteration in seconds.
+    loop_time_histogram: Number of loop iterations in each bucket of LOOP_TIME_BUCKET_BOUNDS .
+    age: Seconds since the worker published, which grows while the worker is blocked.
+    """
+
+    def __init__(
+        self,
+        pid: int,
+        cpu_time: float,
+        resident_set_size: "int | None",
+        iteration_count: int,
+        iteration_rate: float,
+        max_loop_time: float,
+        loop_time_histogram: "list[int]",
+        age: float,
+    ) -> None:
+        self.pid = pid
+        self.cpu_time = cpu_time
+        self.resident_set_size = resident_set_size
+        self.iteration_count = iteration_count
+        self.iteration_rate = iteration_rate
+        self.max_loop_time = max_loop_time
+        self.loop_time_histogram = loop_time_histogram
+        self.age = age
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        resident_set_size = "-" if self.resident_set_size is None else self.resident_set_size
+        return (
+            f"pid: {self.pid}, CPU: {self.cpu_time:.2f}s, RSS: {resident_set_size} kB, "
+            f"iterations: {self.iteration_count} ({self.iteration_rate:.1f}/s, "
+            f"max {self.max_loop_time * 1000:.1f}ms {self.loop_time_histogram}), "
+            f"age: {self.age:.1f}s"
+        )
+
+
+class WorkerStatistics:  # pylint: disable=too-many-instance-attributes
+    """
+    Counters of a single worker process in shared memory, written by the worker and readable by
+    main without going through the data queues.
+
+    The worker counts loop iterations locally and copies the counters to shared memory once every
+    PUBLISH_PERIOD , so recording an iteration does not take a lock.
+    """
+
+    __PID = 0
+    __CPU_TIME = 1
+    __RESIDENT_SET_SIZE = 2
+    __ITERATION_COUNT = 3
+    __ITERATION_RATE = 4
+    __MAX_LOOP_TIME = 5
+    __PUBLISH_TIME = 6
+    __HISTOGRAM = 7
+    __COUNTER_COUNT = __HISTOGRAM + len(LOOP_TIME_BUCKET_BOUNDS) + 1
+
+    def __init__(self) -> None:
+        """
+        Constructor creates zeroed counters.
+        """
+        self.__counters = mp.RawArray(ctypes.c_double, self.__COUNTER_COUNT)
+        self.__lock = mp.Lock()
+
+        # Local to the worker process
+        self.__iteration_count = 0
+        self.__max_loop_time = 0.0
+        self.__histogram = [0] * (len(LOOP_TIME_BUCKET_BOUNDS) + 1)
+        self.__last_iteration_time = 0.0
+        self.__next_publish_time = 0.0
+        self.__last_publish_time = 0.0
+        self.__last_publish_iteration_count = 0
+
+    def record_iteration(self) -> None:
+        """
+        Records the end of a loop iteration, called by the worker. The first call starts timing.
+        """
+        now = time.monotonic()
+        if self.__last_iteration_time > 0.0:
+            loop_time = now - self.__last_iteration_time
+            self.__histogram[bisect.bisect_left(LOOP_TIME_BUCKET_BOUNDS, loop_time)] += 1
+            if loop_time > self.__max_loop_time:
+                self.__max_loop_time = loop_time
+
+        self.__last_iteration_time = now
+        self.__iteration_count += 1
+
+        if now >= self.__next_publish_time:
+            self.publish()
+
+    def publish(self) -> None:
+        """
+        Copies the counters, CPU time and memory of the worker process to shared memory.
+        """
+        now = time.monotonic()
+        elapsed_time = now - self.__last_publish_time
+        iteration_rate = 0.0
+        if self.__last_publish_time > 0.0 and elapsed_time > 0.0:
+            iteration_rate = (
+                self.__iteration_count - self.__last_publish_iteration_count
+            ) / elapsed_time
+
+        cpu_time = time.process_time()
+        resident_set_size = _read_resident_set_size()
+
+        with self.__lock:
+            self.__counters[self.__PID] = os.getpid()
+            self.__counters[self.__CPU_TIME] = cpu_time
+            self.__counters[self.__RESIDENT_SET_SIZE] = (
+                -1 if resident_set_size is None else resident_set_size
+            )
+            self.__counters[self.__ITERATION_COUNT] = self.__iteration_count
+            self.__counters[self.__ITERATION_RATE] = iteration_rate
+            self.__counters[self.__MAX_LOOP_TIME] = self.__max_loop_time
+            self.__counters[self.__PUBLISH_TIME] = now
+            for i, count in enumerate(self.__histogram):
+                self.__counters[self.__HISTOGRAM + i] = count
+
+        self.__last_publish_time = now
+        self.__last_publish_iteration_count = self.__iteration_count
+        self.__next_publish_time = now + PUBLISH_PERIOD
+
+    def snapshot(self) -> WorkerStatisticsSnapshot:
+        """
+        Copies the counters under a single lock acquisition.
+        """
+        with self.__lock:
+            counters = list(self.__counters)
+
+        publish_time = counters[self.__PUBLISH_TIME]
+        histogram = counters[self.__HISTOGRAM :]
+        resident_set_size = int(counters[self.__RESIDENT_SET_SIZE])
+
+        return WorkerStatisticsSnapshot(
+            int(counters[self.__PID]),
+            counters[self.__CPU_TIME],
+            resident_set_size if resident_set_size >= 0 else None,
+            int(counters[self.__ITERATION_COUNT]),
+            counters[self.__ITERATION_RATE],
+            counters[self.__MAX_LOOP_TIME],
+            [int(count) for count in histogram],
+            time.monotonic() - publish_time if publish_time > 0.0 else 0.0,
+        )
+
+
+# Statistics of this worker process, set when it is started by a worker manager
+_current_statistics: "WorkerStatistics | None" = None
+
+
+def set_current_statistics(statistics: "WorkerStatistics | None") -> None:
+    """
+    Sets the statistics that record_iteration() records into for this process.
+    """
+    global _current_statistics  # pylint: disable=global-statement
+    _current_statistics = statistics
+
+
+def record_iteration() -> None:
+    """
+    Records a loop iteration of this worker, call once per loop.
+    Does nothing outside of a worker process started by a worker manager.
+    """
+    if _current_statistics is not None:
+        _current_statistics.record_iteration()
+
+
+def format_table(rows: "list[tuple[str, WorkerStatisticsSnapshot]]") -> str:
+    """
+    Formats the statistics of workers as a table with a row per worker.
+
+    rows: Name and statistics of each worker.
+
+    Returns the table, with a header line.
+    """
+    bucket_names = [f"<{bound * 1000:g}ms" for bound in LOOP_TIME_BUCKET_BOUNDS] + [
+        f">{LOOP_TIME_BUCKET_BOUNDS[-1] * 1000:g}ms"
+    ]
+    name_width = max([len("worker")] + [len(name) for name, _ in rows]) + 2
+    lines = [
+        f"{'worker':<{name_width}}{'pid':>8}{'CPU s':>9}{'RSS MB':>9}{'iter/s':>10}{'max ms':>9}"
+        + "".join(f"{name:>10}" for name in bucket_names)
+        + f"{'age s':>7}"
+    ]
+    for name, snapshot in rows:
+        resident_set_size = "-"
+        if snapshot.resident_set_size is not None:
+            resident_set_size = f"{snapshot.resident_set_size / 1024:.1f}"
+
+        lines.append(
+            f"{name:<{name_width}}{snapshot.pid:>8}{snapshot.cpu_time:>9.2f}"
+            f"{resident_set_size:>9}{snapshot.iteration_rate:>10.1f}"
+            f"{snapshot.max_loop_time * 1000:>9.1f}"
+            + "".join(f"{count:>10}" for count in snapshot.loop_time_histogram)
+            + f"{snapshot.age:>7.1f}"
+        )
+
+    return "\n".join(lines)
@@ -0,0 +1,299 @@
+"""
+For restarting workers as soon as they exit.
+"""
+
+import collections
+import multiprocessing as mp
+import multiprocessing.connection
+import threading
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_manager
+
+
+class WorkerExitEvent:
+    """
+    A worker exited.
+
+    target_name: Name of the worker function.
+    pid: Process ID of the worker.
+    exit_code: Exit code, negative if killed by a signal.
+    exit_time: Monotonic time the exit was noticed.
+    restart_time: Monotonic time a new worker is to be started in its place,
+        None if it is not restarted.
+    """
+
+    def __init__(
+        self,
+        target_name: str,
+        pid: int,
+        exit_code: int,
+        exit_time: float,
+        restart_time: "float | None",
+    ) -> None:
+        self.target_name = target_name
+        self.pid = pid
+        self.exit_code = exit_code
+        self.exit_time = exit_time
+        self.restart_time = restart_time
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        if self.restart_time is None:
+            restart = "not restarted"
+        else:
+            restart = f"restarting in {max(self.restart_time - self.exit_time, 0.0):.3f}s"
+
+        return f"{self.target_name} {self.pid} exited with code {self.exit_code}, {restart}"
+
+
+class WorkerSupervisor:  # pylint: disable=too-many-instance-attributes
+    """
+    Waits on the sentinels of all workers at once in a thread of main,
+    and restarts a worker the moment it exits, or once its backoff is over if it failed to start.
+
+    Exit events are delivered to the callback, put into the queue, and readable from the waitable
+    connection, so main can block on a worker exiting together with other connections.
+    Only the newest exit events are kept for get_exit_event(), so the supervisor never waits for
+    main to read them.
+    An exit is reported as soon as it is noticed, before any backoff, with the time of the
+    restart. If the restart is then refused because the manager has given up, the exit is
+    reported again without a restart time.
+    Stop the supervisor before requesting workers to exit, otherwise they are restarted.
+    Workers retired by scaling down are removed rather than restarted, call refresh() after
+    scaling up so that the new workers are supervised.
+
+    Workers running in a worker host are not supervised, a warning is logged for their managers.
+    """
+
+    __create_key = object()
+
+    # Messages to the supervisor thread
+    __STOP = b"s"
+    __REFRESH = b"r"
+
+    # Exit events kept for get_exit_event(), older ones are dropped
+    __MAX_EVENT_COUNT = 256
+
+    @classmethod
+    def create(
+        cls,
+        worker_managers: "list[worker_manager.WorkerManager]",
+        local_logger: logger.Logger,
+        exit_callback: "(WorkerExitEvent) -> None | None" = None,  # type: ignore
+        exit_event_queue: "object | None" = None,
+    ) -> "tuple[bool, WorkerSupervisor | None]":
+        """
+        Creates a supervisor, call start() once the workers have started.
+
+        worker_managers: Managers of the workers to supervise.
+        local_logger: Existing logger from process.
+        exit_callback: Called in the supervisor thread for each exit event.
+        exit_event_queue: Queue to put exit events into, for example the queue main reads.
+            Should not block when full, as restarts wait for the put.
+
+        Returns whether the supervisor was created and the supervisor.
+        """
+        if len(worker_managers) == 0:
+            local_logger.error("No worker managers to supervise", True)
+            return False, None
+
+        for manager in worker_managers:
+            if manager.is_in_host():
+                local_logger.warning(
+                    f"{manager.get_target_name()} runs in a worker host, its exits are not "
+                    "supervised",
+                    True,
+                )
+
+        return True, WorkerSupervisor(
+            cls.__create_key,
+            worker_managers,
+            local_logger,
+            exit_callback,
+            exit_event_queue,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        worker_managers: "list[worker_manager.WorkerManager]",
+        local_logger: logger.Logger,
+        exit_callback: "(WorkerExitEvent) -> None | None",  # type: ignore
+        exit_event_queue: "object | None",
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is WorkerSupervisor.__create_key, "Use create() method"
+
+        self.__worker_managers = worker_managers
+        self.__local_logger = local_logger
+        self.__exit_callback = exit_callback
+        self.__exit_event_queue = exit_event_queue
+
+        # Exit events and a single byte in the pipe while there are any, so the pipe is readable
+        # while there are events that main has not received and writing it never blocks
+        self.__events: "collections.deque[WorkerExitEvent]" = collections.deque()
+        self.__events_lock = threading.Lock()
+        self.__event_reader, self.__event_writer = mp.Pipe(duplex=False)
+        # Wakes the thread to stop or to supervise new workers
+        self.__wake_reader, self.__wake_writer = mp.Pipe(duplex=False)
+
+        # Dead workers waiting for their restart time, with their manager and exit time
+        self.__backing_off: "dict[mp.Process, tuple[worker_manager.WorkerManager, float]]" = {}
+        # Dead workers that were not restarted
+        self.__abandoned: "set[mp.Process]" = set()
+
+        self.__thread: "threading.Thread | None" = None
+
+    def start(self) -> None:
+        """
+        Starts supervising in a daemon thread.
+        Does nothing if already started.
+        """
+        if self.__thread is not None:
+            return
+
+        self.__thread = threading.Thread(target=self.__run, name="WorkerSupervisor", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops supervising, exits after this are no longer restarted.
+        Does nothing if not started.
+        """
+        if self.__thread is None:
+            return
+
+        self.__wake_writer.send_bytes(self.__STOP)
+        self.__thread.join()
+        self.__thread = None
+
+    def refresh(self) -> None:
+        """
+        Supervises workers added since the supervisor started, call after scaling up.
+        """
+        self.__wake_writer.send_bytes(self.__REFRESH)
+
+    def get_waitable(self) -> multiprocessing.connection.Connection:
+        """
+        Returns a connection that is ready while there are exit events to get,
+        for use with multiprocessing.connection.wait() .
+        """
+        return self.__event_reader
+
+    def get_exit_event(self, timeout: float | None = 0.0) -> "tuple[bool, WorkerExitEvent | None]":
+        """
+        Gets the oldest exit event.
+
+        timeout: Time waiting in seconds before giving up, None is forever.
+
+        Returns whether there was an event and the event.
+        """
+        if not self.__event_reader.poll(timeout):
+            return False, None
+
+        with self.__events_lock:
+            # Taken by another reader in the meantime
+            if len(self.__events) == 0:
+                return False, None
+
+            event = self.__events.popleft()
+            if len(self.__events) == 0:
+                self.__event_reader.recv_bytes()
+
+        return True, event
+
+    def __run(self) -> None:
+        """
+        Supervisor thread.
+        """
+        while True:
+            workers_by_sentinel = {}
+            for manager in self.__worker_managers:
+                for worker in manager.get_workers():
+                    if worker in self.__backing_off or worker in self.__abandoned:
+                        continue
+
+                    workers_by_sentinel[worker.sentinel] = (manager, worker)
+
+            # Wake up for the earliest restart
+            timeout = None
+            if len(self.__backing_off) > 0:
+                restart_time = min(
+                    manager.get_restart_time(worker)
+                    for worker, (manager, _) in self.__backing_off.items()
+                )
+                timeout = max(restart_time - time.monotonic(), 0.0)
+
+            ready = multiprocessing.connection.wait(
+                list(workers_by_sentinel) + [self.__wake_reader], timeout
+            )
+            if self.__wake_reader in ready:
+                if self.__wake_reader.recv_bytes() == self.__STOP:
+                    return
+
+                ready.remove(self.__wake_reader)
+
+            for sentinel in ready:
+                manager, worker = workers_by_sentinel[sentinel]
+                worker.join()
+                if manager.remove_if_retired(worker):
+                    continue
+
+                exit_time = time.monotonic()
+                if manager.is_given_up():
+                    self.__abandoned.add(worker)
+                    self.__report_exit(manager, worker, exit_time, None)
+                    continue
+
+                # Counts the exit towards the backoff of the manager
+                restart_time = manager.get_restart_time(worker)
+                self.__backing_off[worker] = (manager, exit_time)
+                self.__report_exit(manager, worker, exit_time, restart_time)
+
+            for worker, (manager, exit_time) in list(self.__backing_off.items()):
+                if manager.get_restart_time(worker) <= time.monotonic():
+                    del self.__backing_off[worker]
+                    if not manager.restart_worker(worker):
+                        self.__abandoned.add(worker)
+                        self.__report_exit(manager, worker, exit_time, None)
+
+    def __report_exit(
+        self,
+        manager: worker_manager.WorkerManager,
+        worker: mp.Process,
+        exit_time: float,
+        restart_time: "float | None",
+    ) -> None:
+        """
+        Delivers the exit event.
+        """
+        event = WorkerExitEvent(
+            manager.get_target_name(),
+            worker.pid,
+            worker.exitcode,
+            exit_time,
+            restart_time,
+        )
+        if restart_time is None:
+            self.__local_logger.error(f"Worker exit: {event}", True)
+
+        with self.__events_lock:
+            if len(self.__events) == 0:
+                self.__event_writer.send_bytes(b"\x00")
+            elif len(self.__events) >= self.__MAX_EVENT_COUNT:
+                dropped = self.__events.popleft()
+                self.__local_logger.warning(f"Exit event not received in time: {dropped}", True)
+
+            self.__events.append(event)
+
+        if self.__exit_event_queue is not None:
+            self.__exit_event_queue.put(event)
+
+        if self.__exit_callback is not None:
+            self.__exit_callback(event)